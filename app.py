@@ -6,11 +6,35 @@ Application Streamlit pour prédire la consommation énergétique et les émissi
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
+import io
+import os
 from pathlib import Path
-import joblib
-import shap
+import tempfile
+import zipfile
+
+# shap, plotly.express et joblib sont importés à la première utilisation : un
+# démarrage à froid (ou un `import app` dans les tests) ne paie que ce qu'il utilise.
+# plotly.graph_objects reste ici : streamlit l'importe de toute façon.
+# Profil du démarrage : python scripts/profile_startup.py
+
+from seattle_energy.cache import LRUCache
+from seattle_energy.debounce import Debouncer
+from seattle_energy.explain import TREE_SHAP
+from seattle_energy.figures import FigureTemplate
+# Inférence partagée avec le service HTTP (réexportée : app.predict_batch, etc.)
+from seattle_energy.inference import (  # noqa: F401
+    BATCH_INPUT_COLUMNS, BUILDING_TYPE_FACTORS, BUILDING_TYPE_MAPPING, BUILDING_TYPES,
+    EXPLANATION_CACHE_SIZE, SHAP_TIME_BUDGET, SIDEBAR_DEFAULTS, SIDEBAR_DOMAIN,
+    _batch_inputs, compute_shap_values, explain_row, fast_explainer, heuristic_predict_batch,
+    load_fused_forest, load_inference_models, load_joblib_models, load_model_bundle,
+    predict_batch, prepare_features, prepare_features_batch, shap_explainer, shap_frame,
+    standardize_features
+)
+from seattle_energy.shap_store import load_shap_store
+from seattle_energy.surface import build_surface, load_surface
+from seattle_energy.timing import STAGE_TIMER, cache_stats
+from seattle_energy.warmup import WarmUp
 
 # Configuration de la page
 st.set_page_config(
@@ -26,115 +50,138 @@ st.set_page_config(
 
 @st.cache_resource
 def load_models():
-    """Charge les modèles ML pré-entraînés."""
-    models = {}
+    """
+    Charge les modèles ML pré-entraînés.
 
-    # Modèle énergie
-    energy_model_path = Path("models/energy_model.joblib")
-    energy_scaler_path = Path("models/energy_scaler.joblib")
-    energy_features_path = Path("models/energy_features.joblib")
+    Ouvre le bundle projeté en mémoire (models/bundle/) s'il existe, sinon
+    charge les fichiers joblib d'origine (voir load_inference_models).
+    """
+    models = load_inference_models(Path("models"))
 
-    if energy_model_path.exists():
-        models['energy_model'] = joblib.load(energy_model_path)
-        models['energy_scaler'] = joblib.load(energy_scaler_path)
-        models['energy_features'] = joblib.load(energy_features_path)
+    if models and 'energy_fused' in models and 'co2_fused' in models:
+        # Index de surface de réponse : prédictions précalculées du domaine de la sidebar
+        models['surface'] = load_response_surface(models, Path("models/response_surface.npz"))
 
-    # Modèle CO2
-    co2_model_path = Path("models/co2_model.joblib")
-    co2_scaler_path = Path("models/co2_scaler.joblib")
+    return models
 
-    if co2_model_path.exists():
-        models['co2_model'] = joblib.load(co2_model_path)
-        models['co2_scaler'] = joblib.load(co2_scaler_path)
 
-    return models if models else None
+@st.cache_resource
+def get_shap_explainer(_model):
+    """Crée l'explainer SHAP pour le modèle (caché pour performance)."""
+    return shap_explainer(_model)
 
-def prepare_features(property_gfa, floors, age, energy_star, building_type, feature_names):
-    """Prépare les features pour la prédiction."""
-    # Features structurelles de base
-    features = {
-        'Age': age,
-        'NumberofBuildings': 1,
-        'NumberofFloors': floors,
-        'PropertyGFATotal': property_gfa,
-        'PropertyGFAParking_Pct': 5.0,  # Valeur moyenne
-        'PropertyGFABuilding_Pct': 95.0,  # Valeur moyenne
-        'LargestPropertyUseTypeGFA': property_gfa * 0.8,  # 80% de la surface totale
-        'ENERGYSTARScore': energy_star
-    }
 
-    # Mapping des types de bâtiments vers les colonnes one-hot
-    type_mapping = {
-        "Office (Small/Mid)": "PropType_Small- and Mid-Sized Office",
-        "Office (Large)": "PropType_Large Office",
-        "Hotel": "PropType_Hotel",
-        "Retail Store": "PropType_Retail Store",
-        "Warehouse": "PropType_Warehouse",
-        "K-12 School": "PropType_K-12 School",
-        "University": "PropType_University",
-        "Hospital": "PropType_Other",
-        "Other": "PropType_Other"
-    }
+@st.cache_resource
+def get_fast_explainer(model_version, _models):
+    """
+    Explainer du modèle énergie : TreeSHAP exact (shap) et repli Saabas sous budget.
 
-    # Initialiser toutes les features à 0
-    all_features = {name: 0 for name in feature_names}
+    Returns:
+        FastTreeExplainer | None: None si le modèle n'est pas une forêt moyennée
+    """
+    return fast_explainer(_models)
 
-    # Remplir les features structurelles
-    for key, value in features.items():
-        if key in all_features:
-            all_features[key] = value
 
-    # Activer le type de bâtiment approprié
-    prop_type_col = type_mapping.get(building_type, "PropType_Other")
-    if prop_type_col in all_features:
-        all_features[prop_type_col] = 1
+@st.cache_resource
+def get_explanation_cache():
+    """Cache LRU des explications unitaires, partagé par toutes les sessions du processus."""
+    return LRUCache(EXPLANATION_CACHE_SIZE)
 
-    # Créer le DataFrame dans l'ordre correct
-    df = pd.DataFrame([all_features])[feature_names]
-    return df
 
-@st.cache_resource
-def get_shap_explainer(_model):
-    """Crée l'explainer SHAP pour le modèle (caché pour performance)."""
-    return shap.TreeExplainer(_model)
+def explain_prediction(models, X_scaled, feature_names, cache=None, time_budget=SHAP_TIME_BUDGET):
+    """
+    Contributions des features à la prédiction d'énergie d'une ligne (voir explain_row).
 
-def compute_shap_values(explainer, X_scaled, feature_names):
-    """Calcule les valeurs SHAP pour une prédiction."""
-    shap_values = explainer.shap_values(X_scaled)
+    Le cache d'explications et l'explainer sont partagés par toutes les sessions.
 
-    # Créer un DataFrame avec les valeurs SHAP
-    shap_df = pd.DataFrame({
-        'Feature': feature_names,
-        'SHAP Value': shap_values[0],
-        'Abs SHAP': np.abs(shap_values[0])
-    }).sort_values('Abs SHAP', ascending=False)
+    Returns:
+        tuple: (shap_df, valeur de base, méthode 'tree_shap' ou 'saabas')
+    """
+    def explainer():
+        fast = get_fast_explainer(models.get('model_version'), models)
+        return get_shap_explainer(models['energy_model']) if fast is None else fast
 
-    return shap_df, explainer.expected_value
+    cache = get_explanation_cache() if cache is None else cache
+    return explain_row(models, X_scaled, feature_names, cache, explainer, time_budget)
 
-def create_shap_waterfall_plot(shap_df, expected_value, predicted_value):
-    """Crée un waterfall plot SHAP avec Plotly."""
+
+# Délai (secondes) sans changement des entrées avant de recalculer l'explication SHAP ;
+# 0 pour l'explication immédiate à chaque rendu
+SHAP_DEBOUNCE = float(os.environ.get("SHAP_DEBOUNCE", "0.4"))
+
+# Clés de st.session_state : explication affichée et anti-rebond des entrées, propres à la session
+EXPLANATION_STATE_KEY = 'explanation'
+DEBOUNCER_STATE_KEY = 'explanation_debouncer'
+
+
+def get_explanation_debouncer(session):
+    """Anti-rebond des entrées de la session (créé au premier rendu)."""
+    if DEBOUNCER_STATE_KEY not in session:
+        session[DEBOUNCER_STATE_KEY] = Debouncer(SHAP_DEBOUNCE)
+    return session[DEBOUNCER_STATE_KEY]
+
+
+def session_explanation(session, debouncer, models, inputs_key, X_scaled, feature_names, predicted_energy):
+    """
+    Explication SHAP à afficher pour la session.
+
+    L'explication n'est recalculée que si les entrées (`inputs_key`) ont changé
+    depuis la dernière, et seulement une fois stabilisées : pendant un réglage,
+    la précédente reste affichée. Une attribution approchée (Saabas) est
+    recalculée à chaque rendu, pour passer au SHAP exact dès qu'il tient dans le budget.
+
+    Returns:
+        tuple: (explication ou None, à jour) ; l'explication est un dictionnaire
+        inputs_key, shap_df, expected_value, method, predicted_energy
+    """
+    previous = session.get(EXPLANATION_STATE_KEY)
+    if previous is not None and previous['inputs_key'] == inputs_key and previous['method'] == TREE_SHAP:
+        return previous, True
+    if not debouncer.settled:
+        return previous, False
+
+    with STAGE_TIMER.stage('shap'):
+        shap_df, expected_value, method = explain_prediction(models, X_scaled, feature_names)
+    explanation = {'inputs_key': inputs_key, 'shap_df': shap_df, 'expected_value': expected_value,
+                   'method': method, 'predicted_energy': predicted_energy}
+    session[EXPLANATION_STATE_KEY] = explanation
+    return explanation, True
+
+def waterfall_data(shap_df, expected_value):
+    """Barres (top 10 des contributions) et titre du waterfall plot SHAP."""
     # Top 10 features
-    top_features = shap_df.head(10).copy()
-    top_features = top_features.iloc[::-1]  # Inverser pour affichage
+    top_features = shap_df.head(10).iloc[::-1]  # Inverser pour affichage
+    values = top_features['SHAP Value'].to_numpy()
+
+    # Gérer le cas où expected_value est un array
+    base_value = expected_value[0] if hasattr(expected_value, '__len__') else expected_value
+
+    return {
+        'x': values,
+        'y': top_features['Feature'].to_numpy(),
+        'colors': ['#ff6b6b' if v > 0 else '#4ecdc4' for v in values],
+        'text': [f"{v:+.2f}" for v in values],
+        'title': f"Impact des features sur la prédiction (base: {base_value/1e6:.2f}M)",
+    }
 
-    colors = ['#ff6b6b' if v > 0 else '#4ecdc4' for v in top_features['SHAP Value']]
+
+def create_shap_waterfall_plot(shap_df, expected_value, predicted_value):
+    """Crée un waterfall plot SHAP avec Plotly."""
+    data = waterfall_data(shap_df, expected_value)
 
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
-        x=top_features['SHAP Value'],
-        y=top_features['Feature'],
+        x=data['x'],
+        y=data['y'],
         orientation='h',
-        marker_color=colors,
-        text=[f"{v:+.2f}" for v in top_features['SHAP Value']],
+        marker_color=data['colors'],
+        text=data['text'],
         textposition='outside'
     ))
 
-    # Gérer le cas où expected_value est un array
-    base_value = expected_value[0] if hasattr(expected_value, '__len__') else expected_value
-
     fig.update_layout(
-        title=f"Impact des features sur la prédiction (base: {base_value/1e6:.2f}M)",
+        title=data['title'],
         xaxis_title="Impact SHAP (kBtu)",
         yaxis_title="",
         height=400,
@@ -143,6 +190,15 @@ def create_shap_waterfall_plot(shap_df, expected_value, predicted_value):
 
     return fig
 
+
+def update_shap_waterfall_plot(fig, shap_df, expected_value, predicted_value):
+    """Remplace les barres et le titre d'un waterfall plot existant."""
+    data = waterfall_data(shap_df, expected_value)
+    bar = fig.data[0]
+    bar.x, bar.y, bar.text = data['x'], data['y'], data['text']
+    bar.marker.color = data['colors']
+    fig.layout.title.text = data['title']
+
 def get_recommendations(energy_star, age, property_gfa, building_type):
     """Génère des recommandations basées sur les caractéristiques du bâtiment."""
     recommendations = []
@@ -184,10 +240,33 @@ def predict_with_fallback(models, property_gfa, floors, age, energy_star, buildi
     """
     if models and 'energy_model' in models:
         feature_names = models['energy_features']
-        X = prepare_features(property_gfa, floors, age, energy_star, building_type, feature_names)
+        with STAGE_TIMER.stage('prepare_features'):
+            X = prepare_features(property_gfa, floors, age, energy_star, building_type, feature_names)
+        if 'energy_fused' in models and 'co2_fused' in models:
+            # Forêts fusionnées : prédiction sur les features brutes, sans scaler
+            X_raw = X.to_numpy(dtype=np.float64)
+            # Index de surface de réponse : lecture directe si la région est précalculée
+            with STAGE_TIMER.stage('surface_lookup'):
+                surface_hit = models['surface'].lookup_one(X_raw[0]) if 'surface' in models else None
+            if surface_hit is not None:
+                predicted_energy, predicted_co2 = surface_hit['energy'], surface_hit['co2']
+            else:
+                with STAGE_TIMER.stage('predict_energy'):
+                    predicted_energy = models['energy_fused'].predict(X_raw)[0]
+                with STAGE_TIMER.stage('predict_co2'):
+                    predicted_co2 = models['co2_fused'].predict(X_raw)[0]
+            # Features standardisées calculées uniquement pour l'explication SHAP
+            X_scaled = standardize_features(X_raw, models['energy_scaler'])
+            return predicted_energy, predicted_co2, True, X, X_scaled, feature_names
+
         X_scaled = models['energy_scaler'].transform(X)
-        predicted_energy = models['energy_model'].predict(X_scaled)[0]
-        predicted_co2 = models['co2_model'].predict(models['co2_scaler'].transform(X))[0]
+        # Moteurs compilés si disponibles (chemin critique d'une seule ligne)
+        energy_predictor = models.get('energy_engine', models['energy_model'])
+        co2_predictor = models.get('co2_engine', models['co2_model'])
+        with STAGE_TIMER.stage('predict_energy'):
+            predicted_energy = energy_predictor.predict(X_scaled)[0]
+        with STAGE_TIMER.stage('predict_co2'):
+            predicted_co2 = co2_predictor.predict(models['co2_scaler'].transform(X))[0]
         return predicted_energy, predicted_co2, True, X, X_scaled, feature_names
 
     # Fallback heuristique si modèles non disponibles
@@ -195,17 +274,540 @@ def predict_with_fallback(models, property_gfa, floors, age, energy_star, buildi
     floor_factor = 1 + (floors - 1) * 0.02
     age_factor = 1 + (age / 100) * 0.3
     energy_star_factor = 2 - (energy_star / 100)
-    type_factors = {
-        "Office (Small/Mid)": 0.9, "Office (Large)": 1.1, "Hotel": 1.3,
-        "Retail Store": 0.85, "Warehouse": 0.6, "K-12 School": 0.8,
-        "University": 1.0, "Hospital": 1.5, "Other": 1.0
-    }
-    type_factor = type_factors.get(building_type, 1.0)
+    type_factor = BUILDING_TYPE_FACTORS.get(building_type, 1.0)
     predicted_energy = base_consumption * floor_factor * age_factor * energy_star_factor * type_factor
     predicted_co2 = predicted_energy * 0.0001
     return predicted_energy, predicted_co2, False, None, None, None
 
 
+# =============================================================================
+# INDEX DE SURFACE DE RÉPONSE
+# =============================================================================
+
+def surface_axes(feature_names):
+    """Features que les entrées de la sidebar font varier (axes de l'index)."""
+    varying = ['PropertyGFATotal', 'LargestPropertyUseTypeGFA', 'NumberofFloors', 'Age',
+               'ENERGYSTARScore']
+    varying += sorted(set(BUILDING_TYPE_MAPPING.values()))
+    return [name for name in varying if name in feature_names]
+
+
+def surface_domain_inputs(anchors=None):
+    """
+    Entrées de la sidebar à indexer : lignes de balayage autour de points d'ancrage.
+
+    Pour chaque ancrage et chaque type de bâtiment, une entrée numérique parcourt
+    toute sa plage (au pas de la sidebar) pendant que les autres restent fixes :
+    c'est ce que produit un utilisateur qui déplace un curseur à la fois.
+    """
+    anchors = [SIDEBAR_DEFAULTS] if anchors is None else anchors
+    frames = []
+    for anchor in anchors:
+        for axis, (low, high, step) in SIDEBAR_DOMAIN.items():
+            values = np.arange(low, high + step, step)
+            for building_type in BUILDING_TYPES:
+                frame = {name: np.full(len(values), anchor[name]) for name in SIDEBAR_DOMAIN}
+                frame[axis] = values
+                frame['building_type'] = building_type
+                frames.append(pd.DataFrame(frame))
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_response_surface(models, anchors=None):
+    """Construit l'index des forêts fusionnées sur le domaine de la sidebar."""
+    feature_names = models['energy_features']
+    X = prepare_features_batch(*_batch_inputs(surface_domain_inputs(anchors)), feature_names)
+    forests = {'energy': models['energy_fused'], 'co2': models['co2_fused']}
+    return build_surface(
+        forests, feature_names, X, surface_axes(feature_names),
+        source=models.get('model_version')
+    )
+
+
+def load_response_surface(models, path):
+    """
+    Retourne l'index de surface de réponse des modèles chargés.
+
+    Utilise l'export de scripts/build_response_surface.py s'il correspond à la
+    version des modèles, sinon construit l'index autour des valeurs par défaut.
+    """
+    if path.exists():
+        surface = load_surface(path)
+        if surface.source == models.get('model_version'):
+            return surface
+    return build_response_surface(models)
+
+
+# Capacité du cache de prédictions partagé entre les sessions
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+
+
+@st.cache_resource
+def get_prediction_cache():
+    """Cache LRU des prédictions unitaires, partagé par toutes les sessions du processus."""
+    return LRUCache(PREDICTION_CACHE_SIZE)
+
+
+def prediction_cache_key(models, property_gfa, floors, age, energy_star, building_type):
+    """Clé normalisée : entrées de la sidebar + empreinte de la version des modèles."""
+    return (
+        models.get('model_version'),
+        float(property_gfa), float(floors), float(age), float(energy_star),
+        str(building_type)
+    )
+
+
+def predict_cached(models, property_gfa, floors, age, energy_star, building_type, cache=None):
+    """
+    Version mémoïsée de predict_with_fallback pour le modèle ML.
+
+    Le cache conserve les prédictions et la ligne de features standardisée
+    (en lecture seule) ; le fallback heuristique, trivial, n'est pas mis en cache.
+
+    Returns:
+        tuple: même format que predict_with_fallback
+    """
+    if not (models and 'energy_model' in models):
+        return predict_with_fallback(models, property_gfa, floors, age, energy_star, building_type)
+
+    cache = get_prediction_cache() if cache is None else cache
+    key = prediction_cache_key(models, property_gfa, floors, age, energy_star, building_type)
+
+    entry = cache.get(key)
+    if entry is None:
+        predicted_energy, predicted_co2, _, X, X_scaled, _ = predict_with_fallback(
+            models, property_gfa, floors, age, energy_star, building_type
+        )
+        X_scaled.setflags(write=False)
+        entry = (predicted_energy, predicted_co2, X, X_scaled)
+        cache.put(key, entry)
+
+    predicted_energy, predicted_co2, X, X_scaled = entry
+    return predicted_energy, predicted_co2, True, X.copy(), X_scaled, models['energy_features']
+
+# =============================================================================
+# SCÉNARIOS WHAT-IF
+# =============================================================================
+
+# Entrées balayables -> libellé de l'axe
+SWEEP_VARIABLES = {
+    'energy_star': "Score ENERGY STAR",
+    'age': "Âge du bâtiment (années)",
+    'floors': "Nombre d'étages",
+    'property_gfa': "Surface totale (sq ft)",
+}
+
+# Nombre de points du balayage de la surface (échelle logarithmique sur tout le domaine)
+SWEEP_GFA_POINTS = 200
+
+# Capacité du cache de courbes partagé entre les sessions
+SWEEP_CACHE_SIZE = int(os.environ.get("SWEEP_CACHE_SIZE", "256"))
+
+
+@st.cache_resource
+def get_sweep_cache():
+    """Cache LRU des courbes what-if, partagé par toutes les sessions du processus."""
+    return LRUCache(SWEEP_CACHE_SIZE)
+
+
+def sweep_values(variable):
+    """Valeurs balayées pour `variable` : tout son domaine dans la sidebar."""
+    low, high, step = SIDEBAR_DOMAIN[variable]
+    if variable == 'property_gfa':
+        values = np.geomspace(low, high, SWEEP_GFA_POINTS)
+        return np.unique(np.round(values / step) * step)
+    return np.arange(low, high + step, step, dtype=np.float64)
+
+
+def whatif_sweep(models, variable, property_gfa, floors, age, energy_star, building_type, cache=None):
+    """
+    Prédictions du bâtiment courant sur tout le domaine d'une entrée.
+
+    Une seule matrice de features (une ligne par valeur de `variable`, les autres
+    entrées fixées) passe par predict_batch : un appel par modèle pour toute la
+    courbe. Les courbes ML sont mises en cache (lecture seule).
+
+    Returns:
+        tuple: (valeurs balayées, énergie, CO2, using_ml) ; trois tableaux de même taille
+    """
+    building = {'property_gfa': property_gfa, 'floors': floors, 'age': age,
+                'energy_star': energy_star, 'building_type': building_type}
+    values = sweep_values(variable)
+    using_ml = bool(models and 'energy_model' in models)
+
+    key = None
+    if using_ml:
+        cache = get_sweep_cache() if cache is None else cache
+        key = (variable,) + prediction_cache_key(models, **dict(building, **{variable: 0}))
+        entry = cache.get(key)
+        if entry is not None:
+            return (values,) + entry + (True,)
+
+    n_rows = len(values)
+    buildings = {name: np.full(n_rows, value) for name, value in building.items()}
+    buildings[variable] = values
+    predicted_energy, predicted_co2, using_ml = predict_batch(models, buildings)
+
+    if key is not None:
+        predicted_energy.setflags(write=False)
+        predicted_co2.setflags(write=False)
+        cache.put(key, (predicted_energy, predicted_co2))
+    return values, predicted_energy, predicted_co2, using_ml
+
+
+# =============================================================================
+# SCORING DE PORTEFEUILLE (CSV)
+# =============================================================================
+
+# Taille des blocs lus dans le CSV : borne la mémoire quel que soit le nombre de lignes
+PORTFOLIO_CHUNK_SIZE = 10000
+
+# Colonnes du CSV de benchmarking utilisées pour le scoring
+PORTFOLIO_USECOLS = [
+    'OSEBuildingID', 'DataYear', 'PrimaryPropertyType', 'YearBuilt',
+    'NumberofFloors', 'PropertyGFATotal', 'ENERGYSTARScore'
+]
+
+# Mapping des types de propriété bruts vers les types de la sidebar
+RAW_PROPERTY_TYPE_MAPPING = {
+    "Small- and Mid-Sized Office": "Office (Small/Mid)",
+    "Large Office": "Office (Large)",
+    "Hotel": "Hotel",
+    "Retail Store": "Retail Store",
+    "Warehouse": "Warehouse",
+    "K-12 School": "K-12 School",
+    "University": "University",
+    "Hospital": "Hospital"
+}
+
+# Valeurs par défaut lorsque le CSV ne renseigne pas une caractéristique
+DEFAULT_DATA_YEAR = 2016
+DEFAULT_ENERGY_STAR = 50
+
+
+def impute_energy_star(imputer, property_gfa, floors, age, building_type):
+    """
+    Score ENERGY STAR prédit par l'imputer du nettoyage (seattle_energy.imputation).
+
+    Les colonnes du bâtiment sont construites comme dans prepare_features_batch ;
+    les relevés de consommation, inconnus, restent manquants.
+    """
+    property_gfa = np.asarray(property_gfa, dtype=np.float64)
+    frame = pd.DataFrame(np.nan, index=range(len(property_gfa)), columns=imputer.columns_)
+    building = {
+        'NumberofBuildings': 1,
+        'NumberofFloors': floors,
+        'PropertyGFATotal': property_gfa,
+        'LargestPropertyUseTypeGFA': property_gfa * 0.8,
+        'Age': age,
+        'PropertyGFAParking_Pct': 5.0,
+        'PropertyGFABuilding_Pct': 95.0
+    }
+    for name, value in building.items():
+        if name in frame:
+            frame[name] = value
+    one_hot = [col for col in frame if col.startswith(('PropType_', 'District_'))]
+    frame[one_hot] = 0.0
+    type_columns = np.array([BUILDING_TYPE_MAPPING.get(str(t), "PropType_Other") for t in building_type])
+    for col in set(type_columns):
+        if col in frame:
+            frame.loc[type_columns == col, col] = 1.0
+
+    position = imputer.columns_.index('ENERGYSTARScore')
+    low, high, _ = SIDEBAR_DOMAIN['energy_star']
+    return np.clip(imputer.transform(frame)[:, position], low, high)
+
+
+def portfolio_inputs_from_raw(chunk, imputer=None):
+    """
+    Convertit un bloc du CSV de benchmarking en entrées pour predict_batch.
+
+    Reprend les conventions du notebook 01 (Age = DataYear - YearBuilt) et
+    complète les valeurs manquantes avec les valeurs par défaut de la sidebar,
+    ou le score ENERGY STAR avec `imputer` s'il est fourni.
+    """
+    n_rows = len(chunk)
+
+    def column(name, default):
+        if name not in chunk:
+            return np.full(n_rows, default, dtype=np.float64)
+        values = pd.to_numeric(chunk[name], errors='coerce').to_numpy(dtype=np.float64)
+        return np.where(np.isnan(values), default, values)
+
+    data_year = column('DataYear', DEFAULT_DATA_YEAR)
+    year_built = column('YearBuilt', np.nan)
+    age = np.where(np.isnan(year_built), 0.0, np.clip(data_year - year_built, 0, None))
+
+    if 'PrimaryPropertyType' in chunk:
+        raw_types = chunk['PrimaryPropertyType'].astype(str).str.strip()
+        building_type = raw_types.map(RAW_PROPERTY_TYPE_MAPPING).fillna("Other").to_numpy()
+    else:
+        building_type = np.full(n_rows, "Other", dtype=object)
+
+    inputs = pd.DataFrame({
+        'property_gfa': column('PropertyGFATotal', 0.0),
+        'floors': np.clip(column('NumberofFloors', 1.0), 1, None),
+        'age': age,
+        'energy_star': column('ENERGYSTARScore', np.nan),
+        'building_type': building_type
+    }, index=chunk.index)
+
+    missing = inputs['energy_star'].isna().to_numpy()
+    if missing.any():
+        if imputer is not None:
+            subset = inputs[missing]
+            inputs.loc[missing, 'energy_star'] = impute_energy_star(
+                imputer, subset['property_gfa'], subset['floors'], subset['age'], subset['building_type']
+            )
+        else:
+            inputs.loc[missing, 'energy_star'] = DEFAULT_ENERGY_STAR
+    return inputs
+
+
+def score_portfolio_csv(models, source, destination, chunksize=PORTFOLIO_CHUNK_SIZE,
+                        progress_callback=None):
+    """
+    Score un CSV de benchmarking bloc par bloc et écrit le résultat au fil de l'eau.
+
+    Seul un bloc de `chunksize` lignes est en mémoire à la fois : la mémoire
+    reste bornée que le fichier contienne 3 000 ou 3 millions de lignes.
+
+    Args:
+        models: dictionnaire retourné par load_models (ou None pour l'heuristique)
+        source: chemin ou objet fichier du CSV d'entrée
+        destination: chemin ou objet fichier texte du CSV de sortie
+        chunksize: nombre de lignes par bloc
+        progress_callback: appelé après chaque bloc avec (lignes traitées, fraction lue ou None)
+
+    Returns:
+        int: nombre de lignes scorées
+    """
+    total_bytes = None
+    if hasattr(source, 'seek') and hasattr(source, 'tell'):
+        source.seek(0, 2)
+        total_bytes = source.tell()
+        source.seek(0)
+
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        usecols=lambda col: col in PORTFOLIO_USECOLS
+    )
+
+    rows_done = 0
+    for chunk in reader:
+        inputs = portfolio_inputs_from_raw(chunk, imputer=models.get('imputer') if models else None)
+        predicted_energy, predicted_co2, using_ml = predict_batch(models, inputs)
+
+        scored = pd.DataFrame(index=chunk.index)
+        if 'OSEBuildingID' in chunk:
+            scored['OSEBuildingID'] = chunk['OSEBuildingID']
+        if 'PrimaryPropertyType' in chunk:
+            scored['PrimaryPropertyType'] = chunk['PrimaryPropertyType']
+        scored['BuildingType'] = inputs['building_type']
+        scored['PropertyGFATotal'] = inputs['property_gfa']
+        scored['NumberofFloors'] = inputs['floors']
+        scored['Age'] = inputs['age']
+        scored['ENERGYSTARScore'] = inputs['energy_star']
+        scored['Predicted_SiteEnergyUseWN(kBtu)'] = predicted_energy
+        scored['Predicted_TotalGHGEmissions'] = predicted_co2
+        scored['PredictionSource'] = "ml" if using_ml else "heuristic"
+
+        first_chunk = rows_done == 0
+        scored.to_csv(destination, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+        rows_done += len(chunk)
+
+        if progress_callback is not None:
+            fraction = None
+            if total_bytes:
+                fraction = min(source.tell() / total_bytes, 1.0)
+            progress_callback(rows_done, fraction)
+
+    return rows_done
+
+
+# Clé de st.session_state du dossier temporaire des fichiers scorés de la session
+PORTFOLIO_DIR_KEY = 'portfolio_directory'
+
+# Nom du fichier scoré dans ce dossier (le scoring suivant le remplace)
+PORTFOLIO_SCORED_FILE = "portfolio_scored.csv"
+
+
+def get_portfolio_directory(session):
+    """
+    Dossier temporaire des fichiers scorés de la session.
+
+    Le TemporaryDirectory vit dans l'état de la session : le dossier et son
+    contenu sont supprimés quand la session est libérée (ou à l'arrêt du processus).
+    """
+    if PORTFOLIO_DIR_KEY not in session:
+        session[PORTFOLIO_DIR_KEY] = tempfile.TemporaryDirectory(prefix="portfolio_")
+    return Path(session[PORTFOLIO_DIR_KEY].name)
+
+
+def write_scored_portfolio(models, source, directory, progress_callback=None):
+    """
+    Score `source` dans `directory`/portfolio_scored.csv, qui remplace le fichier précédent.
+
+    Le résultat est écrit dans un fichier partiel renommé à la fin : un échec
+    supprime le fichier partiel et laisse intact le fichier scoré précédent.
+
+    Returns:
+        tuple: (chemin du fichier scoré, nombre de lignes scorées)
+    """
+    directory = Path(directory)
+    path = directory / PORTFOLIO_SCORED_FILE
+    partial = path.with_name(path.name + ".partial")
+    try:
+        with open(partial, 'w', newline='') as output:
+            rows = score_portfolio_csv(models, source, output, progress_callback=progress_callback)
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return path, rows
+
+
+def zip_scored_portfolio(path, arcname):
+    """
+    Archive zip du fichier scoré, pour le téléchargement.
+
+    Le CSV est lu par blocs et compressé au fil de l'eau : seule l'archive
+    (plusieurs fois plus petite que le CSV) est en mémoire.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(path, arcname=arcname)
+    return buffer.getvalue()
+
+
+# =============================================================================
+# FIGURES
+# =============================================================================
+
+def create_gauge_plot(predicted_energy):
+    """Crée la jauge de consommation prédite (M kBtu)."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=predicted_energy / 1e6,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Consommation (M kBtu)"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 20], 'color': "lightgreen"},
+                {'range': [20, 50], 'color': "yellow"},
+                {'range': [50, 100], 'color': "salmon"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 70
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+
+def update_gauge_plot(fig, predicted_energy):
+    """Remplace la valeur d'une jauge existante."""
+    fig.data[0].value = predicted_energy / 1e6
+
+
+def impact_factors(property_gfa, floors, age, energy_star, building_type):
+    """Impact relatif de chaque caractéristique saisie (graphique des facteurs)."""
+    return {
+        'Surface (GFA)': property_gfa / 50000,
+        'Étages': floors / 10,
+        'Âge': age / 50,
+        'Score ENERGY STAR': (100 - energy_star) / 50,
+        'Type de bâtiment': BUILDING_TYPE_FACTORS.get(building_type, 1.0)
+    }
+
+
+def create_factors_plot(property_gfa, floors, age, energy_star, building_type):
+    """Crée le graphique d'impact relatif des caractéristiques saisies."""
+    factors = impact_factors(property_gfa, floors, age, energy_star, building_type)
+
+    import plotly.express as px
+
+    fig = px.bar(
+        x=list(factors.keys()),
+        y=list(factors.values()),
+        labels={'x': 'Facteur', 'y': 'Impact relatif'},
+        title="Impact relatif des caractéristiques sur la consommation",
+        color=list(factors.values()),
+        color_continuous_scale='RdYlGn_r'
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def update_factors_plot(fig, property_gfa, floors, age, energy_star, building_type):
+    """Remplace les hauteurs et couleurs des barres d'un graphique des facteurs existant."""
+    values = np.array(list(impact_factors(property_gfa, floors, age, energy_star, building_type).values()))
+    fig.data[0].y = values
+    fig.data[0].marker.color = values
+
+
+def create_whatif_plot(values, predicted_energy, predicted_co2, variable, current_value):
+    """Courbes énergie (M kBtu) et CO2 (tonnes) en fonction d'une entrée balayée."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(name="Énergie (M kBtu/an)", mode='lines', line={'color': "darkblue"}))
+    fig.add_trace(go.Scatter(name="CO2 (tonnes/an)", mode='lines', line={'color': "seagreen"}, yaxis='y2'))
+    fig.add_vline(x=0, line_dash='dash', line_color='gray')
+    fig.update_layout(
+        yaxis={'title': "Énergie (M kBtu/an)"},
+        yaxis2={'title': "CO2 (tonnes/an)", 'overlaying': 'y', 'side': 'right'},
+        legend={'orientation': 'h', 'y': 1.12},
+        hovermode='x unified',
+        height=400
+    )
+    update_whatif_plot(fig, values, predicted_energy, predicted_co2, variable, current_value)
+    return fig
+
+
+def update_whatif_plot(fig, values, predicted_energy, predicted_co2, variable, current_value):
+    """Remplace les courbes, l'axe et le repère de la valeur actuelle d'un graphique what-if."""
+    fig.data[0].x = values
+    fig.data[0].y = np.asarray(predicted_energy) / 1e6
+    fig.data[1].x = values
+    fig.data[1].y = np.asarray(predicted_co2)
+    fig.layout.shapes[0].x0 = fig.layout.shapes[0].x1 = current_value
+    fig.layout.title.text = f"Scénarios : {SWEEP_VARIABLES[variable]}"
+    fig.layout.xaxis.title.text = SWEEP_VARIABLES[variable]
+    fig.layout.xaxis.type = 'log' if variable == 'property_gfa' else 'linear'
+
+
+@st.cache_resource
+def get_figure_templates():
+    """
+    Gabarits des figures dépendant des entrées, construits une fois pour le processus.
+
+    Chaque rendu ne remplace que les tableaux de données (voir FigureTemplate).
+    """
+    building = dict(SIDEBAR_DEFAULTS, building_type=BUILDING_TYPES[0])
+    return {
+        'gauge': FigureTemplate(lambda: create_gauge_plot(0.0), update_gauge_plot),
+        'factors': FigureTemplate(lambda: create_factors_plot(**building), update_factors_plot),
+        'waterfall': FigureTemplate(
+            lambda: create_shap_waterfall_plot(shap_frame(np.zeros(1), ['']), 0.0, 0.0),
+            update_shap_waterfall_plot
+        ),
+        'whatif': FigureTemplate(
+            lambda: create_whatif_plot([], [], [], 'energy_star', 0.0), update_whatif_plot
+        ),
+    }
+
+
+@st.cache_resource
+def get_feature_importance_figure(model_version, _model, feature_names):
+    """Graphique d'importance des features, construit une fois par version des modèles."""
+    return create_feature_importance_plot(_model, list(feature_names))
+
+
 def create_feature_importance_plot(model, feature_names):
     """Crée un graphique d'importance des features basé sur le modèle."""
     importance_df = pd.DataFrame({
@@ -229,6 +831,8 @@ def create_feature_importance_plot(model, feature_names):
         lambda x: name_mapping.get(x, x.replace('PropType_', '').replace('District_', ''))
     )
 
+    import plotly.express as px
+
     fig = px.bar(
         importance_df,
         x='Importance',
@@ -247,77 +851,327 @@ def create_feature_importance_plot(model, feature_names):
     return fig
 
 # =============================================================================
-# INTERFACE UTILISATEUR
+# EXPLICATIONS GLOBALES (MAGASIN SHAP)
 # =============================================================================
 
-def main():
-    # Header
-    st.title("🏢 Prédiction Énergétique des Bâtiments de Seattle")
-    st.markdown("""
-    > **Objectif** : Prédire la consommation énergétique et les émissions CO2 des bâtiments
-    non résidentiels pour aider Seattle à atteindre la neutralité carbone d'ici 2050.
-    """)
+# Magasin construit par scripts/build_shap_store.py
+SHAP_STORE_DIR = Path("models/shap_store")
 
-    # Sidebar - Inputs
-    st.sidebar.header("📊 Caractéristiques du Bâtiment")
+# Libellés des modèles du magasin
+SHAP_STORE_MODELS = {'energy': "Consommation énergétique", 'co2': "Émissions CO2"}
 
-    # Inputs principaux
-    property_gfa = st.sidebar.number_input(
-        "Surface totale (sq ft)",
-        min_value=1000,
-        max_value=2000000,
-        value=50000,
-        step=1000,
-        help="Surface totale du bâtiment en pieds carrés"
-    )
+# Nombre maximal de points du beeswarm (échantillon au-delà)
+BEESWARM_MAX_ROWS = 2000
 
-    floors = st.sidebar.slider(
-        "Nombre d'étages",
-        min_value=1,
-        max_value=100,
-        value=5,
-        help="Nombre d'étages du bâtiment"
-    )
 
-    age = st.sidebar.slider(
-        "Âge du bâtiment (années)",
-        min_value=0,
-        max_value=150,
-        value=30,
-        help="Âge du bâtiment depuis sa construction"
+@st.cache_resource
+def get_shap_store():
+    """Magasin SHAP global projeté en mémoire (None s'il n'a pas été construit)."""
+    return load_shap_store(SHAP_STORE_DIR)
+
+
+def create_global_importance_plot(ranking, top=15):
+    """Classement des features par moyenne des |SHAP|."""
+    top_features = ranking.head(top).iloc[::-1]
+    fig = go.Figure(go.Bar(
+        x=top_features.values,
+        y=top_features.index,
+        orientation='h',
+        marker_color='#4c78a8'
+    ))
+    fig.update_layout(
+        title="Importance globale (moyenne des |SHAP|)",
+        xaxis_title="Moyenne |SHAP|",
+        height=max(400, 25 * len(top_features)),
+        showlegend=False
     )
+    return fig
 
-    energy_star = st.sidebar.slider(
-        "Score ENERGY STAR",
-        min_value=1,
-        max_value=100,
-        value=50,
-        help="Score de performance énergétique (1-100)"
+
+def create_beeswarm_plot(points):
+    """Beeswarm : une ligne par feature, un point par bâtiment coloré par la valeur de la feature."""
+    features = list(dict.fromkeys(points['Feature']))
+    position = {feature: len(features) - 1 - i for i, feature in enumerate(features)}
+    jitter = np.random.default_rng(0).uniform(-0.3, 0.3, len(points))
+
+    fig = go.Figure(go.Scattergl(
+        x=points['SHAP Value'],
+        y=points['Feature'].map(position).to_numpy() + jitter,
+        mode='markers',
+        marker=dict(
+            size=4, color=points['Normalized Value'], colorscale='RdBu_r',
+            colorbar=dict(title="Valeur", tickvals=[0, 1], ticktext=["basse", "haute"])
+        ),
+        customdata=points['Feature Value'],
+        hovertemplate="SHAP %{x:.3s}<br>Valeur %{customdata:.4g}<extra></extra>"
+    ))
+    fig.update_layout(
+        title="Distribution des valeurs SHAP",
+        xaxis_title="Valeur SHAP",
+        yaxis=dict(tickvals=list(position.values()), ticktext=list(position)),
+        height=max(400, 40 * len(features)),
+        showlegend=False
     )
+    return fig
 
-    building_type = st.sidebar.selectbox(
-        "Type de bâtiment",
-        options=[
-            "Office (Small/Mid)",
-            "Office (Large)",
-            "Hotel",
-            "Retail Store",
-            "Warehouse",
-            "K-12 School",
-            "University",
-            "Hospital",
-            "Other"
-        ]
+
+def create_dependence_plot(dependence, feature):
+    """Dépendance : valeur SHAP en fonction de la valeur de la feature."""
+    fig = go.Figure(go.Scattergl(
+        x=dependence['Feature Value'],
+        y=dependence['SHAP Value'],
+        mode='markers',
+        marker=dict(size=5, opacity=0.6, color='#e45756')
+    ))
+    fig.update_layout(
+        title=f"Dépendance SHAP : {feature}",
+        xaxis_title=feature,
+        yaxis_title="Valeur SHAP",
+        height=400,
+        showlegend=False
     )
+    return fig
 
-    # Charger les modèles
-    models = load_models()
+# =============================================================================
+# PRÉCHAUFFAGE AU DÉMARRAGE
+# =============================================================================
 
-    # Prédiction avec les vrais modèles ML ou fallback heuristique
-    predicted_energy, predicted_co2, using_ml, X, X_scaled, feature_names = predict_with_fallback(
-        models, property_gfa, floors, age, energy_star, building_type
+# Journal des durées de préchauffage (JSON Lines), par ex. logs/warmup.jsonl ;
+# désactivé par défaut : un chemin relatif écrirait dans le dossier courant (tests compris)
+WARMUP_LOG = os.environ.get("WARMUP_LOG", "")
+
+
+def _warmup_models(context):
+    context['models'] = load_models()
+    if context['models']:
+        context['labels']['model_version'] = context['models'].get('model_version')
+
+
+def _warmup_explainer(context):
+    models = context['models']
+    if models and 'energy_model' in models:
+        context['explainer'] = get_fast_explainer(models.get('model_version'), models)
+
+
+def _warmup_prediction(context):
+    # Bâtiment par défaut de la sidebar : la prédiction reste dans le cache partagé
+    building = dict(SIDEBAR_DEFAULTS, building_type=BUILDING_TYPES[0])
+    context['prediction'] = predict_cached(context['models'], **building)
+
+
+def _warmup_shap_values(context):
+    if 'explainer' in context:
+        _, _, _, _, X_scaled, feature_names = context['prediction']
+        # Sans budget : l'explication exacte du bâtiment par défaut reste en cache
+        explain_prediction(context['models'], X_scaled, feature_names, time_budget=None)
+
+
+def _warmup_charts(context):
+    import plotly.express  # noqa: F401
+
+    # Gabarits des figures et graphique d'importance : le premier rendu ne fait que les mettre à jour
+    for template in get_figure_templates().values():
+        template.build()
+    models = context['models']
+    if models and 'energy_model' in models:
+        get_feature_importance_figure(
+            models.get('model_version'), models['energy_model'], tuple(models['energy_features'])
+        )
+
+
+WARMUP_STEPS = [
+    ('load_models', _warmup_models),
+    ('shap_explainer', _warmup_explainer),
+    ('prediction', _warmup_prediction),
+    ('shap_values', _warmup_shap_values),
+    ('plotly', _warmup_charts),
+]
+
+
+@st.cache_resource
+def get_warmup():
+    """
+    Préchauffage du processus, lancé au premier rendu et partagé par toutes les sessions.
+
+    Les fonctions préchauffées sont elles-mêmes en cache (st.cache_resource) : une
+    session qui les appelle pendant le préchauffage attend le résultat en cours
+    au lieu de le recalculer.
+    """
+    return WarmUp(WARMUP_STEPS, log_path=WARMUP_LOG or None).start()
+
+
+def current_warmup():
+    """
+    Préchauffage partagé du processus.
+
+    Un préchauffage échoué est retiré du cache : la session suivante en relance
+    un au lieu d'hériter de l'échec jusqu'au redémarrage du serveur.
+    """
+    warmup = get_warmup()
+    if warmup.state == 'failed':
+        get_warmup.clear()
+    return warmup
+
+# =============================================================================
+# CHRONOMÉTRAGE DES ÉTAPES
+# =============================================================================
+
+# Chronométrage des étapes du rendu et panneau de diagnostic dans la sidebar
+STAGE_TIMING = os.environ.get("STAGE_TIMING", "0") == "1"
+
+# Dossier où les histogrammes sont exportés après chaque rendu (Prometheus et JSON) ;
+# vide pour ne rien écrire. Le définir active aussi le chronométrage.
+STAGE_METRICS_DIR = os.environ.get("STAGE_METRICS_DIR", "")
+
+STAGE_TIMER.enabled = STAGE_TIMING or bool(STAGE_METRICS_DIR)
+
+
+def application_caches():
+    """Caches LRU partagés du processus, exportés avec les étapes chronométrées."""
+    return {
+        'prediction': get_prediction_cache(),
+        'explanation': get_explanation_cache(),
+        'whatif': get_sweep_cache(),
+    }
+
+
+def stage_summary_frame(timer):
+    """Tableau des latences par étape pour le panneau de diagnostic."""
+    rows = [
+        {'Étape': name, 'Appels': stats['count'], 'Dernier (ms)': stats['last_ms'],
+         'p50 (ms)': stats['p50_ms'], 'p95 (ms)': stats['p95_ms'], 'p99 (ms)': stats['p99_ms']}
+        for name, stats in timer.summary().items()
+    ]
+    return pd.DataFrame(rows, columns=['Étape', 'Appels', 'Dernier (ms)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)'])
+
+
+def cache_summary_frame(caches):
+    """Tableau des compteurs de chaque cache pour le panneau de diagnostic."""
+    rows = [
+        {'Cache': name, 'Hits': stats['hits'], 'Misses': stats['misses'], 'Évictions': stats['evictions'],
+         'Entrées': stats['size'], 'Capacité': stats['capacity'], 'Taux de succès': stats['hit_rate']}
+        for name, stats in cache_stats(caches).items()
+    ]
+    return pd.DataFrame(rows, columns=['Cache', 'Hits', 'Misses', 'Évictions', 'Entrées', 'Capacité',
+                                       'Taux de succès'])
+
+
+def render_diagnostics_panel(timer, caches):
+    """Panneau de la sidebar : latences par étape, compteurs des caches et exports Prometheus / JSON."""
+    with st.sidebar.expander("⏱️ Diagnostics", expanded=False):
+        frame = stage_summary_frame(timer)
+        if frame.empty:
+            st.caption("Aucune étape mesurée pour l'instant.")
+        else:
+            st.dataframe(frame.round(2), hide_index=True, use_container_width=True)
+            st.caption("Fenêtre glissante des derniers rendus, toutes sessions confondues.")
+        st.dataframe(cache_summary_frame(caches).round(3), hide_index=True, use_container_width=True)
+        st.download_button("Prometheus", timer.to_prometheus(caches), "stage_metrics.prom", "text/plain")
+        st.download_button("JSON", timer.to_json(caches), "stage_metrics.json", "application/json")
+
+
+def publish_stage_metrics(timer):
+    """Affiche le panneau et exporte histogrammes et compteurs des caches selon la configuration."""
+    if not (STAGE_TIMING or STAGE_METRICS_DIR):
+        return
+    caches = application_caches()
+    if STAGE_TIMING:
+        render_diagnostics_panel(timer, caches)
+    if STAGE_METRICS_DIR:
+        try:
+            timer.dump(STAGE_METRICS_DIR, caches)
+        except OSError:
+            pass
+
+# =============================================================================
+# INTERFACE UTILISATEUR
+# =============================================================================
+
+def render_portfolio_mode(models):
+    """Mode portefeuille : upload d'un CSV, scoring par blocs et téléchargement."""
+    st.subheader("📁 Scoring d'un portefeuille de bâtiments")
+    st.markdown("""
+    > Importez un CSV au format **Seattle Building Energy Benchmarking**
+    (colonnes `PropertyGFATotal`, `NumberofFloors`, `YearBuilt`, `ENERGYSTARScore`,
+    `PrimaryPropertyType`). Le fichier est traité par blocs pour limiter la mémoire.
+    """)
+
+    uploaded = st.file_uploader("Fichier CSV du portefeuille", type=["csv"])
+    if uploaded is None:
+        return
+
+    # Identifiant attribué à chaque upload : un autre fichier de même nom et de même taille est rescoré
+    file_key = uploaded.file_id
+    result = st.session_state.get('portfolio_result')
+
+    if st.button("🚀 Lancer le scoring") and (result is None or result['file_key'] != file_key):
+        progress = st.progress(0.0, text="Scoring en cours...")
+
+        def on_progress(rows_done, fraction):
+            progress.progress(fraction or 0.0, text=f"{rows_done:,} bâtiments scorés")
+
+        # Un seul fichier scoré par session : le nouveau remplace le précédent
+        path, rows = write_scored_portfolio(
+            models, uploaded, get_portfolio_directory(st.session_state), progress_callback=on_progress
+        )
+        progress.progress(1.0, text=f"✅ {rows:,} bâtiments scorés")
+
+        result = {'file_key': file_key, 'path': str(path), 'rows': rows}
+        st.session_state['portfolio_result'] = result
+
+    if result is not None and result['file_key'] == file_key:
+        st.success(f"{result['rows']:,} bâtiments scorés")
+        preview = pd.read_csv(result['path'], nrows=20)
+        st.dataframe(preview, use_container_width=True)
+        # Archive construite au clic seulement, pas à chaque rendu de la page
+        scored_name = f"{Path(uploaded.name).stem}_scored.csv"
+        st.download_button(
+            "⬇️ Télécharger le fichier scoré (zip)",
+            data=lambda: zip_scored_portfolio(result['path'], scored_name),
+            file_name=f"{Path(scored_name).stem}.zip",
+            mime="application/zip"
+        )
+
+
+def render_global_shap_mode(models):
+    """Mode explications globales : vues servies depuis le magasin SHAP précalculé."""
+    st.subheader("🌐 Explications globales des modèles (SHAP)")
+
+    store = get_shap_store()
+    if store is None:
+        st.info(
+            "📊 Magasin SHAP absent : lancez `python scripts/build_shap_store.py` "
+            "pour précalculer les explications du dataset."
+        )
+        return
+    if models and store.model_version != models.get('model_version'):
+        st.warning("⚠️ Le magasin SHAP a été construit pour une autre version des modèles.")
+
+    names = [name for name in SHAP_STORE_MODELS if name in store.model_names]
+    name = st.selectbox("Modèle", options=names, format_func=SHAP_STORE_MODELS.get)
+    st.caption(
+        f"{store.n_rows:,} bâtiments · valeur de base {store.expected_value(name):,.0f}"
     )
 
+    ranking_tab, beeswarm_tab, dependence_tab = st.tabs(
+        ["Classement", "Beeswarm", "Dépendance"]
+    )
+    ranking = store.mean_abs_shap(name)
+    with ranking_tab:
+        st.plotly_chart(create_global_importance_plot(ranking), use_container_width=True)
+    with beeswarm_tab:
+        points = store.beeswarm(name, top=10, max_rows=BEESWARM_MAX_ROWS)
+        st.plotly_chart(create_beeswarm_plot(points), use_container_width=True)
+    with dependence_tab:
+        feature = st.selectbox("Feature", options=list(ranking.index))
+        st.plotly_chart(
+            create_dependence_plot(store.dependence(name, feature), feature),
+            use_container_width=True
+        )
+
+
+def render_prediction_section(templates, predicted_energy, predicted_co2, using_ml):
+    """Métriques, jauge et équivalents CO2 (peu coûteux : redessinés à chaque rendu)."""
     # Colonnes principales
     col1, col2 = st.columns(2)
 
@@ -331,29 +1185,10 @@ def main():
             delta="🤖 ML Model" if using_ml else "📊 Heuristique"
         )
 
-        # Gauge chart
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=predicted_energy / 1e6,
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Consommation (M kBtu)"},
-            gauge={
-                'axis': {'range': [0, 100]},
-                'bar': {'color': "darkblue"},
-                'steps': [
-                    {'range': [0, 20], 'color': "lightgreen"},
-                    {'range': [20, 50], 'color': "yellow"},
-                    {'range': [50, 100], 'color': "salmon"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 70
-                }
-            }
-        ))
-        fig_gauge.update_layout(height=300)
-        st.plotly_chart(fig_gauge, use_container_width=True)
+        # Gauge chart (gabarit partagé : seule la valeur change)
+        with STAGE_TIMER.stage('figure_gauge'):
+            with templates['gauge'].render(predicted_energy=predicted_energy) as fig_gauge:
+                st.plotly_chart(fig_gauge, use_container_width=True)
 
     with col2:
         st.subheader("🌿 Estimation des Émissions CO2")
@@ -376,77 +1211,216 @@ def main():
         with equiv_col2:
             st.metric("🚗 Équivalent voitures", f"{cars_equivalent:.1f}")
 
+
+def render_factors_section(templates, property_gfa, floors, age, energy_star, building_type):
+    """Graphique d'impact des facteurs (heuristique, redessiné à chaque rendu)."""
     # Section analyse
     st.markdown("---")
     st.subheader("📈 Analyse des Facteurs d'Impact")
 
-    # Facteurs d'impact par type de bâtiment
-    type_impact = {"Office (Small/Mid)": 0.9, "Office (Large)": 1.1, "Hotel": 1.3,
-                   "Retail Store": 0.85, "Warehouse": 0.6, "K-12 School": 0.8,
-                   "University": 1.0, "Hospital": 1.5, "Other": 1.0}
-
     # Graphique d'impact des features
-    factors = {
-        'Surface (GFA)': property_gfa / 50000,
-        'Étages': floors / 10,
-        'Âge': age / 50,
-        'Score ENERGY STAR': (100 - energy_star) / 50,
-        'Type de bâtiment': type_impact.get(building_type, 1.0)
-    }
+    with STAGE_TIMER.stage('figure_factors'):
+        with templates['factors'].render(property_gfa=property_gfa, floors=floors, age=age,
+                                         energy_star=energy_star, building_type=building_type) as fig_factors:
+            st.plotly_chart(fig_factors, use_container_width=True)
 
-    fig_factors = px.bar(
-        x=list(factors.keys()),
-        y=list(factors.values()),
-        labels={'x': 'Facteur', 'y': 'Impact relatif'},
-        title="Impact relatif des caractéristiques sur la consommation",
-        color=list(factors.values()),
-        color_continuous_scale='RdYlGn_r'
+
+@st.fragment
+def render_whatif_section(models, templates, building):
+    """
+    Courbes what-if du bâtiment courant sur tout le domaine d'une entrée.
+
+    Fragment : changer l'entrée balayée ne réexécute que ce panneau.
+    """
+    st.markdown("---")
+    st.subheader("🔮 Scénarios what-if")
+
+    variable = st.selectbox(
+        "Entrée à faire varier",
+        options=list(SWEEP_VARIABLES),
+        format_func=SWEEP_VARIABLES.get,
+        help="Courbes calculées en un seul appel de chaque modèle sur tout le domaine de l'entrée"
     )
-    fig_factors.update_layout(showlegend=False)
-    st.plotly_chart(fig_factors, use_container_width=True)
 
-    # Section SHAP - Interprétabilité ML
-    if using_ml:
-        st.markdown("---")
-        st.subheader("🔬 Interprétabilité du Modèle (SHAP)")
+    with STAGE_TIMER.stage('whatif_sweep'):
+        values, predicted_energy, predicted_co2, using_ml = whatif_sweep(models, variable, **building)
+    with STAGE_TIMER.stage('figure_whatif'):
+        with templates['whatif'].render(values=values, predicted_energy=predicted_energy,
+                                        predicted_co2=predicted_co2, variable=variable,
+                                        current_value=building[variable]) as fig_whatif:
+            st.plotly_chart(fig_whatif, use_container_width=True)
+    if not using_ml:
+        st.caption("📊 Courbes issues de l'heuristique (modèles ML non disponibles)")
+
 
-        st.markdown("""
-        > **SHAP** (SHapley Additive exPlanations) permet de comprendre comment chaque caractéristique
-        influence la prédiction du modèle de Machine Learning.
-        """)
+def render_explanation_section(models, templates, inputs_key, X_scaled, feature_names, predicted_energy):
+    """
+    Section SHAP : importance globale et waterfall dans un fragment différé.
 
-        shap_col1, shap_col2 = st.columns(2)
+    Tant que les entrées changent, le fragment affiche l'explication précédente et
+    se relance seul toutes les SHAP_DEBOUNCE secondes, sans réexécuter la page.
+    """
+    st.markdown("---")
+    st.subheader("🔬 Interprétabilité du Modèle (SHAP)")
 
-        with shap_col1:
-            # Feature Importance globale
-            fig_importance = create_feature_importance_plot(
+    st.markdown("""
+    > **SHAP** (SHapley Additive exPlanations) permet de comprendre comment chaque caractéristique
+    influence la prédiction du modèle de Machine Learning.
+    """)
+
+    debouncer = get_explanation_debouncer(st.session_state)
+    debouncer.observe(inputs_key)
+    polling = not debouncer.settled
+    st.fragment(explanation_fragment, run_every=debouncer.delay if polling else None)(
+        models, templates, inputs_key, X_scaled, feature_names, predicted_energy, polling
+    )
+
+    # Insights SHAP
+    st.markdown("##### 💡 Insights clés du modèle")
+    st.markdown("""
+    - **Surface totale (GFA)** : Principal prédicteur (~40% d'importance)
+    - **Score ENERGY STAR** : Impact significatif sur l'efficacité
+    - **Âge du bâtiment** : Les bâtiments anciens consomment plus
+    - **Type de bâtiment** : Hôpitaux et hôtels ont les plus fortes consommations
+    """)
+
+
+def explanation_fragment(models, templates, inputs_key, X_scaled, feature_names, predicted_energy, polling):
+    """Importance globale et waterfall SHAP, réexécutables sans le reste de la page."""
+    debouncer = get_explanation_debouncer(st.session_state)
+    shap_col1, shap_col2 = st.columns(2)
+
+    with shap_col1:
+        # Feature Importance globale (ne dépend que du modèle)
+        with STAGE_TIMER.stage('figure_importance'):
+            fig_importance = get_feature_importance_figure(
+                models.get('model_version'),
                 models['energy_model'],
-                feature_names
+                tuple(feature_names)
             )
             st.plotly_chart(fig_importance, use_container_width=True)
 
-        with shap_col2:
-            # SHAP values pour cette prédiction
-            try:
-                explainer = get_shap_explainer(models['energy_model'])
-                shap_df, expected_value = compute_shap_values(
-                    explainer, X_scaled, feature_names
-                )
-                fig_shap = create_shap_waterfall_plot(
-                    shap_df, expected_value, predicted_energy
-                )
-                st.plotly_chart(fig_shap, use_container_width=True)
-            except Exception:
-                st.info("📊 Analyse SHAP individuelle non disponible")
-
-        # Insights SHAP
-        st.markdown("##### 💡 Insights clés du modèle")
-        st.markdown("""
-        - **Surface totale (GFA)** : Principal prédicteur (~40% d'importance)
-        - **Score ENERGY STAR** : Impact significatif sur l'efficacité
-        - **Âge du bâtiment** : Les bâtiments anciens consomment plus
-        - **Type de bâtiment** : Hôpitaux et hôtels ont les plus fortes consommations
-        """)
+    with shap_col2:
+        # SHAP values pour cette prédiction (calculées une fois les entrées stabilisées)
+        try:
+            explanation, current = session_explanation(
+                st.session_state, debouncer, models, inputs_key, X_scaled, feature_names, predicted_energy
+            )
+            if explanation is None:
+                st.info("⏳ Explication SHAP calculée dès la fin du réglage")
+            else:
+                with STAGE_TIMER.stage('figure_waterfall'):
+                    with templates['waterfall'].render(
+                        shap_df=explanation['shap_df'], expected_value=explanation['expected_value'],
+                        predicted_value=explanation['predicted_energy']
+                    ) as fig_shap:
+                        st.plotly_chart(fig_shap, use_container_width=True)
+                if not current:
+                    st.caption("⏳ Explication des entrées précédentes : mise à jour dès la fin du réglage")
+                elif explanation['method'] != TREE_SHAP:
+                    st.caption("⏱️ Attribution approchée (Saabas) : calcul SHAP exact en préparation ou trop long")
+        except Exception:
+            st.info("📊 Analyse SHAP individuelle non disponible")
+
+    if polling and debouncer.settled:
+        # Explication à jour : un rendu complet arrête les relances périodiques du fragment
+        st.rerun(scope="app")
+
+
+def main():
+    # Préchauffage en arrière-plan pendant que le squelette de la page se dessine
+    warmup = current_warmup()
+
+    # Header
+    st.title("🏢 Prédiction Énergétique des Bâtiments de Seattle")
+    st.markdown("""
+    > **Objectif** : Prédire la consommation énergétique et les émissions CO2 des bâtiments
+    non résidentiels pour aider Seattle à atteindre la neutralité carbone d'ici 2050.
+    """)
+
+    # Sidebar - Mode d'utilisation
+    mode = st.sidebar.radio(
+        "Mode",
+        options=["Bâtiment unique", "Portefeuille (CSV)", "Explications globales"],
+        horizontal=True
+    )
+
+    if mode == "Portefeuille (CSV)":
+        render_portfolio_mode(load_models())
+        return
+    if mode == "Explications globales":
+        render_global_shap_mode(load_models())
+        return
+
+    # Sidebar - Inputs
+    st.sidebar.header("📊 Caractéristiques du Bâtiment")
+
+    # Inputs principaux
+    property_gfa = st.sidebar.number_input(
+        "Surface totale (sq ft)",
+        min_value=SIDEBAR_DOMAIN['property_gfa'][0],
+        max_value=SIDEBAR_DOMAIN['property_gfa'][1],
+        value=SIDEBAR_DEFAULTS['property_gfa'],
+        step=SIDEBAR_DOMAIN['property_gfa'][2],
+        help="Surface totale du bâtiment en pieds carrés"
+    )
+
+    floors = st.sidebar.slider(
+        "Nombre d'étages",
+        min_value=SIDEBAR_DOMAIN['floors'][0],
+        max_value=SIDEBAR_DOMAIN['floors'][1],
+        value=SIDEBAR_DEFAULTS['floors'],
+        help="Nombre d'étages du bâtiment"
+    )
+
+    age = st.sidebar.slider(
+        "Âge du bâtiment (années)",
+        min_value=SIDEBAR_DOMAIN['age'][0],
+        max_value=SIDEBAR_DOMAIN['age'][1],
+        value=SIDEBAR_DEFAULTS['age'],
+        help="Âge du bâtiment depuis sa construction"
+    )
+
+    energy_star = st.sidebar.slider(
+        "Score ENERGY STAR",
+        min_value=SIDEBAR_DOMAIN['energy_star'][0],
+        max_value=SIDEBAR_DOMAIN['energy_star'][1],
+        value=SIDEBAR_DEFAULTS['energy_star'],
+        help="Score de performance énergétique (1-100)"
+    )
+
+    building_type = st.sidebar.selectbox(
+        "Type de bâtiment",
+        options=BUILDING_TYPES
+    )
+
+    if warmup.state == 'running':
+        st.sidebar.caption("⏳ Préchargement des modèles et de SHAP en cours…")
+    elif warmup.state == 'failed':
+        st.sidebar.caption(f"⚠️ Préchauffage interrompu : {warmup.error}")
+
+    # Charger les modèles
+    with STAGE_TIMER.stage('load_models'):
+        models = load_models()
+    templates = get_figure_templates()
+
+    # Prédiction avec les vrais modèles ML ou fallback heuristique
+    predicted_energy, predicted_co2, using_ml, X, X_scaled, feature_names = predict_cached(
+        models, property_gfa, floors, age, energy_star, building_type
+    )
+
+    # Métriques et graphiques peu coûteux : mis à jour à chaque rendu
+    render_prediction_section(templates, predicted_energy, predicted_co2, using_ml)
+    render_factors_section(templates, property_gfa, floors, age, energy_star, building_type)
+    render_whatif_section(models, templates, {
+        'property_gfa': property_gfa, 'floors': floors, 'age': age,
+        'energy_star': energy_star, 'building_type': building_type
+    })
+
+    # Section SHAP - Interprétabilité ML (fragment différé tant que les entrées bougent)
+    if using_ml:
+        inputs_key = prediction_cache_key(models, property_gfa, floors, age, energy_star, building_type)
+        render_explanation_section(models, templates, inputs_key, X_scaled, feature_names, predicted_energy)
 
     # Recommandations
     st.markdown("---")
@@ -466,5 +1440,7 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    publish_stage_metrics(STAGE_TIMER)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,266 @@
+"""
+Scoring en masse de CSV de benchmarking, réparti sur plusieurs processus.
+
+Les fichiers d'entrée (ou tous les .csv des dossiers donnés) sont découpés en
+tranches d'octets alignées sur les fins de ligne. Chaque processus ouvre une
+fois les modèles, comme load_models : le bundle projeté en mémoire, partagé
+en lecture seule par tous les processus via le cache de pages (exporté au
+besoin, les blocs étant confiés aux modèles joblib d'origine dépicklés au
+premier bloc), ou avec --joblib une copie privée des modèles sklearn/XGBoost.
+Chaque tranche est scorée par blocs avec score_portfolio_csv et écrite dans
+son propre fichier de sortie.
+
+Reprise : une tranche terminée est renommée atomiquement (part-<fichier>-<tranche>.csv) et
+l'état du scoring (version des modèles, plan de découpage) est conservé dans
+scoring.json. Relancer la même commande ne rescore que les tranches
+manquantes. Les champs CSV ne doivent pas contenir de retour à la ligne
+(c'est le cas des exports Seattle Open Data).
+
+Usage:
+    python bulk_score.py data/portefeuilles/ autre.csv --output scored/ [--workers 8]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import app
+from seattle_energy.artifacts import bundle_path, export_bundle, model_version
+from seattle_energy.bundle import read_manifest
+from seattle_energy.imputation import load_imputer
+
+# Taille cible (octets) d'une tranche de fichier confiée à un processus
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+STATE_FILE = "scoring.json"
+
+# Modèles du processus courant (ouverts par _init_worker)
+_WORKER_MODELS = None
+
+
+def list_inputs(paths):
+    """Fichiers CSV à scorer : fichiers donnés et .csv des dossiers (récursif, triés)."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.csv")))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"Entrée introuvable : {path}")
+    return files
+
+
+def plan_shards(files, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Découpe chaque fichier en tranches [début, fin) alignées sur les fins de ligne.
+
+    Returns:
+        list[dict]: une entrée par tranche (source, taille du fichier, début, fin, fichier de sortie)
+    """
+    shards = []
+    for file_index, path in enumerate(files):
+        size = path.stat().st_size
+        with open(path, 'rb') as f:
+            header_end = len(f.readline())
+            boundaries = [header_end]
+            while boundaries[-1] < size:
+                f.seek(max(boundaries[-1] + shard_bytes, header_end) - 1)
+                f.readline()
+                boundaries.append(min(f.tell(), size))
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            shards.append({
+                'source': str(path.resolve()),
+                'size': size,
+                'start': start,
+                'end': end,
+                'part': f"part-{file_index:04d}-{len(shards):05d}.csv"
+            })
+    return shards
+
+
+def load_scoring_models(models_dir, use_bundle=True):
+    """Modèles utilisés par les processus : bundle projeté en mémoire ou fichiers joblib."""
+    models = app.load_model_bundle(models_dir) if use_bundle else None
+    if models is None:
+        models = app.load_joblib_models(models_dir)
+    imputer = load_imputer(models_dir)
+    if models and imputer is not None:
+        models['imputer'] = imputer
+    return models
+
+
+def _init_worker(models_dir, use_bundle):
+    global _WORKER_MODELS
+    _WORKER_MODELS = load_scoring_models(Path(models_dir), use_bundle)
+
+
+def score_shard(shard, output_dir, chunksize=app.PORTFOLIO_CHUNK_SIZE, models=None):
+    """
+    Score une tranche et écrit son fichier de sortie (renommé à la fin seulement).
+
+    Returns:
+        tuple: (lignes scorées, durée en secondes)
+    """
+    models = _WORKER_MODELS if models is None else models
+    start = time.perf_counter()
+    with open(shard['source'], 'rb') as f:
+        header = f.readline()
+        f.seek(shard['start'])
+        data = f.read(shard['end'] - shard['start'])
+
+    output_dir = Path(output_dir)
+    temporary = output_dir / (shard['part'] + ".tmp")
+    with open(temporary, 'w', newline='', encoding='utf-8') as destination:
+        rows = app.score_portfolio_csv(models, io.BytesIO(header + data), destination, chunksize=chunksize)
+    os.replace(temporary, output_dir / shard['part'])
+    return rows, time.perf_counter() - start
+
+
+def _load_state(output_dir, version, shards, overwrite):
+    """Reprend l'état d'un scoring interrompu, ou en crée un nouveau."""
+    state_path = Path(output_dir) / STATE_FILE
+    state = {'model_version': version, 'shards': shards, 'done': {}}
+    if overwrite:
+        for stale in Path(output_dir).glob("part-*.csv*"):
+            stale.unlink()
+    elif state_path.exists():
+        previous = json.loads(state_path.read_text(encoding="utf-8"))
+        if previous['model_version'] != version or previous['shards'] != shards:
+            raise ValueError(
+                f"{state_path} provient d'un autre scoring (modèles ou entrées différents) : "
+                "utilisez --overwrite pour recommencer"
+            )
+        state['done'] = previous.get('done', {})
+    # Une tranche n'est terminée que si son fichier de sortie existe
+    state['done'] = {
+        part: entry for part, entry in state['done'].items() if (Path(output_dir) / part).exists()
+    }
+    return state
+
+
+def _save_state(output_dir, state):
+    state_path = Path(output_dir) / STATE_FILE
+    temporary = state_path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, state_path)
+
+
+def score_files(inputs, output_dir, models_dir=Path("models"), workers=None,
+                shard_bytes=DEFAULT_SHARD_BYTES, chunksize=app.PORTFOLIO_CHUNK_SIZE,
+                use_bundle=True, overwrite=False, progress_callback=None):
+    """
+    Score tous les fichiers d'entrée dans output_dir, en reprenant un scoring interrompu.
+
+    Args:
+        inputs: fichiers CSV et/ou dossiers
+        output_dir: dossier des fichiers de sortie et de scoring.json
+        models_dir: dossier des modèles
+        workers: nombre de processus (None : tous les cœurs ; 1 : processus courant)
+        shard_bytes: taille cible d'une tranche
+        chunksize: lignes par bloc dans une tranche
+        use_bundle: modèles partagés via le bundle (sinon fichiers joblib)
+        overwrite: ignorer un scoring précédent incompatible au lieu de lever une erreur
+        progress_callback: appelé après chaque tranche avec (tranches terminées, total)
+
+    Returns:
+        dict: lignes scorées, tranches scorées/reprises, durée, débit total et par cœur
+    """
+    models_dir = Path(models_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    # Bundle à jour requis pour le partage en mémoire entre processus
+    if use_bundle and app.load_model_bundle(models_dir) is None and model_version(models_dir):
+        export_bundle(models_dir)
+    manifest = read_manifest(bundle_path(models_dir)) if use_bundle else None
+    version = manifest['model_version'] if manifest else model_version(models_dir)
+
+    shards = plan_shards(list_inputs(inputs), shard_bytes)
+    state = _load_state(output_dir, version, shards, overwrite)
+    todo = [shard for shard in shards if shard['part'] not in state['done']]
+    resumed = len(shards) - len(todo)
+    _save_state(output_dir, state)
+
+    start = time.perf_counter()
+    rows, busy = 0, 0.0
+
+    def record(shard, result):
+        nonlocal rows, busy
+        shard_rows, seconds = result
+        rows += shard_rows
+        busy += seconds
+        state['done'][shard['part']] = {'rows': shard_rows, 'seconds': seconds}
+        _save_state(output_dir, state)
+        if progress_callback is not None:
+            progress_callback(len(state['done']), len(shards))
+
+    if workers <= 1 or len(todo) <= 1:
+        models = load_scoring_models(models_dir, use_bundle)
+        for shard in todo:
+            record(shard, score_shard(shard, output_dir, chunksize, models=models))
+    else:
+        # spawn : chaque processus ouvre le bundle lui-même (pages partagées, pas de copie)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(str(models_dir.resolve()), use_bundle),
+        ) as pool:
+            futures = {pool.submit(score_shard, shard, output_dir, chunksize): shard for shard in todo}
+            for future in as_completed(futures):
+                record(futures[future], future.result())
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'total_rows': sum(entry['rows'] for entry in state['done'].values()),
+        'shards': len(todo),
+        'resumed_shards': resumed,
+        'workers': min(workers, max(len(todo), 1)),
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else None,
+        'rows_per_second_per_core': rows / busy if busy else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring en masse de CSV de benchmarking")
+    parser.add_argument("inputs", nargs="+", help="fichiers CSV ou dossiers")
+    parser.add_argument("--output", type=Path, required=True, help="dossier des fichiers scorés")
+    parser.add_argument("--models", type=Path, default=Path("models"))
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : tous les cœurs)")
+    parser.add_argument("--shard-mb", type=float, default=DEFAULT_SHARD_BYTES / 2**20)
+    parser.add_argument("--chunksize", type=int, default=app.PORTFOLIO_CHUNK_SIZE)
+    parser.add_argument("--joblib", action="store_true",
+                        help="copie privée des modèles joblib par processus au lieu du bundle partagé")
+    parser.add_argument("--overwrite", action="store_true", help="recommencer un scoring incompatible")
+    args = parser.parse_args()
+
+    def on_progress(done, total):
+        print(f"\r{done}/{total} tranches", end="", flush=True)
+
+    summary = score_files(
+        args.inputs, args.output, models_dir=args.models, workers=args.workers,
+        shard_bytes=int(args.shard_mb * 2**20), chunksize=args.chunksize,
+        use_bundle=not args.joblib, overwrite=args.overwrite, progress_callback=on_progress
+    )
+    print()
+    if summary['resumed_shards']:
+        print(f"Reprise : {summary['resumed_shards']} tranches déjà scorées")
+    print(f"{summary['rows']:,} lignes scorées en {summary['seconds']:.1f} s "
+          f"({summary['shards']} tranches, {summary['workers']} processus)")
+    if summary['rows']:
+        print(f"Débit : {summary['rows_per_second']:,.0f} lignes/s, "
+              f"{summary['rows_per_second_per_core']:,.0f} lignes/s/cœur")
+    print(f"Sorties : {args.output}/part-*.csv ({summary['total_rows']:,} lignes au total)")
+
+
+if __name__ == "__main__":
+    main()
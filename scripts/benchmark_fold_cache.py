@@ -0,0 +1,84 @@
+"""
+Benchmark du cache de prétraitement des plis (seattle_energy.fold_cache).
+
+Reproduit la validation croisée à 10 plis des GridSearchCV des notebooks 02
+et 03 : chaque candidat d'une famille est évalué sur les 10 plis du jeu
+d'entraînement, pour la cible brute et la variante log1p. Compare la durée
+totale quand chaque candidat refait log1p et standardisation (sans cache) et
+quand les plis prétraités sont calculés une fois et partagés (avec cache), et
+vérifie que les scores sont identiques.
+
+Usage:
+    python scripts/benchmark_fold_cache.py [--families linear ridge lasso svr] [--candidates 20]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from seattle_energy.fold_cache import FoldCache  # noqa: E402
+from seattle_energy.ingest import default_cleaned_path  # noqa: E402
+from seattle_energy.training import (  # noqa: E402
+    CV_FOLDS, LOG_TRANSFORM_COLS, VARIANTS, cv_rmse, load_training_data, make_folds,
+    model_zoo, sample_candidates, split_train_test
+)
+
+
+def run_grid(factory, candidates, X, y, folds, log_positions, cache):
+    """Scores de tous les candidats sur tous les plis et durée totale."""
+    start = time.perf_counter()
+    scores = [
+        cv_rmse(factory, params, variant, X, y, folds, len(folds[0][0]), log_positions[variant], cache)
+        for params in candidates for variant in VARIANTS
+    ]
+    return scores, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data", type=Path, default=default_cleaned_path(ROOT / "data"))
+    parser.add_argument("--families", nargs="+", default=['linear', 'ridge', 'lasso'])
+    parser.add_argument("--candidates", type=int, default=20, help="candidats par famille")
+    parser.add_argument("--target", default='energy', choices=['energy', 'co2'])
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+
+    X, targets = load_training_data(args.data)
+    train, _ = split_train_test(len(X))
+    values = X.to_numpy(dtype=np.float64)[train]
+    y = targets[args.target].to_numpy(dtype=np.float64)[train]
+    folds = make_folds(len(train), CV_FOLDS)
+    columns = list(X.columns)
+    log_positions = {'raw': [], 'tt': [columns.index(col) for col in LOG_TRANSFORM_COLS]}
+    zoo = model_zoo()
+
+    print(f"{len(train)} lignes d'entraînement, {CV_FOLDS} plis, cible {args.target}\n")
+    print(f"{'Famille':<18}{'Fits':>7}{'Sans cache (s)':>16}{'Avec cache (s)':>16}{'Gain':>8}")
+    # Un seul cache pour toutes les familles, comme dans train_zoo
+    cache = FoldCache(values, folds)
+    totals = [0.0, 0.0]
+    for family in args.families:
+        factory, space = zoo[family]
+        candidates = sample_candidates(space, args.candidates)
+        plain, plain_seconds = run_grid(factory, candidates, values, y, folds, log_positions, None)
+        cached, cached_seconds = run_grid(factory, candidates, values, y, folds, log_positions, cache)
+        np.testing.assert_allclose(cached, plain, rtol=1e-9)
+        totals[0] += plain_seconds
+        totals[1] += cached_seconds
+        fits = len(candidates) * len(VARIANTS) * CV_FOLDS
+        print(f"{family:<18}{fits:>7}{plain_seconds:>16.2f}{cached_seconds:>16.2f}"
+              f"{plain_seconds / cached_seconds:>7.1f}x")
+    print(f"{'Total':<18}{'':>7}{totals[0]:>16.2f}{totals[1]:>16.2f}{totals[0] / totals[1]:>7.1f}x")
+    print(f"\nPlis prétraités : {cache.misses} calculés, {cache.hits} réutilisés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark des chemins critiques de l'application.
+
+Mesure load_models, prepare_features, predict_with_fallback,
+compute_shap_values, create_shap_waterfall_plot et create_feature_importance_plot
+à plusieurs tailles de batch (voir tests/hot_paths.py), affiche médiane, 95e
+centile et pic de mémoire face aux références, et peut enregistrer les mesures
+dans tests/benchmark_baseline.json (section de cette machine et des artefacts
+optionnels présents dans models/, les autres sections sont conservées).
+
+Usage:
+    python scripts/benchmark_hot_paths.py [--update-baseline] [--tolerance 0.5] [--json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tests.hot_paths import (  # noqa: E402
+    BASELINE_PATH, DEFAULT_REPEAT, DEFAULT_TOLERANCE, HotPathContext, all_cases, case_name,
+    find_section, load_baseline, measure, regressions, save_baseline
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"enregistre les mesures dans {BASELINE_PATH.relative_to(ROOT)}")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    context = HotPathContext()
+    section, reason = find_section(load_baseline())
+    if section is None:
+        print(f"⚠️ Pas de comparaison : {reason}", file=sys.stderr)
+    baseline = section['cases'] if section is not None else {}
+    results = {}
+    for function, batch_size in all_cases():
+        results[case_name(function, batch_size)] = measure(context.call(function, batch_size), args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Cas':<36}{'Médiane (ms)':>14}{'p95 (ms)':>11}{'Pic (Ko)':>11}{'Réf. (ms)':>11}  Statut")
+        for name, result in results.items():
+            reference = baseline.get(name)
+            if reference is None:
+                status, previous = "nouveau", "—"
+            else:
+                status = "régression" if regressions(result, reference, args.tolerance) else "ok"
+                previous = f"{reference['median'] * 1e3:.2f}"
+            print(f"{name:<36}{result['median'] * 1e3:>14.2f}{result['p95'] * 1e3:>11.2f}"
+                  f"{result['peak_memory'] / 1024:>11.1f}{previous:>11}  {status}")
+
+    if args.update_baseline:
+        print(f"✅ {save_baseline(results)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark de l'imputation ciblée (GapImputer) face au MICE du notebook 01.
+
+Nettoie le CSV 2016 sans imputation, masque une fraction des scores ENERGY
+STAR renseignés, puis compare pour chaque méthode le temps d'ajustement et
+d'application et l'erreur sur les scores masqués (RMSE, MAE). Les tailles
+supérieures au fichier sont obtenues par rééchantillonnage des lignes.
+
+Usage:
+    python scripts/benchmark_imputation.py [--scales 1 10 50] [--max-mice-rows 20000]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from seattle_energy.cleaning import iter_clean_chunks, make_imputer  # noqa: E402
+from seattle_energy.imputation import GapImputer  # noqa: E402
+
+TARGET = 'ENERGYSTARScore'
+
+# Méthodes comparées : MICE du notebook, imputation ciblée à partir des colonnes
+# du bâtiment (celle du nettoyage) et, pour référence, à partir de toutes les colonnes
+METHODS = {
+    'mice': lambda: make_imputer('mice'),
+    'gaps': lambda: make_imputer('gaps'),
+    'gaps*': GapImputer,
+}
+
+
+def masked_frame(cleaned, fraction, seed):
+    """Copie de `cleaned` où une fraction des scores renseignés est masquée."""
+    rng = np.random.default_rng(seed)
+    observed = np.flatnonzero(cleaned[TARGET].notna().to_numpy())
+    rows = rng.choice(observed, int(len(observed) * fraction), replace=False)
+    masked = cleaned.copy()
+    masked.iloc[rows, masked.columns.get_loc(TARGET)] = np.nan
+    masked['ENERGYSTARScore_Missing'] = masked[TARGET].isna().astype(np.float64)
+    return masked, rows, cleaned[TARGET].to_numpy()[rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--source", type=Path, default=ROOT / "data" / "2016_Building_Energy_Benchmarking.csv")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50],
+                        help="multiples du nombre de lignes du fichier")
+    parser.add_argument("--fraction", type=float, default=0.2, help="fraction des scores masqués")
+    parser.add_argument("--max-mice-rows", type=int, default=20000,
+                        help="taille au-delà de laquelle le MICE n'est pas mesuré")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+
+    cleaned = pd.concat(iter_clean_chunks(args.source))
+    masked, rows, truth = masked_frame(cleaned, args.fraction, args.seed)
+    baseline = np.sqrt(np.mean((np.nanmedian(masked[TARGET]) - truth) ** 2))
+    print(f"{len(cleaned)} lignes, {len(rows)} scores masqués ; "
+          f"RMSE de la médiane seule : {baseline:.2f}")
+    print("gaps* : imputation ciblée à partir de toutes les colonnes (consommations comprises)\n")
+
+    position = list(masked.columns).index(TARGET)
+    rng = np.random.default_rng(args.seed)
+    print(f"{'Méthode':<8}{'Lignes':>10}{'Ajustement (s)':>16}{'Application (s)':>17}{'RMSE':>8}{'MAE':>8}")
+    for scale in args.scales:
+        # Lignes masquées conservées, complétées par rééchantillonnage
+        extra = rng.integers(0, len(masked), size=len(masked) * (scale - 1))
+        data = pd.concat([masked, masked.iloc[extra]]) if scale > 1 else masked
+        for method, factory in METHODS.items():
+            if method == 'mice' and len(data) > args.max_mice_rows:
+                print(f"{method:<8}{len(data):>10,}{'—':>16}{'—':>17}")
+                continue
+            imputer = factory()
+            start = time.perf_counter()
+            imputer.fit(data)
+            fitted = time.perf_counter() - start
+            start = time.perf_counter()
+            imputed = imputer.transform(data)
+            applied = time.perf_counter() - start
+
+            error = np.clip(imputed[rows, position], 0, None) - truth
+            print(f"{method:<8}{len(data):>10,}{fitted:>16.2f}{applied:>17.2f}"
+                  f"{np.sqrt(np.mean(error ** 2)):>8.2f}{np.mean(np.abs(error)):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
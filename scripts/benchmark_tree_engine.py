@@ -0,0 +1,75 @@
+"""
+Benchmark du moteur d'arbres compilé face à `model.predict`.
+
+Mesure la latence médiane des deux modèles (énergie et CO2) pour des batchs
+de 1, 100 et 10 000 bâtiments tirés de data/data_cleaned.csv, et vérifie au
+passage que les prédictions sont identiques bit à bit.
+
+Usage:
+    python scripts/benchmark_tree_engine.py [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from seattle_energy.forest import compile_forest  # noqa: E402
+
+BATCH_SIZES = [1, 100, 10_000]
+
+
+def median_latency(func, X, repeat):
+    """Latence médiane (secondes) de func(X) sur `repeat` appels."""
+    func(X)  # échauffement
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Nombre de mesures par cas")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    features = joblib.load(ROOT / "models" / "energy_features.joblib")
+    data = pd.read_csv(ROOT / "data" / "data_cleaned.csv")
+    rng = np.random.default_rng(42)
+    rows = data[features].to_numpy(dtype=np.float64)
+    rows = rows[rng.integers(0, len(rows), size=max(BATCH_SIZES))]
+
+    print(f"{'Modèle':<14}{'Batch':>8}{'sklearn (ms)':>15}{'compilé (ms)':>15}{'Gain':>8}")
+    for name in ("energy", "co2"):
+        model = joblib.load(ROOT / "models" / f"{name}_model.joblib")
+        scaler = joblib.load(ROOT / "models" / f"{name}_scaler.joblib")
+        engine = compile_forest(model)
+        X_scaled = scaler.transform(pd.DataFrame(rows, columns=features))
+
+        if not np.array_equal(model.predict(X_scaled), engine.predict(X_scaled)):
+            raise SystemExit(f"❌ Prédictions différentes pour le modèle {name}")
+
+        for batch_size in BATCH_SIZES:
+            X = X_scaled[:batch_size]
+            reference = median_latency(model.predict, X, args.repeat)
+            compiled = median_latency(engine.predict, X, args.repeat)
+            print(
+                f"{name:<14}{batch_size:>8}{reference * 1e3:>15.3f}"
+                f"{compiled * 1e3:>15.3f}{reference / compiled:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
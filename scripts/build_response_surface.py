@@ -0,0 +1,104 @@
+"""
+Export de l'index de surface de réponse (models/response_surface.npz).
+
+Précalcule les prédictions énergie et CO2 des forêts fusionnées pour chaque
+région distincte du domaine de la sidebar balayé autour des points d'ancrage,
+vérifie l'accord exact avec les forêts sur un échantillon aléatoire du domaine,
+puis compare la latence d'une recherche à celle d'une prédiction unitaire.
+
+Usage:
+    python scripts/build_response_surface.py [--anchor 50000,5,30,50 ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+warnings.filterwarnings("ignore")
+
+import app  # noqa: E402
+from seattle_energy.surface import save_surface, verify_surface  # noqa: E402
+
+
+def parse_anchor(text):
+    """Ancrage 'surface,étages,âge,energy_star' -> dictionnaire d'entrées."""
+    values = [float(v) for v in text.split(",")]
+    if len(values) != len(app.SIDEBAR_DOMAIN):
+        raise argparse.ArgumentTypeError(f"{len(app.SIDEBAR_DOMAIN)} valeurs attendues : {text!r}")
+    return dict(zip(app.SIDEBAR_DOMAIN, values))
+
+
+def random_domain_inputs(size, rng):
+    """Entrées tirées uniformément sur la grille de la sidebar."""
+    inputs = {
+        name: low + step * rng.integers(0, (high - low) // step + 1, size=size)
+        for name, (low, high, step) in app.SIDEBAR_DOMAIN.items()
+    }
+    inputs['building_type'] = rng.choice(app.BUILDING_TYPES, size=size)
+    return pd.DataFrame(inputs)
+
+
+def median_latency(func, rows):
+    """Latence médiane (secondes) de func(row) sur chaque ligne."""
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        func(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--anchor", type=parse_anchor, action="append",
+                        help="Point d'ancrage surface,étages,âge,energy_star (répétable)")
+    parser.add_argument("--output", default="models/response_surface.npz", help="Fichier de sortie")
+    parser.add_argument("--samples", type=int, default=20000, help="Lignes de vérification aléatoires")
+    args = parser.parse_args()
+
+    models = app.load_models()
+    if not models or 'energy_fused' not in models or 'co2_fused' not in models:
+        raise SystemExit("❌ Modèles introuvables dans models/")
+
+    start = time.perf_counter()
+    surface = app.build_response_surface(models, args.anchor)
+    print(f"✅ {surface.n_regions} régions indexées en {time.perf_counter() - start:.2f} s")
+
+    feature_names = models['energy_features']
+    forests = {'energy': models['energy_fused'], 'co2': models['co2_fused']}
+    domain = app.prepare_features_batch(
+        *app._batch_inputs(app.surface_domain_inputs(args.anchor)), feature_names
+    )
+    rng = np.random.default_rng(0)
+    sample = app.prepare_features_batch(
+        *app._batch_inputs(random_domain_inputs(args.samples, rng)), feature_names
+    )
+    covered = verify_surface(surface, forests, domain)
+    if covered != len(domain):
+        raise SystemExit(f"❌ {len(domain) - covered} lignes du domaine absentes de l'index")
+    found = verify_surface(surface, forests, sample)
+    print(f"✅ Accord exact : {covered} lignes du domaine, {found}/{len(sample)} tirages aléatoires")
+
+    rows = domain[rng.integers(0, len(domain), size=2000)]
+    lookup = median_latency(surface.lookup_one, rows)
+    predict = median_latency(
+        lambda row: (forests['energy'].predict_one(row), forests['co2'].predict_one(row)), rows
+    )
+    print(f"⏱️  Recherche : {lookup * 1e6:.1f} µs, forêts : {predict * 1e6:.1f} µs")
+
+    save_surface(surface, args.output)
+    print(f"✅ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
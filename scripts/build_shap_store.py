@@ -0,0 +1,96 @@
+"""
+Construction du magasin SHAP global (models/shap_store/).
+
+Calcule les valeurs SHAP de chaque ligne des données nettoyées (partitions
+data/partitions/ si elles existent, sinon data/data_cleaned.csv) pour les
+modèles énergie et CO2 : valeurs exactes de shap.TreeExplainer, réparties sur
+un pool de processus pour la Random Forest (seattle_energy.batch_explain),
+en un appel pour XGBoost. Vérifie
+l'additivité (base + somme des contributions = prédiction) puis écrit les
+features brutes et les valeurs SHAP en float32 par colonne.
+
+Usage:
+    python scripts/build_shap_store.py [--jobs 4] [--output models/shap_store]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+warnings.filterwarnings("ignore")
+
+from seattle_energy.artifacts import model_version  # noqa: E402
+from seattle_energy.batch_explain import explain_batch  # noqa: E402
+from seattle_energy.ingest import default_cleaned_path, read_cleaned  # noqa: E402
+from seattle_energy.shap_store import load_shap_store, save_shap_store  # noqa: E402
+
+MODEL_NAMES = ('energy', 'co2')
+
+
+def explain_model(models_dir, name, model, X_scaled, n_jobs):
+    """Valeurs SHAP (n_lignes, n_features) et valeur de base d'un modèle."""
+    if hasattr(model, 'estimators_'):
+        values, _, expected_value = explain_batch(models_dir, X_scaled, name=name, n_jobs=n_jobs)
+        return values, expected_value
+
+    import shap
+
+    explainer = shap.TreeExplainer(model)
+    return explainer.shap_values(X_scaled), explainer.expected_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--models", type=Path, default=ROOT / "models")
+    parser.add_argument("--data", type=Path, default=default_cleaned_path(ROOT / "data"),
+                        help="partitions ou CSV nettoyé")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="dossier du magasin (défaut : <models>/shap_store)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    output = args.output or args.models / "shap_store"
+
+    import joblib
+
+    feature_names = list(joblib.load(args.models / "energy_features.joblib"))
+    features = read_cleaned(args.data, columns=feature_names)
+    print(f"{len(features)} bâtiments, {len(feature_names)} features")
+
+    explanations = {}
+    for name in MODEL_NAMES:
+        model = joblib.load(args.models / f"{name}_model.joblib")
+        X_scaled = joblib.load(args.models / f"{name}_scaler.joblib").transform(features)
+
+        start = time.perf_counter()
+        values, expected_value = explain_model(args.models, name, model, X_scaled, args.jobs)
+        elapsed = time.perf_counter() - start
+
+        prediction = model.predict(X_scaled)
+        base = float(np.ravel(expected_value)[0])
+        error = np.abs(base + np.asarray(values, dtype=np.float64).sum(axis=1) - prediction).max()
+        print(f"{name:>6} : {elapsed:6.2f} s, écart d'additivité max {error / np.abs(prediction).max():.1e}")
+        explanations[name] = (values, base)
+
+    save_shap_store(
+        output, feature_names, features.to_numpy(dtype=np.float64), explanations,
+        model_version(args.models), source=args.data.name
+    )
+
+    store = load_shap_store(output, verify=True)
+    start = time.perf_counter()
+    for name in store.model_names:
+        store.mean_abs_shap(name)
+        store.beeswarm(name)
+    print(f"Magasin SHAP -> {output} (vues globales : {(time.perf_counter() - start) * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
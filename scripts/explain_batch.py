@@ -0,0 +1,71 @@
+"""
+Explications SHAP de tout un portefeuille, en parallèle sur plusieurs processus.
+
+Explique les bâtiments du dataset nettoyé (comme le notebook 02 sur le jeu
+d'entraînement), enregistre la matrice float32 des valeurs SHAP et affiche le
+débit (lignes/s) et le débit par processus pour chaque nombre de processus
+demandé, afin de contrôler la montée en charge.
+
+Usage:
+    python scripts/explain_batch.py [--jobs 1 2 4] [--rows 2000] [--time-limit 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from seattle_energy.batch_explain import DEFAULT_CHUNK_SIZE, explain_batch  # noqa: E402
+from seattle_energy.ingest import default_cleaned_path, read_cleaned  # noqa: E402
+
+
+def load_scaled_rows(models_dir, data_path, rows):
+    """Lignes standardisées du dataset nettoyé, dans l'ordre des features du modèle."""
+    import joblib
+
+    features = joblib.load(models_dir / "energy_features.joblib")
+    scaler = joblib.load(models_dir / "energy_scaler.joblib")
+    return scaler.transform(read_cleaned(data_path, columns=list(features), nrows=rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--models", type=Path, default=ROOT / "models")
+    parser.add_argument("--data", type=Path, default=default_cleaned_path(ROOT / "data"),
+                        help="partitions ou CSV nettoyé")
+    parser.add_argument("--rows", type=int, default=None, help="nombre de lignes (défaut : toutes)")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="durée maximale du calcul exact (s) ; Saabas au-delà")
+    parser.add_argument("--output", type=Path, default=None, help="fichier .npy des valeurs SHAP")
+    args = parser.parse_args()
+
+    X_scaled = load_scaled_rows(args.models, args.data, args.rows)
+    print(f"{len(X_scaled)} bâtiments, {X_scaled.shape[1]} features")
+
+    values = None
+    for n_jobs in args.jobs:
+        start = time.perf_counter()
+        values, exact, expected_value = explain_batch(
+            args.models, X_scaled, n_jobs=n_jobs,
+            chunk_size=args.chunk_size, time_limit=args.time_limit
+        )
+        elapsed = time.perf_counter() - start
+        rate = len(X_scaled) / elapsed
+        print(f"{n_jobs:>3} processus : {elapsed:7.2f} s, {rate:8.1f} lignes/s, "
+              f"{rate / n_jobs:8.1f} lignes/s/processus, {exact.mean():6.1%} exactes")
+
+    if args.output is not None and values is not None:
+        np.save(args.output, values)
+        print(f"Valeurs SHAP (float32, base {expected_value:.0f}) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
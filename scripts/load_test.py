@@ -0,0 +1,102 @@
+"""
+Test de charge local du service d'inférence (service.py).
+
+Envoie des requêtes concurrentes de bâtiments tirés sur la grille de la
+sidebar et affiche les latences p50/p99 côté client et côté serveur, le débit
+et la taille moyenne des micro-batchs. Sans --url, un service est démarré dans
+le processus pour chaque taille de batch demandée (1 = sans micro-batching).
+
+Usage:
+    python scripts/load_test.py [--requests 2000] [--concurrency 64] [--max-batch-size 1 64]
+    python scripts/load_test.py --url 127.0.0.1:8000 --endpoint /explain
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+warnings.filterwarnings("ignore")
+
+import service  # noqa: E402
+from seattle_energy import inference  # noqa: E402
+
+
+def random_buildings(size, seed=0):
+    """Bâtiments tirés uniformément sur la grille de la sidebar."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        name: low + step * rng.integers(0, (high - low) // step + 1, size=size)
+        for name, (low, high, step) in inference.SIDEBAR_DOMAIN.items()
+    }
+    types = rng.choice(inference.BUILDING_TYPES, size=size)
+    return [
+        {**{name: int(values[i]) for name, values in columns.items()}, 'building_type': str(types[i])}
+        for i in range(size)
+    ]
+
+
+def report(label, result, metrics=None):
+    latencies = result['latencies'] * 1e3
+    errors = sum(status != 200 for status in result['statuses'])
+    line = (f"{label:<18} {len(latencies) / result['elapsed']:8.0f} req/s  "
+            f"client p50 {np.percentile(latencies, 50):7.2f} ms  p99 {np.percentile(latencies, 99):7.2f} ms")
+    if metrics is not None:
+        latency = next(iter(v for v in metrics['latency'].values() if v['count']), None)
+        batches = next(iter(v for v in metrics['batches'].values() if v['batches']), None)
+        if latency and batches:
+            line += (f"  serveur p50 {latency['p50_ms']:7.2f} ms  p99 {latency['p99_ms']:7.2f} ms"
+                     f"  batch moyen {batches['mean_size']:5.1f}")
+    print(line + (f"  ({errors} erreurs)" if errors else ""))
+
+
+async def run_local(models, buildings, args):
+    for max_batch_size in args.max_batch_size:
+        svc = service.InferenceService(models, max_batch_size=max_batch_size,
+                                       max_wait=args.max_wait_ms / 1000)
+        server = await service.start_server(svc, port=0)
+        host, port = server.sockets[0].getsockname()[:2]
+        try:
+            # Échauffement (explainer, caches) hors mesure
+            await service.generate_load(host, port, buildings[:8], args.endpoint, 1)
+            svc.latency = {name: service.LatencyRecorder() for name in svc.latency}
+            result = await service.generate_load(host, port, buildings, args.endpoint, args.concurrency)
+            report(f"batch ≤ {max_batch_size}", result, svc.metrics())
+        finally:
+            server.close()
+            await server.wait_closed()
+            await svc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=None, help="hôte:port d'un service déjà démarré")
+    parser.add_argument("--endpoint", default="/predict", choices=["/predict", "/explain"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, nargs="+", default=[1, service.DEFAULT_MAX_BATCH_SIZE])
+    parser.add_argument("--max-wait-ms", type=float, default=service.DEFAULT_MAX_WAIT * 1000)
+    args = parser.parse_args()
+
+    buildings = random_buildings(args.requests)
+    print(f"{args.requests} requêtes {args.endpoint}, {args.concurrency} clients concurrents")
+
+    if args.url is None:
+        asyncio.run(run_local(inference.load_inference_models(Path("models")), buildings, args))
+        return
+
+    host, port = args.url.rsplit(":", 1)
+    result = asyncio.run(service.generate_load(host, int(port), buildings, args.endpoint, args.concurrency))
+    report(args.url, result)
+
+
+if __name__ == "__main__":
+    main()
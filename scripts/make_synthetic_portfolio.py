@@ -0,0 +1,72 @@
+"""
+Génération de portefeuilles synthétiques au format du CSV de benchmarking.
+
+Rééchantillonne les bâtiments du CSV 2016 (colonnes utilisées par le scoring)
+en perturbant surface, étages, année de construction et score ENERGY STAR,
+puis écrit les lignes par blocs dans un ou plusieurs fichiers : de quoi tester
+bulk_score.py sur des dizaines de millions de lignes.
+
+Usage:
+    python scripts/make_synthetic_portfolio.py data/synthetic --rows 20000000 --files 8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app import PORTFOLIO_USECOLS  # noqa: E402
+
+# Lignes générées et écrites à la fois
+BLOCK_ROWS = 500000
+
+
+def synthetic_block(source, size, rng, first_id):
+    """Bloc de `size` bâtiments rééchantillonnés et perturbés."""
+    block = source.iloc[rng.integers(0, len(source), size=size)].reset_index(drop=True)
+    block['OSEBuildingID'] = np.arange(first_id, first_id + size)
+    block['PropertyGFATotal'] = np.round(
+        block['PropertyGFATotal'] * rng.lognormal(0.0, 0.3, size=size)
+    )
+    block['NumberofFloors'] = np.clip(block['NumberofFloors'] + rng.integers(-2, 3, size=size), 0, None)
+    block['YearBuilt'] = np.clip(block['YearBuilt'] + rng.integers(-10, 11, size=size), 1900, 2016)
+    score = block['ENERGYSTARScore'] + rng.integers(-10, 11, size=size)
+    block['ENERGYSTARScore'] = score.clip(1, 100)
+    return block
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", type=Path, help="dossier des fichiers générés")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--source", type=Path, default=ROOT / "data" / "2016_Building_Energy_Benchmarking.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    source = pd.read_csv(args.source, usecols=lambda col: col in PORTFOLIO_USECOLS)
+    rng = np.random.default_rng(args.seed)
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    rows_per_file = -(-args.rows // args.files)
+    next_id = 0
+    for file_index in range(args.files):
+        path = args.output / f"synthetic_{file_index:03d}.csv"
+        file_rows = min(rows_per_file, args.rows - next_id)
+        written = 0
+        while written < file_rows:
+            size = min(BLOCK_ROWS, file_rows - written)
+            block = synthetic_block(source, size, rng, next_id)
+            block.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += size
+            next_id += size
+        print(f"{path} : {written:,} lignes")
+
+
+if __name__ == "__main__":
+    main()
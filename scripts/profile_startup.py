@@ -0,0 +1,112 @@
+"""
+Profil du démarrage à froid de l'application.
+
+Lance un interpréteur neuf (`python -X importtime`) qui enchaîne les étapes d'un
+premier affichage : import de app, chargement des modèles, première prédiction,
+premiers graphiques, première explication SHAP. Pour chaque étape, le script
+rapporte sa durée totale et le temps d'import attribué à chaque module
+(somme des temps propres de ses sous-modules).
+
+Usage:
+    python scripts/profile_startup.py [--top 8] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import warnings
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Marqueur de fin d'étape écrit sur stderr par le processus enfant
+STAGE_MARKER = "@@stage"
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_stages():
+    """Processus enfant : exécute chaque étape et signale sa durée sur stderr."""
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    warnings.filterwarnings("ignore")
+
+    def stage(name, func):
+        start = time.perf_counter()
+        result = func()
+        print(f"{STAGE_MARKER} {name} {time.perf_counter() - start:.6f}", file=sys.stderr, flush=True)
+        return result
+
+    app = stage("import app", lambda: __import__("app"))
+    models = stage("load_models", app.load_models)
+    defaults = dict(app.SIDEBAR_DEFAULTS, building_type=app.BUILDING_TYPES[0])
+    prediction = stage("première prédiction", lambda: app.predict_cached(models, **defaults))
+
+    def first_charts():
+        import plotly.express  # noqa: F401
+        return app.create_feature_importance_plot(models['energy_model'], models['energy_features'])
+
+    stage("premiers graphiques", first_charts)
+
+    def first_explanation():
+        _, _, _, _, X_scaled, feature_names = prediction
+        return app.explain_prediction(models, X_scaled, feature_names, time_budget=None)
+
+    stage("première explication SHAP", first_explanation)
+
+
+def parse_profile(stderr):
+    """Répartit les lignes -X importtime entre les étapes du processus enfant."""
+    stages, pending = [], defaultdict(float)
+    for line in stderr.splitlines():
+        if line.startswith(STAGE_MARKER):
+            name, seconds = line[len(STAGE_MARKER) + 1:].rsplit(" ", 1)
+            stages.append({'stage': name, 'seconds': float(seconds), 'imports': dict(pending)})
+            pending = defaultdict(float)
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, module = int(match.group(1)), match.group(4)
+            pending[module.split(".")[0]] += self_us / 1e6
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=8, help="Modules affichés par étape")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_stages()
+        return
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, "--child"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"❌ Échec du profilage :\n{completed.stderr[-2000:]}")
+    stages = parse_profile(completed.stderr)
+
+    if args.json:
+        print(json.dumps(stages, indent=2, ensure_ascii=False))
+        return
+
+    elapsed = 0.0
+    for stage in stages:
+        elapsed += stage['seconds']
+        print(f"{stage['stage']:<28}{stage['seconds'] * 1e3:>10.1f} ms   (cumul {elapsed * 1e3:.0f} ms)")
+        imports = sorted(stage['imports'].items(), key=lambda item: item[1], reverse=True)
+        for module, seconds in imports[:args.top]:
+            print(f"    import {module:<24}{seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Briques d'inférence et d'outillage hors Streamlit pour le Seattle Energy Predictor.
+"""
+
+from .forest import CompiledForest, compile_forest
+
+__all__ = ['CompiledForest', 'compile_forest']
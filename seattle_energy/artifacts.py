@@ -0,0 +1,117 @@
+"""
+Gestion des artefacts dérivés des modèles entraînés (dossier models/).
+
+Export des forêts fusionnées : le StandardScaler est replié une fois pour
+toutes dans les seuils des arbres, et le résultat est sauvegardé à côté des
+fichiers joblib d'origine.
+
+Export du bundle (models/bundle/) : les cinq fichiers joblib réunis en tableaux
+projetables en mémoire, décrits par un manifeste versionné.
+
+Usage:
+    python -m seattle_energy.artifacts [--models-dir models] [--no-bundle]
+"""
+
+import argparse
+import hashlib
+from pathlib import Path
+
+from .bundle import save_bundle
+from .forest import compile_forest, fold_scaler, save_forest
+
+# Couples (modèle, scaler) exportés sous forme fusionnée
+FUSED_MODELS = {
+    'energy': ('energy_model.joblib', 'energy_scaler.joblib'),
+    'co2': ('co2_model.joblib', 'co2_scaler.joblib'),
+}
+
+# Ordre des features commun aux deux modèles
+FEATURES_FILE = 'energy_features.joblib'
+
+# Fichiers dont l'empreinte définit la version des modèles (même ordre que load_models)
+MODEL_VERSION_FILES = (
+    'energy_model.joblib', 'energy_scaler.joblib', FEATURES_FILE,
+    'co2_model.joblib', 'co2_scaler.joblib'
+)
+
+
+def file_fingerprint(*paths):
+    """Empreinte SHA-256 (tronquée) du contenu d'un ou plusieurs fichiers."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def model_version(models_dir):
+    """Empreinte des fichiers joblib présents, ou None s'il n'y en a aucun."""
+    paths = [Path(models_dir) / file_name for file_name in MODEL_VERSION_FILES]
+    paths = [path for path in paths if path.exists()]
+    return file_fingerprint(*paths) if paths else None
+
+
+def bundle_path(models_dir):
+    """Dossier du bundle de modèles."""
+    return Path(models_dir) / "bundle"
+
+
+def fused_path(models_dir, name):
+    """Chemin du fichier .npz de la forêt fusionnée `name`."""
+    return Path(models_dir) / f"{name}_fused.npz"
+
+
+def export_fused_models(models_dir="models"):
+    """Replie chaque scaler dans sa forêt et écrit models/<nom>_fused.npz."""
+    import joblib
+
+    models_dir = Path(models_dir)
+    written = []
+    for name, (model_file, scaler_file) in FUSED_MODELS.items():
+        model_path, scaler_path = models_dir / model_file, models_dir / scaler_file
+        if not model_path.exists():
+            continue
+        forest = compile_forest(joblib.load(model_path))
+        fused = fold_scaler(
+            forest, joblib.load(scaler_path),
+            source=file_fingerprint(model_path, scaler_path)
+        )
+        save_forest(fused, fused_path(models_dir, name))
+        written.append(fused_path(models_dir, name))
+    return written
+
+
+def export_bundle(models_dir="models"):
+    """Écrit models/bundle/ à partir des fichiers joblib ; retourne le chemin du manifeste."""
+    import joblib
+
+    models_dir = Path(models_dir)
+    models = {}
+    for name, (model_file, scaler_file) in FUSED_MODELS.items():
+        model_path, scaler_path = models_dir / model_file, models_dir / scaler_file
+        if not model_path.exists():
+            continue
+        model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+        engine = compile_forest(model)
+        fused = fold_scaler(engine, scaler, source=file_fingerprint(model_path, scaler_path))
+        models[name] = (model, scaler, engine, fused)
+    if 'energy' not in models:
+        raise FileNotFoundError(f"Modèle énergie introuvable dans {models_dir}")
+
+    feature_names = joblib.load(models_dir / FEATURES_FILE)
+    return save_bundle(bundle_path(models_dir), feature_names, models, model_version(models_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export des artefacts dérivés des modèles")
+    parser.add_argument("--models-dir", default="models", help="Dossier des modèles joblib")
+    parser.add_argument("--no-bundle", action="store_true", help="Ne pas écrire models/bundle/")
+    args = parser.parse_args()
+
+    for path in export_fused_models(args.models_dir):
+        print(f"✅ {path}")
+    if not args.no_bundle:
+        print(f"✅ {export_bundle(args.models_dir)}")
+
+
+if __name__ == "__main__":
+    main()
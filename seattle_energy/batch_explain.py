@@ -0,0 +1,152 @@
+"""
+Explications SHAP par lots, réparties sur un pool de processus.
+
+Chaque processus ouvre une fois le modèle (bundle projeté en mémoire s'il est
+à jour, sinon fichiers joblib) et construit son FastTreeExplainer ; les lignes
+standardisées sont ensuite découpées en blocs distribués aux processus. Les
+valeurs reviennent au fil de l'eau sous forme de matrices float32 (n_lignes,
+n_features), deux fois plus compactes que le float64 de shap.
+
+Avec `time_limit`, toutes les lignes sont expliquées dans un temps fixe : passé
+l'échéance commune, les lignes restantes reçoivent l'attribution de Saabas
+(un parcours des arbres) au lieu du TreeSHAP exact.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+
+from .artifacts import bundle_path, model_version
+from .bundle import load_bundle, read_manifest
+from .explain import TREE_SHAP, FastTreeExplainer
+from .forest import compile_forest
+
+# Nombre de lignes par bloc envoyé à un processus
+DEFAULT_CHUNK_SIZE = 64
+
+# Explainer du processus courant (construit par _init_worker)
+_WORKER_EXPLAINER = None
+
+
+def load_tree_explainer(models_dir, name='energy'):
+    """
+    Construit le FastTreeExplainer du modèle `name` de models_dir.
+
+    Le bundle est utilisé s'il existe et correspond aux fichiers joblib présents.
+    """
+    models_dir = Path(models_dir)
+    manifest = read_manifest(bundle_path(models_dir))
+    if manifest is not None and model_version(models_dir) in (None, manifest['model_version']):
+        models = load_bundle(bundle_path(models_dir))
+        return FastTreeExplainer.from_model(models[f"{name}_model"], models[f"{name}_engine"])
+
+    import joblib
+
+    model = joblib.load(models_dir / f"{name}_model.joblib")
+    return FastTreeExplainer.from_model(model, compile_forest(model))
+
+
+def _init_worker(models_dir, name):
+    global _WORKER_EXPLAINER
+    _WORKER_EXPLAINER = load_tree_explainer(models_dir, name)
+
+
+def _explain_rows(explainer, X, deadline):
+    """Valeurs float32 et masque des lignes expliquées exactement, avant l'échéance (time.time)."""
+    if deadline is None:
+        # Sans échéance : un seul appel de shap pour tout le bloc (plus rapide que ligne à ligne)
+        return explainer.shap_values(X).astype(np.float32), np.ones(len(X), dtype=bool)
+    values = np.empty(X.shape, dtype=np.float32)
+    exact = np.zeros(len(X), dtype=bool)
+    for i, row in enumerate(X):
+        budget = max(0.0, deadline - time.time())
+        row_values, method = explainer.explain(row, budget)
+        values[i] = row_values
+        exact[i] = method == TREE_SHAP
+    return values, exact
+
+
+def _explain_chunk(start, X, deadline):
+    values, exact = _explain_rows(_WORKER_EXPLAINER, X, deadline)
+    return start, values, exact, _WORKER_EXPLAINER.expected_value
+
+
+def iter_shap_batches(models_dir, X_scaled, name='energy', n_jobs=None,
+                      chunk_size=DEFAULT_CHUNK_SIZE, time_limit=None):
+    """
+    Explique les lignes de X_scaled par blocs, dans l'ordre où les blocs se terminent.
+
+    Args:
+        models_dir: dossier des modèles (bundle et/ou fichiers joblib)
+        X_scaled: features standardisées (n_lignes, n_features)
+        name: modèle à expliquer ('energy')
+        n_jobs: nombre de processus (None : tous les cœurs ; 1 : dans le processus courant)
+        chunk_size: nombre de lignes par bloc
+        time_limit: durée maximale (secondes) du TreeSHAP exact pour l'ensemble du lot
+
+    Yields:
+        tuple: (indice de la première ligne, valeurs float32, masque exact, valeur de base)
+    """
+    X_scaled = np.ascontiguousarray(X_scaled, dtype=np.float64)
+    n_jobs = (os.cpu_count() or 1) if n_jobs is None else n_jobs
+    deadline = None if time_limit is None else time.time() + time_limit
+    starts = range(0, len(X_scaled), chunk_size)
+
+    if n_jobs <= 1:
+        explainer = load_tree_explainer(models_dir, name)
+        for start in starts:
+            values, exact = _explain_rows(explainer, X_scaled[start:start + chunk_size], deadline)
+            yield start, values, exact, explainer.expected_value
+        return
+
+    # spawn : les processus n'héritent pas des threads du serveur Streamlit
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(str(models_dir), name),
+    ) as pool:
+        pending = {
+            pool.submit(_explain_chunk, start, X_scaled[start:start + chunk_size], deadline)
+            for start in starts
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def explain_batch(models_dir, X_scaled, name='energy', n_jobs=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, time_limit=None, progress_callback=None):
+    """
+    Valeurs SHAP de toutes les lignes de X_scaled, calculées en parallèle.
+
+    Args:
+        progress_callback: fonction appelée avec (lignes terminées, fraction)
+        (autres arguments : voir iter_shap_batches)
+
+    Returns:
+        tuple: (valeurs float32 (n_lignes, n_features), masque des lignes
+        exactes, valeur de base)
+    """
+    X_scaled = np.asarray(X_scaled)
+    values = np.empty(X_scaled.shape, dtype=np.float32)
+    exact = np.zeros(len(X_scaled), dtype=bool)
+    expected_value = None
+
+    rows_done = 0
+    for start, chunk_values, chunk_exact, expected_value in iter_shap_batches(
+        models_dir, X_scaled, name=name, n_jobs=n_jobs,
+        chunk_size=chunk_size, time_limit=time_limit
+    ):
+        values[start:start + len(chunk_values)] = chunk_values
+        exact[start:start + len(chunk_values)] = chunk_exact
+        rows_done += len(chunk_values)
+        if progress_callback is not None:
+            progress_callback(rows_done, rows_done / len(X_scaled))
+
+    return values, exact, expected_value
@@ -0,0 +1,284 @@
+"""
+Bundle de modèles versionné et projetable en mémoire (dossier models/bundle/).
+
+Le bundle remplace les cinq fichiers joblib chargés par l'application :
+
+- manifest.json : version du format, version des modèles (empreinte des
+  fichiers joblib d'origine), ordre des features et empreinte SHA-256 de
+  chaque tableau ;
+- un fichier .npy par tableau (nœuds des arbres, seuils standardisés et
+  bruts, paramètres du scaler, importances, valeurs et poids des nœuds pour
+  SHAP).
+
+Les tableaux sont ouverts avec `np.load(mmap_mode='r')` : aucun dépickling, et
+les pages sont partagées en lecture seule par tous les processus via le cache
+de pages du système. Ouvrir le bundle ne coûte que la lecture du manifeste.
+
+Le parcours NumPy du moteur compilé est le plus rapide sur quelques lignes ;
+au-delà de ESTIMATOR_BATCH_ROWS, les parcours natifs de scikit-learn et
+XGBoost reprennent l'avantage (3 à 5 fois plus rapides sur 10 000 lignes) :
+lorsque les fichiers joblib d'origine sont disponibles, les gros batchs leur
+sont confiés, dépicklés au premier besoin seulement.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .forest import CompiledForest
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Tableaux de nœuds communs à la forêt standardisée et à la forêt fusionnée
+_NODE_ARRAYS = ('feature', 'left', 'right', 'value', 'default_left', 'roots')
+
+# Taille de batch à partir de laquelle le modèle d'origine prédit plus vite que le moteur
+# (forêt énergie : ~500 lignes, XGBoost CO2 : ~50 lignes)
+ESTIMATOR_BATCH_ROWS = 500
+
+
+class BundledScaler:
+    """
+    StandardScaler ajusté, réduit à ses paramètres.
+
+    `transform` effectue les mêmes opérations float64 que scikit-learn
+    (soustraction de la moyenne puis division par l'écart-type).
+    """
+
+    def __init__(self, mean, scale, feature_names=None):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class BundledForest:
+    """
+    Modèle d'arbres chargé depuis un bundle, utilisable à la place du modèle d'origine.
+
+    Args:
+        engine: forêt compilée travaillant sur les features standardisées
+        feature_importances: importances des features du modèle d'origine
+        node_value: valeur de chaque nœud, internes compris (None si absent)
+        cover: poids (nombre d'échantillons) de chaque nœud (None si absent)
+        estimator_path: fichier joblib du modèle d'origine, utilisé pour les
+            batchs d'au moins ESTIMATOR_BATCH_ROWS lignes (None : moteur seul)
+    """
+
+    def __init__(self, engine, feature_importances, node_value=None, cover=None, estimator_path=None):
+        self.engine = engine
+        self.feature_importances_ = feature_importances
+        self.n_features_in_ = engine.n_features
+        self.node_value = node_value
+        self.cover = cover
+        self.estimator_path = estimator_path
+        self._estimator = None
+        self._estimator_lock = threading.Lock()
+
+    def predict(self, X):
+        X = np.asarray(X)
+        if self.estimator_path is not None and len(X) >= ESTIMATOR_BATCH_ROWS:
+            return self.estimator().predict(X)
+        return self.engine.predict(X)
+
+    def estimator(self):
+        """Modèle d'origine, dépicklé au premier appel (un seul chargement par processus)."""
+        with self._estimator_lock:
+            if self._estimator is None:
+                import joblib
+
+                self._estimator = joblib.load(self.estimator_path)
+            return self._estimator
+
+    def shap_model(self):
+        """
+        Description des arbres au format dictionnaire de shap.TreeExplainer.
+
+        Reproduit ce que shap extrait d'un RandomForestRegressor (valeurs divisées
+        par le nombre d'arbres, entrées converties en float32).
+        """
+        if self.node_value is None or self.cover is None:
+            raise ValueError("Le bundle ne contient pas les données nécessaires à SHAP")
+        engine = self.engine
+        if engine.aggregation != 'mean':
+            raise ValueError("Seules les forêts moyennées sont exportées pour SHAP")
+
+        bounds = np.append(engine.roots, engine.n_nodes)
+        trees = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            local = np.arange(end - start)
+            is_leaf = engine.left[start:end] == local + start
+            left = np.where(is_leaf, -1, engine.left[start:end] - start)
+            right = np.where(is_leaf, -1, engine.right[start:end] - start)
+            trees.append({
+                'children_left': left,
+                'children_right': right,
+                'children_default': np.where(engine.default_left[start:end], left, right),
+                'features': np.where(is_leaf, -2, engine.feature[start:end]),
+                'thresholds': np.where(is_leaf, -2.0, engine.threshold[start:end]),
+                'values': self.node_value[start:end].reshape(-1, 1) * (1.0 / engine.n_trees),
+                'node_sample_weight': np.asarray(self.cover[start:end], dtype=np.float64),
+            })
+        return {
+            'trees': trees,
+            'input_dtype': engine.input_dtype.type,
+            'internal_dtype': np.float64,
+            'tree_output': 'raw_value',
+        }
+
+
+def _sklearn_node_arrays(model):
+    """Valeurs et poids de tous les nœuds d'une forêt sklearn (dans l'ordre du moteur)."""
+    if not hasattr(model, 'estimators_'):
+        return None, None
+    node_value = np.concatenate([e.tree_.value[:, 0, 0] for e in model.estimators_])
+    cover = np.concatenate([e.tree_.weighted_n_node_samples for e in model.estimators_])
+    return node_value, cover
+
+
+def _array_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def save_bundle(directory, feature_names, models, model_version):
+    """
+    Écrit le bundle à partir des artefacts chargés depuis les fichiers joblib.
+
+    Args:
+        directory: dossier du bundle (créé si besoin)
+        feature_names: ordre des features attendu par les modèles
+        models: dictionnaire nom -> (modèle, scaler, forêt compilée, forêt fusionnée)
+        model_version: empreinte des fichiers joblib d'origine
+
+    Returns:
+        Path: chemin du manifeste écrit
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': model_version,
+        'feature_names': list(feature_names),
+        'models': {}
+    }
+    for name, (model, scaler, engine, fused) in models.items():
+        node_value, cover = _sklearn_node_arrays(model)
+        arrays = {array: getattr(engine, array) for array in _NODE_ARRAYS}
+        arrays.update({
+            'threshold': engine.threshold,
+            'fused_threshold': fused.threshold,
+            'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+            'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+            'feature_importances': np.asarray(model.feature_importances_, dtype=np.float64),
+        })
+        if node_value is not None:
+            arrays.update({'node_value': node_value, 'cover': cover})
+
+        entry = {
+            'n_features': engine.n_features,
+            'aggregation': engine.aggregation,
+            'base_score': engine.base_score,
+            'input_dtype': engine.input_dtype.name,
+            'source': fused.source,
+            'arrays': {}
+        }
+        for array, values in arrays.items():
+            file_name = f"{name}.{array}.npy"
+            np.save(directory / file_name, np.ascontiguousarray(values))
+            entry['arrays'][array] = {
+                'file': file_name,
+                'dtype': str(values.dtype),
+                'shape': list(values.shape),
+                'sha256': _array_digest(directory / file_name)
+            }
+        manifest['models'][name] = entry
+
+    manifest_path = directory / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest_path
+
+
+def read_manifest(directory):
+    """Lit le manifeste du bundle, ou None s'il n'existe pas."""
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Format de bundle non supporté : {manifest.get('format_version')!r}")
+    return manifest
+
+
+def verify_bundle(directory, manifest=None):
+    """Vérifie les empreintes SHA-256 de tous les tableaux (lève ValueError si l'une diffère)."""
+    directory = Path(directory)
+    manifest = read_manifest(directory) if manifest is None else manifest
+    for name, entry in manifest['models'].items():
+        for array, meta in entry['arrays'].items():
+            if _array_digest(directory / meta['file']) != meta['sha256']:
+                raise ValueError(f"Tableau corrompu dans le bundle : {name}.{array}")
+
+
+def load_bundle(directory, verify=False, estimators_dir=None):
+    """
+    Ouvre un bundle en projetant ses tableaux en mémoire (lecture seule).
+
+    Args:
+        directory: dossier du bundle
+        verify: vérifier les empreintes SHA-256 des tableaux
+        estimators_dir: dossier des fichiers joblib d'origine, de la même version
+            que le bundle, utilisés pour les gros batchs (None : moteur seul)
+
+    Returns:
+        dict: mêmes clés que load_models (modèles, scalers, moteurs, forêts
+        fusionnées, features et version), ou None si le dossier n'a pas de manifeste
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    if verify:
+        verify_bundle(directory, manifest)
+
+    models = {'energy_features': manifest['feature_names']}
+    for name, entry in manifest['models'].items():
+        arrays = {}
+        for array, meta in entry['arrays'].items():
+            values = np.load(directory / meta['file'], mmap_mode='r')
+            if str(values.dtype) != meta['dtype'] or list(values.shape) != meta['shape']:
+                raise ValueError(f"Tableau incohérent avec le manifeste : {name}.{array}")
+            arrays[array] = values
+
+        nodes = {array: arrays[array] for array in _NODE_ARRAYS}
+        params = dict(n_features=entry['n_features'], aggregation=entry['aggregation'],
+                      base_score=entry['base_score'])
+        engine = CompiledForest(threshold=arrays['threshold'], **nodes, **params,
+                                input_dtype=np.dtype(entry['input_dtype']))
+        fused = CompiledForest(threshold=arrays['fused_threshold'], **nodes, **params,
+                               input_dtype=np.float64, source=entry['source'])
+
+        estimator_path = None
+        if estimators_dir is not None and (Path(estimators_dir) / f"{name}_model.joblib").exists():
+            estimator_path = Path(estimators_dir) / f"{name}_model.joblib"
+        models[f"{name}_model"] = BundledForest(
+            engine, arrays['feature_importances'],
+            node_value=arrays.get('node_value'), cover=arrays.get('cover'),
+            estimator_path=estimator_path
+        )
+        models[f"{name}_scaler"] = BundledScaler(
+            arrays['scaler_mean'], arrays['scaler_scale'], manifest['feature_names']
+        )
+        models[f"{name}_engine"] = engine
+        models[f"{name}_fused"] = fused
+
+    models['model_version'] = manifest['model_version']
+    return models
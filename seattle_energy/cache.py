@@ -0,0 +1,86 @@
+"""
+Cache LRU borné, thread-safe, avec compteurs de hits / misses / évictions.
+
+Streamlit exécute chaque session dans son propre thread : le cache est protégé
+par un verrou pour pouvoir être partagé entre toutes les sessions du processus.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache LRU de capacité fixe.
+
+    Args:
+        capacity: nombre maximal d'entrées conservées (0 désactive le cache)
+    """
+
+    def __init__(self, capacity=1024):
+        if capacity < 0:
+            raise ValueError("La capacité du cache doit être positive ou nulle")
+        self.capacity = int(capacity)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        """Retourne la valeur associée à `key` (et la marque comme récente)."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Ajoute ou remplace une entrée, en évinçant la plus ancienne si nécessaire."""
+        if self.capacity == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Retourne la valeur en cache, ou la calcule avec `compute()` et la mémorise."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Compteurs exportables (hits, misses, évictions, taille, taux de succès)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,306 @@
+"""
+Nettoyage du CSV de benchmarking par blocs (portage du notebook 01).
+
+Reprend les étapes de notebooks/01_exploration.ipynb — exclusion des
+bâtiments multifamiliaux, features Age et pourcentages de surface/énergie,
+suppression des outliers signalés et de l'électricité négative, regroupement
+des types de propriété rares, one-hot encoding, indicateur de score ENERGY STAR
+manquant, imputation MICE — sans jamais charger tout le fichier :
+
+1. chaque bloc du CSV brut est nettoyé indépendamment avec un vocabulaire de
+   catégories fixe : les colonnes one-hot sont les mêmes pour tous les blocs,
+   tous les fichiers et toutes les années ;
+2. les lignes nettoyées sont accumulées en float64 dans un fichier binaire
+   temporaire (projeté en mémoire, sans perte de précision) ;
+3. l'imputer (IterativeImputer du notebook, ou GapImputer avec --imputer gaps)
+   est ajusté sur un échantillon borné (`fit_rows`, DEFAULT_FIT_ROWS lignes par
+   défaut ; toutes les lignes d'un fichier plus petit), puis appliqué bloc par bloc.
+
+Sur le fichier 2016, la sortie est celle du notebook (data/data_cleaned.csv).
+Un type de propriété absent du vocabulaire est regroupé dans 'Other' et un
+district inconnu n'active aucune colonne.
+
+Usage:
+    python -m seattle_energy.cleaning data/2016_Building_Energy_Benchmarking.csv -o data/data_cleaned.csv
+"""
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Nombre de lignes brutes lues à la fois
+DEFAULT_CHUNK_SIZE = 50000
+
+# Lignes tirées pour ajuster l'imputer : l'échantillon est chargé en mémoire
+# (~33 Mo de float64) ; le fichier 2016 (1 646 lignes conservées) est ajusté en entier
+DEFAULT_FIT_ROWS = 100000
+
+INDEX_COLUMN = 'OSEBuildingID'
+
+# Colonnes numériques conservées telles quelles, dans l'ordre du notebook
+RAW_NUMERIC_COLUMNS = [
+    'NumberofBuildings', 'NumberofFloors', 'PropertyGFATotal', 'LargestPropertyUseTypeGFA',
+    'ENERGYSTARScore', 'SiteEUI(kBtu/sf)', 'SiteEUIWN(kBtu/sf)', 'SourceEUI(kBtu/sf)',
+    'SourceEUIWN(kBtu/sf)', 'SiteEnergyUse(kBtu)', 'SiteEnergyUseWN(kBtu)',
+    'TotalGHGEmissions', 'GHGEmissionsIntensity'
+]
+
+# Features créées (section 4 du notebook)
+ENGINEERED_COLUMNS = [
+    'Age', 'PropertyGFAParking_Pct', 'PropertyGFABuilding_Pct',
+    'SteamUse_Pct', 'Electricity_Pct', 'NaturalGas_Pct'
+]
+
+# Colonnes brutes lues : conservées, servant aux features, aux filtres ou à l'encodage
+RAW_COLUMNS = [
+    INDEX_COLUMN, 'DataYear', 'BuildingType', 'PrimaryPropertyType', 'CouncilDistrictCode',
+    'YearBuilt', 'PropertyGFAParking', 'PropertyGFABuilding(s)', 'SteamUse(kBtu)',
+    'Electricity(kBtu)', 'NaturalGas(kBtu)', 'Outlier'
+] + RAW_NUMERIC_COLUMNS
+
+# Types regroupés dans 'Other' et types exclus (section 6 du notebook)
+RARE_PROPERTY_TYPES = [
+    'Residence Hall', 'Senior Care Community', 'Refrigerated Warehouse',
+    'Restaurant', 'Hospital', 'Laboratory', 'Office'
+]
+EXCLUDED_PROPERTY_TYPES = ['Low-Rise Multifamily']
+
+# Vocabulaire fixe des colonnes one-hot (ordre de pd.get_dummies sur le fichier 2016)
+PROPERTY_TYPES = [
+    'Distribution Center', 'Hotel', 'K-12 School', 'Large Office', 'Medical Office',
+    'Mixed Use Property', 'Other', 'Retail Store', 'Self-Storage Facility',
+    'Small- and Mid-Sized Office', 'Supermarket / Grocery Store', 'University',
+    'Warehouse', 'Worship Facility'
+]
+COUNCIL_DISTRICTS = [1, 2, 3, 4, 5, 6, 7]
+
+OUTPUT_COLUMNS = (
+    RAW_NUMERIC_COLUMNS + ENGINEERED_COLUMNS
+    + [f"PropType_{name}" for name in PROPERTY_TYPES]
+    + [f"District_{code}" for code in COUNCIL_DISTRICTS]
+    + ['ENERGYSTARScore_Missing']
+)
+
+# Colonnes décrivant le bâtiment, connues sans relevé de consommation : seuls
+# prédicteurs de l'imputation ciblée, que l'application sait aussi construire
+BUILDING_COLUMNS = (
+    ['NumberofBuildings', 'NumberofFloors', 'PropertyGFATotal', 'LargestPropertyUseTypeGFA',
+     'Age', 'PropertyGFAParking_Pct', 'PropertyGFABuilding_Pct']
+    + [f"PropType_{name}" for name in PROPERTY_TYPES]
+    + [f"District_{code}" for code in COUNCIL_DISTRICTS]
+)
+
+# Méthodes d'imputation : MICE du notebook ou imputation ciblée (seattle_energy.imputation)
+IMPUTERS = ('mice', 'gaps')
+
+
+def clean_chunk(chunk):
+    """
+    Nettoie un bloc du CSV brut (sans imputation).
+
+    Returns:
+        pd.DataFrame: lignes conservées, indexées par OSEBuildingID, colonnes
+        OUTPUT_COLUMNS en float64 (NaN pour les valeurs manquantes)
+    """
+    missing = [col for col in RAW_COLUMNS if col not in chunk]
+    if missing:
+        raise KeyError(f"Colonnes manquantes dans le CSV brut : {missing}")
+
+    # Bâtiments non résidentiels, outliers signalés et électricité négative (ou absente) exclus
+    keep = ~chunk['BuildingType'].str.startswith('Multifamily', na=False).to_numpy()
+    keep &= chunk['Outlier'].isna().to_numpy()
+    keep &= (chunk['Electricity(kBtu)'] >= 0).to_numpy()
+    keep &= ~chunk['PrimaryPropertyType'].isin(EXCLUDED_PROPERTY_TYPES).to_numpy()
+    chunk = chunk[keep]
+
+    out = pd.DataFrame(index=pd.Index(chunk[INDEX_COLUMN].to_numpy(), name=INDEX_COLUMN))
+    for col in RAW_NUMERIC_COLUMNS:
+        out[col] = chunk[col].to_numpy(dtype=np.float64)
+
+    gfa_total = chunk['PropertyGFATotal'].to_numpy(dtype=np.float64)
+    energy_total = chunk['SiteEnergyUse(kBtu)'].replace(0, np.nan).to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['Age'] = (chunk['DataYear'] - chunk['YearBuilt']).to_numpy(dtype=np.float64)
+        out['PropertyGFAParking_Pct'] = np.nan_to_num(
+            chunk['PropertyGFAParking'].to_numpy(dtype=np.float64) / gfa_total * 100,
+            nan=0.0, posinf=np.inf, neginf=-np.inf
+        )
+        out['PropertyGFABuilding_Pct'] = np.nan_to_num(
+            chunk['PropertyGFABuilding(s)'].to_numpy(dtype=np.float64) / gfa_total * 100,
+            nan=0.0, posinf=np.inf, neginf=-np.inf
+        )
+        out['SteamUse_Pct'] = chunk['SteamUse(kBtu)'].to_numpy(dtype=np.float64) / energy_total * 100
+        out['Electricity_Pct'] = chunk['Electricity(kBtu)'].to_numpy(dtype=np.float64) / energy_total * 100
+        out['NaturalGas_Pct'] = chunk['NaturalGas(kBtu)'].to_numpy(dtype=np.float64) / energy_total * 100
+
+    # Types rares regroupés ; hors vocabulaire -> 'Other' ; valeur manquante -> aucune colonne
+    property_type = chunk['PrimaryPropertyType'].replace(RARE_PROPERTY_TYPES, 'Other')
+    property_type = property_type.where(property_type.isin(PROPERTY_TYPES) | property_type.isna(), 'Other')
+    property_type = property_type.to_numpy()
+    for name in PROPERTY_TYPES:
+        out[f"PropType_{name}"] = (property_type == name).astype(np.float64)
+
+    district = pd.to_numeric(chunk['CouncilDistrictCode'], errors='coerce').to_numpy()
+    for code in COUNCIL_DISTRICTS:
+        out[f"District_{code}"] = (district == code).astype(np.float64)
+
+    out['ENERGYSTARScore_Missing'] = out['ENERGYSTARScore'].isna().astype(np.float64)
+    out.replace([np.inf, -np.inf], np.nan, inplace=True)
+    return out
+
+
+def _iter_raw_chunks(sources, chunksize):
+    if isinstance(sources, (str, Path)) or hasattr(sources, 'read'):
+        sources = [sources]
+    for source in sources:
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=lambda col: col in RAW_COLUMNS)
+
+
+def iter_clean_chunks(sources, chunksize=DEFAULT_CHUNK_SIZE):
+    """Nettoie un ou plusieurs CSV bruts bloc par bloc (générateur de DataFrames)."""
+    for chunk in _iter_raw_chunks(sources, chunksize):
+        yield clean_chunk(chunk)
+
+
+def make_imputer(method='mice'):
+    """
+    Imputer non ajusté : MICE du notebook 01 (10 itérations, graine 42) ou
+    imputation ciblée des colonnes lacunaires à partir des colonnes du bâtiment.
+    """
+    if method == 'gaps':
+        from .imputation import GapImputer
+
+        return GapImputer(predictors=BUILDING_COLUMNS)
+    if method != 'mice':
+        raise ValueError(f"Méthode d'imputation inconnue : {method!r} (attendu : {IMPUTERS})")
+
+    from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+    from sklearn.impute import IterativeImputer
+
+    return IterativeImputer(max_iter=10, random_state=42, verbose=0)
+
+
+def _write_frame(frame, destination, first):
+    frame.to_csv(destination, mode='w' if first else 'a', header=first)
+
+
+def clean_csv(sources, destination, chunksize=DEFAULT_CHUNK_SIZE, impute=True,
+              imputer=None, fit_rows=DEFAULT_FIT_ROWS, seed=0, progress_callback=None):
+    """
+    Nettoie un ou plusieurs CSV bruts et écrit le CSV nettoyé au fil de l'eau.
+
+    Args:
+        sources: chemin(s) ou objet(s) fichier des CSV bruts
+        destination: chemin du CSV nettoyé
+        chunksize: lignes par bloc (lecture et imputation)
+        impute: imputer les valeurs manquantes (sinon NaN conservés)
+        imputer: imputer non ajusté exposant fit/transform (défaut : make_imputer())
+        fit_rows: lignes tirées au hasard pour ajuster l'imputer (None ou 0 : toutes,
+            chargées en mémoire)
+        seed: graine du tirage de `fit_rows`
+        progress_callback: appelé avec (étape, lignes traitées)
+
+    Returns:
+        dict: lignes lues, lignes conservées, lignes utilisées pour l'ajustement
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    stats = {'rows_read': 0, 'rows_kept': 0, 'fit_rows': 0}
+
+    if not impute:
+        for cleaned in _counted_chunks(sources, chunksize, stats, progress_callback):
+            _write_frame(cleaned, destination, first=stats['rows_kept'] == len(cleaned))
+        if stats['rows_kept'] == 0:
+            _write_frame(pd.DataFrame(columns=OUTPUT_COLUMNS).rename_axis(INDEX_COLUMN), destination, True)
+        return stats
+
+    workdir = Path(tempfile.mkdtemp(prefix=".cleaning_", dir=destination.parent))
+    try:
+        # Passe 1 : lignes nettoyées accumulées en binaire (float64 exact, mémoire bornée)
+        values_path, index_path = workdir / "values.f8", workdir / "index.i8"
+        with open(values_path, 'wb') as values_file, open(index_path, 'wb') as index_file:
+            for cleaned in _counted_chunks(sources, chunksize, stats, progress_callback):
+                np.ascontiguousarray(cleaned.to_numpy(dtype=np.float64)).tofile(values_file)
+                np.asarray(cleaned.index, dtype=np.int64).tofile(index_file)
+
+        n_rows, n_columns = stats['rows_kept'], len(OUTPUT_COLUMNS)
+        if n_rows == 0:
+            _write_frame(pd.DataFrame(columns=OUTPUT_COLUMNS).rename_axis(INDEX_COLUMN), destination, True)
+            return stats
+        values = np.memmap(values_path, dtype=np.float64, mode='r', shape=(n_rows, n_columns))
+        index = np.fromfile(index_path, dtype=np.int64)
+
+        # Passe 2 : ajustement sur toutes les lignes ou sur un échantillon borné
+        imputer = make_imputer() if imputer is None else imputer
+        if not fit_rows or fit_rows >= n_rows:
+            sample = values
+        else:
+            rows = np.sort(np.random.default_rng(seed).choice(n_rows, fit_rows, replace=False))
+            sample = values[rows]
+        imputer.fit(pd.DataFrame(np.asarray(sample), columns=OUTPUT_COLUMNS))
+        stats['fit_rows'] = len(sample)
+        if progress_callback is not None:
+            progress_callback('fit', stats['fit_rows'])
+
+        # Passe 3 : imputation bloc par bloc, valeurs négatives ramenées à 0 (comme le notebook)
+        for start in range(0, n_rows, chunksize):
+            block = pd.DataFrame(np.asarray(values[start:start + chunksize]), columns=OUTPUT_COLUMNS)
+            imputed = pd.DataFrame(
+                imputer.transform(block), columns=OUTPUT_COLUMNS,
+                index=pd.Index(index[start:start + chunksize], name=INDEX_COLUMN)
+            )
+            imputed[imputed < 0] = 0
+            _write_frame(imputed, destination, first=start == 0)
+            if progress_callback is not None:
+                progress_callback('impute', min(start + chunksize, n_rows))
+        del values
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return stats
+
+
+def _counted_chunks(sources, chunksize, stats, progress_callback):
+    for chunk in _iter_raw_chunks(sources, chunksize):
+        stats['rows_read'] += len(chunk)
+        cleaned = clean_chunk(chunk)
+        stats['rows_kept'] += len(cleaned)
+        if progress_callback is not None:
+            progress_callback('clean', stats['rows_read'])
+        yield cleaned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nettoyage du CSV de benchmarking (notebook 01)")
+    parser.add_argument("sources", nargs="+", help="CSV bruts (une ou plusieurs années)")
+    parser.add_argument("-o", "--output", default="data/data_cleaned.csv")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--fit-rows", type=int, default=DEFAULT_FIT_ROWS,
+                        help=f"lignes tirées pour ajuster l'imputer (défaut : {DEFAULT_FIT_ROWS} ; "
+                             "0 : toutes, mémoire non bornée)")
+    parser.add_argument("--imputer", choices=IMPUTERS, default='mice',
+                        help="MICE du notebook ou imputation ciblée des colonnes lacunaires")
+    parser.add_argument("--save-imputer", type=Path, default=None, metavar="MODELS_DIR",
+                        help="sauvegarder l'imputer ajusté (imputer.joblib) pour l'application "
+                             "(avec --imputer gaps)")
+    parser.add_argument("--no-impute", action="store_true", help="conserver les valeurs manquantes")
+    args = parser.parse_args()
+    if args.save_imputer is not None and (args.imputer != 'gaps' or args.no_impute):
+        # L'application complète ses entrées colonne par colonne : seul GapImputer le permet
+        parser.error("--save-imputer demande --imputer gaps (et l'imputation)")
+
+    imputer = make_imputer(args.imputer)
+    stats = clean_csv(args.sources, args.output, chunksize=args.chunksize,
+                      impute=not args.no_impute, imputer=imputer, fit_rows=args.fit_rows)
+    if args.save_imputer is not None and stats['fit_rows']:
+        from .imputation import save_imputer
+
+        print(f"Imputer sauvegardé : {save_imputer(imputer, args.save_imputer)}")
+    print(f"✅ {args.output} : {stats['rows_kept']:,} lignes conservées sur {stats['rows_read']:,}")
+
+
+if __name__ == "__main__":
+    main()
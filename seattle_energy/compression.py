@@ -0,0 +1,402 @@
+"""
+Compression des forêts d'arbres : élagage et stockage en précision réduite.
+
+La forêt énergie (max_depth=100, min_samples_split=10) contient beaucoup de
+sous-arbres profonds dont les feuilles ont des valeurs presque identiques.
+prune_forest remplace par une feuille unique tout sous-arbre dont les valeurs
+de feuilles s'écartent de moins d'une tolérance : la prédiction de chaque
+arbre change d'au plus cette tolérance.
+
+L'artefact compact (models/<nom>_compact.npz) stocke ensuite :
+
+- les arbres en ordre préfixe (l'enfant gauche suit son parent, seul l'enfant
+  droit est stocké) ;
+- seuils et valeurs de feuilles en float32, seulement pour les nœuds concernés ;
+- features et indices de nœuds dans le plus petit type entier suffisant ;
+- les directions des valeurs manquantes en bits ;
+- les paramètres du scaler, replié dans les seuils au chargement.
+
+Les entrées des forêts sklearn et XGBoost étant converties en float32, un
+seuil float32 arrondi vers le bas donne exactement les mêmes décisions : seule
+la conversion des valeurs de feuilles en float32 et l'élagage modifient les
+prédictions.
+
+Usage:
+    python -m seattle_energy.compression [--tolerances 0 0.001 0.01] [--write 0.001]
+"""
+
+import argparse
+import json
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from .bundle import BundledScaler, _sklearn_node_arrays
+from .forest import CompiledForest, _round_down, compile_forest, fold_scaler, save_forest
+
+COMPACT_FORMAT_VERSION = 1
+
+# Tolérances relatives du rapport (fraction de l'écart-type des valeurs de feuilles)
+DEFAULT_TOLERANCES = (0.0, 0.01, 0.05, 0.1, 0.2)
+
+_UNSIGNED_TYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+def compact_path(models_dir, name):
+    """Chemin de l'artefact compact de la forêt `name`."""
+    return Path(models_dir) / f"{name}_compact.npz"
+
+
+def index_dtype(max_value):
+    """Plus petit type entier non signé pouvant représenter `max_value`."""
+    for dtype in _UNSIGNED_TYPES:
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise OverflowError(f"Indice trop grand : {max_value}")
+
+
+def leaf_values(forest):
+    """Valeurs des feuilles de la forêt."""
+    return forest.value[forest.left == np.arange(forest.n_nodes)]
+
+
+def relative_tolerance(forest, fraction):
+    """Tolérance absolue correspondant à une fraction de l'écart-type des feuilles."""
+    return float(fraction * leaf_values(forest).std())
+
+
+def prune_forest(forest, tolerance, node_value=None):
+    """
+    Remplace par une feuille chaque sous-arbre dont les feuilles s'écartent de moins de `tolerance`.
+
+    Les arbres du résultat sont réécrits en ordre préfixe (enfant gauche = nœud
+    suivant). Avec une tolérance nulle, seuls les sous-arbres aux feuilles
+    identiques sont fusionnés : les prédictions sont inchangées.
+
+    Args:
+        forest: forêt compilée
+        tolerance: écart maximal (max - min) entre les feuilles d'un sous-arbre fusionné
+        node_value: valeur de chaque nœud, internes compris (moyenne d'entraînement
+            du nœud pour une forêt sklearn) ; sans elle, le milieu de l'intervalle
+            des feuilles est utilisé
+
+    Returns:
+        CompiledForest: forêt élaguée, mêmes métadonnées que `forest`
+    """
+    if tolerance < 0:
+        raise ValueError(f"La tolérance doit être positive, reçu {tolerance}")
+
+    left, right = forest.left.tolist(), forest.right.tolist()
+    value = forest.value.tolist()
+    node_value = None if node_value is None else np.asarray(node_value, dtype=np.float64).tolist()
+    lo, hi = list(value), list(value)
+
+    feature, threshold, right_out, value_out, default_left, roots = [], [], [], [], [], []
+    for root in forest.roots.tolist():
+        # Bornes des feuilles de chaque sous-arbre (descendants avant ancêtres)
+        order, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if left[node] != node:
+                stack.extend((right[node], left[node]))
+        for node in reversed(order):
+            if left[node] != node:
+                lo[node] = min(lo[left[node]], lo[right[node]])
+                hi[node] = max(hi[left[node]], hi[right[node]])
+
+        # Réécriture en ordre préfixe ; l'indice de l'enfant droit est renseigné à sa visite
+        roots.append(len(feature))
+        stack = [(root, None)]
+        while stack:
+            node, parent = stack.pop()
+            position = len(feature)
+            if parent is not None:
+                right_out[parent] = position
+            internal = left[node] != node
+            if internal and hi[node] - lo[node] > tolerance:
+                feature.append(forest.feature[node])
+                threshold.append(forest.threshold[node])
+                right_out.append(-1)
+                value_out.append(0.0)
+                default_left.append(forest.default_left[node])
+                stack.append((right[node], position))
+                stack.append((left[node], None))
+                continue
+
+            if not internal or lo[node] == hi[node]:
+                leaf = lo[node]
+            elif node_value is not None:
+                leaf = node_value[node]
+            else:
+                leaf = (lo[node] + hi[node]) / 2
+            feature.append(0)
+            threshold.append(np.inf)
+            right_out.append(position)
+            value_out.append(leaf)
+            default_left.append(False)
+
+    right_out = np.array(right_out, dtype=np.int64)
+    own = np.arange(len(right_out))
+    left_out = np.where(right_out == own, own, own + 1)
+    return CompiledForest(
+        feature, threshold, left_out, right_out, value_out, default_left, roots,
+        n_features=forest.n_features, aggregation=forest.aggregation,
+        base_score=forest.base_score, input_dtype=forest.input_dtype, source=forest.source
+    )
+
+
+def save_compact_forest(forest, path, scaler=None, tolerance=0.0):
+    """
+    Écrit l'artefact compact d'une forêt travaillant sur des entrées float32.
+
+    Args:
+        forest: forêt compilée (élaguée ou non), avant repli du scaler
+        path: fichier .npz écrit (compressé)
+        scaler: StandardScaler à replier dans les seuils au chargement (optionnel)
+        tolerance: tolérance d'élagage, conservée dans les métadonnées
+    """
+    if forest.input_dtype != np.float32:
+        raise ValueError(
+            "Seules les forêts à entrées float32 se compressent sans perte de décision : "
+            "compresser la forêt standardisée et replier le scaler au chargement"
+        )
+    # Ordre préfixe exigé par le format (tolérance nulle : prédictions inchangées)
+    forest = prune_forest(forest, 0.0)
+    is_leaf = forest.left == np.arange(forest.n_nodes)
+    internal = ~is_leaf
+
+    node_type = index_dtype(forest.n_nodes - 1)
+    arrays = {
+        'is_leaf': np.packbits(is_leaf),
+        'feature': forest.feature[internal].astype(index_dtype(forest.n_features - 1)),
+        'threshold': _round_down(forest.threshold[internal], np.dtype(np.float32)),
+        'right': forest.right[internal].astype(node_type),
+        'value': forest.value[is_leaf].astype(np.float32),
+        'default_left': np.packbits(forest.default_left[internal]),
+        'roots': forest.roots.astype(node_type),
+    }
+    if scaler is not None:
+        arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+        arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    metadata = {
+        'format_version': COMPACT_FORMAT_VERSION,
+        'n_nodes': forest.n_nodes,
+        'n_features': forest.n_features,
+        'aggregation': forest.aggregation,
+        'base_score': forest.base_score,
+        'tolerance': tolerance,
+        'source': forest.source,
+    }
+    np.savez_compressed(path, metadata=np.array(json.dumps(metadata)), **arrays)
+    return Path(path)
+
+
+def load_compact_forest(path, fold=True):
+    """
+    Charge un artefact compact.
+
+    Args:
+        path: fichier écrit par save_compact_forest
+        fold: replier le scaler éventuel dans les seuils (prédiction sur les features brutes)
+
+    Returns:
+        CompiledForest
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        metadata = json.loads(str(archive['metadata']))
+        if metadata['format_version'] != COMPACT_FORMAT_VERSION:
+            raise ValueError(f"Version d'artefact compact non supportée : {metadata['format_version']}")
+        arrays = {name: archive[name] for name in archive.files if name != 'metadata'}
+
+    n_nodes = metadata['n_nodes']
+    is_leaf = np.unpackbits(arrays['is_leaf'], count=n_nodes).astype(bool)
+    internal = ~is_leaf
+    own = np.arange(n_nodes)
+
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    feature[internal] = arrays['feature']
+    threshold = np.full(n_nodes, np.inf)
+    threshold[internal] = arrays['threshold']
+    right = own.copy()
+    right[internal] = arrays['right']
+    value = np.zeros(n_nodes)
+    value[is_leaf] = arrays['value']
+    default_left = np.zeros(n_nodes, dtype=bool)
+    default_left[internal] = np.unpackbits(arrays['default_left'], count=int(internal.sum())).astype(bool)
+
+    forest = CompiledForest(
+        feature, threshold, np.where(is_leaf, own, own + 1), right, value, default_left,
+        arrays['roots'], n_features=metadata['n_features'], aggregation=metadata['aggregation'],
+        base_score=metadata['base_score'], input_dtype=np.float32, source=metadata['source']
+    )
+    if fold and 'scaler_mean' in arrays:
+        scaler = BundledScaler(arrays['scaler_mean'], arrays['scaler_scale'])
+        forest = fold_scaler(forest, scaler, source=metadata['source'])
+    return forest
+
+
+def forest_nbytes(forest):
+    """Mémoire occupée par les tableaux de nœuds d'une forêt compilée."""
+    return sum(
+        getattr(forest, name).nbytes
+        for name in ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'roots')
+    )
+
+
+def model_nbytes(model):
+    """
+    Mémoire des tableaux de nœuds d'une forêt sklearn dépicklée (None pour les autres modèles).
+
+    Les nœuds sont alloués par le code Cython des arbres : on lit leur taille
+    dans l'état sérialisé plutôt que par un traceur d'allocations Python.
+    """
+    if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+        return None
+    return sum(
+        state['nodes'].nbytes + state['values'].nbytes
+        for state in (estimator.tree_.__getstate__() for estimator in model.estimators_)
+    )
+
+
+def _median_latency(func, X, repeat):
+    func(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def compression_report(model_path, scaler_path, X_test, y_test, fractions=DEFAULT_TOLERANCES,
+                       repeat=20, workdir=None):
+    """
+    Compromis taille / latence / RMSE de l'artefact compact face au modèle d'origine.
+
+    Args:
+        model_path, scaler_path: fichiers joblib du modèle et de son scaler
+        X_test, y_test: jeu de test (features brutes, cible)
+        fractions: tolérances d'élagage relatives (voir relative_tolerance)
+        repeat: nombre de mesures de latence par variante
+        workdir: dossier des artefacts écrits pour la mesure (temporaire par défaut)
+
+    Returns:
+        list: une ligne par variante (dictionnaires)
+    """
+    import tempfile
+
+    import joblib
+
+    model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+    X_scaled = np.asarray(scaler.transform(X_test), dtype=np.float64)
+    row = X_scaled[0]
+    reference = model.predict(X_scaled)
+
+    def summary(variant, nodes, disk, memory, predict, predict_one, predictions, tolerance):
+        return {
+            'variant': variant,
+            'tolerance': tolerance,
+            'nodes': nodes,
+            'disk_bytes': disk,
+            'memory_bytes': memory,
+            'batch_seconds': _median_latency(predict, X_scaled, repeat),
+            'row_seconds': _median_latency(predict_one, row, repeat * 10),
+            'rmse': float(np.sqrt(np.mean((predictions - y_test) ** 2))),
+            'max_deviation': float(np.max(np.abs(predictions - reference))),
+        }
+
+    engine = compile_forest(model)
+    node_value, _ = _sklearn_node_arrays(model)
+
+    rows = [summary(
+        'original', engine.n_nodes, Path(model_path).stat().st_size,
+        model_nbytes(model),
+        model.predict, lambda x: model.predict(x.reshape(1, -1)), reference, None
+    )]
+
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        # Moteur compilé non compressé (format .npz des forêts fusionnées)
+        path = Path(directory) / "compiled.npz"
+        save_forest(engine, path)
+        rows.append(summary(
+            'compilé', engine.n_nodes, path.stat().st_size, forest_nbytes(engine),
+            engine.predict, engine.predict_one, engine.predict(X_scaled), None
+        ))
+        for fraction in fractions:
+            tolerance = relative_tolerance(engine, fraction)
+            path = Path(directory) / f"compact_{fraction}.npz"
+            save_compact_forest(prune_forest(engine, tolerance, node_value), path, tolerance=tolerance)
+            compact = load_compact_forest(path)
+            rows.append(summary(
+                f"compact {fraction:g}", compact.n_nodes, path.stat().st_size,
+                forest_nbytes(compact),
+                compact.predict, compact.predict_one, compact.predict(X_scaled), tolerance
+            ))
+    return rows
+
+
+def _kilobytes(size):
+    return "—" if size is None else f"{size / 1024:.1f}"
+
+
+def main():
+    from .artifacts import FEATURES_FILE, FUSED_MODELS
+    from .ingest import default_cleaned_path
+    from .training import TARGETS, load_training_data, split_train_test
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models-dir", type=Path, default=Path("models"))
+    parser.add_argument("--data", type=Path, default=default_cleaned_path(Path("data")))
+    parser.add_argument("--tolerances", type=float, nargs="+", default=list(DEFAULT_TOLERANCES),
+                        help="tolérances relatives (fraction de l'écart-type des feuilles)")
+    parser.add_argument("--write", type=float, default=None, metavar="TOLERANCE",
+                        help="écrit models/<nom>_compact.npz élagué à cette tolérance relative")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    import joblib
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    feature_names = joblib.load(args.models_dir / FEATURES_FILE)
+    X, targets = load_training_data(args.data)
+    _, test = split_train_test(len(X))
+    X_test = X.iloc[test][feature_names]
+    print(f"Jeu de test du notebook 02 : {len(test)} bâtiments\n")
+
+    for name, (model_file, scaler_file) in FUSED_MODELS.items():
+        model_path = args.models_dir / model_file
+        if not model_path.exists():
+            continue
+        y_test = targets[name].to_numpy(dtype=np.float64)[test]
+        print(f"{name} ({TARGETS[name]})")
+        print(f"{'Variante':<18}{'Nœuds':>8}{'Disque (Ko)':>13}{'Mémoire (Ko)':>14}"
+              f"{'Batch (ms)':>12}{'1 ligne (µs)':>14}{'RMSE':>14}{'Écart max':>12}")
+        for row in compression_report(model_path, args.models_dir / scaler_file, X_test, y_test,
+                                      args.tolerances, args.repeat):
+            print(f"{row['variant']:<18}{row['nodes']:>8,}{row['disk_bytes'] / 1024:>13.1f}"
+                  f"{_kilobytes(row['memory_bytes']):>14}{row['batch_seconds'] * 1e3:>12.2f}"
+                  f"{row['row_seconds'] * 1e6:>14.1f}{row['rmse']:>14,.1f}{row['max_deviation']:>12.4g}")
+        print()
+
+        if args.write is not None:
+            from .artifacts import file_fingerprint
+
+            model, scaler = joblib.load(model_path), joblib.load(args.models_dir / scaler_file)
+            engine = compile_forest(model)
+            engine.source = file_fingerprint(model_path, args.models_dir / scaler_file)
+            node_value, _ = _sklearn_node_arrays(model)
+            tolerance = relative_tolerance(engine, args.write)
+            path = save_compact_forest(
+                prune_forest(engine, tolerance, node_value), compact_path(args.models_dir, name),
+                scaler=scaler, tolerance=tolerance
+            )
+            print(f"✅ {path}\n")
+
+
+if __name__ == "__main__":
+    main()
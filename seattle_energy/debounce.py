@@ -0,0 +1,52 @@
+"""
+Anti-rebond des entrées de l'application.
+
+Glisser un curseur de la sidebar déclenche un rendu par valeur intermédiaire.
+Les étapes coûteuses (explication SHAP) n'ont de sens que pour la valeur
+finale : Debouncer mémorise la dernière valeur observée et l'instant où elle
+a changé, et ne la déclare stable qu'après `delay` secondes sans changement.
+"""
+
+import time
+
+_UNSET = object()
+
+
+class Debouncer:
+    """
+    Valeur d'entrée déclarée stable après `delay` secondes sans changement.
+
+    La première valeur observée (chargement de la page) est stable d'emblée :
+    rien n'est différé tant que l'utilisateur n'a pas touché aux entrées.
+
+    Args:
+        delay: durée sans changement (secondes) avant que la valeur soit stable
+        clock: horloge monotone (secondes), remplaçable dans les tests
+    """
+
+    def __init__(self, delay, clock=time.monotonic):
+        self.delay = delay
+        self._clock = clock
+        self.value = _UNSET
+        self.changed_at = None
+        self.changes = 0
+
+    def observe(self, value):
+        """Enregistre la valeur courante ; retourne True si elle a changé."""
+        if self.value is not _UNSET and value == self.value:
+            return False
+        if self.value is not _UNSET:
+            self.changed_at = self._clock()
+            self.changes += 1
+        self.value = value
+        return True
+
+    def remaining(self):
+        """Secondes restantes avant que la valeur courante soit stable (0 si elle l'est)."""
+        if self.changed_at is None:
+            return 0.0
+        return max(0.0, self.changed_at + self.delay - self._clock())
+
+    @property
+    def settled(self):
+        return self.remaining() == 0.0
@@ -0,0 +1,166 @@
+"""
+Explications SHAP d'une ligne pour une forêt moyennée, avec repli sous budget de temps.
+
+Le TreeSHAP exact est délégué à shap.TreeExplainer (implémentation C++,
+importée et construite à la première explication exacte). Une version NumPy
+sur les tableaux aplatis de la forêt a été mesurée plus lente sur la forêt
+énergie (6,6 ms par ligne contre 3,8 ms, 2,6 ms par lot) et a été retirée.
+
+Le calcul exact de shap n'est pas interruptible : le budget de temps est
+appliqué avant le calcul, à partir de la durée moyenne des explications
+exactes déjà observées. Si elle dépasse le budget (ou si le budget est épuisé),
+l'attribution de Saabas est retournée à la place : variations de la valeur des
+nœuds le long du chemin de décision, précalculées par feuille sur les tableaux
+aplatis de la forêt (un parcours des arbres, sans shap).
+
+Tant qu'aucune durée n'a été mesurée (préchauffage de l'application, par
+exemple), une explication sous budget retourne aussi Saabas et lance la
+mesure en arrière-plan : import de shap, construction de l'explainer et
+premier calcul exact ne bloquent jamais l'appelant.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .bundle import _sklearn_node_arrays
+
+# Méthodes d'attribution retournées par FastTreeExplainer.explain
+TREE_SHAP, SAABAS = 'tree_shap', 'saabas'
+
+
+class FastTreeExplainer:
+    """
+    TreeSHAP exact (shap) et attribution de Saabas pour une forêt compilée moyennée.
+
+    Args:
+        forest: forêt compilée (agrégation 'mean')
+        node_value: valeur de chaque nœud, internes compris
+        model: modèle accepté par shap.TreeExplainer (forêt sklearn ou dictionnaire
+            d'arbres de shap)
+    """
+
+    def __init__(self, forest, node_value, model):
+        if forest.aggregation != 'mean':
+            raise ValueError("Seules les forêts moyennées (Random Forest) sont supportées")
+        self.forest = forest
+        node_value = np.asarray(node_value, dtype=np.float64)
+        self.scale = 1.0 / forest.n_trees
+        self.expected_value = float(np.sum(node_value[forest.roots] * self.scale))
+        self._model = model
+        self._shap_explainer = None
+        self._lock = threading.Lock()
+        # Durée moyenne (secondes) d'une explication exacte, pour le budget de temps
+        self.exact_seconds = None
+        self._calibration = None
+        self._prepare_saabas(node_value)
+
+    @classmethod
+    def from_model(cls, model, forest):
+        """Construit l'explainer d'un RandomForestRegressor ou d'un modèle issu du bundle."""
+        if getattr(model, 'node_value', None) is not None:
+            return cls(forest, model.node_value, model.shap_model())
+        if hasattr(model, 'estimators_'):
+            node_value, _ = _sklearn_node_arrays(model)
+            return cls(forest, node_value, model)
+        raise TypeError(f"Modèle non supporté par l'explainer rapide : {type(model).__name__}")
+
+    def _prepare_saabas(self, node_value):
+        """Contribution (valeur enfant - valeur parent) cumulée par feuille et feature."""
+        forest = self.forest
+        n_nodes = forest.n_nodes
+        nodes = np.arange(n_nodes)
+        internal = forest.left != nodes
+        leaves = np.flatnonzero(~internal)
+
+        parent = np.full(n_nodes, -1, dtype=np.int64)
+        parent[forest.left[internal]] = nodes[internal]
+        parent[forest.right[internal]] = nodes[internal]
+
+        # Remontée simultanée de toutes les feuilles : une étape (parent, enfant) par niveau
+        step_leaf, step_parent, step_child = [], [], []
+        rows, current = np.arange(len(leaves)), leaves
+        while len(current):
+            up = parent[current]
+            keep = up >= 0
+            rows, current, up = rows[keep], current[keep], up[keep]
+            step_leaf.append(rows)
+            step_parent.append(up)
+            step_child.append(current)
+            current = up
+        step_leaf = np.concatenate(step_leaf)
+        step_parent = np.concatenate(step_parent)
+        step_child = np.concatenate(step_child)
+
+        n_features = forest.n_features
+        cell = step_leaf * n_features + forest.feature[step_parent].astype(np.int64)
+        saabas = np.zeros(len(leaves) * n_features)
+        np.add.at(saabas, cell, node_value[step_child] - node_value[step_parent])
+        self._saabas = saabas.reshape(len(leaves), n_features) * self.scale
+        self._leaf_row = np.full(n_nodes, -1, dtype=np.int64)
+        self._leaf_row[leaves] = np.arange(len(leaves))
+
+    def _explainer(self):
+        """shap.TreeExplainer du modèle, construit à la première explication exacte."""
+        with self._lock:
+            if self._shap_explainer is None:
+                import shap
+
+                self._shap_explainer = shap.TreeExplainer(self._model)
+            return self._shap_explainer
+
+    def shap_values(self, X):
+        """Valeurs SHAP exactes, forme (n_rows, n_features) comme shap.TreeExplainer."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.forest.n_features)
+        explainer = self._explainer()
+        start = time.perf_counter()
+        values = np.asarray(explainer.shap_values(X), dtype=np.float64).reshape(X.shape)
+        if len(X):
+            seconds = (time.perf_counter() - start) / len(X)
+            previous = self.exact_seconds
+            self.exact_seconds = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+        return values
+
+    def tree_shap(self, row):
+        """Valeurs SHAP exactes d'une ligne (n_features,)."""
+        return self.shap_values(row)[0]
+
+    def _calibrate(self, row):
+        """Mesure la durée d'une explication exacte dans un thread (une seule fois)."""
+        with self._lock:
+            if self._calibration is not None:
+                return
+            self._calibration = threading.Thread(
+                target=self.tree_shap, args=(np.array(row, dtype=np.float64),),
+                name="shap-calibration", daemon=True
+            )
+        self._calibration.start()
+
+    def saabas(self, row):
+        """Attribution de Saabas d'une ligne (n_features,), en un seul parcours des arbres."""
+        leaves = self.forest.apply(np.asarray(row).reshape(1, -1))[:, 0]
+        return self._saabas[self._leaf_row[leaves]].sum(axis=0)
+
+    def explain(self, row, time_budget=None):
+        """
+        Attribution d'une ligne, exacte si elle tient dans le budget de temps.
+
+        Args:
+            row: ligne de features (dans l'espace d'entrée de la forêt)
+            time_budget: durée maximale (secondes) du calcul exact, None pour illimité ;
+                comparée à la durée moyenne des explications exactes précédentes
+                (Saabas tant qu'aucune n'a été mesurée)
+
+        Returns:
+            tuple: (valeurs par feature, méthode 'tree_shap' ou 'saabas')
+        """
+        if time_budget is not None:
+            if time_budget <= 0:
+                return self.saabas(row), SAABAS
+            if self.exact_seconds is None:
+                self._calibrate(row)
+                return self.saabas(row), SAABAS
+            if self.exact_seconds > time_budget:
+                return self.saabas(row), SAABAS
+        return self.tree_shap(row), TREE_SHAP
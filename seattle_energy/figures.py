@@ -0,0 +1,56 @@
+"""
+Gabarits de figures Plotly mis à jour en place.
+
+Construire une figure (validation de chaque propriété, px.bar qui passe par un
+DataFrame) coûte des dizaines de millisecondes, alors qu'entre deux rendus
+seules quelques valeurs changent. FigureTemplate construit la figure une fois
+pour tout le processus ; chaque rendu remplace ses tableaux de données sous
+verrou, puis la sérialise (st.plotly_chart) avant de rendre la main : deux
+sessions ne peuvent pas voir les données l'une de l'autre.
+"""
+
+import contextlib
+import threading
+
+
+class FigureTemplate:
+    """
+    Figure construite une seule fois dont seules les données changent à chaque rendu.
+
+    Args:
+        build: fonction sans argument construisant la figure
+        update: fonction (figure, **données) remplaçant les données en place
+    """
+
+    def __init__(self, build, update):
+        self._build = build
+        self._update = update
+        self._figure = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.updates = 0
+
+    def build(self):
+        """Construit la figure si ce n'est pas déjà fait (préchauffage)."""
+        with self._lock:
+            self._ensure_built()
+        return self
+
+    def _ensure_built(self):
+        if self._figure is None:
+            self._figure = self._build()
+            self.builds += 1
+
+    @contextlib.contextmanager
+    def render(self, **data):
+        """
+        Figure mise à jour avec `data`, réservée jusqu'à la sortie du bloc.
+
+        La figure ne doit être utilisée (affichée, sérialisée) qu'à l'intérieur du bloc.
+        """
+        with self._lock:
+            self._ensure_built()
+            with self._figure.batch_update():
+                self._update(self._figure, **data)
+            self.updates += 1
+            yield self._figure
@@ -0,0 +1,128 @@
+"""
+Cache du prétraitement des plis de validation croisée.
+
+Sans cache, chaque candidat de chaque famille refait pour chaque pli la même
+transformation log1p des colonnes asymétriques et réajuste la même
+standardisation. FoldCache calcule une seule fois les matrices train/test
+prétraitées d'un pli, identifiées par l'empreinte de ses indices (sous-
+échantillon du palier compris) et de la configuration de transformation, et
+les sert en lecture seule à tous les candidats et à toutes les familles.
+
+Avec un dossier, les matrices sont écrites en .npy et projetées en mémoire :
+les processus d'entraînement partagent les mêmes pages sans copie.
+
+Benchmark sur la validation croisée à 10 plis : python scripts/benchmark_fold_cache.py
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+def preprocess(X_train, X_test, log_positions):
+    """log1p des colonnes asymétriques puis standardisation ajustée sur X_train."""
+    X_train = np.array(X_train, dtype=np.float64)
+    X_test = np.array(X_test, dtype=np.float64)
+    if log_positions:
+        X_train[:, log_positions] = np.log1p(X_train[:, log_positions])
+        X_test[:, log_positions] = np.log1p(X_test[:, log_positions])
+    mean = X_train.mean(axis=0)
+    scale = X_train.std(axis=0)
+    scale[scale == 0] = 1.0
+    return (X_train - mean) / scale, (X_test - mean) / scale
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class FoldCache:
+    """
+    Matrices train/test prétraitées de chaque pli, calculées une seule fois.
+
+    Args:
+        X: features brutes, lignes indexées par les plis
+        folds: liste de (indices train, indices test)
+        directory: dossier des matrices partagées entre processus (None : mémoire du processus)
+    """
+
+    def __init__(self, X, folds, directory=None):
+        self.X = X
+        self.folds = folds
+        self.directory = Path(directory) if directory is not None else None
+        self._arrays = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def key(self, fold, resources, log_positions):
+        """Empreinte des indices du pli (limités à `resources` lignes) et de la transformation."""
+        config = (fold, resources, tuple(log_positions))
+        key = self._keys.get(config)
+        if key is None:
+            train, test = self.folds[fold]
+            digest = hashlib.sha256(np.ascontiguousarray(train[:resources], dtype=np.int64).tobytes())
+            digest.update(np.ascontiguousarray(test, dtype=np.int64).tobytes())
+            digest.update(f"log1p:{list(log_positions)};standard".encode())
+            key = self._keys[config] = digest.hexdigest()[:24]
+        return key
+
+    def get(self, fold, resources, log_positions):
+        """
+        Matrices prétraitées (train, test) d'un pli, en lecture seule.
+
+        Args:
+            fold: numéro du pli
+            resources: nombre de lignes d'entraînement utilisées (préfixe des indices)
+            log_positions: colonnes passées en log1p
+        """
+        key = self.key(fold, resources, log_positions)
+        with self._lock:
+            arrays = self._arrays.get(key)
+            if arrays is None:
+                arrays = self._load(key)
+            if arrays is None:
+                self.misses += 1
+                train, test = self.folds[fold]
+                arrays = self._store(key, preprocess(self.X[train[:resources]], self.X[test], log_positions))
+            else:
+                self.hits += 1
+            self._arrays[key] = arrays
+        return arrays
+
+    def warm(self, resources_levels, log_configs):
+        """Calcule à l'avance tous les plis pour les paliers et transformations donnés."""
+        for log_positions in log_configs:
+            for resources in resources_levels:
+                for fold in range(len(self.folds)):
+                    self.get(fold, resources, log_positions)
+        return self
+
+    def _paths(self, key):
+        return self.directory / f"{key}.train.npy", self.directory / f"{key}.test.npy"
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        paths = self._paths(key)
+        if not all(path.exists() for path in paths):
+            return None
+        return tuple(np.load(path, mmap_mode='r') for path in paths)
+
+    def _store(self, key, arrays):
+        if self.directory is None:
+            return tuple(_read_only(array) for array in arrays)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path, array in zip(self._paths(key), arrays):
+            temporary = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+            np.save(temporary, array)
+            os.replace(temporary, path)
+        return self._load(key)
@@ -0,0 +1,431 @@
+"""
+Moteur d'inférence compilé pour les forêts d'arbres (Random Forest et XGBoost).
+
+Les arbres sont aplatis une fois pour toutes en tableaux NumPy contigus
+(feature, seuil, enfants, valeur de feuille). Les prédictions sont ensuite
+calculées sans passer par la validation et le dispatch de scikit-learn :
+
+- parcours vectorisé de tous les arbres à la fois pour les batchs ;
+- boucle Python serrée sur des listes pour une ligne unique (slider Streamlit).
+
+Les résultats sont identiques bit à bit à `model.predict` : mêmes conversions
+de type en entrée, mêmes règles de comparaison et même ordre d'accumulation.
+"""
+
+import json
+
+import numpy as np
+
+# Objectifs XGBoost dont la sortie est la somme brute des feuilles (lien identité)
+_XGB_IDENTITY_OBJECTIVES = {
+    'reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror'
+}
+
+# Lignes parcourues ensemble par le chemin vectorisé : au-delà, les tableaux de
+# travail (n_trees × lignes) sortent du cache et le parcours ralentit
+_APPLY_BLOCK_ROWS = 1024
+
+
+class CompiledForest:
+    """
+    Forêt d'arbres aplatie en tableaux contigus.
+
+    Tous les arbres partagent les mêmes tableaux de nœuds (indices globaux).
+    Un nœud interne envoie l'échantillon à gauche si `x[feature] <= threshold`
+    (ou si la valeur est manquante et `default_left` est vrai). Les feuilles
+    pointent sur elles-mêmes.
+
+    Args:
+        feature: indice de la feature testée par nœud (0 pour les feuilles)
+        threshold: seuil de décision par nœud (float64)
+        left, right: indices globaux des enfants (la feuille pointe sur elle-même)
+        value: valeur de sortie des feuilles (float64)
+        default_left: direction des valeurs manquantes par nœud
+        roots: indice de la racine de chaque arbre
+        n_features: nombre de features attendues en entrée
+        aggregation: 'mean' (Random Forest) ou 'sum' (boosting, accumulation float32)
+        base_score: valeur initiale de l'accumulation pour 'sum'
+        input_dtype: type dans lequel les entrées sont converties avant comparaison
+        source: empreinte optionnelle des artefacts dont la forêt est issue
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left, roots,
+                 n_features, aggregation='mean', base_score=0.0, input_dtype=np.float32,
+                 source=None):
+        if aggregation not in ('mean', 'sum'):
+            raise ValueError(f"Agrégation inconnue : {aggregation!r}")
+
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.n_features = int(n_features)
+        self.aggregation = aggregation
+        self.base_score = float(base_score)
+        self.input_dtype = np.dtype(input_dtype)
+        self.source = source
+        self._lists = None
+        self._routing = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _check_input(self, X):
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X doit avoir {self.n_features} features, reçu la forme {X.shape}"
+            )
+        return X
+
+    def _routing_tables(self):
+        """Tables de parcours précalculées pour le chemin vectorisé."""
+        if self._routing is None:
+            n_nodes = self.n_nodes
+            is_leaf = self.left == np.arange(n_nodes)
+            # Enfants entrelacés [gauche, droite] ; un enfant feuille est codé ~indice (< 0)
+            children = np.stack([self.left, self.right], axis=1).astype(np.intp).ravel()
+            children = np.where(is_leaf[children], ~children, children)
+            self._routing = {
+                'feature': self.feature.astype(np.intp),
+                'threshold': _round_down(self.threshold, self.input_dtype),
+                'children': children,
+                'is_leaf': is_leaf
+            }
+        return self._routing
+
+    def apply(self, X):
+        """Retourne l'indice global de la feuille atteinte, forme (n_trees, n_rows)."""
+        X = self._check_input(X)
+        if X.shape[0] <= _APPLY_BLOCK_ROWS:
+            return self._apply_block(X)
+        return np.concatenate([
+            self._apply_block(X[start:start + _APPLY_BLOCK_ROWS])
+            for start in range(0, X.shape[0], _APPLY_BLOCK_ROWS)
+        ], axis=1)
+
+    def _apply_block(self, X):
+        n_rows, n_features = X.shape
+        tables = self._routing_tables()
+        feature, threshold, children = tables['feature'], tables['threshold'], tables['children']
+
+        flat_X = np.ascontiguousarray(X).ravel()
+        has_nan = bool(np.isnan(flat_X).any())
+
+        # Une entrée par couple (arbre, ligne) encore en cours de parcours
+        node = np.repeat(self.roots.astype(np.intp), n_rows)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        slot = np.arange(node.size, dtype=np.intp)
+        leaves = node.copy()
+
+        # Arbres réduits à une feuille : déjà terminés
+        active = ~tables['is_leaf'][node]
+        node, row_offset, slot = node[active], row_offset[active], slot[active]
+
+        while node.size:
+            x = flat_X[row_offset + feature[node]]
+            go_right = x > threshold[node]
+            if has_nan:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.default_left[node[missing]]
+            node = children[2 * node + go_right]
+
+            # Compaction : on retire les couples arrivés sur une feuille
+            done = node < 0
+            if done.any():
+                leaves[slot[done]] = ~node[done]
+                active = ~done
+                node, row_offset, slot = node[active], row_offset[active], slot[active]
+
+        return leaves.reshape(self.n_trees, n_rows)
+
+    def predict(self, X):
+        """Prédit un batch de lignes (identique à `model.predict`)."""
+        X = self._check_input(X)
+        if X.shape[0] == 1:
+            return np.array([self.predict_one(X[0])], dtype=self._output_dtype())
+
+        leaf_values = self.value[self.apply(X)]
+        return self._aggregate(leaf_values)
+
+    def predict_one(self, row):
+        """Prédit une seule ligne par une boucle serrée sur des listes Python."""
+        if self._lists is None:
+            self._lists = (
+                self.feature.tolist(), self.threshold.tolist(), self.left.tolist(),
+                self.right.tolist(), self.value.tolist(), self.default_left.tolist(),
+                self.roots.tolist()
+            )
+        feature, threshold, left, right, value, default_left, roots = self._lists
+
+        # Conversion identique au chemin batch (float32 puis promotion exacte en float)
+        x = np.asarray(row, dtype=self.input_dtype).ravel().tolist()
+
+        if self.aggregation == 'mean':
+            total = 0.0
+            for node in roots:
+                while left[node] != node:
+                    v = x[feature[node]]
+                    if v <= threshold[node] or (v != v and default_left[node]):
+                        node = left[node]
+                    else:
+                        node = right[node]
+                total += value[node]
+            return total / len(roots)
+
+        total = np.float32(self.base_score)
+        for node in roots:
+            while left[node] != node:
+                v = x[feature[node]]
+                if v <= threshold[node] or (v != v and default_left[node]):
+                    node = left[node]
+                else:
+                    node = right[node]
+            total = total + np.float32(value[node])
+        return total
+
+    def _output_dtype(self):
+        return np.float64 if self.aggregation == 'mean' else np.float32
+
+    def _aggregate(self, leaf_values):
+        # Accumulation arbre par arbre, dans l'ordre, comme scikit-learn et XGBoost
+        if self.aggregation == 'mean':
+            out = np.zeros(leaf_values.shape[1], dtype=np.float64)
+            for tree_values in leaf_values:
+                out += tree_values
+            out /= self.n_trees
+            return out
+
+        out = np.full(leaf_values.shape[1], self.base_score, dtype=np.float32)
+        for tree_values in leaf_values.astype(np.float32):
+            out += tree_values
+        return out
+
+
+def _round_down(values, dtype):
+    """Arrondit vers le bas dans `dtype` : pour x de ce type, x <= v ⇔ x <= résultat."""
+    rounded = values.astype(dtype)
+    too_high = rounded > values
+    rounded[too_high] = np.nextafter(rounded[too_high], dtype.type(-np.inf))
+    return rounded
+
+
+def _concatenate_trees(trees):
+    """Concatène des arbres locaux (indices par arbre) en tableaux globaux."""
+    feature, threshold, left, right, value, default_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        n_nodes = len(tree['feature'])
+        is_leaf = tree['left'] < 0
+        own = np.arange(n_nodes) + offset
+
+        feature.append(np.where(is_leaf, 0, tree['feature']))
+        threshold.append(np.where(is_leaf, np.inf, tree['threshold']))
+        left.append(np.where(is_leaf, own, tree['left'] + offset))
+        right.append(np.where(is_leaf, own, tree['right'] + offset))
+        value.append(np.where(is_leaf, tree['value'], 0.0))
+        default_left.append(tree['default_left'] & ~is_leaf)
+        roots.append(offset)
+        offset += n_nodes
+
+    return (
+        np.concatenate(feature), np.concatenate(threshold), np.concatenate(left),
+        np.concatenate(right), np.concatenate(value), np.concatenate(default_left),
+        np.array(roots)
+    )
+
+
+def compile_sklearn_forest(model):
+    """Aplatit un RandomForestRegressor (ou tout ensemble d'arbres sklearn moyenné)."""
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Seules les forêts à une sortie sont supportées")
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+        if missing_left is None:
+            missing_left = np.zeros(tree.node_count, dtype=bool)
+        trees.append({
+            'feature': tree.feature,
+            'threshold': tree.threshold,
+            'left': tree.children_left,
+            'right': tree.children_right,
+            'value': tree.value[:, 0, 0],
+            'default_left': np.asarray(missing_left, dtype=bool)
+        })
+
+    # scikit-learn convertit X en float32 puis compare `x <= seuil` (float64)
+    return CompiledForest(
+        *_concatenate_trees(trees),
+        n_features=model.n_features_in_,
+        aggregation='mean',
+        input_dtype=np.float32
+    )
+
+
+def _xgb_base_score(config):
+    """Extrait base_score de la configuration XGBoost ('186.3' ou '[1.86E2]')."""
+    raw = config['learner']['learner_model_param']['base_score']
+    values = json.loads(raw) if raw.startswith('[') else [float(raw)]
+    if len(values) != 1:
+        raise ValueError("Seuls les modèles XGBoost à une sortie sont supportés")
+    return np.float32(values[0])
+
+
+def compile_xgboost(model):
+    """Aplatit un XGBRegressor (booster gbtree, objectif de régression à lien identité)."""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    config = json.loads(booster.save_config())
+    objective = config['learner']['objective']['name']
+    if objective not in _XGB_IDENTITY_OBJECTIVES:
+        raise ValueError(f"Objectif XGBoost non supporté : {objective}")
+
+    raw_model = json.loads(booster.save_raw('json'))
+    gradient_booster = raw_model['learner']['gradient_booster']
+    if gradient_booster['name'] != 'gbtree':
+        raise ValueError(f"Booster XGBoost non supporté : {gradient_booster['name']}")
+
+    trees = []
+    for tree in gradient_booster['model']['trees']:
+        left = np.array(tree['left_children'], dtype=np.int64)
+        split = np.array(tree['split_conditions'], dtype=np.float32)
+        # XGBoost compare `x < seuil` en float32 : équivalent à `x <= float32 précédent`
+        threshold = np.nextafter(split, np.float32(-np.inf)).astype(np.float64)
+        trees.append({
+            'feature': np.array(tree['split_indices'], dtype=np.int64),
+            'threshold': threshold,
+            'left': left,
+            'right': np.array(tree['right_children'], dtype=np.int64),
+            'value': split.astype(np.float64),
+            'default_left': np.array(tree['default_left'], dtype=bool)
+        })
+
+    return CompiledForest(
+        *_concatenate_trees(trees),
+        n_features=booster.num_features(),
+        aggregation='sum',
+        base_score=_xgb_base_score(config),
+        input_dtype=np.float32
+    )
+
+
+def _scaled_value(x, mean, scale, dtype):
+    """Valeur vue par les arbres : StandardScaler (float64) puis conversion dans `dtype`."""
+    return ((x - mean) / scale).astype(dtype).astype(np.float64)
+
+
+def fold_scaler(forest, scaler, source=None):
+    """
+    Replie un StandardScaler dans les seuils de la forêt.
+
+    La transformation x -> dtype((x - mean) / scale) est croissante pour chaque
+    feature : le test `scaled(x) <= seuil` équivaut donc à `x <= b`, où b est le
+    plus grand float64 vérifiant l'inégalité. b est trouvé par dichotomie sur
+    les float64, ce qui garantit des prédictions identiques bit à bit sur les
+    features brutes, sans aucun appel au scaler.
+
+    Args:
+        forest: forêt compilée travaillant sur les features standardisées
+        scaler: StandardScaler ajusté appliqué avant la forêt
+        source: empreinte des artefacts d'origine, conservée dans le résultat
+
+    Returns:
+        CompiledForest: forêt travaillant directement sur les features brutes (float64)
+    """
+    mean = scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(forest.n_features)
+    scale = scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(forest.n_features)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+    if mean.shape != (forest.n_features,):
+        raise ValueError("Le scaler ne correspond pas au nombre de features de la forêt")
+
+    internal = np.flatnonzero(forest.left != np.arange(forest.n_nodes))
+    features = forest.feature[internal]
+    target = forest.threshold[internal]
+    m, s = mean[features], scale[features]
+
+    def satisfied(x):
+        return _scaled_value(x, m, s, forest.input_dtype) <= target
+
+    # Encadrement initial autour de l'inversion naïve du seuil
+    guess = target * s + m
+    step = np.maximum(np.abs(guess), s) * 2.0 ** -20
+    lo, hi = guess - step, guess + step
+    for _ in range(64):
+        bad_lo = ~satisfied(lo)
+        bad_hi = satisfied(hi)
+        if not (bad_lo.any() or bad_hi.any()):
+            break
+        step = step * 2
+        lo = np.where(bad_lo, lo - step, lo)
+        hi = np.where(bad_hi, hi + step, hi)
+    else:
+        raise ValueError("Impossible d'encadrer certains seuils dans l'espace brut")
+
+    # Dichotomie jusqu'à ce que lo et hi soient deux float64 consécutifs
+    for _ in range(2100):
+        open_gap = np.nextafter(lo, np.inf) < hi
+        if not open_gap.any():
+            break
+        mid = lo + (hi - lo) / 2
+        mid = np.where(open_gap, mid, lo)
+        ok = satisfied(mid)
+        lo = np.where(open_gap & ok, mid, lo)
+        hi = np.where(open_gap & ~ok, mid, hi)
+
+    threshold = forest.threshold.copy()
+    threshold[internal] = lo
+
+    return CompiledForest(
+        forest.feature, threshold, forest.left, forest.right, forest.value,
+        forest.default_left, forest.roots, n_features=forest.n_features,
+        aggregation=forest.aggregation, base_score=forest.base_score,
+        input_dtype=np.float64, source=source
+    )
+
+
+# Tableaux sauvegardés par save_forest / load_forest
+_FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'roots')
+
+
+def save_forest(forest, path):
+    """Sauvegarde une forêt compilée au format .npz (tableaux + métadonnées)."""
+    metadata = {
+        'n_features': forest.n_features,
+        'aggregation': forest.aggregation,
+        'base_score': forest.base_score,
+        'input_dtype': forest.input_dtype.name,
+        'source': forest.source
+    }
+    np.savez(
+        path,
+        metadata=np.array(json.dumps(metadata)),
+        **{name: getattr(forest, name) for name in _FOREST_ARRAYS}
+    )
+
+
+def load_forest(path):
+    """Charge une forêt compilée sauvegardée par save_forest."""
+    with np.load(path, allow_pickle=False) as archive:
+        metadata = json.loads(str(archive['metadata']))
+        arrays = {name: archive[name] for name in _FOREST_ARRAYS}
+    return CompiledForest(**arrays, **metadata)
+
+
+def compile_forest(model):
+    """Compile un modèle d'arbres supporté (Random Forest sklearn ou XGBoost)."""
+    if hasattr(model, 'get_booster'):
+        return compile_xgboost(model)
+    if hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_'):
+        return compile_sklearn_forest(model)
+    raise TypeError(f"Modèle non supporté par le moteur compilé : {type(model).__name__}")
@@ -0,0 +1,153 @@
+"""
+Imputation ciblée des colonnes lacunaires, alternative rapide au MICE du notebook.
+
+IterativeImputer remodélise à chaque itération toutes les colonnes du tableau
+(numériques et one-hot), même celles qui n'ont aucune valeur manquante. GapImputer
+n'ajuste qu'un modèle par colonne réellement lacunaire à l'ajustement
+(ENERGYSTARScore, pourcentages d'énergie, quelques surfaces), une seule fois,
+sur les lignes où elle est renseignée, avec un HistGradientBoostingRegressor
+qui accepte lui-même des valeurs manquantes dans les prédicteurs.
+
+Les lignes sont imputées indépendamment les unes des autres : transform
+s'applique bloc par bloc et donne le même résultat qu'en une fois. L'imputer
+ajusté est sauvegardé (models/imputer.joblib) pour compléter de la même façon
+les entrées de l'application (score ENERGY STAR absent d'un portefeuille).
+
+Benchmark contre le MICE : python scripts/benchmark_imputation.py
+"""
+
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+IMPUTER_FILE = "imputer.joblib"
+
+# Hyperparamètres du HistGradientBoostingRegressor par colonne (précision du
+# MICE dépassée sur ENERGYSTARScore pour un coût d'ajustement ~0,1 s)
+DEFAULT_ESTIMATOR_PARAMS = {'max_iter': 50, 'learning_rate': 0.2, 'max_leaf_nodes': 15}
+
+
+class GapImputer:
+    """
+    Impute chaque colonne lacunaire à partir des prédicteurs donnés.
+
+    Args:
+        predictors: colonnes utilisées pour prédire les valeurs manquantes
+            (défaut : toutes les autres colonnes)
+        estimator_params: paramètres du HistGradientBoostingRegressor
+        random_state: graine des estimateurs
+    """
+
+    def __init__(self, predictors=None, estimator_params=None, random_state=42):
+        self.predictors = predictors
+        self.estimator_params = estimator_params
+        self.random_state = random_state
+
+    def fit(self, X):
+        """Ajuste un estimateur par colonne ayant au moins une valeur manquante dans X."""
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        X = pd.DataFrame(X)
+        self.columns_ = [str(col) for col in X.columns]
+        values = X.to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+
+        # Repli : médiane de la colonne (0 si elle est entièrement vide)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.fill_values_ = np.nan_to_num(np.nanmedian(values, axis=0))
+
+        params = {**DEFAULT_ESTIMATOR_PARAMS, **(self.estimator_params or {})}
+        self.estimators_ = {}
+        self.predictors_ = {}
+        for j in np.flatnonzero(missing.any(axis=0)):
+            target = self.columns_[j]
+            predictors = [
+                col for col in (self.columns_ if self.predictors is None else self.predictors)
+                if col != target
+            ]
+            observed = ~missing[:, j]
+            if observed.sum() < 2 or not predictors:
+                continue
+            positions = [self.columns_.index(col) for col in predictors]
+            estimator = HistGradientBoostingRegressor(random_state=self.random_state, **params)
+            estimator.fit(values[observed][:, positions], values[observed, j])
+            self.estimators_[target] = estimator
+            self.predictors_[target] = positions
+        return self
+
+    @property
+    def target_columns(self):
+        """Colonnes imputées par un estimateur (les autres le sont par leur médiane)."""
+        return list(self.estimators_)
+
+    def transform(self, X):
+        """
+        Complète les valeurs manquantes de X (colonnes dans l'ordre de l'ajustement).
+
+        Returns:
+            np.ndarray: tableau float64 sans valeur manquante
+        """
+        if isinstance(X, pd.DataFrame):
+            unknown = [col for col in self.columns_ if col not in X]
+            if unknown:
+                raise KeyError(f"Colonnes absentes pour l'imputation : {unknown}")
+            X = X[self.columns_]
+        values = np.array(X, dtype=np.float64)
+        missing = np.isnan(values)
+
+        # Prédictions calculées sur les valeurs d'origine : indépendantes de l'ordre des colonnes
+        predictions = {}
+        for target, estimator in self.estimators_.items():
+            j = self.columns_.index(target)
+            rows = missing[:, j]
+            if rows.any():
+                predictions[j] = (rows, estimator.predict(values[rows][:, self.predictors_[target]]))
+        for j, (rows, predicted) in predictions.items():
+            values[rows, j] = predicted
+
+        remaining = np.isnan(values)
+        if remaining.any():
+            values[remaining] = np.broadcast_to(self.fill_values_, values.shape)[remaining]
+        return values
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+def save_imputer(imputer, models_dir=Path("models")):
+    """Sauvegarde le GapImputer ajusté dans models_dir/imputer.joblib."""
+    if not hasattr(imputer, 'columns_'):
+        raise TypeError(f"Seul un GapImputer ajusté peut être sauvegardé (reçu : {type(imputer).__name__})")
+    import joblib
+
+    path = Path(models_dir) / IMPUTER_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(imputer, path)
+    return path
+
+
+def load_imputer(models_dir=Path("models")):
+    """
+    Imputer sauvegardé dans models_dir, ou None s'il n'y en a pas.
+
+    L'application complète ses entrées colonne par colonne (columns_) : un
+    fichier qui ne contient pas un GapImputer ajusté (MICE, par exemple) est
+    ignoré avec un avertissement.
+    """
+    path = Path(models_dir) / IMPUTER_FILE
+    if not path.exists():
+        return None
+    import joblib
+
+    imputer = joblib.load(path)
+    if not hasattr(imputer, 'columns_'):
+        warnings.warn(
+            f"{path} ignoré : {type(imputer).__name__} n'est pas un GapImputer ajusté "
+            "(relancer le nettoyage avec --imputer gaps --save-imputer)",
+            RuntimeWarning
+        )
+        return None
+    return imputer
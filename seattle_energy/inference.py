@@ -0,0 +1,413 @@
+"""
+Inférence partagée par l'application Streamlit et le service HTTP.
+
+Chargement des modèles (bundle projeté en mémoire ou fichiers joblib),
+préparation des features, prédictions batch et explications d'une ligne, sans
+dépendance à Streamlit : le service (service.py) reste sans interface et
+app.py n'ajoute que ses caches (st.cache_resource) et son rendu.
+
+Les explications reçoivent leur cache et leur explainer de l'appelant :
+l'application les partage entre ses sessions, le service possède les siens.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import bundle_path, file_fingerprint, fused_path, model_version
+from .bundle import load_bundle, read_manifest
+from .explain import TREE_SHAP, FastTreeExplainer
+from .forest import compile_forest, fold_scaler, load_forest
+from .imputation import load_imputer
+
+# =============================================================================
+# CHARGEMENT DES MODÈLES ML
+# =============================================================================
+
+def load_fused_forest(name, engine, scaler, model_path, scaler_path):
+    """
+    Retourne la forêt avec le scaler replié dans ses seuils.
+
+    Utilise l'export models/<nom>_fused.npz s'il correspond aux fichiers joblib
+    actuels, sinon replie le scaler au chargement.
+    """
+    source = file_fingerprint(model_path, scaler_path)
+    path = fused_path(model_path.parent, name)
+    if path.exists():
+        fused = load_forest(path)
+        if fused.source == source:
+            return fused
+    return fold_scaler(engine, scaler, source=source)
+
+
+def load_model_bundle(models_dir):
+    """
+    Ouvre le bundle de models_dir, ou retourne None s'il est absent ou périmé.
+
+    Le bundle est périmé lorsque des fichiers joblib sont présents et que leur
+    empreinte diffère de la version inscrite dans le manifeste. S'ils sont à
+    jour, les gros batchs leur sont confiés (voir BundledForest.predict).
+    """
+    manifest = read_manifest(bundle_path(models_dir))
+    if manifest is None:
+        return None
+    current_version = model_version(models_dir)
+    if current_version is not None and current_version != manifest['model_version']:
+        return None
+    estimators_dir = models_dir if current_version is not None else None
+    return load_bundle(bundle_path(models_dir), estimators_dir=estimators_dir)
+
+
+def load_joblib_models(models_dir=Path("models")):
+    """Charge les modèles depuis les fichiers joblib (un dépickling par fichier)."""
+    import joblib
+
+    models_dir = Path(models_dir)
+    models = {}
+
+    # Modèle énergie
+    energy_model_path = models_dir / "energy_model.joblib"
+    energy_scaler_path = models_dir / "energy_scaler.joblib"
+    energy_features_path = models_dir / "energy_features.joblib"
+
+    if energy_model_path.exists():
+        models['energy_model'] = joblib.load(energy_model_path)
+        models['energy_scaler'] = joblib.load(energy_scaler_path)
+        models['energy_features'] = joblib.load(energy_features_path)
+        # Moteur compilé : mêmes prédictions sans le surcoût de sklearn.predict
+        models['energy_engine'] = compile_forest(models['energy_model'])
+        # Forêt fusionnée : prédit directement sur les features brutes
+        models['energy_fused'] = load_fused_forest(
+            'energy', models['energy_engine'], models['energy_scaler'],
+            energy_model_path, energy_scaler_path
+        )
+
+    # Modèle CO2
+    co2_model_path = models_dir / "co2_model.joblib"
+    co2_scaler_path = models_dir / "co2_scaler.joblib"
+
+    if co2_model_path.exists():
+        models['co2_model'] = joblib.load(co2_model_path)
+        models['co2_scaler'] = joblib.load(co2_scaler_path)
+        models['co2_engine'] = compile_forest(models['co2_model'])
+        models['co2_fused'] = load_fused_forest(
+            'co2', models['co2_engine'], models['co2_scaler'],
+            co2_model_path, co2_scaler_path
+        )
+
+    if models:
+        # Empreinte des artefacts chargés : invalide les caches lors d'un changement de modèle
+        models['model_version'] = model_version(models_dir)
+
+    return models
+
+
+def load_inference_models(models_dir=Path("models")):
+    """
+    Charge les modèles ML pré-entraînés de models_dir.
+
+    Ouvre le bundle projeté en mémoire (models/bundle/) s'il existe, sinon
+    charge les fichiers joblib d'origine, puis l'imputer du nettoyage s'il a
+    été sauvegardé (scores ENERGY STAR absents des portefeuilles).
+
+    Returns:
+        dict | None: modèles, scalers, moteurs et version, ou None sans modèle
+    """
+    models = load_model_bundle(models_dir)
+    if models is None:
+        models = load_joblib_models(models_dir)
+    if not models:
+        return None
+
+    imputer = load_imputer(models_dir)
+    if imputer is not None:
+        models['imputer'] = imputer
+    return models
+
+
+# =============================================================================
+# FEATURES ET PRÉDICTIONS
+# =============================================================================
+
+# Types de bâtiments proposés dans la sidebar
+BUILDING_TYPES = [
+    "Office (Small/Mid)",
+    "Office (Large)",
+    "Hotel",
+    "Retail Store",
+    "Warehouse",
+    "K-12 School",
+    "University",
+    "Hospital",
+    "Other"
+]
+
+# Mapping des types de bâtiments vers les colonnes one-hot
+BUILDING_TYPE_MAPPING = {
+    "Office (Small/Mid)": "PropType_Small- and Mid-Sized Office",
+    "Office (Large)": "PropType_Large Office",
+    "Hotel": "PropType_Hotel",
+    "Retail Store": "PropType_Retail Store",
+    "Warehouse": "PropType_Warehouse",
+    "K-12 School": "PropType_K-12 School",
+    "University": "PropType_University",
+    "Hospital": "PropType_Other",
+    "Other": "PropType_Other"
+}
+
+# Facteurs multiplicatifs par type de bâtiment (fallback heuristique)
+BUILDING_TYPE_FACTORS = {
+    "Office (Small/Mid)": 0.9, "Office (Large)": 1.1, "Hotel": 1.3,
+    "Retail Store": 0.85, "Warehouse": 0.6, "K-12 School": 0.8,
+    "University": 1.0, "Hospital": 1.5, "Other": 1.0
+}
+
+# Colonnes attendues par les fonctions batch
+BATCH_INPUT_COLUMNS = ('property_gfa', 'floors', 'age', 'energy_star', 'building_type')
+
+# Domaine des entrées numériques de la sidebar : (min, max, pas) et valeurs par défaut
+SIDEBAR_DOMAIN = {
+    'property_gfa': (1000, 2000000, 1000),
+    'floors': (1, 100, 1),
+    'age': (0, 150, 1),
+    'energy_star': (1, 100, 1)
+}
+SIDEBAR_DEFAULTS = {'property_gfa': 50000, 'floors': 5, 'age': 30, 'energy_star': 50}
+
+
+def prepare_features(property_gfa, floors, age, energy_star, building_type, feature_names):
+    """Prépare les features pour la prédiction."""
+    # Features structurelles de base
+    features = {
+        'Age': age,
+        'NumberofBuildings': 1,
+        'NumberofFloors': floors,
+        'PropertyGFATotal': property_gfa,
+        'PropertyGFAParking_Pct': 5.0,  # Valeur moyenne
+        'PropertyGFABuilding_Pct': 95.0,  # Valeur moyenne
+        'LargestPropertyUseTypeGFA': property_gfa * 0.8,  # 80% de la surface totale
+        'ENERGYSTARScore': energy_star
+    }
+
+    # Initialiser toutes les features à 0
+    all_features = {name: 0 for name in feature_names}
+
+    # Remplir les features structurelles
+    for key, value in features.items():
+        if key in all_features:
+            all_features[key] = value
+
+    # Activer le type de bâtiment approprié
+    prop_type_col = BUILDING_TYPE_MAPPING.get(building_type, "PropType_Other")
+    if prop_type_col in all_features:
+        all_features[prop_type_col] = 1
+
+    # Créer le DataFrame dans l'ordre correct
+    df = pd.DataFrame([all_features])[feature_names]
+    return df
+
+
+def _batch_inputs(buildings):
+    """Extrait les tableaux (gfa, étages, âge, score, type) d'un DataFrame ou d'un dict."""
+    missing = [col for col in BATCH_INPUT_COLUMNS if col not in buildings]
+    if missing:
+        raise KeyError(f"Colonnes manquantes pour la prédiction batch : {missing}")
+
+    property_gfa = np.asarray(buildings['property_gfa'], dtype=np.float64)
+    floors = np.asarray(buildings['floors'], dtype=np.float64)
+    age = np.asarray(buildings['age'], dtype=np.float64)
+    energy_star = np.asarray(buildings['energy_star'], dtype=np.float64)
+    building_type = np.asarray(buildings['building_type'], dtype=object)
+    return property_gfa, floors, age, energy_star, building_type
+
+
+def prepare_features_batch(property_gfa, floors, age, energy_star, building_type, feature_names):
+    """
+    Version vectorisée de prepare_features pour N bâtiments.
+
+    Remplit directement une matrice NumPy préallouée (N, len(feature_names))
+    dans l'ordre des features du modèle, sans passer par un DataFrame par ligne.
+    """
+    property_gfa = np.asarray(property_gfa, dtype=np.float64)
+    n_rows = property_gfa.shape[0]
+    column_index = {name: i for i, name in enumerate(feature_names)}
+
+    X = np.zeros((n_rows, len(feature_names)), dtype=np.float64)
+
+    # Features structurelles (mêmes valeurs par défaut que prepare_features)
+    structural = {
+        'Age': age,
+        'NumberofBuildings': 1,
+        'NumberofFloors': floors,
+        'PropertyGFATotal': property_gfa,
+        'PropertyGFAParking_Pct': 5.0,
+        'PropertyGFABuilding_Pct': 95.0,
+        'LargestPropertyUseTypeGFA': property_gfa * 0.8,
+        'ENERGYSTARScore': energy_star
+    }
+    for key, value in structural.items():
+        if key in column_index:
+            X[:, column_index[key]] = value
+
+    # One-hot du type de bâtiment : un seul lookup par type distinct
+    labels, inverse = np.unique(np.asarray(building_type, dtype=object).astype(str), return_inverse=True)
+    label_cols = np.array([
+        column_index.get(BUILDING_TYPE_MAPPING.get(label, "PropType_Other"), -1)
+        for label in labels
+    ], dtype=np.intp)
+    row_cols = label_cols[inverse.reshape(-1)]
+    has_col = row_cols >= 0
+    X[np.flatnonzero(has_col), row_cols[has_col]] = 1.0
+
+    return X
+
+
+def heuristic_predict_batch(property_gfa, floors, age, energy_star, building_type):
+    """Fallback heuristique vectorisé (mêmes formules que predict_with_fallback)."""
+    property_gfa = np.asarray(property_gfa, dtype=np.float64)
+    floors = np.asarray(floors, dtype=np.float64)
+    age = np.asarray(age, dtype=np.float64)
+    energy_star = np.asarray(energy_star, dtype=np.float64)
+
+    labels, inverse = np.unique(np.asarray(building_type, dtype=object).astype(str), return_inverse=True)
+    label_factors = np.array([BUILDING_TYPE_FACTORS.get(label, 1.0) for label in labels])
+    type_factor = label_factors[inverse.reshape(-1)]
+
+    base_consumption = property_gfa * 50
+    floor_factor = 1 + (floors - 1) * 0.02
+    age_factor = 1 + (age / 100) * 0.3
+    energy_star_factor = 2 - (energy_star / 100)
+    predicted_energy = base_consumption * floor_factor * age_factor * energy_star_factor * type_factor
+    predicted_co2 = predicted_energy * 0.0001
+    return predicted_energy, predicted_co2
+
+
+def standardize_features(X_raw, scaler):
+    """Équivalent NumPy de scaler.transform (mêmes opérations float64), sans validation."""
+    return (X_raw - scaler.mean_) / scaler.scale_
+
+
+def predict_batch(models, buildings):
+    """
+    Prédiction vectorisée pour tout un portefeuille de bâtiments.
+
+    Args:
+        models: dictionnaire retourné par load_models (ou None)
+        buildings: DataFrame ou dict de tableaux avec les colonnes
+            property_gfa, floors, age, energy_star, building_type
+
+    Returns:
+        tuple: (predicted_energy, predicted_co2, using_ml) avec deux tableaux de taille N
+    """
+    property_gfa, floors, age, energy_star, building_type = _batch_inputs(buildings)
+
+    if models and 'energy_model' in models:
+        feature_names = models['energy_features']
+        X = prepare_features_batch(property_gfa, floors, age, energy_star, building_type, feature_names)
+        if len(X) == 0:
+            return np.empty(0), np.empty(0), True
+        # Les gros batchs restent sur sklearn/XGBoost : leur parcours natif dépasse le
+        # parcours NumPy du moteur compilé au-delà de quelques centaines de lignes
+        # (le modèle du bundle les y renvoie, voir BundledForest.predict).
+        # Vue DataFrame sans copie pour conserver les noms de colonnes attendus par les scalers
+        X_df = pd.DataFrame(X, columns=feature_names, copy=False)
+        predicted_energy = models['energy_model'].predict(models['energy_scaler'].transform(X_df))
+        predicted_co2 = models['co2_model'].predict(models['co2_scaler'].transform(X_df))
+        return predicted_energy, predicted_co2, True
+
+    predicted_energy, predicted_co2 = heuristic_predict_batch(
+        property_gfa, floors, age, energy_star, building_type
+    )
+    return predicted_energy, predicted_co2, False
+
+
+# =============================================================================
+# EXPLICATIONS
+# =============================================================================
+
+def shap_explainer(model):
+    """shap.TreeExplainer du modèle (forêt sklearn, XGBoost ou modèle du bundle)."""
+    import shap
+
+    # Modèle issu du bundle : arbres décrits au format dictionnaire de shap
+    if hasattr(model, 'shap_model'):
+        return shap.TreeExplainer(model.shap_model())
+    return shap.TreeExplainer(model)
+
+
+def fast_explainer(models):
+    """
+    Explainer du modèle énergie : TreeSHAP exact (shap) et repli Saabas sous budget.
+
+    Returns:
+        FastTreeExplainer | None: None si le modèle n'est pas une forêt moyennée
+    """
+    if 'energy_engine' not in models:
+        return None
+    try:
+        return FastTreeExplainer.from_model(models['energy_model'], models['energy_engine'])
+    except (TypeError, ValueError):
+        return None
+
+
+def shap_frame(values, feature_names):
+    """DataFrame des contributions d'une ligne, triées par valeur absolue décroissante."""
+    return pd.DataFrame({
+        'Feature': feature_names,
+        'SHAP Value': values,
+        'Abs SHAP': np.abs(values)
+    }).sort_values('Abs SHAP', ascending=False)
+
+
+def compute_shap_values(explainer, X_scaled, feature_names):
+    """Calcule les valeurs SHAP pour une prédiction."""
+    shap_values = explainer.shap_values(X_scaled)
+    return shap_frame(shap_values[0], feature_names), explainer.expected_value
+
+
+# Durée maximale (secondes) du TreeSHAP exact avant repli sur l'attribution de Saabas
+SHAP_TIME_BUDGET = float(os.environ.get("SHAP_TIME_BUDGET", "0.5"))
+
+# Capacité du cache d'explications (partagé par les sessions de l'app, propre au service)
+EXPLANATION_CACHE_SIZE = int(os.environ.get("EXPLANATION_CACHE_SIZE", "256"))
+
+
+def explain_row(models, X_scaled, feature_names, cache, get_explainer, time_budget=SHAP_TIME_BUDGET):
+    """
+    Contributions des features à la prédiction d'énergie d'une ligne.
+
+    Les explications exactes sont mises en cache par (version des modèles, ligne
+    standardisée), sous forme de DataFrame déjà trié : un hit ne coûte qu'une
+    copie. Si le TreeSHAP exact ne tient pas dans `time_budget`, l'attribution
+    de Saabas est retournée (et n'est pas mise en cache).
+
+    Args:
+        cache: LRUCache des explications
+        get_explainer: fonction sans argument retournant l'explainer du modèle
+            énergie (FastTreeExplainer ou shap.TreeExplainer), appelée en cas de miss
+
+    Returns:
+        tuple: (shap_df, valeur de base, méthode 'tree_shap' ou 'saabas')
+    """
+    row = np.ascontiguousarray(X_scaled, dtype=np.float64).reshape(-1)
+    key = (models.get('model_version'), row.tobytes())
+
+    entry = cache.get(key)
+    if entry is None:
+        explainer = get_explainer()
+        if isinstance(explainer, FastTreeExplainer):
+            values, method = explainer.explain(row, time_budget)
+            shap_df, expected_value = shap_frame(values, feature_names), explainer.expected_value
+            if method != TREE_SHAP:
+                return shap_df, expected_value, method
+        else:
+            # Modèle non supporté par l'explainer rapide : shap.TreeExplainer seul
+            shap_df, expected_value = compute_shap_values(explainer, row.reshape(1, -1), feature_names)
+        entry = (shap_df, expected_value)
+        cache.put(key, entry)
+
+    shap_df, expected_value = entry
+    # Copie : l'appelant ne peut pas modifier l'entrée partagée
+    return shap_df.copy(), expected_value, TREE_SHAP
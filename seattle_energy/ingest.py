@@ -0,0 +1,342 @@
+"""
+Ingestion incrémentale des CSV de benchmarking annuels (dossier data/partitions/).
+
+Chaque année publiée est nettoyée par seattle_energy.cleaning (imputation
+ajustée sur l'année) et stockée dans sa propre partition binaire :
+
+- manifest.json : colonnes, empreinte du code de nettoyage et, par année,
+  fichier source (chemin, taille, date, SHA-256), clé et nombre de lignes ;
+- <année>-<clé>/values.npy : features nettoyées (n_lignes, n_colonnes), float64
+  stockées par colonne ;
+- <année>-<clé>/index.npy : OSEBuildingID de chaque ligne.
+
+La clé d'une partition est l'empreinte du contenu du fichier source, du
+code de nettoyage et de la méthode d'imputation : seule une année nouvelle,
+dont le fichier a changé, ou dont le nettoyage a changé est retraitée. Un fichier dont la taille et la date
+n'ont pas bougé n'est même pas relu. Les partitions sont projetées en mémoire
+à la lecture : l'union des années n'est matérialisée que pour les colonnes et
+les années demandées.
+
+Usage:
+    python -m seattle_energy.ingest data/20*_Building_Energy_Benchmarking.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import cleaning, imputation
+
+PARTITIONS_FORMAT_VERSION = 1
+PARTITIONS_DIR = Path("data/partitions")
+MANIFEST_NAME = "manifest.json"
+VALUES_FILE = "values.npy"
+INDEX_FILE = "index.npy"
+
+# Lecture des fichiers sources pour l'empreinte
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def source_digest(path):
+    """Empreinte SHA-256 du contenu d'un fichier source, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cleaning_digest():
+    """Empreinte du code de nettoyage et d'imputation et du format des partitions."""
+    digest = hashlib.sha256(Path(cleaning.__file__).read_bytes())
+    digest.update(Path(imputation.__file__).read_bytes())
+    digest.update(f"partitions-v{PARTITIONS_FORMAT_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def partition_key(source_sha256, code_sha256, imputer='mice'):
+    """Clé d'une partition : empreinte (tronquée) de la source, du code et de l'imputation."""
+    return hashlib.sha256(f"{source_sha256}:{code_sha256}:{imputer}".encode()).hexdigest()[:16]
+
+
+def source_year(path):
+    """Année de publication d'un CSV brut (colonne DataYear, unique par fichier)."""
+    years = pd.read_csv(path, usecols=['DataYear'])['DataYear'].dropna().unique()
+    if len(years) != 1:
+        raise ValueError(f"{path} : une seule année attendue dans DataYear, trouvé {sorted(years)}")
+    return int(years[0])
+
+
+def read_partitions_manifest(directory):
+    """Manifeste des partitions, ou None si le dossier n'en a pas."""
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get('format_version') != PARTITIONS_FORMAT_VERSION:
+        raise ValueError(f"Format de partitions non supporté : {manifest.get('format_version')!r}")
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    path = Path(directory) / MANIFEST_NAME
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def _build_partition(source, directory, name, chunksize, fit_rows, imputer):
+    """Nettoie `source` et écrit la partition `name` (renommée à la fin seulement)."""
+    workdir = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=directory))
+    try:
+        cleaned_csv = workdir / "cleaned.csv"
+        stats = cleaning.clean_csv(source, cleaned_csv, chunksize=chunksize,
+                                   imputer=cleaning.make_imputer(imputer), fit_rows=fit_rows)
+        n_rows = stats['rows_kept']
+
+        values = np.lib.format.open_memmap(
+            workdir / VALUES_FILE, mode='w+', dtype=np.float64,
+            shape=(n_rows, len(cleaning.OUTPUT_COLUMNS)), fortran_order=True
+        )
+        index = np.empty(n_rows, dtype=np.int64)
+        start = 0
+        reader = pd.read_csv(cleaned_csv, index_col=0, chunksize=chunksize, float_precision='round_trip')
+        for chunk in reader:
+            values[start:start + len(chunk)] = chunk[cleaning.OUTPUT_COLUMNS].to_numpy(dtype=np.float64)
+            index[start:start + len(chunk)] = chunk.index.to_numpy(dtype=np.int64)
+            start += len(chunk)
+        values.flush()
+        del values
+        np.save(workdir / INDEX_FILE, index)
+        cleaned_csv.unlink()
+
+        # Partition orpheline de même clé (ingestion interrompue avant le manifeste)
+        shutil.rmtree(directory / name, ignore_errors=True)
+        os.replace(workdir, directory / name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return n_rows
+
+
+def ingest(sources, directory=PARTITIONS_DIR, chunksize=cleaning.DEFAULT_CHUNK_SIZE,
+           fit_rows=cleaning.DEFAULT_FIT_ROWS, imputer='mice', progress_callback=None):
+    """
+    Met à jour les partitions annuelles à partir des CSV bruts donnés.
+
+    Les années absentes de `sources` sont conservées telles quelles.
+
+    Args:
+        sources: CSV bruts (un fichier par année)
+        directory: dossier des partitions
+        chunksize: lignes par bloc pour le nettoyage
+        fit_rows: lignes tirées pour ajuster l'imputer de chaque année (None ou 0 : toutes)
+        imputer: méthode d'imputation ('mice' ou 'gaps', voir cleaning.make_imputer)
+        progress_callback: appelé avec (année, statut) ; statut 'unchanged' ou 'built'
+
+    Returns:
+        dict: années reconstruites et années inchangées
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    code_sha256 = cleaning_digest()
+    manifest = read_partitions_manifest(directory) or {
+        'format_version': PARTITIONS_FORMAT_VERSION,
+        'columns': cleaning.OUTPUT_COLUMNS,
+        'partitions': {}
+    }
+    manifest['columns'] = cleaning.OUTPUT_COLUMNS
+    manifest['code_sha256'] = code_sha256
+    partitions = manifest['partitions']
+    summary = {'built': [], 'unchanged': []}
+    seen = {}
+
+    def is_current(entry, source_sha256):
+        return (entry['source_sha256'] == source_sha256 and entry['code_sha256'] == code_sha256
+                and entry.get('imputer', 'mice') == imputer
+                and (directory / entry['path']).is_dir())
+
+    for source in map(Path, sources):
+        stat = source.stat()
+        resolved = str(source.resolve())
+
+        # Fichier déjà ingéré et inchangé (taille et date) : ni relu ni haché
+        entry = next((e for e in partitions.values() if e['source'] == resolved), None)
+        if (entry is not None and entry['source_size'] == stat.st_size
+                and entry['source_mtime_ns'] == stat.st_mtime_ns and is_current(entry, entry['source_sha256'])):
+            year = entry['year']
+            source_sha256 = entry['source_sha256']
+        else:
+            source_sha256 = source_digest(source)
+            entry = next((e for e in partitions.values() if e['source_sha256'] == source_sha256), None)
+            year = entry['year'] if entry is not None else source_year(source)
+
+        if str(year) in seen:
+            raise ValueError(f"Année {year} fournie deux fois : {seen[str(year)]} et {source}")
+        seen[str(year)] = source
+
+        previous = partitions.get(str(year))
+        if previous is not None and is_current(previous, source_sha256):
+            previous.update(source=resolved, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+            summary['unchanged'].append(year)
+            if progress_callback is not None:
+                progress_callback(year, 'unchanged')
+            continue
+
+        key = partition_key(source_sha256, code_sha256, imputer)
+        name = f"{year}-{key}"
+        rows = _build_partition(source, directory, name, chunksize, fit_rows, imputer)
+        partitions[str(year)] = {
+            'year': year,
+            'path': name,
+            'key': key,
+            'rows': rows,
+            'source': resolved,
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_sha256': source_sha256,
+            'code_sha256': code_sha256,
+            'imputer': imputer
+        }
+        _write_manifest(directory, manifest)
+        if previous is not None and previous['path'] != name:
+            shutil.rmtree(directory / previous['path'], ignore_errors=True)
+        summary['built'].append(year)
+        if progress_callback is not None:
+            progress_callback(year, 'built')
+
+    manifest['partitions'] = dict(sorted(partitions.items()))
+    _write_manifest(directory, manifest)
+    return summary
+
+
+def open_dataset(directory=PARTITIONS_DIR):
+    """
+    Ouvre les partitions en projetant leurs tableaux en mémoire (lecture seule).
+
+    Returns:
+        CleanedDataset | None: None si le dossier n'a pas de manifeste
+    """
+    directory = Path(directory)
+    manifest = read_partitions_manifest(directory)
+    if manifest is None:
+        return None
+    return CleanedDataset(directory, manifest)
+
+
+class CleanedDataset:
+    """
+    Union paresseuse des partitions annuelles nettoyées.
+
+    Args:
+        directory: dossier des partitions
+        manifest: contenu de manifest.json
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = Path(directory)
+        self.manifest = manifest
+        self.columns = list(manifest['columns'])
+        self.years = sorted(int(year) for year in manifest['partitions'])
+
+    @property
+    def n_rows(self):
+        return sum(entry['rows'] for entry in self.manifest['partitions'].values())
+
+    def arrays(self, year):
+        """(valeurs, index) projetés en mémoire de la partition `year`."""
+        entry = self.manifest['partitions'][str(year)]
+        path = self.directory / entry['path']
+        values = np.load(path / VALUES_FILE, mmap_mode='r')
+        if values.shape != (entry['rows'], len(self.columns)):
+            raise ValueError(f"Partition incohérente avec le manifeste : {entry['path']}")
+        return values, np.load(path / INDEX_FILE, mmap_mode='r')
+
+    def partition(self, year, columns=None):
+        """DataFrame de la partition `year`, limité aux colonnes demandées."""
+        values, index = self.arrays(year)
+        columns = self.columns if columns is None else list(columns)
+        positions = [self.columns.index(col) for col in columns]
+        return pd.DataFrame(
+            values[:, positions], columns=columns,
+            index=pd.Index(np.asarray(index), name=cleaning.INDEX_COLUMN)
+        )
+
+    def iter_partitions(self, columns=None, years=None):
+        """Génère (année, DataFrame) partition par partition."""
+        for year in self.years if years is None else years:
+            yield year, self.partition(year, columns)
+
+    def read(self, columns=None, years=None, with_year=False):
+        """
+        Union des partitions demandées.
+
+        Args:
+            columns: colonnes à lire (défaut : toutes)
+            years: années à lire (défaut : toutes)
+            with_year: ajouter une colonne DataYear
+        """
+        frames = []
+        for year, frame in self.iter_partitions(columns, years):
+            if with_year:
+                frame['DataYear'] = year
+            frames.append(frame)
+        if not frames:
+            columns = self.columns if columns is None else list(columns)
+            return pd.DataFrame(columns=columns + (['DataYear'] if with_year else []))
+        return pd.concat(frames)
+
+
+def read_cleaned(path, columns=None, nrows=None):
+    """
+    Données nettoyées depuis un dossier de partitions ou un CSV (data_cleaned.csv).
+
+    Args:
+        path: dossier de partitions (manifest.json) ou fichier CSV
+        columns: colonnes à lire (défaut : toutes)
+        nrows: nombre maximal de lignes (défaut : toutes)
+    """
+    dataset = open_dataset(path) if Path(path).is_dir() else None
+    if dataset is None:
+        usecols = None if columns is None else lambda col: col in columns
+        data = pd.read_csv(path, usecols=usecols, nrows=nrows)
+        return data if columns is None else data[list(columns)]
+    data = dataset.read(columns)
+    return data if nrows is None else data.iloc[:nrows]
+
+
+def default_cleaned_path(data_dir=Path("data")):
+    """Partitions si elles existent, sinon data_cleaned.csv."""
+    data_dir = Path(data_dir)
+    partitions = data_dir / "partitions"
+    return partitions if (partitions / MANIFEST_NAME).exists() else data_dir / "data_cleaned.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion incrémentale des CSV de benchmarking annuels")
+    parser.add_argument("sources", nargs="+", help="CSV bruts (un fichier par année)")
+    parser.add_argument("--output", type=Path, default=PARTITIONS_DIR)
+    parser.add_argument("--chunksize", type=int, default=cleaning.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--fit-rows", type=int, default=cleaning.DEFAULT_FIT_ROWS,
+                        help="lignes tirées pour ajuster l'imputer de chaque année "
+                             f"(défaut : {cleaning.DEFAULT_FIT_ROWS} ; 0 : toutes)")
+    parser.add_argument("--imputer", choices=cleaning.IMPUTERS, default='mice')
+    args = parser.parse_args()
+
+    def on_progress(year, status):
+        print(f"{year} : {'reconstruite' if status == 'built' else 'inchangée'}")
+
+    ingest(args.sources, args.output, chunksize=args.chunksize, fit_rows=args.fit_rows,
+           imputer=args.imputer, progress_callback=on_progress)
+    dataset = open_dataset(args.output)
+    print(f"✅ {args.output} : {dataset.n_rows:,} lignes, années {dataset.years}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Magasin de valeurs SHAP globales précalculées (dossier models/shap_store/).
+
+Construit hors ligne par scripts/build_shap_store.py pour toutes les lignes de
+data/data_cleaned.csv et chaque modèle :
+
+- manifest.json : version des modèles, ordre des features, valeurs de base,
+  source des données et empreinte SHA-256 de chaque tableau ;
+- features.npy : features brutes (n_lignes, n_features) ;
+- <modèle>.shap.npy : valeurs SHAP (n_lignes, n_features).
+
+Les matrices sont en float32 et stockées par colonne (ordre Fortran) : une
+feature est un bloc contigu du fichier, lu directement depuis la projection en
+mémoire par les vues de l'application (classement, beeswarm, dépendance).
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bundle import _array_digest
+
+STORE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+FEATURES_FILE = "features.npy"
+
+
+def _save_column_major(path, values):
+    np.save(path, np.asfortranarray(values, dtype=np.float32))
+    return {
+        'file': path.name,
+        'shape': list(values.shape),
+        'sha256': _array_digest(path)
+    }
+
+
+def save_shap_store(directory, feature_names, features, explanations, model_version, source=None):
+    """
+    Écrit le magasin SHAP.
+
+    Args:
+        directory: dossier du magasin (créé si besoin)
+        feature_names: noms des colonnes de `features`
+        features: features brutes (n_lignes, n_features)
+        explanations: dictionnaire nom -> (valeurs SHAP (n_lignes, n_features), valeur de base)
+        model_version: empreinte des modèles expliqués
+        source: description des données expliquées (ex. chemin du CSV)
+
+    Returns:
+        Path: chemin du manifeste écrit
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    features = np.asarray(features)
+
+    manifest = {
+        'format_version': STORE_FORMAT_VERSION,
+        'model_version': model_version,
+        'source': source,
+        'n_rows': int(features.shape[0]),
+        'feature_names': list(feature_names),
+        'features': _save_column_major(directory / FEATURES_FILE, features),
+        'models': {}
+    }
+    for name, (values, expected_value) in explanations.items():
+        values = np.asarray(values)
+        if values.shape != features.shape:
+            raise ValueError(f"Valeurs SHAP de {name!r} : forme {values.shape} au lieu de {features.shape}")
+        entry = _save_column_major(directory / f"{name}.shap.npy", values)
+        entry['expected_value'] = float(np.ravel(expected_value)[0])
+        manifest['models'][name] = entry
+
+    manifest_path = directory / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest_path
+
+
+def load_shap_store(directory, verify=False):
+    """
+    Ouvre le magasin en projetant ses tableaux en mémoire (lecture seule).
+
+    Returns:
+        ShapStore | None: None si le dossier n'a pas de manifeste
+    """
+    directory = Path(directory)
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get('format_version') != STORE_FORMAT_VERSION:
+        raise ValueError(f"Format de magasin SHAP non supporté : {manifest.get('format_version')!r}")
+
+    def open_array(meta):
+        if verify and _array_digest(directory / meta['file']) != meta['sha256']:
+            raise ValueError(f"Tableau corrompu dans le magasin SHAP : {meta['file']}")
+        values = np.load(directory / meta['file'], mmap_mode='r')
+        if list(values.shape) != meta['shape']:
+            raise ValueError(f"Tableau incohérent avec le manifeste : {meta['file']}")
+        return values
+
+    features = open_array(manifest['features'])
+    values = {name: open_array(entry) for name, entry in manifest['models'].items()}
+    return ShapStore(manifest, features, values)
+
+
+class ShapStore:
+    """
+    Valeurs SHAP globales d'un jeu de données, servies depuis les tableaux projetés.
+
+    Args:
+        manifest: contenu de manifest.json
+        features: features brutes (n_lignes, n_features)
+        values: dictionnaire nom du modèle -> valeurs SHAP (n_lignes, n_features)
+    """
+
+    def __init__(self, manifest, features, values):
+        self.manifest = manifest
+        self.feature_names = list(manifest['feature_names'])
+        self.model_version = manifest.get('model_version')
+        self.features = features
+        self._values = values
+        self._feature_index = {name: j for j, name in enumerate(self.feature_names)}
+        self._mean_abs = {}
+
+    @property
+    def model_names(self):
+        return list(self._values)
+
+    @property
+    def n_rows(self):
+        return self.features.shape[0]
+
+    def shap_values(self, name):
+        """Valeurs SHAP (n_lignes, n_features) du modèle `name`."""
+        return self._values[name]
+
+    def expected_value(self, name):
+        return self.manifest['models'][name]['expected_value']
+
+    def mean_abs_shap(self, name):
+        """Importance globale : moyenne des |SHAP| par feature, triée par ordre décroissant."""
+        if name not in self._mean_abs:
+            importance = np.abs(self._values[name]).mean(axis=0, dtype=np.float64)
+            self._mean_abs[name] = pd.Series(
+                importance, index=self.feature_names, name='Mean |SHAP|'
+            ).sort_values(ascending=False)
+        return self._mean_abs[name]
+
+    def dependence(self, name, feature):
+        """Valeur de la feature et valeur SHAP associée, pour chaque ligne."""
+        j = self._feature_index[feature]
+        return pd.DataFrame({
+            'Feature Value': np.asarray(self.features[:, j]),
+            'SHAP Value': np.asarray(self._values[name][:, j])
+        })
+
+    def beeswarm(self, name, top=10, max_rows=None, seed=0):
+        """
+        Points du beeswarm des `top` features les plus importantes.
+
+        Chaque valeur de feature est ramenée à son rang dans [0, 1] (couleur
+        du point) ; au-delà de `max_rows` lignes, un échantillon est tiré.
+
+        Returns:
+            pd.DataFrame: colonnes Feature, SHAP Value, Feature Value, Normalized Value
+        """
+        rows = np.arange(self.n_rows)
+        if max_rows is not None and self.n_rows > max_rows:
+            rows = np.sort(np.random.default_rng(seed).choice(self.n_rows, max_rows, replace=False))
+
+        frames = []
+        for feature in self.mean_abs_shap(name).index[:top]:
+            j = self._feature_index[feature]
+            feature_values = np.asarray(self.features[rows, j])
+            ranks = pd.Series(feature_values).rank(pct=True).to_numpy()
+            frames.append(pd.DataFrame({
+                'Feature': feature,
+                'SHAP Value': np.asarray(self._values[name][rows, j]),
+                'Feature Value': feature_values,
+                'Normalized Value': ranks
+            }))
+        return pd.concat(frames, ignore_index=True)
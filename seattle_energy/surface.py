@@ -0,0 +1,269 @@
+"""
+Index précalculé de la surface de réponse des forêts sur le domaine de la sidebar.
+
+Une forêt d'arbres est constante par morceaux : sa prédiction ne dépend que du
+côté de chaque seuil où tombe chaque feature. En rassemblant tous les seuils
+utilisés par les forêts, une ligne de features se réduit à un vecteur de codes
+de région (nombre de seuils strictement inférieurs à la valeur, par feature) :
+deux lignes de même code ont exactement les mêmes prédictions.
+
+L'index stocke, pour chaque région rencontrée lors de la construction, une clé
+entière (codes des axes en base mixte) triée et les prédictions associées. Une
+recherche coûte une recherche dichotomique par feature plus une dans les clés,
+et retourne les valeurs des forêts bit à bit ; une région absente de l'index
+est signalée pour que l'appelant se rabatte sur les forêts.
+"""
+
+import json
+from bisect import bisect_left
+
+import numpy as np
+
+from .forest import _round_down
+
+
+class ResponseSurface:
+    """
+    Table des prédictions indexée par région de l'espace des features.
+
+    Args:
+        feature_names: noms des features, dans l'ordre des colonnes
+        thresholds: seuils triés (uniques) de chaque feature, concaténés
+        offsets: bornes de chaque feature dans `thresholds` (taille n_features + 1)
+        axes: indices des features qui varient dans le domaine indexé
+        base_codes: code de région imposé aux autres features (-1 : non contrôlé)
+        keys: clés de région triées
+        values: dictionnaire nom -> prédictions alignées sur `keys`
+        input_dtype: type dans lequel les entrées sont converties (celui des forêts)
+        source: empreinte optionnelle des artefacts dont l'index est issu
+    """
+
+    def __init__(self, feature_names, thresholds, offsets, axes, base_codes, keys, values,
+                 input_dtype=np.float64, source=None):
+        self.feature_names = list(feature_names)
+        self.thresholds = np.ascontiguousarray(thresholds, dtype=np.float64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.axes = np.ascontiguousarray(axes, dtype=np.int64)
+        self.base_codes = np.ascontiguousarray(base_codes, dtype=np.int64)
+        self.keys = np.ascontiguousarray(keys, dtype=np.int64)
+        self.values = {name: np.ascontiguousarray(v) for name, v in values.items()}
+        self.input_dtype = np.dtype(input_dtype)
+        self.source = source
+
+        if len(self.offsets) != len(self.feature_names) + 1:
+            raise ValueError("offsets doit contenir n_features + 1 bornes")
+        if any(len(v) != len(self.keys) for v in self.values.values()):
+            raise ValueError("Chaque tableau de prédictions doit être aligné sur les clés")
+
+        # Base mixte des clés : une position par code possible sur chaque axe
+        radices = [self._n_thresholds(j) + 1 for j in self.axes.tolist()]
+        strides, size = [], 1
+        for radix in radices:
+            strides.append(size)
+            size *= radix
+        if size > np.iinfo(np.int64).max:
+            raise ValueError("Trop de régions pour des clés int64 : réduire les axes")
+        self.strides = np.array(strides, dtype=np.int64)
+        self._lists = None
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    @property
+    def n_regions(self):
+        return len(self.keys)
+
+    def _n_thresholds(self, j):
+        return int(self.offsets[j + 1] - self.offsets[j])
+
+    def feature_thresholds(self, j):
+        """Seuils triés de la feature d'indice `j`."""
+        return self.thresholds[self.offsets[j]:self.offsets[j + 1]]
+
+    def region_codes(self, X):
+        """Codes de région par feature, forme (n_rows, n_features)."""
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X doit avoir {self.n_features} features, reçu la forme {X.shape}")
+        codes = np.zeros(X.shape, dtype=np.int64)
+        for j in range(self.n_features):
+            thresholds = self.feature_thresholds(j)
+            if len(thresholds):
+                # x <= t  <=>  t n'est pas strictement inférieur à x
+                codes[:, j] = np.searchsorted(thresholds, X[:, j], side='left')
+        return codes
+
+    def _in_domain(self, X, codes):
+        """Lignes sans valeur manquante dont les features hors axes sont dans la région de base."""
+        controlled = self.base_codes >= 0
+        return (
+            ~np.isnan(X).any(axis=1)
+            & (codes[:, controlled] == self.base_codes[controlled]).all(axis=1)
+        )
+
+    def region_keys(self, codes):
+        """Clés entières des régions à partir des codes par feature."""
+        return codes[:, self.axes] @ self.strides
+
+    def lookup(self, X):
+        """
+        Recherche vectorisée d'un batch de lignes.
+
+        Returns:
+            tuple: (values, found) où `values` associe chaque nom à un tableau de
+            prédictions (non significatif là où `found` est faux)
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        codes = self.region_codes(X)
+        keys = self.region_keys(codes)
+        positions = np.minimum(np.searchsorted(self.keys, keys), self.n_regions - 1)
+        found = self._in_domain(X, codes) & (self.keys[positions] == keys)
+        values = {name: v[positions] for name, v in self.values.items()}
+        return values, found
+
+    def lookup_one(self, row):
+        """
+        Recherche d'une seule ligne par des boucles serrées sur des listes Python.
+
+        Returns:
+            dict | None: nom -> prédiction, ou None si la région n'est pas indexée
+        """
+        if self._lists is None:
+            thresholds = [self.feature_thresholds(j).tolist() for j in range(self.n_features)]
+            checks = [(j, thresholds[j], code) for j, code in enumerate(self.base_codes.tolist())
+                      if code >= 0]
+            axes = [(j, thresholds[j], stride)
+                    for j, stride in zip(self.axes.tolist(), self.strides.tolist())]
+            self._lists = (checks, axes)
+        checks, axes = self._lists
+
+        x = np.asarray(row, dtype=self.input_dtype).ravel().tolist()
+        if any(v != v for v in x):
+            return None
+        for j, thresholds, code in checks:
+            if bisect_left(thresholds, x[j]) != code:
+                return None
+        key = 0
+        for j, thresholds, stride in axes:
+            key += bisect_left(thresholds, x[j]) * stride
+
+        position = int(np.searchsorted(self.keys, key))
+        if position == self.n_regions or self.keys[position] != key:
+            return None
+        return {name: v[position] for name, v in self.values.items()}
+
+
+def forest_thresholds(forests, n_features):
+    """Seuils uniques de chaque feature, tous arbres et toutes forêts confondus."""
+    per_feature = [[] for _ in range(n_features)]
+    for forest in forests:
+        internal = forest.left != np.arange(forest.n_nodes)
+        thresholds = _round_down(forest.threshold[internal], forest.input_dtype)
+        features = forest.feature[internal]
+        for j in np.unique(features).tolist():
+            per_feature[j].append(thresholds[features == j])
+    return [np.unique(np.concatenate(t)) if t else np.empty(0) for t in per_feature]
+
+
+def build_surface(forests, feature_names, X, axes, source=None):
+    """
+    Construit l'index des régions couvertes par les lignes `X`.
+
+    Chaque région distincte n'est prédite qu'une fois, sur une ligne représentante.
+
+    Args:
+        forests: dictionnaire nom -> CompiledForest (même type d'entrée pour toutes)
+        feature_names: noms des features, dans l'ordre des colonnes de X
+        X: lignes du domaine à indexer, forme (n_rows, n_features)
+        axes: noms des features qui varient dans le domaine ; les autres doivent
+            rester dans la même région que la première ligne
+        source: empreinte optionnelle des artefacts
+
+    Returns:
+        ResponseSurface
+    """
+    input_dtypes = {forest.input_dtype for forest in forests.values()}
+    if len(input_dtypes) != 1:
+        raise ValueError("Les forêts doivent partager le même type d'entrée")
+    input_dtype = input_dtypes.pop()
+
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) == 0:
+        raise ValueError("Le domaine à indexer est vide")
+    feature_names = list(feature_names)
+    thresholds = forest_thresholds(forests.values(), len(feature_names))
+    offsets = np.cumsum([0] + [len(t) for t in thresholds])
+    axis_index = [feature_names.index(name) for name in axes]
+
+    # Index vide pour calculer les codes des lignes du domaine
+    surface = ResponseSurface(
+        feature_names, np.concatenate(thresholds), offsets, axis_index,
+        np.full(len(feature_names), -1), [], {name: [] for name in forests},
+        input_dtype=input_dtype, source=source
+    )
+    codes = surface.region_codes(X)
+
+    base_codes = codes[0].copy()
+    base_codes[axis_index] = -1
+    base_codes[np.diff(offsets) == 0] = -1
+    controlled = base_codes >= 0
+    if np.isnan(X).any() or (codes[:, controlled] != base_codes[controlled]).any():
+        raise ValueError("Les features hors axes doivent rester dans la même région")
+
+    keys, representatives = np.unique(surface.region_keys(codes), return_index=True)
+    values = {name: forest.predict(X[representatives]) for name, forest in forests.items()}
+
+    return ResponseSurface(
+        feature_names, surface.thresholds, offsets, axis_index, base_codes, keys, values,
+        input_dtype=input_dtype, source=source
+    )
+
+
+def verify_surface(surface, forests, X):
+    """
+    Vérifie que l'index reproduit exactement les forêts sur les lignes trouvées.
+
+    Returns:
+        int: nombre de lignes de X trouvées dans l'index
+    """
+    values, found = surface.lookup(X)
+    X_found = np.asarray(X, dtype=np.float64)[found]
+    for name, forest in forests.items():
+        if found.any() and not np.array_equal(values[name][found], forest.predict(X_found)):
+            raise AssertionError(f"L'index diverge de la forêt {name!r}")
+    return int(found.sum())
+
+
+# =============================================================================
+# PERSISTANCE
+# =============================================================================
+
+_SURFACE_ARRAYS = ('thresholds', 'offsets', 'axes', 'base_codes', 'keys')
+
+
+def save_surface(surface, path):
+    """Sauvegarde un index au format .npz (tableaux + métadonnées)."""
+    metadata = {
+        'feature_names': surface.feature_names,
+        'value_names': list(surface.values),
+        'input_dtype': surface.input_dtype.name,
+        'source': surface.source
+    }
+    np.savez(
+        path,
+        metadata=np.array(json.dumps(metadata)),
+        **{name: getattr(surface, name) for name in _SURFACE_ARRAYS},
+        **{f"values_{name}": v for name, v in surface.values.items()}
+    )
+
+
+def load_surface(path):
+    """Charge un index sauvegardé par save_surface."""
+    with np.load(path, allow_pickle=False) as archive:
+        metadata = json.loads(str(archive['metadata']))
+        arrays = {name: archive[name] for name in _SURFACE_ARRAYS}
+        values = {name: archive[f"values_{name}"] for name in metadata.pop('value_names')}
+    return ResponseSurface(values=values, **arrays, **metadata)
@@ -0,0 +1,228 @@
+"""
+Chronométrage par étape du rendu de l'application, exportable pour la supervision.
+
+Chaque étape instrumentée (chargement des modèles, préparation des features,
+prédictions, SHAP, figures Plotly) est entourée de `timer.stage(nom)`. Quand
+le chronométrage est désactivé, `stage` retourne un contexte vide partagé :
+le coût se limite à un test de booléen.
+
+Activé, chaque durée alimente l'histogramme de son étape :
+
+- compteurs cumulés par seuil, somme et nombre d'observations, au sens des
+  histogrammes Prometheus (format texte d'exposition) ;
+- fenêtre glissante des dernières durées pour les percentiles (p50, p95,
+  p99) affichés dans le panneau de diagnostic et exportés en JSON.
+
+Les exports peuvent inclure les compteurs de caches LRU (hits, misses,
+évictions, taille ; voir LRUCache.stats), passés sous la forme {nom: cache}.
+
+Le minuteur est un singleton de module (STAGE_TIMER) : Streamlit réexécute
+app.py à chaque interaction, mais les modules importés, et donc les
+histogrammes, persistent pour toute la durée du processus.
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# Seuils des histogrammes (secondes), de la lecture en cache au calcul SHAP exact
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Nombre de durées conservées par étape pour les percentiles
+DEFAULT_WINDOW = 1000
+
+METRIC_NAME = "seattle_energy_stage_seconds"
+
+# Métriques Prometheus des caches : (nom, type, clé de LRUCache.stats, description)
+CACHE_METRICS = (
+    ("seattle_energy_cache_hits_total", "counter", 'hits', "Lectures servies par le cache."),
+    ("seattle_energy_cache_misses_total", "counter", 'misses', "Lectures absentes du cache."),
+    ("seattle_energy_cache_evictions_total", "counter", 'evictions', "Entrées évincées du cache."),
+    ("seattle_energy_cache_entries", "gauge", 'size', "Entrées présentes dans le cache."),
+    ("seattle_energy_cache_capacity", "gauge", 'capacity', "Capacité du cache."),
+)
+
+PROMETHEUS_FILE = "stage_metrics.prom"
+JSON_FILE = "stage_metrics.json"
+
+_DISABLED = contextlib.nullcontext()
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def cache_stats(caches):
+    """Compteurs de chaque cache ({nom: cache} -> {nom: stats})."""
+    return {name: cache.stats() for name, cache in (caches or {}).items()}
+
+
+class RollingHistogram:
+    """
+    Histogramme cumulé des durées d'une étape et fenêtre glissante des plus récentes.
+
+    Args:
+        buckets: seuils supérieurs des classes (secondes, croissants)
+        window: nombre de durées récentes conservées pour les percentiles
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=DEFAULT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.last = None
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.last = seconds
+        self._recent.append(seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative_counts(self):
+        """Nombre d'observations inférieures ou égales à chaque seuil (puis +Inf)."""
+        return list(itertools.accumulate(self.bucket_counts + [self.count - sum(self.bucket_counts)]))
+
+    def summary(self):
+        """Compteurs et percentiles de la fenêtre récente (millisecondes)."""
+        summary = {'count': self.count, 'sum_seconds': self.sum,
+                   'last_ms': None if self.last is None else self.last * 1e3,
+                   'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+        if self._recent:
+            p50, p95, p99 = np.percentile(np.asarray(self._recent), [50, 95, 99]) * 1e3
+            summary.update(p50_ms=float(p50), p95_ms=float(p95), p99_ms=float(p99))
+        return summary
+
+
+class _TimedStage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """
+    Histogrammes de durée par étape, partagés par toutes les sessions du processus.
+
+    Args:
+        enabled: chronométrage actif (sinon `stage` ne mesure rien)
+        buckets: seuils des histogrammes (secondes)
+        window: taille de la fenêtre glissante des percentiles
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS, window=DEFAULT_WINDOW):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Contexte chronométrant l'étape `name` (contexte vide si désactivé)."""
+        if not self.enabled:
+            return _DISABLED
+        return _TimedStage(self, name)
+
+    def record(self, name, seconds):
+        """Ajoute une durée (secondes) à l'histogramme de l'étape `name`."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = RollingHistogram(self.buckets, self.window)
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    @property
+    def stages(self):
+        return list(self._histograms)
+
+    def summary(self):
+        """Résumé par étape (ordre de première observation)."""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self._histograms.items()}
+
+    def to_json(self, caches=None):
+        """Export JSON : résumé et classes cumulées de chaque étape, compteurs des caches."""
+        with self._lock:
+            stages = {
+                name: {**histogram.summary(), 'buckets': dict(zip(
+                    [*map(str, self.buckets), '+Inf'], histogram.cumulative_counts()
+                ))}
+                for name, histogram in self._histograms.items()
+            }
+        document = {'generated_at': time.time(), 'stages': stages}
+        if caches:
+            document['caches'] = cache_stats(caches)
+        return json.dumps(document, indent=2)
+
+    def to_prometheus(self, caches=None):
+        """Export au format texte d'exposition Prometheus (histogramme par étape, compteurs des caches)."""
+        lines = [
+            f"# HELP {METRIC_NAME} Durée des étapes du rendu de l'application.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for name, histogram in self._histograms.items():
+                label = _label(name)
+                bounds = [*(f"{bound:g}" for bound in self.buckets), '+Inf']
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {histogram.sum:.9g}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {histogram.count}')
+        stats = cache_stats(caches)
+        if stats:
+            for metric, kind, key, description in CACHE_METRICS:
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for name, values in stats.items():
+                    lines.append(f'{metric}{{cache="{_label(name)}"}} {values[key]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, directory, caches=None):
+        """
+        Écrit stage_metrics.prom et stage_metrics.json dans `directory` (caches compris).
+
+        Chaque fichier est remplacé atomiquement : un collecteur (textfile de
+        node_exporter, agent de scraping) ne lit jamais un fichier partiel.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        exports = ((PROMETHEUS_FILE, self.to_prometheus(caches)), (JSON_FILE, self.to_json(caches)))
+        for file_name, content in exports:
+            handle, temporary = tempfile.mkstemp(dir=directory, prefix=f".{file_name}.")
+            with os.fdopen(handle, 'w', encoding='utf-8') as output:
+                output.write(content)
+            os.replace(temporary, directory / file_name)
+            written.append(directory / file_name)
+        return written
+
+
+# Minuteur partagé par l'application (désactivé par défaut, voir STAGE_TIMING dans app.py)
+STAGE_TIMER = StageTimer()
@@ -0,0 +1,503 @@
+"""
+Réentraînement parallèle du zoo de modèles des notebooks 02 et 03.
+
+Chaque famille du notebook (régression linéaire, Ridge, Lasso, SVR, Random
+Forest, Gradient Boosting, AdaBoost, XGBoost) est entraînée sur la cible brute
+(features standardisées) et, comme avec TransformedTargetRegressor dans les
+notebooks, sur la cible log1p (features asymétriques en log1p). Pour chaque
+cible, famille et variante :
+
+- les hyperparamètres sont cherchés par successive halving : les candidats
+  tirés dans l'espace de recherche sont évalués en validation croisée sur un
+  sous-échantillon des lignes, seul le meilleur tiers passe au palier suivant,
+  avec trois fois plus de lignes, jusqu'au jeu d'entraînement complet ;
+- la recherche dispose d'un budget de temps : à son expiration, le meilleur
+  candidat du palier le plus avancé est retenu ;
+- le meilleur candidat est réentraîné sur le jeu d'entraînement et évalué sur
+  le jeu de test (même découpage 80/20 que les notebooks).
+
+Les tâches (cible, famille, variante) tournent en parallèle dans des processus
+séparés. Pour chaque cible, le meilleur modèle servable par l'application
+(Random Forest ou XGBoost sur la cible brute) est écrit dans les fichiers que
+load_models charge (<cible>_model.joblib, <cible>_scaler.joblib,
+energy_features.joblib), avec le classement complet dans training_report.json.
+
+Usage:
+    python -m seattle_energy.training --jobs 8 --time-budget 60
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .fold_cache import FoldCache, preprocess
+
+# Features et cibles des notebooks 02 (énergie) et 03 (CO2)
+STRUCTURAL_FEATURES = [
+    'Age', 'NumberofBuildings', 'NumberofFloors',
+    'PropertyGFATotal', 'PropertyGFAParking_Pct', 'PropertyGFABuilding_Pct',
+    'LargestPropertyUseTypeGFA', 'ENERGYSTARScore'
+]
+TARGETS = {'energy': 'SiteEnergyUseWN(kBtu)', 'co2': 'TotalGHGEmissions'}
+LOG_TRANSFORM_COLS = ['NumberofFloors', 'PropertyGFATotal', 'LargestPropertyUseTypeGFA']
+
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+CV_FOLDS = 10
+
+# Variantes : cible brute, ou cible et features asymétriques en log1p
+VARIANTS = ('raw', 'tt')
+
+# Familles que l'application sait servir (moteur compilé, bundle, TreeSHAP)
+DEPLOYABLE_FAMILIES = ('random_forest', 'xgboost')
+
+# Successive halving : candidats tirés, facteur d'élimination, lignes du premier palier
+DEFAULT_CANDIDATES = 27
+HALVING_FACTOR = 3
+MIN_RESOURCES = 150
+
+# Budget de temps (secondes) de la recherche d'une famille pour une cible et une variante
+DEFAULT_TIME_BUDGET = 60.0
+
+REPORT_FILE = "training_report.json"
+
+
+def model_zoo():
+    """
+    Familles du zoo : nom -> (fabrique de l'estimateur, espace de recherche).
+
+    Les espaces encadrent les hyperparamètres retenus par les GridSearchCV des notebooks.
+    """
+    from functools import partial
+
+    from scipy.stats import loguniform, randint
+    from sklearn.ensemble import AdaBoostRegressor, GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import Lasso, LinearRegression, Ridge
+    from sklearn.svm import SVR
+    from xgboost import XGBRegressor
+
+    return {
+        'random_forest': (partial(RandomForestRegressor, random_state=RANDOM_STATE, n_jobs=1), {
+            'n_estimators': [10, 50, 100, 200],
+            'max_depth': [None, 10, 30, 100],
+            'min_samples_split': [2, 5, 10],
+            'min_samples_leaf': [1, 2, 4],
+        }),
+        'xgboost': (partial(XGBRegressor, random_state=RANDOM_STATE, n_jobs=1), {
+            'learning_rate': [0.01, 0.05, 0.1, 0.2],
+            'max_depth': [3, 4, 6, 8],
+            'n_estimators': [100, 300, 500],
+        }),
+        'gradient_boosting': (partial(GradientBoostingRegressor, random_state=RANDOM_STATE), {
+            'learning_rate': [0.01, 0.05, 0.1, 0.2],
+            'max_depth': [2, 3, 4, 6],
+            'min_samples_leaf': randint(1, 21),
+            'loss': ['squared_error', 'huber'],
+        }),
+        'adaboost': (partial(AdaBoostRegressor, random_state=RANDOM_STATE), {
+            'learning_rate': [0.01, 0.1, 1.0],
+            'n_estimators': [50, 100, 200],
+            'loss': ['linear', 'square', 'exponential'],
+        }),
+        # Itérations bornées : un noyau linéaire ou polynomial mal conditionné ne bloque pas la recherche
+        'svr': (partial(SVR, max_iter=100000), {
+            'C': loguniform(1e-1, 1e4),
+            'kernel': ['rbf', 'poly', 'linear'],
+            'degree': [1, 2, 3],
+        }),
+        'lasso': (partial(Lasso, max_iter=5000), {'alpha': loguniform(1e-2, 1e7)}),
+        'ridge': (Ridge, {'alpha': loguniform(1e-2, 1e5)}),
+        'linear': (LinearRegression, {}),
+    }
+
+
+def feature_columns(columns):
+    """Features des notebooks présentes dans `columns`, dans l'ordre des notebooks."""
+    columns = list(columns)
+    return (
+        [col for col in STRUCTURAL_FEATURES if col in columns]
+        + [col for col in columns if col.startswith('PropType_')]
+        + [col for col in columns if col.startswith('District_')]
+    )
+
+
+def load_training_data(path):
+    """
+    Données nettoyées (CSV ou partitions), sans lignes incomplètes ni infinies.
+
+    Returns:
+        tuple: (X DataFrame des features, dictionnaire nom de cible -> Series)
+    """
+    from .ingest import read_cleaned
+
+    data = read_cleaned(path)
+    data = data[~data.isin([np.nan, np.inf, -np.inf]).any(axis=1)].reset_index(drop=True)
+    features = feature_columns(data.columns)
+    return data[features], {name: data[column] for name, column in TARGETS.items()}
+
+
+def split_train_test(n_rows):
+    """Indices train/test du découpage 80/20 des notebooks."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(np.arange(n_rows), test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def make_folds(n_rows, cv=CV_FOLDS, seed=RANDOM_STATE):
+    """
+    Plis de validation croisée ; les lignes d'entraînement de chaque pli sont
+    mélangées pour que leurs préfixes forment les sous-échantillons des paliers.
+    """
+    from sklearn.model_selection import KFold
+
+    rng = np.random.default_rng(seed)
+    return [
+        (rng.permutation(train), test)
+        for train, test in KFold(cv, shuffle=True, random_state=seed).split(np.arange(n_rows))
+    ]
+
+
+def build_estimator(factory, params, variant):
+    """Estimateur d'un candidat ; la variante 'tt' apprend log1p(cible)."""
+    estimator = factory(**params)
+    if variant == 'tt':
+        from sklearn.compose import TransformedTargetRegressor
+
+        estimator = TransformedTargetRegressor(
+            regressor=estimator, func=np.log1p, inverse_func=np.expm1, check_inverse=False
+        )
+    return estimator
+
+
+def sample_candidates(space, n_candidates, seed=RANDOM_STATE):
+    """Candidats tirés dans l'espace (toute la grille si elle est plus petite)."""
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    if not space:
+        return [{}]
+    if all(isinstance(values, list) for values in space.values()):
+        n_candidates = min(n_candidates, len(ParameterGrid(space)))
+    return list(ParameterSampler(space, n_candidates, random_state=seed))
+
+
+def resource_levels(n_train, factor=HALVING_FACTOR, min_resources=MIN_RESOURCES):
+    """Lignes d'entraînement possibles d'un palier, du jeu complet au plus petit."""
+    return [n_train // factor ** k for k in range(max(int(math.log(n_train / min_resources, factor)), 0) + 1)]
+
+
+def cv_rmse(factory, params, variant, X, y, folds, resources, log_positions, cache=None):
+    """
+    RMSE moyen (échelle de la cible) en validation croisée sur `resources` lignes par pli.
+
+    Avec `cache` (FoldCache sur X et folds), les matrices prétraitées des plis sont réutilisées.
+    """
+    errors = []
+    for fold, (train, test) in enumerate(folds):
+        train = train[:resources]
+        if cache is None:
+            X_train, X_test = preprocess(X[train], X[test], log_positions)
+        else:
+            X_train, X_test = cache.get(fold, resources, log_positions)
+        estimator = build_estimator(factory, params, variant)
+        estimator.fit(X_train, y[train])
+        errors.append(np.sqrt(np.mean((estimator.predict(X_test) - y[test]) ** 2)))
+    return float(np.mean(errors))
+
+
+def successive_halving(factory, candidates, variant, X, y, folds, log_positions,
+                       time_budget=DEFAULT_TIME_BUDGET, factor=HALVING_FACTOR,
+                       min_resources=MIN_RESOURCES, cache=None):
+    """
+    Recherche par successive halving sous budget de temps.
+
+    Tous les candidats d'un palier partagent les plis prétraités de `cache` (FoldCache).
+
+    Returns:
+        dict: meilleurs paramètres, leur RMSE de validation croisée, palier
+        atteint, nombre d'évaluations et expiration du budget
+    """
+    start = time.perf_counter()
+    n_train = min(len(train) for train, _ in folds)
+    # Paliers : assez pour éliminer tous les candidats sauf un, le dernier sur toutes les lignes
+    levels = resource_levels(n_train, factor, min_resources)
+    n_rungs = 1 + min(
+        len(levels) - 1,
+        math.ceil(math.log(len(candidates), factor)) if len(candidates) > 1 else 0
+    )
+    survivors = list(range(len(candidates)))
+    best, evaluations, timed_out = None, 0, False
+
+    for rung in range(n_rungs):
+        resources = levels[n_rungs - 1 - rung]
+        scores = {}
+        for i in survivors:
+            if (best is not None or scores) and time.perf_counter() - start > time_budget:
+                timed_out = True
+                break
+            scores[i] = cv_rmse(factory, candidates[i], variant, X, y, folds, resources, log_positions, cache)
+            evaluations += 1
+        if scores:
+            winner = min(scores, key=scores.get)
+            best = {'params': candidates[winner], 'cv_rmse': scores[winner],
+                    'rung': rung, 'resources': resources}
+        if timed_out:
+            break
+        survivors = sorted(scores, key=scores.get)[:max(1, math.ceil(len(scores) / factor))]
+
+    return {**best, 'evaluations': evaluations, 'timed_out': timed_out,
+            'seconds': time.perf_counter() - start}
+
+
+def run_task(target, family, variant, X, y, train, test, folds, log_positions,
+             time_budget=DEFAULT_TIME_BUDGET, n_candidates=DEFAULT_CANDIDATES,
+             fold_cache=True, cache_dir=None):
+    """
+    Recherche d'une famille pour une cible et une variante, puis évaluation
+    du meilleur candidat réentraîné sur le jeu d'entraînement.
+
+    Args:
+        X, y: features brutes et cible (toutes les lignes)
+        train, test: indices du découpage train/test
+        folds: plis de validation croisée (indices dans le jeu d'entraînement)
+        log_positions: colonnes passées en log1p pour la variante 'tt'
+        fold_cache: réutiliser les plis prétraités entre candidats
+        cache_dir: dossier des plis prétraités partagés entre processus (None : mémoire)
+    """
+    warnings.filterwarnings("ignore")
+    factory, space = model_zoo()[family]
+    log_positions = log_positions if variant == 'tt' else []
+
+    X_train, y_train = X[train], y[train]
+    cache = FoldCache(X_train, folds, cache_dir) if fold_cache else None
+    search = successive_halving(
+        factory, sample_candidates(space, n_candidates), variant,
+        X_train, y_train, folds, log_positions, time_budget=time_budget, cache=cache
+    )
+
+    X_fit, X_eval = preprocess(X_train, X[test], log_positions)
+    estimator = build_estimator(factory, search['params'], variant).fit(X_fit, y_train)
+    residuals = estimator.predict(X_eval) - y[test]
+    total = np.sum((y[test] - y[test].mean()) ** 2)
+    return {
+        'target': target,
+        'family': family,
+        'variant': variant,
+        **search,
+        'test_rmse': float(np.sqrt(np.mean(residuals ** 2))),
+        'test_mae': float(np.mean(np.abs(residuals))),
+        'test_r2': float(1 - np.sum(residuals ** 2) / total),
+        'deployable': family in DEPLOYABLE_FAMILIES and variant == 'raw',
+    }
+
+
+def _init_worker():
+    warnings.filterwarnings("ignore")
+
+
+def train_zoo(X, targets, families=None, variants=VARIANTS, n_jobs=None,
+              time_budget=DEFAULT_TIME_BUDGET, n_candidates=DEFAULT_CANDIDATES,
+              cv=CV_FOLDS, fold_cache=True, progress_callback=None):
+    """
+    Lance toutes les recherches (cible × famille × variante) en parallèle.
+
+    Args:
+        X: DataFrame des features brutes
+        targets: dictionnaire nom de cible -> Series
+        families: familles à entraîner (défaut : tout le zoo)
+        variants: variantes ('raw', 'tt')
+        n_jobs: processus (None : tous les cœurs ; 1 : processus courant)
+        time_budget: budget de temps (s) de chaque recherche
+        n_candidates: candidats tirés par recherche
+        cv: nombre de plis de validation croisée
+        fold_cache: prétraiter chaque pli une seule fois pour toutes les recherches
+        progress_callback: appelé avec chaque résultat terminé
+
+    Returns:
+        list[dict]: résultats triés par cible puis RMSE de test
+    """
+    families = list(model_zoo()) if families is None else list(families)
+    n_jobs = (os.cpu_count() or 1) if n_jobs is None else n_jobs
+    feature_names = list(X.columns)
+    log_positions = [feature_names.index(col) for col in LOG_TRANSFORM_COLS if col in feature_names]
+
+    values = X.to_numpy(dtype=np.float64)
+    train, test = split_train_test(len(values))
+    folds = make_folds(len(train), cv)
+
+    # Plis prétraités une fois pour toutes les cibles, familles et candidats, projetés
+    # en mémoire par chaque processus
+    cache_dir = None
+    if fold_cache:
+        cache_dir = tempfile.mkdtemp(prefix="fold_cache_")
+        log_configs = [log_positions if variant == 'tt' else [] for variant in variants]
+        levels = resource_levels(min(len(fold_train) for fold_train, _ in folds))
+        FoldCache(values[train], folds, cache_dir).warm(levels, log_configs)
+
+    # Familles coûteuses en tête de file : les plus longues démarrent en premier
+    tasks = [
+        (name, family, variant, values, targets[name].to_numpy(dtype=np.float64),
+         train, test, folds, log_positions, time_budget, n_candidates, fold_cache, cache_dir)
+        for family in families for name in targets for variant in variants
+    ]
+    try:
+        results = _run_tasks(tasks, n_jobs, progress_callback)
+    finally:
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return sorted(results, key=lambda r: (list(targets).index(r['target']), r['test_rmse']))
+
+
+def _run_tasks(tasks, n_jobs, progress_callback):
+    results = []
+
+    def record(result):
+        results.append(result)
+        if progress_callback is not None:
+            progress_callback(result)
+
+    if n_jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            record(run_task(*task))
+    else:
+        # spawn : pas de fork d'un processus qui a déjà démarré les threads d'OpenMP
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(tasks)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        ) as pool:
+            for future in as_completed([pool.submit(run_task, *task) for task in tasks]):
+                record(future.result())
+    return results
+
+
+def select_winners(results):
+    """Meilleur résultat servable (RMSE de test) pour chaque cible."""
+    winners = {}
+    for result in results:
+        if result['deployable'] and (
+            result['target'] not in winners or result['test_rmse'] < winners[result['target']]['test_rmse']
+        ):
+            winners[result['target']] = result
+    return winners
+
+
+def fit_winner(result, X, y):
+    """
+    Réentraîne un résultat servable sur le jeu d'entraînement.
+
+    Returns:
+        tuple: (modèle ajusté sur les features standardisées, StandardScaler)
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    factory, _ = model_zoo()[result['family']]
+    train, _ = split_train_test(len(X))
+    X_train = X.iloc[train]
+    scaler = StandardScaler().fit(X_train)
+    X_scaled = pd.DataFrame(scaler.transform(X_train), columns=X.columns)
+    model = factory(**result['params']).fit(X_scaled, y.iloc[train])
+    return model, scaler
+
+
+def write_artifacts(models_dir, feature_names, fitted, results):
+    """
+    Écrit les modèles retenus dans les fichiers chargés par load_models.
+
+    Args:
+        models_dir: dossier des modèles
+        feature_names: ordre des features
+        fitted: dictionnaire nom de cible -> (modèle, scaler)
+        results: classement complet (écrit dans training_report.json)
+
+    Returns:
+        list[Path]: fichiers écrits
+    """
+    import joblib
+
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    def dump(value, file_name):
+        path = models_dir / file_name
+        temporary = path.with_suffix(".tmp")
+        joblib.dump(value, temporary)
+        os.replace(temporary, path)
+        written.append(path)
+
+    for name, (model, scaler) in fitted.items():
+        dump(model, f"{name}_model.joblib")
+        dump(scaler, f"{name}_scaler.joblib")
+    dump(list(feature_names), "energy_features.joblib")
+
+    report = {
+        'features': list(feature_names),
+        'winners': {name: select_winners(results)[name] for name in fitted},
+        'results': results,
+    }
+    path = models_dir / REPORT_FILE
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=_json_default), encoding="utf-8")
+    written.append(path)
+    return written
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def main():
+    from .ingest import default_cleaned_path
+
+    parser = argparse.ArgumentParser(description="Réentraînement parallèle du zoo de modèles")
+    parser.add_argument("--data", type=Path, default=default_cleaned_path(),
+                        help="partitions ou CSV nettoyé")
+    parser.add_argument("--output", type=Path, default=Path("models"))
+    parser.add_argument("--jobs", type=int, default=None, help="processus (défaut : tous les cœurs)")
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET,
+                        help="secondes de recherche par cible, famille et variante")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES)
+    parser.add_argument("--cv", type=int, default=CV_FOLDS)
+    parser.add_argument("--families", nargs="+", default=None, help="familles du zoo (défaut : toutes)")
+    parser.add_argument("--dry-run", action="store_true", help="classement seul, sans écrire les modèles")
+    args = parser.parse_args()
+
+    X, targets = load_training_data(args.data)
+    print(f"{len(X)} bâtiments, {X.shape[1]} features")
+
+    def on_result(result):
+        flag = " (budget atteint)" if result['timed_out'] else ""
+        print(f"{result['target']:>6} {result['family']:<18} {result['variant']:<4} "
+              f"RMSE test {result['test_rmse']:>14,.2f}  R² {result['test_r2']:6.3f}  "
+              f"{result['evaluations']:>3} évaluations en {result['seconds']:6.1f} s{flag}")
+
+    start = time.perf_counter()
+    results = train_zoo(X, targets, families=args.families, n_jobs=args.jobs,
+                        time_budget=args.time_budget, n_candidates=args.candidates,
+                        cv=args.cv, progress_callback=on_result)
+    print(f"Zoo entraîné en {time.perf_counter() - start:.1f} s")
+
+    winners = select_winners(results)
+    for name, result in winners.items():
+        print(f"Retenu pour {name} : {result['family']} {result['params']} (RMSE test {result['test_rmse']:,.2f})")
+    if args.dry_run or not winners:
+        return
+    fitted = {name: fit_winner(result, X, targets[name]) for name, result in winners.items()}
+    for path in write_artifacts(args.output, X.columns, fitted, results):
+        print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
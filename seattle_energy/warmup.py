@@ -0,0 +1,105 @@
+"""
+Préchauffage en arrière-plan au démarrage du serveur.
+
+Les étapes (chargement des modèles, construction des explainers, prédiction
+et explication factices) s'exécutent dans un thread pendant que la page se
+dessine. L'état de préparation est consultable à tout moment et les durées
+de chaque étape sont ajoutées à un journal JSON Lines, pour suivre la latence
+de démarrage à froid d'une version à l'autre.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# États successifs du préchauffage
+PENDING, RUNNING, READY, FAILED = 'pending', 'running', 'ready', 'failed'
+
+
+class WarmUp:
+    """
+    Exécute une suite d'étapes de préchauffage dans un thread dédié.
+
+    Args:
+        steps: liste de couples (nom, fonction) ; chaque fonction reçoit le
+            dictionnaire `context` partagé entre les étapes
+        log_path: journal JSON Lines des durées (None pour ne rien écrire)
+    """
+
+    def __init__(self, steps, log_path=None):
+        self.steps = list(steps)
+        self.log_path = Path(log_path) if log_path else None
+        # Étiquettes ajoutées à l'enregistrement (ex. version des modèles)
+        self.labels = {}
+        self.context = {'labels': self.labels}
+        self.timings = {}
+        self.error = None
+        self.total_seconds = None
+        self._state = PENDING
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def is_ready(self):
+        return self._state == READY
+
+    def start(self):
+        """Lance le thread de préchauffage (une seule fois)."""
+        with self._lock:
+            if self._thread is None:
+                self._state = RUNNING
+                self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Attend la fin du préchauffage ; retourne True s'il est terminé."""
+        return self._done.wait(timeout)
+
+    def status(self):
+        """État exportable : étape, durées par étape, durée totale, erreur."""
+        return {
+            'state': self._state,
+            'timings': dict(self.timings),
+            'total_seconds': self.total_seconds,
+            'error': self.error,
+        }
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            for name, step in self.steps:
+                step_start = time.perf_counter()
+                step(self.context)
+                self.timings[name] = time.perf_counter() - step_start
+            self._state = READY
+        except Exception as exc:  # l'application reste utilisable sans préchauffage
+            self.error = f"{type(exc).__name__}: {exc}"
+            self._state = FAILED
+        finally:
+            self.total_seconds = time.perf_counter() - start
+            self._record()
+            self._done.set()
+
+    def _record(self):
+        """Ajoute les durées du préchauffage au journal."""
+        if self.log_path is None:
+            return
+        record = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            **self.labels,
+            **self.status(),
+        }
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.log_path.open('a', encoding='utf-8') as log:
+                log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
@@ -0,0 +1,490 @@
+"""
+Service HTTP d'inférence sans interface (asyncio, bibliothèque standard).
+
+Expose la logique de prédiction et d'explication de l'application
+(seattle_energy.inference, sans Streamlit) aux outils internes :
+
+    POST /predict   {"property_gfa": 50000, "floors": 5, "age": 30,
+                     "energy_star": 50, "building_type": "Office (Small/Mid)"}
+                    -> {"energy_kbtu": ..., "co2_tons": ..., "using_ml": true}
+    POST /explain   même corps -> {"expected_value": ..., "method": "tree_shap",
+                                   "contributions": [{"feature": ..., "value": ...}, ...]}
+    GET  /health    -> {"status": "ok", "model_version": ...}
+    GET  /metrics   -> latences p50/p99 par endpoint, tailles des micro-batchs et
+                       compteurs du cache d'explications
+
+Les requêtes unitaires concurrentes sont regroupées en micro-batchs (taille
+maximale et attente maximale configurables) : un seul appel aux modèles par
+batch amortit le surcoût fixe de sklearn. Les calculs s'exécutent dans un
+thread dédié, la boucle asyncio ne fait que lire et répondre.
+
+Usage:
+    python service.py [--port 8000] [--max-batch-size 64] [--max-wait-ms 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from seattle_energy.cache import LRUCache
+from seattle_energy.inference import (
+    BATCH_INPUT_COLUMNS, EXPLANATION_CACHE_SIZE, SHAP_TIME_BUDGET, SIDEBAR_DOMAIN, _batch_inputs,
+    explain_row, fast_explainer, load_inference_models, predict_batch, prepare_features_batch,
+    shap_explainer, standardize_features
+)
+
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("SERVICE_MAX_BATCH_SIZE", "64"))
+DEFAULT_MAX_WAIT = float(os.environ.get("SERVICE_MAX_WAIT_MS", "2")) / 1000
+
+# Nombre de latences conservées par endpoint pour le calcul des percentiles
+LATENCY_WINDOW = 10000
+
+# Taille maximale acceptée pour le corps d'une requête
+MAX_BODY_BYTES = 64 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class RequestError(Exception):
+    """Requête invalide, renvoyée au client avec son code HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ProtocolError(RequestError):
+    """Message HTTP mal formé ou corps non lu : la connexion n'est plus synchronisée."""
+
+
+# =============================================================================
+# MICRO-BATCHS ET LATENCES
+# =============================================================================
+
+class MicroBatcher:
+    """
+    Regroupe les éléments soumis en parallèle pour un traitement par lots.
+
+    Un batch part dès qu'il atteint `max_batch_size` éléments, ou `max_wait`
+    secondes après l'arrivée de son premier élément.
+
+    Args:
+        process_batch: fonction liste d'éléments -> liste de résultats (même ordre)
+        max_batch_size: nombre maximal d'éléments par batch
+        max_wait: attente maximale (secondes) avant de lancer un batch incomplet
+        executor: exécuteur des appels à process_batch (None : celui de la boucle)
+    """
+
+    def __init__(self, process_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait=DEFAULT_MAX_WAIT, executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._queue = None
+        self._task = None
+
+    async def submit(self, item):
+        """Ajoute un élément au prochain batch et attend son résultat."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.batch_sizes.append(len(batch))
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.process_batch, [item for item, _ in batch]
+                )
+            except Exception as exc:  # l'erreur est transmise à chaque requête du batch
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        sizes = np.asarray(self.batch_sizes)
+        return {
+            'batches': int(len(sizes)),
+            'mean_size': float(sizes.mean()) if len(sizes) else None,
+            'max_size': int(sizes.max()) if len(sizes) else None,
+        }
+
+
+class LatencyRecorder:
+    """Latences récentes d'un endpoint (fenêtre glissante) et leurs percentiles."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.count = 0
+        self._latencies = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.count += 1
+        self._latencies.append(seconds)
+
+    def summary(self):
+        if not self._latencies:
+            return {'count': self.count, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(np.asarray(self._latencies), [50, 99]) * 1e3
+        return {'count': self.count, 'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+
+# =============================================================================
+# SERVICE D'INFÉRENCE
+# =============================================================================
+
+def parse_building(payload):
+    """Valide le corps JSON d'une requête et retourne les entrées d'un bâtiment."""
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Le corps doit être un objet JSON")
+    missing = [name for name in BATCH_INPUT_COLUMNS if name not in payload]
+    if missing:
+        raise RequestError(400, f"Champs manquants : {missing}")
+
+    building = {'building_type': str(payload['building_type'])}
+    for name in BATCH_INPUT_COLUMNS[:-1]:
+        value = payload[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(400, f"Valeur numérique attendue pour {name!r}")
+        try:
+            # Un entier JSON hors de la plage des flottants (10**400) lève OverflowError
+            value = float(value)
+        except (OverflowError, TypeError, ValueError):
+            raise RequestError(400, f"Valeur numérique hors limites pour {name!r}") from None
+        low, high, _ = SIDEBAR_DOMAIN[name]
+        if not low <= value <= high:
+            # Domaine de la sidebar : les modèles n'ont pas été validés au-delà
+            raise RequestError(400, f"{name!r} doit être compris entre {low} et {high}")
+        building[name] = value
+    return building
+
+
+class InferenceService:
+    """
+    Endpoints predict/explain adossés à seattle_energy.inference, avec micro-batching.
+
+    Args:
+        models: dictionnaire retourné par load_inference_models (None : fallback heuristique)
+        max_batch_size: nombre maximal de requêtes par appel aux modèles
+        max_wait: attente maximale (secondes) avant un batch incomplet
+        time_budget: budget du TreeSHAP exact par explication (voir explain_row)
+    """
+
+    def __init__(self, models, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT,
+                 time_budget=SHAP_TIME_BUDGET):
+        self.models = models
+        self.time_budget = time_budget
+        # Cache d'explications et explainer propres au service (construit à la première explication)
+        self.explanation_cache = LRUCache(EXPLANATION_CACHE_SIZE)
+        self._explainer = None
+        # Un seul thread de calcul : les batchs s'enchaînent sans se disputer le GIL
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self.batchers = {
+            'predict': MicroBatcher(self.predict_buildings, max_batch_size, max_wait, self._executor),
+            'explain': MicroBatcher(self.explain_buildings, max_batch_size, max_wait, self._executor),
+        }
+        self.latency = {name: LatencyRecorder() for name in ('predict', 'explain')}
+
+    @property
+    def using_ml(self):
+        return bool(self.models and 'energy_model' in self.models)
+
+    def predict_buildings(self, buildings):
+        """Prédictions d'un micro-batch (un appel predict_batch pour tous les bâtiments)."""
+        predicted_energy, predicted_co2, using_ml = predict_batch(self.models, pd.DataFrame(buildings))
+        return [
+            {'energy_kbtu': float(energy), 'co2_tons': float(co2), 'using_ml': using_ml}
+            for energy, co2 in zip(predicted_energy, predicted_co2)
+        ]
+
+    def explainer(self):
+        """Explainer du modèle énergie (appelé dans le thread de calcul uniquement)."""
+        if self._explainer is None:
+            fast = fast_explainer(self.models)
+            self._explainer = shap_explainer(self.models['energy_model']) if fast is None else fast
+        return self._explainer
+
+    def explain_buildings(self, buildings):
+        """Explications d'un micro-batch : features préparées et standardisées en une fois."""
+        feature_names = self.models['energy_features']
+        X = prepare_features_batch(*_batch_inputs(pd.DataFrame(buildings)), feature_names)
+        X_scaled = standardize_features(X, self.models['energy_scaler'])
+
+        results = []
+        for row in X_scaled:
+            shap_df, expected_value, method = explain_row(
+                self.models, row, feature_names, self.explanation_cache, self.explainer, self.time_budget
+            )
+            results.append({
+                'expected_value': float(np.ravel(expected_value)[0]),
+                'method': method,
+                'contributions': [
+                    {'feature': feature, 'value': float(value)}
+                    for feature, value in zip(shap_df['Feature'], shap_df['SHAP Value'])
+                ]
+            })
+        return results
+
+    async def handle(self, method, path, body):
+        """
+        Traite une requête HTTP décodée.
+
+        Returns:
+            tuple: (code HTTP, objet JSON de la réponse)
+        """
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            return 200, {
+                'status': 'ok', 'using_ml': self.using_ml,
+                'model_version': (self.models or {}).get('model_version')
+            }
+        if path == '/metrics':
+            return 200, self.metrics()
+        endpoint = path.lstrip('/')
+        if endpoint not in self.batchers:
+            raise RequestError(404, f"Endpoint inconnu : {path}")
+        if method != 'POST':
+            raise RequestError(405, f"{path} n'accepte que POST")
+        if path == '/explain' and not self.using_ml:
+            raise RequestError(503, "Explications indisponibles sans modèle ML")
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as exc:
+            raise RequestError(400, f"JSON invalide : {exc}") from exc
+        building = parse_building(payload)
+
+        start = time.perf_counter()
+        result = await self.batchers[endpoint].submit(building)
+        self.latency[endpoint].record(time.perf_counter() - start)
+        return 200, result
+
+    def metrics(self):
+        return {
+            'latency': {name: recorder.summary() for name, recorder in self.latency.items()},
+            'batches': {name: batcher.stats() for name, batcher in self.batchers.items()},
+            'caches': {'explanation': self.explanation_cache.stats()},
+        }
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
+        self._executor.shutdown(wait=False)
+
+
+# =============================================================================
+# SERVEUR HTTP/1.1 (KEEP-ALIVE)
+# =============================================================================
+
+async def read_http_message(reader):
+    """
+    Lit un message HTTP/1.1 (requête ou réponse) : ligne de départ, en-têtes, corps.
+
+    Returns:
+        tuple | None: (ligne de départ, en-têtes en minuscules, corps), None en fin de flux
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise ProtocolError(413, "Corps de requête trop volumineux")
+    body = await reader.readexactly(length) if length else b''
+    return start_line.decode('latin-1').rstrip('\r\n'), headers, body
+
+
+def _encode_response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+async def read_request(reader):
+    """
+    Requête suivante d'une connexion.
+
+    Returns:
+        tuple | None: (méthode, chemin, en-têtes, corps), None en fin de flux
+
+    Raises:
+        ProtocolError: message HTTP mal formé (400) ou corps trop volumineux (413)
+    """
+    try:
+        message = await read_http_message(reader)
+        if message is None:
+            return None
+        start_line, headers, body = message
+        method, path, _ = start_line.split(' ', 2)
+    except (ValueError, asyncio.IncompleteReadError) as exc:
+        raise ProtocolError(400, f"Requête HTTP invalide : {exc}") from exc
+    return method, path, headers, body
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            keep_alive = True
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await service.handle(method, path, body)
+            except RequestError as exc:
+                status, payload = exc.status, {'error': str(exc)}
+                keep_alive = keep_alive and not isinstance(exc, ProtocolError)
+            except Exception as exc:  # erreurs du modèle ou du batcher : le service reste disponible
+                status, payload = 500, {'error': f"{type(exc).__name__}: {exc}"}
+
+            writer.write(_encode_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host="127.0.0.1", port=8000):
+    """Démarre le serveur HTTP (port 0 : port libre choisi par le système)."""
+    return await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer), host, port
+    )
+
+
+async def http_request(reader, writer, method, path, payload=None):
+    """
+    Client minimal : envoie une requête sur une connexion keep-alive ouverte.
+
+    Returns:
+        tuple: (code HTTP, objet JSON de la réponse)
+    """
+    body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1')
+        + body
+    )
+    await writer.drain()
+    status_line, _, response_body = await read_http_message(reader)
+    return int(status_line.split(' ', 2)[1]), json.loads(response_body)
+
+
+async def generate_load(host, port, buildings, endpoint='/predict', concurrency=32):
+    """
+    Générateur de charge : `concurrency` clients keep-alive se partagent la liste des bâtiments.
+
+    Returns:
+        dict: latences client (secondes, ordre d'envoi), codes HTTP, durée totale
+    """
+    latencies = np.empty(len(buildings))
+    statuses = [None] * len(buildings)
+    pending = iter(range(len(buildings)))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in pending:
+                start = time.perf_counter()
+                statuses[i], _ = await http_request(reader, writer, 'POST', endpoint, buildings[i])
+                latencies[i] = time.perf_counter() - start
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, len(buildings)))))
+    return {'latencies': latencies, 'statuses': statuses, 'elapsed': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP d'inférence (predict/explain)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000)
+    args = parser.parse_args()
+
+    service = InferenceService(
+        load_inference_models(Path("models")), max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    )
+
+    async def serve():
+        server = await start_server(service, args.host, args.port)
+        address = server.sockets[0].getsockname()
+        print(f"Service d'inférence sur http://{address[0]}:{address[1]} "
+              f"(batch ≤ {args.max_batch_size}, attente ≤ {args.max_wait_ms:g} ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,12 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: benchmark de non-régression (RUN_BENCHMARKS=1, dépend de la machine)"
+    )
+
+
 @pytest.fixture
 def sample_features():
     """Features de test pour un bâtiment."""
@@ -0,0 +1,288 @@
+"""
+Mesure des chemins critiques de l'application (benchmarks de non-régression).
+
+Chaque cas chronomètre une fonction de app.py sur les artefacts réels de
+models/ et des bâtiments de data/data_cleaned.csv, pour une taille de batch
+donnée (nombre de bâtiments traités par appel mesuré) : médiane, 95e centile
+et pic de mémoire Python (tracemalloc, mesuré sur un appel séparé pour ne pas
+fausser les durées). Les mesures sont comparées aux références de
+tests/benchmark_baseline.json.
+
+Le fichier de références contient une section par machine et par état des
+artefacts optionnels de models/ (bundle, surface de réponse, imputer, non
+versionnés) : un clone sans artefact, une machine de CI ou un poste avec le
+bundle exporté ont chacun la leur, ajoutée ou remplacée par
+python scripts/benchmark_hot_paths.py --update-baseline.
+
+Utilisé par tests/test_benchmarks.py (seuils) et scripts/benchmark_hot_paths.py
+(rapport, mise à jour des références).
+"""
+
+import contextlib
+import json
+import os
+import platform
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+# Écart relatif toléré avant de signaler une régression (0.5 : +50 %)
+DEFAULT_TOLERANCE = 0.5
+
+# Écarts absolus en deçà desquels une régression n'est pas signalée (bruit de mesure)
+TIME_FLOOR = 2e-4
+MEMORY_FLOOR = 64 * 1024
+
+# Fonction mesurée -> tailles de batch
+BATCH_SIZES = {
+    'load_models': [1],
+    'prepare_features': [1, 10, 100],
+    'predict_with_fallback': [1, 10, 100],
+    'compute_shap_values': [1, 10],
+    'create_shap_waterfall_plot': [1, 10],
+    'create_feature_importance_plot': [1],
+}
+
+# Nombre de mesures par cas (les cas lents s'arrêtent au budget de temps)
+DEFAULT_REPEAT = 15
+TIME_BUDGET = 3.0
+
+
+# Artefacts optionnels (non versionnés) qui changent le chemin de load_models
+OPTIONAL_ARTIFACTS = ('bundle/manifest.json', 'response_surface.npz', 'imputer.joblib')
+
+
+def artifact_state(models_dir=ROOT / "models"):
+    """Présence de chaque artefact optionnel de models/."""
+    return {name: (Path(models_dir) / name).exists() for name in OPTIONAL_ARTIFACTS}
+
+
+def machine_info():
+    """Machine de mesure : les références ne valent que sur une machine identique."""
+    return {'system': platform.system(), 'arch': platform.machine(),
+            'python': '.'.join(platform.python_version_tuple()[:2]), 'cpus': os.cpu_count()}
+
+
+def find_section(baseline, machine=None, artifacts=None):
+    """
+    Section des références mesurée sur cette machine avec ces artefacts optionnels.
+
+    Returns:
+        tuple: (section ou None, raison de l'absence de section applicable)
+    """
+    machine = machine_info() if machine is None else machine
+    artifacts = artifact_state() if artifacts is None else artifacts
+    same_machine = [section for section in baseline.get('sections', []) if section['machine'] == machine]
+    if not same_machine:
+        return None, "aucune référence pour cette machine (--update-baseline pour l'ajouter)"
+    for section in same_machine:
+        if section['artifacts'] == artifacts:
+            return section, None
+    return None, "aucune référence pour ces artefacts optionnels de models/ (--update-baseline pour l'ajouter)"
+
+
+def case_name(function, batch_size):
+    return f"{function}[{batch_size}]"
+
+
+def all_cases():
+    """Liste des (fonction, taille de batch) mesurés."""
+    return [(function, size) for function, sizes in BATCH_SIZES.items() for size in sizes]
+
+
+@contextlib.contextmanager
+def in_repository():
+    """Répertoire courant placé à la racine du dépôt (chemins relatifs de app.py)."""
+    previous = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def sample_buildings(n_rows, seed=0):
+    """
+    Bâtiments tirés de data/data_cleaned.csv, sous forme d'entrées de la sidebar.
+
+    Returns:
+        list: dictionnaires (property_gfa, floors, age, energy_star, building_type)
+    """
+    import app
+
+    data = pd.read_csv(ROOT / "data" / "data_cleaned.csv")
+    rows = data.sample(n=n_rows, replace=len(data) < n_rows, random_state=seed)
+    types = {column: name for name, column in reversed(app.BUILDING_TYPE_MAPPING.items())}
+    buildings = []
+    for _, row in rows.iterrows():
+        active = [column for column in types if row.get(column, 0) == 1]
+        buildings.append({
+            'property_gfa': float(row['PropertyGFATotal']),
+            'floors': int(row['NumberofFloors']),
+            'age': int(row['Age']),
+            'energy_star': float(row['ENERGYSTARScore']),
+            'building_type': types[active[0]] if active else "Other",
+        })
+    return buildings
+
+
+class HotPathContext:
+    """Modèles, explainer et bâtiments partagés par tous les cas."""
+
+    def __init__(self, max_batch=None):
+        import app
+
+        self.app = app
+        max_batch = max_batch or max(size for sizes in BATCH_SIZES.values() for size in sizes)
+        with in_repository():
+            self.models = app.load_models()
+        self.feature_names = self.models['energy_features']
+        self.buildings = sample_buildings(max_batch)
+        self.predictions = [
+            app.predict_with_fallback(self.models, **building) for building in self.buildings
+        ]
+        self.X_scaled = np.vstack([prediction[4] for prediction in self.predictions])
+        self.explainer = app.get_shap_explainer(self.models['energy_model'])
+        self.shap_frames = [
+            app.compute_shap_values(self.explainer, self.X_scaled[i:i + 1], self.feature_names)
+            for i in range(min(len(self.buildings), max(BATCH_SIZES['create_shap_waterfall_plot'])))
+        ]
+
+    def call(self, function, batch_size):
+        """Fonction sans argument exécutant `function` sur `batch_size` bâtiments."""
+        app = self.app
+        buildings = self.buildings[:batch_size]
+
+        if function == 'load_models':
+            def run():
+                app.load_models.clear()
+                with in_repository():
+                    return app.load_models()
+        elif function == 'prepare_features':
+            def run():
+                for building in buildings:
+                    app.prepare_features(feature_names=self.feature_names, **building)
+        elif function == 'predict_with_fallback':
+            def run():
+                for building in buildings:
+                    app.predict_with_fallback(self.models, **building)
+        elif function == 'compute_shap_values':
+            X = self.X_scaled[:batch_size]
+
+            def run():
+                return app.compute_shap_values(self.explainer, X, self.feature_names)
+        elif function == 'create_shap_waterfall_plot':
+            frames = self.shap_frames[:batch_size]
+            predicted = [prediction[0] for prediction in self.predictions[:batch_size]]
+
+            def run():
+                for (shap_df, expected_value), value in zip(frames, predicted):
+                    app.create_shap_waterfall_plot(shap_df, expected_value, value)
+        elif function == 'create_feature_importance_plot':
+            def run():
+                app.create_feature_importance_plot(self.models['energy_model'], self.feature_names)
+        else:
+            raise KeyError(f"Fonction non mesurée : {function}")
+        return run
+
+
+def measure(run, repeat=DEFAULT_REPEAT, time_budget=TIME_BUDGET):
+    """
+    Durées de `run` (médiane, 95e centile) et pic de mémoire d'un appel.
+
+    Returns:
+        dict: median, p95 (secondes), peak_memory (octets), runs
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        run()  # échauffement (imports paresseux, caches de routage)
+
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < repeat and (len(timings) < 3 or time.perf_counter() - started < time_budget):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'median': float(np.median(timings)),
+        'p95': float(np.percentile(timings, 95)),
+        'peak_memory': int(peak),
+        'runs': len(timings),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Références enregistrées (dictionnaire vide si le fichier est absent)."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """
+    Enregistre les mesures comme références de cette machine et de ces artefacts.
+
+    Les sections des autres machines et des autres états des artefacts sont conservées.
+    """
+    section = {
+        'machine': machine_info(),
+        'artifacts': artifact_state(),
+        'cases': {name: {key: result[key] for key in ('median', 'p95', 'peak_memory')}
+                  for name, result in sorted(results.items())},
+    }
+    sections = [
+        other for other in load_baseline(path).get('sections', [])
+        if (other['machine'], other['artifacts']) != (section['machine'], section['artifacts'])
+    ]
+    sections.append(section)
+    sections.sort(key=lambda other: json.dumps([other['machine'], other['artifacts']], sort_keys=True))
+    Path(path).write_text(json.dumps({'sections': sections}, indent=2) + "\n", encoding="utf-8")
+    return Path(path)
+
+
+def best_of(*results):
+    """Meilleure valeur de chaque métrique sur plusieurs mesures d'un même cas."""
+    merged = {key: min(result[key] for result in results) for key in ('median', 'p95', 'peak_memory')}
+    merged['runs'] = sum(result['runs'] for result in results)
+    return merged
+
+
+def regressions(result, reference, tolerance=DEFAULT_TOLERANCE):
+    """
+    Métriques de `result` qui dépassent leur référence de plus de `tolerance`.
+
+    Le 95e centile, plus bruité, est comparé avec une tolérance doublée ; un
+    dépassement inférieur au plancher absolu (TIME_FLOOR, MEMORY_FLOOR) est ignoré.
+
+    Returns:
+        list: messages décrivant chaque régression (vide si aucune)
+    """
+    messages = []
+    for metric, factor, floor in (('median', 1, TIME_FLOOR), ('p95', 2, TIME_FLOOR),
+                                  ('peak_memory', 1, MEMORY_FLOOR)):
+        if metric not in reference:
+            continue
+        allowed = tolerance * factor
+        limit = max(reference[metric] * (1 + allowed), reference[metric] + floor)
+        if result[metric] > limit:
+            messages.append(
+                f"{metric} : {result[metric]:.6g} > {limit:.6g} "
+                f"(référence {reference[metric]:.6g}, tolérance {allowed:.0%})"
+            )
+    return messages
@@ -550,3 +550,482 @@ class TestShapFunctions:
         assert fig is not None
         assert hasattr(fig, 'data')
         assert hasattr(fig, 'layout')
+
+
+class TestPredictBatch:
+    """Tests pour la prédiction vectorisée de portefeuille."""
+
+    @pytest.fixture
+    def buildings(self):
+        """Petit portefeuille de bâtiments hétérogènes."""
+        return pd.DataFrame({
+            'property_gfa': [50000, 10000, 250000, 80000],
+            'floors': [5, 2, 30, 4],
+            'age': [30, 80, 5, 120],
+            'energy_star': [50, 20, 95, 60],
+            'building_type': ['Office (Small/Mid)', 'Hotel', 'Office (Large)', 'Inconnu']
+        })
+
+    def test_prepare_features_batch_matches_single(self, buildings, feature_names):
+        """Vérifie que la matrice batch est identique aux lignes de prepare_features."""
+        from app import prepare_features, prepare_features_batch
+
+        X = prepare_features_batch(
+            buildings['property_gfa'], buildings['floors'], buildings['age'],
+            buildings['energy_star'], buildings['building_type'], feature_names
+        )
+
+        assert X.shape == (len(buildings), len(feature_names))
+        for i, row in enumerate(buildings.itertuples(index=False)):
+            expected = prepare_features(*row, feature_names).to_numpy(dtype=float)[0]
+            np.testing.assert_array_equal(X[i], expected)
+
+    def test_predict_batch_matches_predict_with_fallback(self, monkeypatch, buildings):
+        """Vérifie que le batch ML donne les mêmes prédictions que l'appel unitaire."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_batch, predict_with_fallback
+
+        load_models.clear()
+        models = load_models()
+
+        energy, co2, using_ml = predict_batch(models, buildings)
+
+        assert using_ml is True
+        assert energy.shape == co2.shape == (len(buildings),)
+        for i, row in enumerate(buildings.itertuples(index=False)):
+            single = predict_with_fallback(models, *row)
+            assert energy[i] == pytest.approx(single[0])
+            assert co2[i] == pytest.approx(single[1])
+
+    def test_predict_batch_heuristic_matches_fallback(self, buildings):
+        """Vérifie que le fallback vectorisé reproduit le fallback unitaire."""
+        from app import predict_batch, predict_with_fallback
+
+        energy, co2, using_ml = predict_batch(None, buildings.to_dict('list'))
+
+        assert using_ml is False
+        for i, row in enumerate(buildings.itertuples(index=False)):
+            single = predict_with_fallback(None, *row)
+            assert energy[i] == pytest.approx(single[0])
+            assert co2[i] == pytest.approx(single[1])
+
+    def test_predict_batch_missing_column(self):
+        """Vérifie qu'une colonne manquante lève une KeyError explicite."""
+        from app import predict_batch
+
+        with pytest.raises(KeyError):
+            predict_batch(None, {'property_gfa': [50000]})
+
+
+class TestPortfolioScoring:
+    """Tests pour le scoring de portefeuille par blocs."""
+
+    @pytest.fixture
+    def raw_csv(self):
+        """Extrait du CSV de benchmarking brut (200 premières lignes)."""
+        data_path = Path(__file__).parent.parent / "data" / "2016_Building_Energy_Benchmarking.csv"
+        with open(data_path, encoding='utf-8') as f:
+            lines = [next(f) for _ in range(201)]
+        return "".join(lines)
+
+    def test_portfolio_inputs_from_raw(self):
+        """Vérifie la conversion des colonnes brutes en entrées batch."""
+        from app import portfolio_inputs_from_raw
+
+        chunk = pd.DataFrame({
+            'DataYear': [2016, 2016],
+            'YearBuilt': [1927, 2020],
+            'NumberofFloors': [12, 0],
+            'PropertyGFATotal': [88434, 20000],
+            'ENERGYSTARScore': [60, np.nan],
+            'PrimaryPropertyType': ['Large Office', 'Restaurant\n']
+        })
+
+        inputs = portfolio_inputs_from_raw(chunk)
+
+        assert inputs['age'].tolist() == [89, 0]
+        assert inputs['floors'].tolist() == [12, 1]
+        assert inputs['energy_star'].tolist() == [60, 50]
+        assert inputs['building_type'].tolist() == ['Office (Large)', 'Other']
+
+    def test_score_portfolio_csv_chunks(self, raw_csv, tmp_path):
+        """Vérifie que le scoring par blocs écrit toutes les lignes avec un seul en-tête."""
+        import io
+        from app import score_portfolio_csv
+
+        output_path = tmp_path / "scored.csv"
+        progress = []
+
+        rows = score_portfolio_csv(
+            None, io.StringIO(raw_csv), output_path, chunksize=64,
+            progress_callback=lambda done, fraction: progress.append((done, fraction))
+        )
+
+        scored = pd.read_csv(output_path)
+        assert rows == 200
+        assert len(scored) == 200
+        assert [done for done, _ in progress] == [64, 128, 192, 200]
+        assert progress[-1][1] == pytest.approx(1.0)
+        assert (scored['Predicted_SiteEnergyUseWN(kBtu)'] > 0).all()
+        assert (scored['PredictionSource'] == 'heuristic').all()
+
+    def test_score_portfolio_csv_matches_single_chunk(self, monkeypatch, raw_csv, tmp_path):
+        """Vérifie que le découpage en blocs ne change pas les prédictions ML."""
+        import io
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, score_portfolio_csv
+
+        load_models.clear()
+        models = load_models()
+
+        score_portfolio_csv(models, io.StringIO(raw_csv), tmp_path / "small.csv", chunksize=50)
+        score_portfolio_csv(models, io.StringIO(raw_csv), tmp_path / "full.csv", chunksize=1000)
+
+        small = pd.read_csv(tmp_path / "small.csv")
+        full = pd.read_csv(tmp_path / "full.csv")
+        pd.testing.assert_frame_equal(small, full)
+
+    def test_scored_file_replaced_and_removed_on_failure(self, monkeypatch, raw_csv, tmp_path):
+        """Vérifie qu'un seul fichier scoré existe par dossier et qu'un échec n'en laisse aucun partiel."""
+        import io
+        import app
+
+        path, rows = app.write_scored_portfolio(None, io.StringIO(raw_csv), tmp_path)
+        app.write_scored_portfolio(None, io.StringIO(raw_csv), tmp_path)
+        assert rows == 200
+        assert [entry.name for entry in tmp_path.iterdir()] == [path.name]
+
+        def failing(models, source, destination, progress_callback=None):
+            destination.write("partiel")
+            raise ValueError("CSV illisible")
+
+        monkeypatch.setattr(app, 'score_portfolio_csv', failing)
+        with pytest.raises(ValueError):
+            app.write_scored_portfolio(None, io.StringIO(raw_csv), tmp_path)
+        assert [entry.name for entry in tmp_path.iterdir()] == [path.name]
+        assert len(pd.read_csv(path)) == 200
+
+    def test_zip_scored_portfolio(self, raw_csv, tmp_path):
+        """Vérifie que l'archive téléchargée contient le fichier scoré, compressé."""
+        import io
+        import zipfile
+        import app
+
+        path, _ = app.write_scored_portfolio(None, io.StringIO(raw_csv), tmp_path)
+        data = app.zip_scored_portfolio(path, "portefeuille_scored.csv")
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["portefeuille_scored.csv"]
+            assert archive.read("portefeuille_scored.csv") == path.read_bytes()
+        assert len(data) < path.stat().st_size
+
+    def test_portfolio_directory_per_session(self):
+        """Vérifie que le dossier de la session est réutilisé puis supprimé avec elle."""
+        import gc
+        from app import get_portfolio_directory
+
+        session = {}
+        directory = get_portfolio_directory(session)
+        assert get_portfolio_directory(session) == directory
+        assert get_portfolio_directory({}) != directory
+        (directory / "portfolio_scored.csv").write_text("x")
+
+        session.clear()
+        gc.collect()
+        assert not directory.exists()
+
+
+class TestPredictCached:
+    """Tests pour le cache de prédictions unitaires."""
+
+    def test_second_call_is_a_hit(self, monkeypatch, sample_features):
+        """Vérifie qu'un appel identique est servi par le cache."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_cached, predict_with_fallback
+        from seattle_energy.cache import LRUCache
+
+        load_models.clear()
+        models = load_models()
+        cache = LRUCache(capacity=8)
+
+        first = predict_cached(models, cache=cache, **sample_features)
+        second = predict_cached(models, cache=cache, **sample_features)
+        direct = predict_with_fallback(models, **sample_features)
+
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['hits'] == 1
+        assert first[0] == second[0] == direct[0]
+        assert first[1] == second[1] == direct[1]
+        np.testing.assert_array_equal(second[4], direct[4])
+
+    def test_key_is_normalized(self, monkeypatch):
+        """Vérifie que des entrées équivalentes (int/float) partagent la même entrée."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_cached
+        from seattle_energy.cache import LRUCache
+
+        load_models.clear()
+        models = load_models()
+        cache = LRUCache(capacity=8)
+
+        predict_cached(models, 50000, 5, 30, 50, "Hotel", cache=cache)
+        predict_cached(models, 50000.0, 5.0, 30.0, 50.0, "Hotel", cache=cache)
+
+        assert cache.stats()['hits'] == 1
+        assert len(cache) == 1
+
+    def test_model_version_is_part_of_key(self, monkeypatch, sample_features):
+        """Vérifie qu'une nouvelle version de modèle n'utilise pas les anciennes entrées."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_cached
+        from seattle_energy.cache import LRUCache
+
+        load_models.clear()
+        models = load_models()
+        cache = LRUCache(capacity=8)
+
+        predict_cached(models, cache=cache, **sample_features)
+        predict_cached(dict(models, model_version='autre'), cache=cache, **sample_features)
+
+        assert cache.stats()['misses'] == 2
+        assert models['model_version']
+
+    def test_cached_scaled_row_is_read_only(self, monkeypatch, sample_features):
+        """Vérifie que la ligne standardisée en cache ne peut pas être modifiée."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_cached
+        from seattle_energy.cache import LRUCache
+
+        load_models.clear()
+        models = load_models()
+        X_scaled = predict_cached(models, cache=LRUCache(capacity=8), **sample_features)[4]
+
+        with pytest.raises(ValueError):
+            X_scaled[0, 0] = 0.0
+
+    def test_heuristic_bypasses_cache(self, sample_features):
+        """Vérifie que le fallback heuristique n'utilise pas le cache."""
+        from app import predict_cached
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=8)
+        result = predict_cached(None, cache=cache, **sample_features)
+
+        assert result[2] is False
+        assert cache.stats()['misses'] == 0
+
+
+class TestFigureTemplates:
+    """Tests des gabarits de figures mis à jour en place."""
+
+    def test_gauge_and_factors_match_fresh_figures(self):
+        """Vérifie qu'un gabarit mis à jour sérialise comme une figure construite pour ces entrées."""
+        import plotly.io as pio
+        from app import create_factors_plot, create_gauge_plot, get_figure_templates
+
+        templates = get_figure_templates()
+        for energy in (1.5e6, 42e6):
+            with templates['gauge'].render(predicted_energy=energy) as fig:
+                assert pio.to_json(fig) == pio.to_json(create_gauge_plot(energy))
+
+        building = {'property_gfa': 120000, 'floors': 12, 'age': 80, 'energy_star': 15,
+                    'building_type': 'Hotel'}
+        with templates['factors'].render(**building) as fig:
+            assert pio.to_json(fig) == pio.to_json(create_factors_plot(**building))
+
+    def test_waterfall_matches_fresh_figure(self):
+        """Vérifie le gabarit du waterfall plot SHAP (barres, couleurs, titre)."""
+        import plotly.io as pio
+        from app import create_shap_waterfall_plot, get_figure_templates, shap_frame
+
+        rng = np.random.default_rng(0)
+        shap_df = shap_frame(rng.normal(scale=1e5, size=15), [f"f{i}" for i in range(15)])
+        with get_figure_templates()['waterfall'].render(
+            shap_df=shap_df, expected_value=np.array([3e6]), predicted_value=4e6
+        ) as fig:
+            expected = create_shap_waterfall_plot(shap_df, np.array([3e6]), 4e6)
+            assert pio.to_json(fig) == pio.to_json(expected)
+
+    def test_template_built_once(self):
+        """Vérifie que la figure n'est construite qu'une fois et isolée entre sessions."""
+        import threading
+        from app import create_gauge_plot, update_gauge_plot
+        from seattle_energy.figures import FigureTemplate
+
+        template = FigureTemplate(lambda: create_gauge_plot(0.0), update_gauge_plot)
+        errors = []
+
+        def session(energy):
+            for _ in range(20):
+                with template.render(predicted_energy=energy) as fig:
+                    if fig.data[0].value != energy / 1e6:
+                        errors.append(energy)
+
+        threads = [threading.Thread(target=session, args=(energy,)) for energy in (1e6, 2e6, 3e6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert template.builds == 1
+        assert template.updates == 60
+
+    def test_importance_figure_cached_per_model_version(self, models_path):
+        """Vérifie que le graphique d'importance est construit une fois par version des modèles."""
+        from app import get_feature_importance_figure
+
+        model = joblib.load(models_path / "energy_model.joblib")
+        features = tuple(joblib.load(models_path / "energy_features.joblib"))
+
+        first = get_feature_importance_figure('v1', model, features)
+        assert get_feature_importance_figure('v1', model, features) is first
+        assert get_feature_importance_figure('v2', model, features) is not first
+
+
+class TestSessionExplanation:
+    """Tests de l'explication SHAP différée pendant un réglage des entrées."""
+
+    @pytest.fixture
+    def explain_calls(self, monkeypatch):
+        """Remplace explain_prediction et compte ses appels."""
+        import app
+
+        calls = []
+
+        def explain_prediction(models, X_scaled, feature_names):
+            calls.append(X_scaled)
+            return app.shap_frame(np.asarray(X_scaled, dtype=float), feature_names), 1.0, app.TREE_SHAP
+
+        monkeypatch.setattr(app, 'explain_prediction', explain_prediction)
+        return calls
+
+    def test_recomputed_only_when_inputs_change(self, explain_calls):
+        """Vérifie que des rendus aux mêmes entrées réutilisent l'explication de la session."""
+        from app import session_explanation
+        from seattle_energy.debounce import Debouncer
+
+        session, debouncer = {}, Debouncer(0.4)
+        debouncer.observe('a')
+        for _ in range(3):
+            explanation, current = session_explanation(session, debouncer, {}, 'a', [1.0, 2.0], ['x', 'y'], 5.0)
+            assert current
+        assert len(explain_calls) == 1
+        assert explanation['predicted_energy'] == 5.0
+
+    def test_previous_explanation_kept_until_settled(self, explain_calls):
+        """Vérifie que l'explication précédente reste affichée tant que les entrées bougent."""
+        from app import session_explanation
+        from seattle_energy.debounce import Debouncer
+
+        clock = [0.0]
+        session, debouncer = {}, Debouncer(0.4, clock=lambda: clock[0])
+        debouncer.observe('a')
+        first, _ = session_explanation(session, debouncer, {}, 'a', [1.0, 2.0], ['x', 'y'], 5.0)
+
+        for step, key in enumerate(('b', 'c', 'd')):
+            clock[0] += 0.1
+            debouncer.observe(key)
+            explanation, current = session_explanation(session, debouncer, {}, key, [3.0, 4.0], ['x', 'y'], 6.0)
+            assert explanation is first and not current
+        assert len(explain_calls) == 1
+
+        clock[0] += 0.5
+        explanation, current = session_explanation(session, debouncer, {}, 'd', [3.0, 4.0], ['x', 'y'], 6.0)
+        assert current and explanation['inputs_key'] == 'd'
+        assert len(explain_calls) == 2
+
+
+class TestWhatIfSweep:
+    """Tests des courbes what-if calculées en un seul batch."""
+
+    def test_sweep_values_cover_sidebar_domain(self):
+        """Vérifie que chaque balayage couvre le domaine de l'entrée dans la sidebar."""
+        from app import SIDEBAR_DOMAIN, SWEEP_VARIABLES, sweep_values
+
+        assert len(sweep_values('energy_star')) == 100
+        assert len(sweep_values('age')) == 151
+        for variable in SWEEP_VARIABLES:
+            values = sweep_values(variable)
+            assert values[0] == SIDEBAR_DOMAIN[variable][0]
+            assert values[-1] == SIDEBAR_DOMAIN[variable][1]
+            assert np.all(np.diff(values) > 0)
+
+    def test_sweep_matches_single_predictions(self, monkeypatch, sample_features):
+        """Vérifie que la courbe ML reproduit predict_with_fallback valeur par valeur."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import LRUCache, load_models, predict_with_fallback, whatif_sweep
+
+        load_models.clear()
+        models = load_models()
+        cache = LRUCache(4)
+
+        values, energy, co2, using_ml = whatif_sweep(models, 'energy_star', cache=cache, **sample_features)
+
+        assert using_ml is True
+        assert energy.shape == co2.shape == values.shape
+        for i in (0, 39, 79, len(values) - 1):
+            single = predict_with_fallback(models, **dict(sample_features, energy_star=values[i]))
+            assert energy[i] == pytest.approx(single[0])
+            assert co2[i] == pytest.approx(single[1])
+
+        # Même bâtiment, autre valeur de l'entrée balayée : même courbe, lue dans le cache
+        again = whatif_sweep(models, 'energy_star', cache=cache, **dict(sample_features, energy_star=90))
+        assert again[1] is energy
+        assert cache.hits == 1
+
+    def test_sweep_heuristic(self, sample_features):
+        """Vérifie le balayage sans modèles (fallback heuristique, non mis en cache)."""
+        from app import predict_with_fallback, whatif_sweep
+
+        values, energy, co2, using_ml = whatif_sweep(None, 'age', **sample_features)
+
+        assert using_ml is False
+        single = predict_with_fallback(None, **dict(sample_features, age=values[10]))
+        assert energy[10] == pytest.approx(single[0])
+        assert co2[10] == pytest.approx(single[1])
+
+    def test_whatif_template_matches_fresh_figure(self):
+        """Vérifie que le gabarit what-if sérialise comme une figure construite pour ces courbes."""
+        import plotly.io as pio
+        from app import create_whatif_plot, get_figure_templates
+
+        values = np.arange(1.0, 11.0)
+        curves = {'values': values, 'predicted_energy': values * 1e6, 'predicted_co2': values * 3,
+                  'current_value': 4.0}
+        for variable in ('property_gfa', 'age'):
+            with get_figure_templates()['whatif'].render(variable=variable, **curves) as fig:
+                expected = create_whatif_plot(variable=variable, **curves)
+                assert pio.to_json(fig) == pio.to_json(expected)
+
+
+class TestWarmUp:
+    """Tests du préchauffage partagé de l'application."""
+
+    def test_failed_warmup_is_retried(self, monkeypatch):
+        """Vérifie qu'un préchauffage échoué n'est pas réutilisé par la session suivante."""
+        import app
+
+        def fail(context):
+            raise RuntimeError("modèles illisibles")
+
+        monkeypatch.setattr(app, 'WARMUP_STEPS', [('load_models', fail)])
+        app.get_warmup.clear()
+        try:
+            failed = app.get_warmup()
+            assert failed.wait(5)
+            assert app.current_warmup() is failed
+            assert failed.state == 'failed'
+
+            retried = app.current_warmup()
+            assert retried is not failed
+            assert retried.wait(5)
+        finally:
+            app.get_warmup.clear()
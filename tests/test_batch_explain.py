@@ -0,0 +1,93 @@
+"""
+Tests pour les explications SHAP par lots (seattle_energy.batch_explain).
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import shutil
+import joblib
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def models_dir(tmp_path_factory):
+    """Copie des fichiers joblib + bundle exporté (chargement rapide dans chaque processus)."""
+    from seattle_energy.artifacts import export_bundle
+
+    source = Path(__file__).parent.parent / "models"
+    models_dir = tmp_path_factory.mktemp("project") / "models"
+    models_dir.mkdir()
+    for path in source.glob("*.joblib"):
+        shutil.copy(path, models_dir / path.name)
+    export_bundle(models_dir)
+    return models_dir
+
+
+@pytest.fixture(scope="module")
+def scaled_rows(models_dir):
+    """Lignes standardisées du dataset nettoyé."""
+    features = joblib.load(models_dir / "energy_features.joblib")
+    data = pd.read_csv(Path(__file__).parent.parent / "data" / "data_cleaned.csv", nrows=24)
+    return joblib.load(models_dir / "energy_scaler.joblib").transform(data[features])
+
+
+class TestBatchExplain:
+    """Tests du découpage en blocs, du pool de processus et du temps limite."""
+
+    def test_parallel_matches_single_row_explainer(self, models_dir, scaled_rows):
+        """Vérifie que le pool reproduit l'explainer unitaire, en float32 et dans l'ordre des lignes."""
+        from seattle_energy.batch_explain import explain_batch, load_tree_explainer
+
+        explainer = load_tree_explainer(models_dir)
+        values, exact, expected_value = explain_batch(
+            models_dir, scaled_rows, n_jobs=2, chunk_size=5
+        )
+
+        assert values.dtype == np.float32
+        assert exact.all()
+        assert expected_value == explainer.expected_value
+        np.testing.assert_array_equal(
+            values, explainer.shap_values(scaled_rows).astype(np.float32)
+        )
+
+    def test_batches_stream_every_row_once(self, models_dir, scaled_rows):
+        """Vérifie que les blocs couvrent chaque ligne exactement une fois."""
+        from seattle_energy.batch_explain import iter_shap_batches
+
+        covered = np.zeros(len(scaled_rows), dtype=int)
+        for start, values, exact, _ in iter_shap_batches(models_dir, scaled_rows, n_jobs=1, chunk_size=7):
+            assert values.shape == (len(exact), scaled_rows.shape[1])
+            covered[start:start + len(values)] += 1
+
+        assert (covered == 1).all()
+
+    def test_time_limit_falls_back_to_saabas(self, models_dir, scaled_rows):
+        """Vérifie qu'au-delà du temps limite les lignes reçoivent l'attribution de Saabas."""
+        from seattle_energy.batch_explain import explain_batch, load_tree_explainer
+
+        explainer = load_tree_explainer(models_dir)
+        progress = []
+        values, exact, _ = explain_batch(
+            models_dir, scaled_rows[:6], n_jobs=1, chunk_size=4, time_limit=0.0,
+            progress_callback=lambda rows, fraction: progress.append(rows)
+        )
+
+        assert not exact.any()
+        np.testing.assert_array_equal(values[0], explainer.saabas(scaled_rows[0]).astype(np.float32))
+        assert progress == [4, 6]
+
+    def test_joblib_models_without_bundle(self, models_dir, scaled_rows, tmp_path):
+        """Vérifie le chargement depuis les seuls fichiers joblib."""
+        from seattle_energy.batch_explain import load_tree_explainer
+
+        shutil.copy(models_dir / "energy_model.joblib", tmp_path / "energy_model.joblib")
+        explainer = load_tree_explainer(tmp_path)
+
+        np.testing.assert_array_equal(
+            explainer.shap_values(scaled_rows[:2]),
+            load_tree_explainer(models_dir).shap_values(scaled_rows[:2])
+        )
@@ -0,0 +1,127 @@
+"""
+Benchmarks de non-régression des chemins critiques de app.py.
+
+Chaque cas est comparé à tests/benchmark_baseline.json : le test échoue si la
+médiane, le 95e centile ou le pic de mémoire dépasse la référence de plus de
+BENCHMARK_TOLERANCE (doublée pour le 95e centile) ; une régression n'est
+retenue que si une seconde mesure la confirme. Références régénérées par
+python scripts/benchmark_hot_paths.py --update-baseline.
+
+Les mesures dépendent de la machine : les benchmarks (marqueur `benchmark`)
+ne s'exécutent qu'avec RUN_BENCHMARKS=1, contre la section des références de
+cette machine et des artefacts optionnels présents dans models/ (cas ignorés
+si elle n'existe pas encore) :
+
+    RUN_BENCHMARKS=1 pytest tests/test_benchmarks.py
+"""
+
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.hot_paths import (  # noqa: E402
+    DEFAULT_TOLERANCE, HotPathContext, all_cases, best_of, case_name, find_section, load_baseline,
+    measure, regressions
+)
+
+# Benchmarks de non-régression activés (désactivés par défaut, dont en CI)
+RUN_BENCHMARKS = os.environ.get("RUN_BENCHMARKS", "0") == "1"
+
+# Écart relatif toléré (0.5 : +50 %), ajustable selon la machine
+BENCHMARK_TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", str(DEFAULT_TOLERANCE)))
+
+
+@pytest.fixture(scope="module")
+def context():
+    """Modèles, explainer et bâtiments chargés une fois pour tous les cas."""
+    return HotPathContext()
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    """Références des benchmarks (les cas sans référence sont ignorés)."""
+    return load_baseline()
+
+
+class TestRegressionGate:
+    """Tests de la comparaison aux références."""
+
+    def test_within_tolerance(self):
+        """Vérifie qu'un écart sous la tolérance n'est pas signalé."""
+        reference = {'median': 0.01, 'p95': 0.02, 'peak_memory': 10_000_000}
+        result = {'median': 0.014, 'p95': 0.025, 'peak_memory': 12_000_000}
+        assert regressions(result, reference, tolerance=0.5) == []
+
+    def test_regression_reported(self):
+        """Vérifie que chaque métrique au-delà de la tolérance est signalée."""
+        reference = {'median': 0.01, 'p95': 0.02, 'peak_memory': 10_000_000}
+        result = {'median': 0.03, 'p95': 0.05, 'peak_memory': 20_000_000}
+        messages = regressions(result, reference, tolerance=0.5)
+        assert [message.split(" ")[0] for message in messages] == ['median', 'p95', 'peak_memory']
+
+    def test_p95_tolerance_doubled(self):
+        """Vérifie que le 95e centile, plus bruité, bénéficie d'une tolérance doublée."""
+        reference = {'median': 0.01, 'p95': 0.02, 'peak_memory': 10_000_000}
+        result = {'median': 0.01, 'p95': 0.038, 'peak_memory': 10_000_000}
+        assert regressions(result, reference, tolerance=0.5) == []
+
+    def test_noise_floor(self):
+        """Vérifie qu'un écart relatif important mais minuscule en absolu est ignoré."""
+        reference = {'median': 1e-5, 'p95': 2e-5, 'peak_memory': 1000}
+        result = {'median': 5e-5, 'p95': 9e-5, 'peak_memory': 4000}
+        assert regressions(result, reference, tolerance=0.5) == []
+
+    def test_baseline_section_per_machine_and_artifacts(self, tmp_path, monkeypatch):
+        """Vérifie qu'un état des artefacts ajoute sa section sans écraser celle des autres."""
+        import tests.hot_paths as hot_paths
+
+        path = tmp_path / "baseline.json"
+        fresh_clone = {name: False for name in hot_paths.OPTIONAL_ARTIFACTS}
+        exported = dict(fresh_clone, **{'bundle/manifest.json': True})
+        result = {'median': 0.01, 'p95': 0.02, 'peak_memory': 1000, 'runs': 3}
+
+        for artifacts, median in ((fresh_clone, 0.01), (exported, 0.002), (fresh_clone, 0.012)):
+            monkeypatch.setattr(hot_paths, 'artifact_state', lambda artifacts=artifacts: artifacts)
+            hot_paths.save_baseline({'load_models[1]': dict(result, median=median)}, path)
+
+        baseline = load_baseline(path)
+        assert len(baseline['sections']) == 2
+        section, reason = find_section(baseline, artifacts=fresh_clone)
+        assert reason is None and section['cases']['load_models[1]']['median'] == 0.012
+        assert find_section(baseline, artifacts=exported)[0]['cases']['load_models[1]']['median'] == 0.002
+        assert find_section(baseline, artifacts=dict(exported, **{'imputer.joblib': True}))[0] is None
+        assert find_section(baseline, machine=dict(hot_paths.machine_info(), cpus=-1))[0] is None
+        assert find_section({})[0] is None
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="Benchmarks désactivés (RUN_BENCHMARKS=1 pour les lancer)")
+class TestHotPaths:
+    """Benchmarks des fonctions de app.py sur les artefacts réels."""
+
+    @pytest.mark.parametrize("function,batch_size", all_cases())
+    def test_no_regression(self, context, baseline, function, batch_size):
+        """Vérifie que la fonction ne ralentit pas et ne consomme pas plus de mémoire."""
+        name = case_name(function, batch_size)
+        section, reason = find_section(baseline)
+        if section is None:
+            pytest.skip(f"Pas de référence applicable : {reason}")
+        reference = section['cases'].get(name)
+        if reference is None:
+            pytest.skip(f"Pas de référence pour {name}")
+
+        run = context.call(function, batch_size)
+        result = measure(run)
+        messages = regressions(result, reference, BENCHMARK_TOLERANCE)
+        if messages:
+            # Seconde mesure : écarte un ralentissement passager de la machine
+            result = best_of(result, measure(run))
+            messages = regressions(result, reference, BENCHMARK_TOLERANCE)
+        assert not messages, (
+            f"Régression de {name} : " + " ; ".join(messages)
+            + " (voir python scripts/benchmark_hot_paths.py)"
+        )
@@ -0,0 +1,113 @@
+"""
+Tests pour le scoring en masse multi-processus (bulk_score.py).
+"""
+
+import pytest
+import pandas as pd
+from pathlib import Path
+import shutil
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+RAW_CSV = Path(__file__).parent.parent / "data" / "2016_Building_Energy_Benchmarking.csv"
+
+
+@pytest.fixture(scope="module")
+def models_dir(tmp_path_factory):
+    """Copie des fichiers joblib (le bundle est exporté par le scoring)."""
+    models_dir = tmp_path_factory.mktemp("project") / "models"
+    models_dir.mkdir()
+    for path in (Path(__file__).parent.parent / "models").glob("*.joblib"):
+        shutil.copy(path, models_dir / path.name)
+    return models_dir
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """Dossier de deux CSV bruts (le fichier 2016 et ses 500 premières lignes)."""
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    shutil.copy(RAW_CSV, directory / "a.csv")
+    with open(RAW_CSV, encoding='utf-8') as source:
+        (directory / "b.csv").write_text("".join(next(source) for _ in range(501)), encoding='utf-8')
+    return directory
+
+
+def read_outputs(output_dir):
+    parts = sorted(Path(output_dir).glob("part-*.csv"))
+    return pd.concat([pd.read_csv(part) for part in parts], ignore_index=True)
+
+
+class TestBulkScore:
+    """Tests du découpage, de l'équivalence avec le scoring de l'application et de la reprise."""
+
+    def test_shards_cover_every_line_once(self, inputs):
+        """Vérifie que les tranches sont alignées sur les lignes et couvrent tout le fichier."""
+        from bulk_score import list_inputs, plan_shards
+
+        files = list_inputs([inputs])
+        shards = plan_shards(files, shard_bytes=100_000)
+        assert [Path(shard['source']).name for shard in shards].count('a.csv') > 5
+
+        for path in files:
+            data = path.read_bytes()
+            own = [shard for shard in shards if shard['source'] == str(path.resolve())]
+            assert own[0]['start'] == data.index(b'\n') + 1
+            assert own[-1]['end'] == len(data)
+            for previous, shard in zip(own, own[1:]):
+                assert previous['end'] == shard['start']
+                assert data[shard['start'] - 1:shard['start']] == b'\n'
+
+    def test_parallel_scoring_matches_app(self, inputs, models_dir, tmp_path):
+        """Vérifie les sorties de deux processus face à score_portfolio_csv."""
+        from app import load_joblib_models, score_portfolio_csv
+        from bulk_score import score_files
+
+        summary = score_files([inputs], tmp_path / "out", models_dir=models_dir,
+                              workers=2, shard_bytes=300_000)
+        scored = read_outputs(tmp_path / "out")
+
+        expected_path = tmp_path / "expected.csv"
+        score_portfolio_csv(load_joblib_models(models_dir), RAW_CSV, expected_path)
+        expected = pd.read_csv(expected_path)
+
+        assert summary['rows'] == summary['total_rows'] == len(expected) + 500
+        assert summary['rows_per_second_per_core'] > 0
+        assert (models_dir / "bundle" / "manifest.json").exists()
+
+        scored = scored.sort_values('OSEBuildingID', kind='stable').drop_duplicates('OSEBuildingID')
+        expected = expected.sort_values('OSEBuildingID', kind='stable').drop_duplicates('OSEBuildingID')
+        pd.testing.assert_frame_equal(scored.reset_index(drop=True), expected.reset_index(drop=True))
+
+    def test_resume_rescores_only_missing_shards(self, inputs, models_dir, tmp_path):
+        """Vérifie la reprise après interruption (tranche manquante, fichier temporaire abandonné)."""
+        from bulk_score import score_files
+
+        output = tmp_path / "out"
+        first = score_files([inputs], output, models_dir=models_dir, workers=1, shard_bytes=300_000)
+        parts = sorted(output.glob("part-*.csv"))
+        lost = parts[1]
+        lost.rename(lost.with_name(lost.name + ".tmp"))
+
+        resumed = score_files([inputs], output, models_dir=models_dir, workers=1, shard_bytes=300_000)
+
+        assert resumed['resumed_shards'] == first['shards'] - 1
+        assert resumed['shards'] == 1
+        assert resumed['total_rows'] == first['total_rows']
+        assert lost.exists()
+        assert not list(output.glob("*.tmp"))
+
+    def test_incompatible_previous_run_is_refused(self, inputs, models_dir, tmp_path):
+        """Vérifie le refus de reprendre un scoring fait avec un autre découpage."""
+        from bulk_score import score_files
+
+        output = tmp_path / "out"
+        score_files([inputs], output, models_dir=models_dir, workers=1, shard_bytes=300_000)
+
+        with pytest.raises(ValueError):
+            score_files([inputs], output, models_dir=models_dir, workers=1, shard_bytes=200_000)
+        summary = score_files([inputs], output, models_dir=models_dir, workers=1,
+                              shard_bytes=200_000, overwrite=True)
+        assert summary['resumed_shards'] == 0
+        assert len(list(output.glob("part-*.csv"))) == summary['shards']
@@ -0,0 +1,194 @@
+"""
+Tests pour le bundle de modèles projeté en mémoire (seattle_energy.bundle).
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import shutil
+import joblib
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def models_path():
+    """Chemin vers le dossier des modèles (portée module)."""
+    return Path(__file__).parent.parent / "models"
+
+
+@pytest.fixture(scope="module")
+def bundle_dir(models_path, tmp_path_factory):
+    """Copie des fichiers joblib + bundle exporté dans <tmp>/models."""
+    from seattle_energy.artifacts import export_bundle
+
+    models_dir = tmp_path_factory.mktemp("project") / "models"
+    models_dir.mkdir()
+    for path in models_path.glob("*.joblib"):
+        shutil.copy(path, models_dir / path.name)
+    export_bundle(models_dir)
+    return models_dir
+
+
+@pytest.fixture(scope="module")
+def raw_rows(models_path):
+    """Lignes brutes du dataset nettoyé."""
+    features = joblib.load(models_path / "energy_features.joblib")
+    data = pd.read_csv(Path(__file__).parent.parent / "data" / "data_cleaned.csv")
+    return data[features]
+
+
+class TestModelBundle:
+    """Tests d'équivalence, de versionnement et de projection en mémoire."""
+
+    @pytest.mark.parametrize("name", ["energy", "co2"])
+    def test_predictions_identical_to_joblib(self, models_path, bundle_dir, raw_rows, name):
+        """Vérifie modèle, scaler et forêt fusionnée du bundle face aux fichiers joblib."""
+        from seattle_energy.bundle import load_bundle
+
+        bundled = load_bundle(bundle_dir / "bundle")
+        model = joblib.load(models_path / f"{name}_model.joblib")
+        scaler = joblib.load(models_path / f"{name}_scaler.joblib")
+
+        X_scaled = scaler.transform(raw_rows)
+        expected = model.predict(X_scaled)
+
+        np.testing.assert_array_equal(bundled[f"{name}_scaler"].transform(raw_rows), X_scaled)
+        np.testing.assert_array_equal(bundled[f"{name}_model"].predict(X_scaled), expected)
+        np.testing.assert_array_equal(
+            bundled[f"{name}_fused"].predict(raw_rows.to_numpy(dtype=np.float64)), expected
+        )
+        np.testing.assert_array_equal(
+            bundled[f"{name}_model"].feature_importances_, model.feature_importances_
+        )
+
+    def test_shap_values_identical(self, models_path, bundle_dir, raw_rows):
+        """Vérifie que l'explainer construit depuis le bundle reproduit celui du modèle sklearn."""
+        import shap
+        from seattle_energy.bundle import load_bundle
+
+        bundled = load_bundle(bundle_dir / "bundle")
+        model = joblib.load(models_path / "energy_model.joblib")
+        X_scaled = joblib.load(models_path / "energy_scaler.joblib").transform(raw_rows[:50])
+
+        expected = shap.TreeExplainer(model)
+        explainer = shap.TreeExplainer(bundled['energy_model'].shap_model())
+
+        np.testing.assert_array_equal(explainer.shap_values(X_scaled), expected.shap_values(X_scaled))
+        np.testing.assert_array_equal(explainer.expected_value, expected.expected_value)
+
+    def test_arrays_are_read_only_memory_maps(self, bundle_dir):
+        """Vérifie que les tableaux des arbres ne sont pas copiés en mémoire privée."""
+        from seattle_energy.bundle import load_bundle
+
+        bundled = load_bundle(bundle_dir / "bundle")
+        for key in ("energy_engine", "energy_fused", "co2_engine"):
+            forest = bundled[key]
+            for array in (forest.feature, forest.threshold, forest.left, forest.value):
+                assert not array.flags.writeable
+                assert isinstance(array.base, np.memmap) or isinstance(array, np.memmap)
+
+    def test_manifest_records_version_features_and_hashes(self, bundle_dir):
+        """Vérifie le contenu du manifeste."""
+        from seattle_energy.artifacts import model_version
+        from seattle_energy.bundle import read_manifest
+
+        manifest = read_manifest(bundle_dir / "bundle")
+
+        assert manifest['model_version'] == model_version(bundle_dir)
+        assert manifest['feature_names'] == list(joblib.load(bundle_dir / "energy_features.joblib"))
+        for entry in manifest['models'].values():
+            for meta in entry['arrays'].values():
+                assert len(meta['sha256']) == 64
+                assert (bundle_dir / "bundle" / meta['file']).exists()
+
+    def test_verify_detects_corruption(self, bundle_dir, tmp_path):
+        """Vérifie qu'un tableau modifié est détecté par les empreintes."""
+        from seattle_energy.bundle import load_bundle, verify_bundle
+
+        corrupted = tmp_path / "bundle"
+        shutil.copytree(bundle_dir / "bundle", corrupted)
+        verify_bundle(corrupted)
+
+        value = np.load(corrupted / "co2.value.npy")
+        value[0] += 1.0
+        np.save(corrupted / "co2.value.npy", value)
+
+        with pytest.raises(ValueError):
+            verify_bundle(corrupted)
+        with pytest.raises(ValueError):
+            load_bundle(corrupted, verify=True)
+
+    def test_load_model_bundle_fallbacks(self, bundle_dir, tmp_path):
+        """Vérifie le choix entre bundle et fichiers joblib."""
+        from app import load_model_bundle
+
+        # Pas de bundle : retour aux fichiers joblib
+        assert load_model_bundle(tmp_path) is None
+
+        # Bundle à jour
+        assert load_model_bundle(bundle_dir) is not None
+
+        # Bundle seul, sans fichiers joblib : utilisé tel quel
+        shutil.copytree(bundle_dir / "bundle", tmp_path / "bundle")
+        assert load_model_bundle(tmp_path)['model_version'] is not None
+
+        # Fichiers joblib modifiés : le bundle est périmé
+        scaler = joblib.load(bundle_dir / "energy_scaler.joblib")
+        scaler.mean_ = scaler.mean_ + 1.0
+        joblib.dump(scaler, tmp_path / "energy_scaler.joblib")
+        assert load_model_bundle(tmp_path) is None
+
+    @pytest.mark.parametrize("name", ["energy", "co2"])
+    def test_large_batches_use_original_model(self, bundle_dir, raw_rows, name):
+        """Vérifie que seuls les gros batchs dépicklent le modèle d'origine, à l'identique."""
+        from app import load_model_bundle
+        from seattle_energy.bundle import ESTIMATOR_BATCH_ROWS, load_bundle
+
+        model = load_model_bundle(bundle_dir)[f"{name}_model"]
+        assert model.estimator_path == bundle_dir / f"{name}_model.joblib"
+        assert load_bundle(bundle_dir / "bundle")[f"{name}_model"].estimator_path is None
+
+        X_scaled = joblib.load(bundle_dir / f"{name}_scaler.joblib").transform(raw_rows)
+        expected = joblib.load(bundle_dir / f"{name}_model.joblib").predict(X_scaled)
+        small = model.predict(X_scaled[:ESTIMATOR_BATCH_ROWS - 1])
+        assert model._estimator is None
+        large = model.predict(X_scaled)
+        assert model._estimator is not None
+
+        np.testing.assert_array_equal(small, expected[:ESTIMATOR_BATCH_ROWS - 1])
+        np.testing.assert_array_equal(large, expected)
+
+    def test_load_models_opens_bundle(self, bundle_dir, monkeypatch, sample_features):
+        """Vérifie le chargement de l'application depuis le bundle, prédiction et SHAP compris."""
+        from app import (
+            load_models, predict_cached, predict_with_fallback,
+            get_shap_explainer, compute_shap_values
+        )
+        from seattle_energy.bundle import BundledForest
+        from seattle_energy.cache import LRUCache
+
+        monkeypatch.chdir(bundle_dir.parent)
+        load_models.clear()
+        try:
+            models = load_models()
+            assert isinstance(models['energy_model'], BundledForest)
+
+            energy, co2, using_ml, _, X_scaled, feature_names = predict_cached(
+                models, **sample_features, cache=LRUCache(8)
+            )
+            monkeypatch.chdir(Path(__file__).parent.parent)
+            load_models.clear()
+            reference = predict_with_fallback(load_models(), **sample_features)
+
+            assert using_ml
+            assert (energy, co2) == reference[:2]
+
+            shap_df, _ = compute_shap_values(
+                get_shap_explainer(models['energy_model']), X_scaled, feature_names
+            )
+            assert len(shap_df) == len(feature_names)
+        finally:
+            load_models.clear()
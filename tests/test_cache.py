@@ -0,0 +1,90 @@
+"""
+Tests pour le cache LRU partagé (seattle_energy.cache).
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestLRUCache:
+    """Tests pour LRUCache."""
+
+    def test_hits_and_misses(self):
+        """Vérifie le comptage des hits et des misses."""
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=2)
+        assert cache.get('a') is None
+        cache.put('a', 1)
+        assert cache.get('a') == 1
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == pytest.approx(0.5)
+
+    def test_evicts_least_recently_used(self):
+        """Vérifie que l'entrée la moins récemment utilisée est évincée."""
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert cache.stats()['evictions'] == 1
+        assert len(cache) == 2
+
+    def test_zero_capacity_disables_cache(self):
+        """Vérifie qu'une capacité nulle ne conserve rien."""
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=0)
+        cache.put('a', 1)
+
+        assert len(cache) == 0
+        assert cache.get('a') is None
+
+    def test_negative_capacity(self):
+        """Vérifie qu'une capacité négative est refusée."""
+        from seattle_energy.cache import LRUCache
+
+        with pytest.raises(ValueError):
+            LRUCache(capacity=-1)
+
+    def test_get_or_compute_calls_once(self):
+        """Vérifie que get_or_compute ne recalcule pas une valeur en cache."""
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=4)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 42
+
+        assert cache.get_or_compute('k', compute) == 42
+        assert cache.get_or_compute('k', compute) == 42
+        assert len(calls) == 1
+
+    def test_clear_resets_counters(self):
+        """Vérifie que clear vide le cache et les compteurs."""
+        from seattle_energy.cache import LRUCache
+
+        cache = LRUCache(capacity=1)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('b')
+        cache.clear()
+
+        assert cache.stats() == {
+            'hits': 0, 'misses': 0, 'evictions': 0,
+            'size': 0, 'capacity': 1, 'hit_rate': 0.0
+        }
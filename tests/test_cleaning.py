@@ -0,0 +1,148 @@
+"""
+Tests pour le nettoyage par blocs (seattle_energy.cleaning).
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ROOT = Path(__file__).parent.parent
+RAW_CSV = ROOT / "data" / "2016_Building_Energy_Benchmarking.csv"
+CLEANED_CSV = ROOT / "data" / "data_cleaned.csv"
+
+
+def raw_row(**overrides):
+    """Ligne brute minimale d'un bâtiment non résidentiel conservé."""
+    from seattle_energy.cleaning import RAW_COLUMNS
+
+    row = {col: 1.0 for col in RAW_COLUMNS}
+    row.update({
+        'OSEBuildingID': 1, 'DataYear': 2016, 'YearBuilt': 1990, 'BuildingType': 'NonResidential',
+        'PrimaryPropertyType': 'Hotel', 'CouncilDistrictCode': 7, 'Outlier': np.nan,
+        'PropertyGFATotal': 1000.0, 'PropertyGFAParking': 250.0, 'PropertyGFABuilding(s)': 750.0,
+        'SiteEnergyUse(kBtu)': 100.0, 'Electricity(kBtu)': 60.0, 'NaturalGas(kBtu)': 40.0,
+        'SteamUse(kBtu)': 0.0, 'ENERGYSTARScore': np.nan
+    })
+    row.update(overrides)
+    return row
+
+
+class TestCleanChunk:
+    """Tests du nettoyage d'un bloc."""
+
+    def test_features_and_fixed_schema(self):
+        """Vérifie les features du notebook et les colonnes one-hot fixes."""
+        from seattle_energy.cleaning import clean_chunk, OUTPUT_COLUMNS
+
+        cleaned = clean_chunk(pd.DataFrame([raw_row()]))
+
+        assert list(cleaned.columns) == OUTPUT_COLUMNS
+        row = cleaned.iloc[0]
+        assert row['Age'] == 26
+        assert row['PropertyGFAParking_Pct'] == 25
+        assert row['Electricity_Pct'] == 60
+        assert row['PropType_Hotel'] == 1 and row['District_7'] == 1
+        assert row['ENERGYSTARScore_Missing'] == 1
+        assert cleaned.filter(like='PropType_').to_numpy().sum() == 1
+
+    def test_filters(self):
+        """Vérifie l'exclusion des multifamiliaux, outliers et électricité négative."""
+        from seattle_energy.cleaning import clean_chunk
+
+        chunk = pd.DataFrame([
+            raw_row(OSEBuildingID=1),
+            raw_row(OSEBuildingID=2, BuildingType='Multifamily LR (1-4)'),
+            raw_row(OSEBuildingID=3, Outlier='High outlier'),
+            raw_row(OSEBuildingID=4, **{'Electricity(kBtu)': -5.0}),
+            raw_row(OSEBuildingID=5, PrimaryPropertyType='Low-Rise Multifamily'),
+        ])
+
+        assert list(clean_chunk(chunk).index) == [1]
+
+    def test_unknown_categories(self):
+        """Un type inconnu est regroupé dans 'Other', un district inconnu n'active rien."""
+        from seattle_energy.cleaning import clean_chunk
+
+        chunk = pd.DataFrame([
+            raw_row(PrimaryPropertyType='Data Center', CouncilDistrictCode=9),
+            raw_row(PrimaryPropertyType='Restaurant'),
+        ])
+        cleaned = clean_chunk(chunk)
+
+        assert list(cleaned['PropType_Other']) == [1, 1]
+        assert cleaned.filter(like='District_').iloc[0].sum() == 0
+
+    def test_zero_energy_gives_missing_shares(self):
+        """Vérifie que les divisions par zéro deviennent des valeurs manquantes."""
+        from seattle_energy.cleaning import clean_chunk
+
+        cleaned = clean_chunk(pd.DataFrame([raw_row(**{'SiteEnergyUse(kBtu)': 0.0, 'PropertyGFATotal': 0.0})]))
+
+        assert cleaned[['Electricity_Pct', 'PropertyGFAParking_Pct']].isna().all(axis=None)
+
+
+@pytest.mark.skipif(not RAW_CSV.exists(), reason="CSV brut absent")
+class TestCleanCsv:
+    """Tests du pipeline complet sur le fichier 2016."""
+
+    def test_matches_notebook_output(self, tmp_path):
+        """Vérifie que la sortie par petits blocs reproduit data_cleaned.csv."""
+        from seattle_energy.cleaning import clean_csv
+
+        stats = clean_csv(RAW_CSV, tmp_path / "cleaned.csv", chunksize=500)
+        cleaned = pd.read_csv(tmp_path / "cleaned.csv", index_col=0)
+        expected = pd.read_csv(CLEANED_CSV, index_col=0)
+
+        assert stats['rows_kept'] == len(expected) == stats['fit_rows']
+        assert list(cleaned.columns) == list(expected.columns)
+        assert (cleaned.index == expected.index).all()
+        np.testing.assert_allclose(cleaned.to_numpy(), expected.to_numpy(dtype=float), rtol=1e-6, atol=1e-6)
+        assert not list(tmp_path.glob(".cleaning_*"))
+
+    def test_without_imputation_and_with_fit_sample(self, tmp_path):
+        """Vérifie la sortie sans imputation et l'ajustement sur un échantillon."""
+        from seattle_energy.cleaning import clean_csv
+
+        clean_csv(RAW_CSV, tmp_path / "raw.csv", chunksize=700, impute=False)
+        stats = clean_csv(RAW_CSV, tmp_path / "sampled.csv", fit_rows=400)
+        raw = pd.read_csv(tmp_path / "raw.csv", index_col=0)
+        sampled = pd.read_csv(tmp_path / "sampled.csv", index_col=0)
+
+        assert raw['ENERGYSTARScore'].isna().any()
+        assert stats['fit_rows'] == 400
+        assert not sampled.isna().any(axis=None)
+        assert (sampled.to_numpy() >= 0).all()
+
+    def test_default_fit_sample_is_bounded(self, tmp_path, monkeypatch):
+        """Vérifie que l'imputer est ajusté par défaut sur un échantillon borné, CLI comprise."""
+        import inspect
+        from seattle_energy import cleaning
+
+        default = inspect.signature(cleaning.clean_csv).parameters['fit_rows'].default
+        assert default == cleaning.DEFAULT_FIT_ROWS
+
+        calls = []
+        monkeypatch.setattr(cleaning, 'clean_csv', lambda *args, **kwargs: calls.append(kwargs) or
+                            {'rows_read': 0, 'rows_kept': 0, 'fit_rows': 0})
+        monkeypatch.setattr(sys, 'argv', ['cleaning', str(RAW_CSV), '-o', str(tmp_path / "cleaned.csv")])
+        cleaning.main()
+        assert calls[0]['fit_rows'] == cleaning.DEFAULT_FIT_ROWS
+
+    def test_gap_imputer_keeps_observed_values(self, tmp_path):
+        """Vérifie que l'imputation ciblée ne modifie que les valeurs manquantes."""
+        from seattle_energy.cleaning import clean_csv, make_imputer
+
+        clean_csv(RAW_CSV, tmp_path / "raw.csv", impute=False)
+        clean_csv(RAW_CSV, tmp_path / "gaps.csv", imputer=make_imputer('gaps'), chunksize=400)
+        raw = pd.read_csv(tmp_path / "raw.csv", index_col=0)
+        imputed = pd.read_csv(tmp_path / "gaps.csv", index_col=0)
+
+        assert not imputed.isna().any(axis=None)
+        observed = raw.notna().to_numpy()
+        np.testing.assert_allclose(imputed.to_numpy()[observed], raw.clip(lower=0).to_numpy()[observed])
+        with pytest.raises(ValueError):
+            make_imputer('knn')
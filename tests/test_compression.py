@@ -0,0 +1,129 @@
+"""
+Tests pour la compression des forêts (seattle_energy.compression).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """Random Forest profond et XGBoost ajustés sur des données synthétiques, avec leur scaler."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBRegressor
+
+    rng = np.random.default_rng(0)
+    X = rng.lognormal(2.0, 1.0, size=(400, 6))
+    y = 100 * X[:, 0] + 10 * np.round(X[:, 1]) + rng.normal(size=400)
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    forest = RandomForestRegressor(n_estimators=10, max_depth=100, random_state=42).fit(X_scaled, y)
+    booster = XGBRegressor(n_estimators=20, max_depth=4, random_state=42).fit(X_scaled, y)
+    return X, X_scaled, scaler, forest, booster
+
+
+class TestPruneForest:
+    """Tests de l'élagage des sous-arbres quasi constants."""
+
+    def test_zero_tolerance_keeps_predictions(self, fitted):
+        """Vérifie qu'une tolérance nulle ne change aucune prédiction."""
+        from seattle_energy.compression import prune_forest
+        from seattle_energy.forest import compile_forest
+
+        _, X_scaled, _, forest, booster = fitted
+        for model in (forest, booster):
+            engine = compile_forest(model)
+            pruned = prune_forest(engine, 0.0)
+            np.testing.assert_array_equal(pruned.predict(X_scaled), engine.predict(X_scaled))
+
+    def test_deviation_bounded_by_tolerance(self, fitted):
+        """Vérifie que l'élagage réduit les nœuds et que l'écart reste sous la tolérance."""
+        from seattle_energy.bundle import _sklearn_node_arrays
+        from seattle_energy.compression import prune_forest, relative_tolerance
+        from seattle_energy.forest import compile_forest
+
+        _, X_scaled, _, forest, _ = fitted
+        engine = compile_forest(forest)
+        node_value, _ = _sklearn_node_arrays(forest)
+        tolerance = relative_tolerance(engine, 0.05)
+        pruned = prune_forest(engine, tolerance, node_value)
+
+        assert pruned.n_nodes < engine.n_nodes
+        # Layout préfixe : l'enfant gauche d'un nœud interne est le nœud suivant
+        internal = np.flatnonzero(pruned.left != np.arange(pruned.n_nodes))
+        np.testing.assert_array_equal(pruned.left[internal], internal + 1)
+        deviation = np.abs(pruned.predict(X_scaled) - engine.predict(X_scaled))
+        assert deviation.max() <= tolerance
+
+    def test_negative_tolerance_rejected(self, fitted):
+        """Vérifie qu'une tolérance négative lève une erreur."""
+        from seattle_energy.compression import prune_forest
+        from seattle_energy.forest import compile_forest
+
+        with pytest.raises(ValueError):
+            prune_forest(compile_forest(fitted[3]), -1.0)
+
+
+class TestCompactArtifact:
+    """Tests de l'artefact compact (précision réduite, indices minimaux)."""
+
+    def test_round_trip_and_dtypes(self, fitted, tmp_path):
+        """Vérifie les types stockés et que seules les feuilles float32 modifient les prédictions."""
+        from seattle_energy.compression import load_compact_forest, save_compact_forest
+        from seattle_energy.forest import compile_forest
+
+        _, X_scaled, _, forest, booster = fitted
+        engine = compile_forest(forest)
+        path = save_compact_forest(engine, tmp_path / "forest.npz")
+
+        with np.load(path) as archive:
+            assert archive['feature'].dtype == np.uint8
+            assert archive['right'].dtype == np.uint16
+            assert archive['threshold'].dtype == np.float32
+            assert archive['value'].dtype == np.float32
+
+        compact = load_compact_forest(path)
+        np.testing.assert_allclose(compact.predict(X_scaled), engine.predict(X_scaled), rtol=1e-6)
+
+        # Feuilles XGBoost déjà float32 : artefact sans perte
+        engine = compile_forest(booster)
+        compact = load_compact_forest(save_compact_forest(engine, tmp_path / "booster.npz"))
+        np.testing.assert_array_equal(compact.predict(X_scaled), engine.predict(X_scaled))
+
+    def test_scaler_folded_on_load(self, fitted, tmp_path):
+        """Vérifie que l'artefact avec scaler prédit sur les features brutes."""
+        from seattle_energy.compression import load_compact_forest, save_compact_forest
+        from seattle_energy.forest import compile_forest
+
+        X, X_scaled, scaler, _, booster = fitted
+        engine = compile_forest(booster)
+        path = save_compact_forest(engine, tmp_path / "booster.npz", scaler=scaler)
+
+        raw = load_compact_forest(path)
+        assert raw.input_dtype == np.float64
+        np.testing.assert_array_equal(raw.predict(X), engine.predict(X_scaled))
+        standardized = load_compact_forest(path, fold=False)
+        np.testing.assert_array_equal(standardized.predict(X_scaled), engine.predict(X_scaled))
+
+    def test_fused_forest_rejected(self, fitted, tmp_path):
+        """Vérifie qu'une forêt à entrées float64 (scaler replié) n'est pas compressée."""
+        from seattle_energy.compression import save_compact_forest
+        from seattle_energy.forest import compile_forest, fold_scaler
+
+        _, _, scaler, forest, _ = fitted
+        fused = fold_scaler(compile_forest(forest), scaler)
+        with pytest.raises(ValueError):
+            save_compact_forest(fused, tmp_path / "fused.npz")
+
+    def test_index_dtype(self):
+        """Vérifie le choix du plus petit entier non signé."""
+        from seattle_energy.compression import index_dtype
+
+        assert index_dtype(255) == np.uint8
+        assert index_dtype(256) == np.uint16
+        assert index_dtype(70000) == np.uint32
@@ -0,0 +1,73 @@
+"""
+Tests pour l'anti-rebond des entrées (seattle_energy.debounce).
+"""
+
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeClock:
+    """Horloge manuelle pour les tests."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDebouncer:
+    """Tests de la stabilisation des entrées."""
+
+    def test_first_value_is_settled(self):
+        """Vérifie que la valeur du chargement de la page n'est pas différée."""
+        from seattle_energy.debounce import Debouncer
+
+        debouncer = Debouncer(0.5, clock=FakeClock())
+        assert debouncer.observe(('a', 1))
+        assert debouncer.settled
+        assert debouncer.changes == 0
+
+    def test_change_settles_after_delay(self):
+        """Vérifie qu'une valeur modifiée n'est stable qu'après le délai sans changement."""
+        from seattle_energy.debounce import Debouncer
+
+        clock = FakeClock()
+        debouncer = Debouncer(0.5, clock=clock)
+        debouncer.observe(1)
+        assert debouncer.observe(2)
+        assert not debouncer.settled
+        clock.now += 0.375
+        assert debouncer.remaining() == 0.125
+        clock.now += 0.125
+        assert debouncer.settled
+
+    def test_drag_restarts_delay(self):
+        """Vérifie que chaque valeur intermédiaire d'un glissement repousse la stabilisation."""
+        from seattle_energy.debounce import Debouncer
+
+        clock = FakeClock()
+        debouncer = Debouncer(0.5, clock=clock)
+        debouncer.observe(50)
+        for value in range(51, 60):
+            clock.now += 0.125
+            debouncer.observe(value)
+            assert not debouncer.settled
+        assert debouncer.changes == 9
+        clock.now += 0.5
+        assert debouncer.settled
+
+    def test_same_value_is_not_a_change(self):
+        """Vérifie qu'un rendu sans changement d'entrée ne repousse pas la stabilisation."""
+        from seattle_energy.debounce import Debouncer
+
+        clock = FakeClock()
+        debouncer = Debouncer(0.5, clock=clock)
+        debouncer.observe(1)
+        debouncer.observe(2)
+        clock.now += 0.375
+        assert not debouncer.observe(2)
+        clock.now += 0.125
+        assert debouncer.settled
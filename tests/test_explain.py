@@ -0,0 +1,185 @@
+"""
+Tests pour les explications SHAP rapides (seattle_energy.explain).
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import joblib
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def models_path():
+    """Chemin vers le dossier des modèles (portée module)."""
+    return Path(__file__).parent.parent / "models"
+
+
+@pytest.fixture(scope="module")
+def energy_model(models_path):
+    """Random Forest énergie et sa forêt compilée."""
+    from seattle_energy.forest import compile_forest
+
+    model = joblib.load(models_path / "energy_model.joblib")
+    return model, compile_forest(model)
+
+
+@pytest.fixture(scope="module")
+def scaled_rows(models_path):
+    """Premières lignes standardisées du dataset nettoyé."""
+    features = joblib.load(models_path / "energy_features.joblib")
+    data = pd.read_csv(Path(__file__).parent.parent / "data" / "data_cleaned.csv")
+    scaler = joblib.load(models_path / "energy_scaler.joblib")
+    return scaler.transform(data[features][:20])
+
+
+@pytest.fixture(scope="module")
+def explainer(energy_model):
+    from seattle_energy.explain import FastTreeExplainer
+
+    return FastTreeExplainer.from_model(*energy_model)
+
+
+class TestFastTreeExplainer:
+    """Tests d'exactitude du TreeSHAP exact et du repli Saabas."""
+
+    def test_matches_shap_tree_explainer(self, energy_model, explainer, scaled_rows):
+        """Vérifie les valeurs SHAP et la valeur de base face à shap.TreeExplainer."""
+        import shap
+
+        reference = shap.TreeExplainer(energy_model[0])
+        expected = reference.shap_values(scaled_rows)
+
+        np.testing.assert_allclose(
+            explainer.shap_values(scaled_rows), expected,
+            rtol=1e-7, atol=1e-7 * np.abs(expected).max()
+        )
+        assert explainer.expected_value == pytest.approx(float(np.ravel(reference.expected_value)[0]))
+
+    @pytest.mark.parametrize("method", ["tree_shap", "saabas"])
+    def test_local_accuracy(self, energy_model, explainer, scaled_rows, method):
+        """Vérifie que base + somme des contributions redonne la prédiction."""
+        model, _ = energy_model
+        prediction = model.predict(scaled_rows[:5])
+
+        for row, expected in zip(scaled_rows[:5], prediction):
+            values = getattr(explainer, method)(row)
+            assert explainer.expected_value + values.sum() == pytest.approx(expected, rel=1e-9)
+
+    def test_budget_exceeded_falls_back_to_saabas(self, explainer, scaled_rows):
+        """Vérifie le repli sur Saabas quand le budget de temps est épuisé."""
+        from seattle_energy.explain import SAABAS, TREE_SHAP
+
+        values, method = explainer.explain(scaled_rows[0], time_budget=0.0)
+        assert method == SAABAS
+        np.testing.assert_array_equal(values, explainer.saabas(scaled_rows[0]))
+
+        _, method = explainer.explain(scaled_rows[0])
+        assert method == TREE_SHAP
+
+    def test_slow_exact_path_falls_back_to_saabas(self, explainer, scaled_rows, monkeypatch):
+        """Vérifie le repli quand les explications exactes observées dépassent le budget."""
+        from seattle_energy.explain import SAABAS, TREE_SHAP
+
+        explainer.tree_shap(scaled_rows[0])
+        assert explainer.exact_seconds > 0
+        monkeypatch.setattr(explainer, 'exact_seconds', 1.0)
+        assert explainer.explain(scaled_rows[0], time_budget=0.5)[1] == SAABAS
+        assert explainer.explain(scaled_rows[0], time_budget=2.0)[1] == TREE_SHAP
+
+    def test_unmeasured_exact_path_is_calibrated_in_background(self, energy_model, scaled_rows):
+        """Vérifie qu'une première explication sous budget ne bloque pas sur shap."""
+        from seattle_energy.explain import SAABAS, TREE_SHAP, FastTreeExplainer
+
+        model, forest = energy_model
+        explainer = FastTreeExplainer.from_model(model, forest)
+
+        values, method = explainer.explain(scaled_rows[0], time_budget=5.0)
+        assert method == SAABAS
+        np.testing.assert_array_equal(values, explainer.saabas(scaled_rows[0]))
+
+        explainer._calibration.join(timeout=60)
+        assert explainer.exact_seconds > 0
+        assert explainer.explain(scaled_rows[0], time_budget=5.0)[1] == TREE_SHAP
+
+    def test_bundle_model_gives_same_values(self, models_path, explainer, scaled_rows, tmp_path):
+        """Vérifie l'explainer construit depuis un modèle du bundle."""
+        import shutil
+        from seattle_energy.artifacts import export_bundle
+        from seattle_energy.bundle import load_bundle
+        from seattle_energy.explain import FastTreeExplainer
+
+        for path in models_path.glob("*.joblib"):
+            shutil.copy(path, tmp_path / path.name)
+        export_bundle(tmp_path)
+        bundled = load_bundle(tmp_path / "bundle")
+
+        from_bundle = FastTreeExplainer.from_model(bundled['energy_model'], bundled['energy_engine'])
+        np.testing.assert_array_equal(
+            from_bundle.shap_values(scaled_rows[:3]), explainer.shap_values(scaled_rows[:3])
+        )
+
+    def test_unsupported_model(self, models_path):
+        """Vérifie le refus d'un modèle boosté (XGBoost)."""
+        from seattle_energy.explain import FastTreeExplainer
+        from seattle_energy.forest import compile_forest
+
+        model = joblib.load(models_path / "co2_model.joblib")
+        with pytest.raises((TypeError, ValueError)):
+            FastTreeExplainer.from_model(model, compile_forest(model))
+
+
+class TestExplainPrediction:
+    """Tests du cache d'explications de l'application."""
+
+    def test_exact_explanations_are_cached(self, monkeypatch, sample_features):
+        """Vérifie qu'une explication exacte est servie depuis le cache au second appel."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+        from app import explain_prediction, load_models, predict_cached, get_fast_explainer
+        from seattle_energy.cache import LRUCache
+        from seattle_energy.explain import TREE_SHAP
+
+        models = load_models()
+        energy, _, _, _, X_scaled, feature_names = predict_cached(
+            models, **sample_features, cache=LRUCache(8)
+        )
+        cache = LRUCache(8)
+
+        shap_df, expected_value, method = explain_prediction(
+            models, X_scaled, feature_names, cache=cache, time_budget=None
+        )
+        assert method == TREE_SHAP
+        assert len(cache) == 1
+        assert expected_value + shap_df['SHAP Value'].sum() == pytest.approx(energy, rel=1e-9)
+
+        calls = []
+        explainer = get_fast_explainer(models.get('model_version'), models)
+        monkeypatch.setattr(explainer, 'explain', lambda *args: calls.append(args))
+        cached_df, _, _ = explain_prediction(models, X_scaled, feature_names, cache=cache)
+        assert calls == []
+        pd.testing.assert_frame_equal(cached_df, shap_df)
+
+        # Chaque hit retourne une copie : l'entrée partagée ne peut pas être modifiée
+        cached_df['SHAP Value'] = 0.0
+        again, _, _ = explain_prediction(models, X_scaled, feature_names, cache=cache)
+        pd.testing.assert_frame_equal(again, shap_df)
+
+    def test_fallback_is_not_cached(self, monkeypatch, sample_features):
+        """Vérifie que l'attribution approchée n'est pas conservée dans le cache."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+        from app import explain_prediction, load_models, predict_cached
+        from seattle_energy.cache import LRUCache
+        from seattle_energy.explain import SAABAS
+
+        models = load_models()
+        _, _, _, _, X_scaled, feature_names = predict_cached(
+            models, **sample_features, cache=LRUCache(8)
+        )
+        cache = LRUCache(8)
+
+        _, _, method = explain_prediction(models, X_scaled, feature_names, cache=cache, time_budget=0.0)
+        assert method == SAABAS
+        assert len(cache) == 0
@@ -0,0 +1,81 @@
+"""
+Tests pour le cache de prétraitement des plis (seattle_energy.fold_cache).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def data():
+    """Features positives asymétriques et plis de validation croisée."""
+    from seattle_energy.training import make_folds
+
+    rng = np.random.default_rng(0)
+    X = rng.lognormal(3.0, 1.0, size=(200, 4))
+    return X, make_folds(200, 5)
+
+
+class TestFoldCache:
+    """Tests du calcul unique et du partage des plis prétraités."""
+
+    def test_matches_preprocess_and_is_read_only(self, data):
+        """Vérifie que les matrices servies sont celles de preprocess, en lecture seule."""
+        from seattle_energy.fold_cache import FoldCache, preprocess
+
+        X, folds = data
+        cache = FoldCache(X, folds)
+        X_train, X_test = cache.get(1, 100, [0, 2])
+        train, test = folds[1]
+        expected_train, expected_test = preprocess(X[train[:100]], X[test], [0, 2])
+
+        np.testing.assert_array_equal(X_train, expected_train)
+        np.testing.assert_array_equal(X_test, expected_test)
+        assert not X_train.flags.writeable
+        with pytest.raises(ValueError):
+            X_train[0, 0] = 1.0
+
+    def test_computed_once_per_fold_and_config(self, data):
+        """Vérifie la réutilisation et les clés distinctes par palier et transformation."""
+        from seattle_energy.fold_cache import FoldCache
+
+        X, folds = data
+        cache = FoldCache(X, folds)
+        first = cache.get(0, 160, [])
+        assert cache.get(0, 160, []) is first
+        assert cache.misses == 1 and cache.hits == 1
+
+        keys = {cache.key(0, 160, []), cache.key(0, 80, []), cache.key(0, 160, [1]), cache.key(1, 160, [])}
+        assert len(keys) == 4
+
+    def test_shared_directory_between_caches(self, data, tmp_path):
+        """Vérifie qu'un second cache (autre processus) relit les plis projetés en mémoire."""
+        from seattle_energy.fold_cache import FoldCache
+
+        X, folds = data
+        FoldCache(X, folds, tmp_path).warm([160, 53], [[], [0]])
+        assert len(list(tmp_path.glob("*.npy"))) == 5 * 2 * 2 * 2
+
+        reader = FoldCache(X, folds, tmp_path)
+        X_train, _ = reader.get(3, 53, [0])
+        assert isinstance(X_train, np.memmap)
+        assert reader.misses == 0 and reader.hits == 1
+
+    def test_cv_scores_identical_with_cache(self, data):
+        """Vérifie que la validation croisée donne le même score avec ou sans cache."""
+        from sklearn.linear_model import Ridge
+        from seattle_energy.fold_cache import FoldCache
+        from seattle_energy.training import cv_rmse
+
+        X, folds = data
+        y = np.log(X[:, 0]) * 2 + X[:, 1] / 10
+        cache = FoldCache(X, folds)
+        for alpha in (0.1, 10.0):
+            plain = cv_rmse(Ridge, {'alpha': alpha}, 'tt', X, y, folds, 120, [0], None)
+            cached = cv_rmse(Ridge, {'alpha': alpha}, 'tt', X, y, folds, 120, [0], cache)
+            assert cached == plain
+        assert cache.misses == 5 and cache.hits == 5
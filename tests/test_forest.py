@@ -0,0 +1,212 @@
+"""
+Tests pour le moteur d'inférence compilé (seattle_energy.forest).
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import joblib
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def scaled_rows(models_path):
+    """Lignes du dataset nettoyé + lignes aléatoires, standardisées."""
+    features = joblib.load(models_path / "energy_features.joblib")
+    scaler = joblib.load(models_path / "energy_scaler.joblib")
+    data = pd.read_csv(Path(__file__).parent.parent / "data" / "data_cleaned.csv")
+
+    X = scaler.transform(data[features])
+    rng = np.random.default_rng(0)
+    return np.vstack([X, rng.normal(scale=3.0, size=(500, X.shape[1]))])
+
+
+@pytest.fixture(scope="module")
+def raw_rows(models_path):
+    """Lignes brutes du dataset nettoyé + lignes aléatoires dans l'espace brut."""
+    features = joblib.load(models_path / "energy_features.joblib")
+    scaler = joblib.load(models_path / "energy_scaler.joblib")
+    data = pd.read_csv(Path(__file__).parent.parent / "data" / "data_cleaned.csv")
+
+    rng = np.random.default_rng(1)
+    random_rows = scaler.inverse_transform(rng.normal(scale=2.0, size=(500, len(features))))
+    return np.vstack([data[features].to_numpy(dtype=np.float64), random_rows])
+
+
+@pytest.fixture(scope="module")
+def models_path():
+    """Chemin vers le dossier des modèles (portée module)."""
+    return Path(__file__).parent.parent / "models"
+
+
+class TestCompiledForest:
+    """Tests d'équivalence bit à bit avec les modèles d'origine."""
+
+    @pytest.mark.parametrize("model_name", ["energy_model", "co2_model"])
+    def test_batch_predictions_bit_identical(self, models_path, scaled_rows, model_name):
+        """Vérifie que le parcours vectorisé reproduit exactement model.predict."""
+        from seattle_energy.forest import compile_forest
+
+        model = joblib.load(models_path / f"{model_name}.joblib")
+        engine = compile_forest(model)
+
+        expected = model.predict(scaled_rows)
+        predicted = engine.predict(scaled_rows)
+
+        assert predicted.dtype == expected.dtype
+        np.testing.assert_array_equal(predicted, expected)
+
+    @pytest.mark.parametrize("model_name", ["energy_model", "co2_model"])
+    def test_single_row_bit_identical(self, models_path, scaled_rows, model_name):
+        """Vérifie que la boucle ligne unique reproduit exactement model.predict."""
+        from seattle_energy.forest import compile_forest
+
+        model = joblib.load(models_path / f"{model_name}.joblib")
+        engine = compile_forest(model)
+
+        rows = scaled_rows[:50]
+        expected = model.predict(rows)
+        predicted = np.array([engine.predict_one(row) for row in rows])
+
+        np.testing.assert_array_equal(predicted, expected)
+
+    def test_missing_values_follow_default_direction(self, models_path, scaled_rows):
+        """Vérifie le routage des valeurs manquantes sur le modèle XGBoost."""
+        from seattle_energy.forest import compile_forest
+
+        model = joblib.load(models_path / "co2_model.joblib")
+        engine = compile_forest(model)
+
+        X = scaled_rows[:200].copy()
+        X[::3, 0] = np.nan
+        X[::5, 7] = np.nan
+
+        np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+
+    def test_wrong_number_of_features(self, models_path):
+        """Vérifie qu'une mauvaise dimension lève une ValueError."""
+        from seattle_energy.forest import compile_forest
+
+        engine = compile_forest(joblib.load(models_path / "energy_model.joblib"))
+
+        with pytest.raises(ValueError):
+            engine.predict(np.zeros((3, 5)))
+
+    def test_unsupported_model(self):
+        """Vérifie qu'un modèle non arborescent est refusé."""
+        from sklearn.linear_model import LinearRegression
+        from seattle_energy.forest import compile_forest
+
+        with pytest.raises(TypeError):
+            compile_forest(LinearRegression())
+
+    def test_load_models_exposes_engines(self, monkeypatch):
+        """Vérifie que load_models compile les deux modèles."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models
+        from seattle_energy.forest import CompiledForest
+
+        load_models.clear()
+        models = load_models()
+
+        assert isinstance(models['energy_engine'], CompiledForest)
+        assert isinstance(models['co2_engine'], CompiledForest)
+
+
+class TestFoldScaler:
+    """Tests pour les forêts fusionnées (scaler replié dans les seuils)."""
+
+    @pytest.mark.parametrize("name", ["energy", "co2"])
+    def test_fused_predictions_bit_identical(self, models_path, raw_rows, name):
+        """Vérifie que la forêt fusionnée sur données brutes reproduit scaler + modèle."""
+        from seattle_energy.forest import compile_forest, fold_scaler
+
+        features = joblib.load(models_path / "energy_features.joblib")
+        model = joblib.load(models_path / f"{name}_model.joblib")
+        scaler = joblib.load(models_path / f"{name}_scaler.joblib")
+        fused = fold_scaler(compile_forest(model), scaler)
+
+        expected = model.predict(scaler.transform(pd.DataFrame(raw_rows, columns=features)))
+
+        np.testing.assert_array_equal(fused.predict(raw_rows), expected)
+
+    @pytest.mark.parametrize("name", ["energy", "co2"])
+    def test_fused_thresholds_are_exact_boundaries(self, models_path, name):
+        """Vérifie que chaque seuil replié est la frontière exacte dans l'espace brut."""
+        from seattle_energy.forest import compile_forest, fold_scaler
+
+        model = joblib.load(models_path / f"{name}_model.joblib")
+        scaler = joblib.load(models_path / f"{name}_scaler.joblib")
+        engine = compile_forest(model)
+        fused = fold_scaler(engine, scaler)
+
+        internal = np.flatnonzero(fused.left != np.arange(fused.n_nodes))
+        feature = fused.feature[internal]
+        mean, scale = scaler.mean_[feature], scaler.scale_[feature]
+
+        def scaled(x):
+            return ((x - mean) / scale).astype(np.float32).astype(np.float64)
+
+        boundary = fused.threshold[internal]
+        assert (scaled(boundary) <= engine.threshold[internal]).all()
+        assert (scaled(np.nextafter(boundary, np.inf)) > engine.threshold[internal]).all()
+
+    def test_save_and_load_roundtrip(self, models_path, raw_rows, tmp_path):
+        """Vérifie qu'une forêt sauvegardée puis rechargée prédit à l'identique."""
+        from seattle_energy.forest import compile_forest, fold_scaler, save_forest, load_forest
+
+        model = joblib.load(models_path / "co2_model.joblib")
+        scaler = joblib.load(models_path / "co2_scaler.joblib")
+        fused = fold_scaler(compile_forest(model), scaler, source="abc")
+
+        save_forest(fused, tmp_path / "co2_fused.npz")
+        loaded = load_forest(tmp_path / "co2_fused.npz")
+
+        assert loaded.source == "abc"
+        assert loaded.input_dtype == np.float64
+        np.testing.assert_array_equal(loaded.predict(raw_rows), fused.predict(raw_rows))
+
+    def test_export_used_only_when_fresh(self, models_path, tmp_path):
+        """Vérifie que load_fused_forest ignore un export périmé."""
+        import shutil
+        from app import load_fused_forest
+        from seattle_energy.artifacts import export_fused_models
+        from seattle_energy.forest import compile_forest
+
+        for file_name in ["energy_model.joblib", "energy_scaler.joblib"]:
+            shutil.copy(models_path / file_name, tmp_path / file_name)
+        model_path, scaler_path = tmp_path / "energy_model.joblib", tmp_path / "energy_scaler.joblib"
+
+        written = export_fused_models(tmp_path)
+        assert written == [tmp_path / "energy_fused.npz"]
+
+        model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+        engine = compile_forest(model)
+        fused = load_fused_forest('energy', engine, scaler, model_path, scaler_path)
+        assert fused.source is not None
+
+        # Un scaler modifié rend l'export périmé : la forêt est repliée à nouveau
+        scaler.mean_ = scaler.mean_ + 1.0
+        joblib.dump(scaler, scaler_path)
+        refolded = load_fused_forest('energy', engine, scaler, model_path, scaler_path)
+        assert refolded.source != fused.source
+
+    def test_predict_with_fallback_uses_fused_models(self, monkeypatch, sample_features):
+        """Vérifie le chemin fusionné de predict_with_fallback (prédictions et X_scaled)."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import load_models, predict_with_fallback
+
+        load_models.clear()
+        models = load_models()
+
+        energy, co2, using_ml, X, X_scaled, _ = predict_with_fallback(models, **sample_features)
+
+        expected_scaled = models['energy_scaler'].transform(X)
+        np.testing.assert_array_equal(X_scaled, expected_scaled)
+        assert energy == models['energy_model'].predict(expected_scaled)[0]
+        assert co2 == models['co2_model'].predict(models['co2_scaler'].transform(X))[0]
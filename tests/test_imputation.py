@@ -0,0 +1,150 @@
+"""
+Tests pour l'imputation ciblée (seattle_energy.imputation).
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def gappy_frame():
+    """Tableau synthétique : 'score' dépend de 'a' et 'b' et a des trous."""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'a': rng.uniform(0, 10, size=600),
+        'b': rng.integers(0, 2, size=600).astype(float),
+        'c': rng.normal(size=600),
+    })
+    frame['score'] = 5 * frame['a'] + 20 * frame['b']
+    frame.loc[rng.choice(600, 150, replace=False), 'score'] = np.nan
+    frame.loc[:4, 'c'] = np.nan
+    return frame
+
+
+class TestGapImputer:
+    """Tests d'ajustement et d'application de GapImputer."""
+
+    def test_models_only_columns_with_gaps(self, gappy_frame):
+        """Vérifie qu'un estimateur n'est ajusté que pour les colonnes lacunaires."""
+        from seattle_energy.imputation import GapImputer
+
+        imputer = GapImputer(predictors=['a', 'b']).fit(gappy_frame)
+
+        assert imputer.target_columns == ['c', 'score']
+        imputed = imputer.transform(gappy_frame)
+        assert not np.isnan(imputed).any()
+        observed = gappy_frame['score'].notna().to_numpy()
+        np.testing.assert_array_equal(imputed[observed, 3], gappy_frame['score'][observed])
+        truth = 5 * gappy_frame['a'] + 20 * gappy_frame['b']
+        assert np.abs(imputed[~observed, 3] - truth[~observed]).mean() < 3
+
+    def test_chunked_transform_matches_full(self, gappy_frame):
+        """Vérifie que l'application par blocs donne le même résultat qu'en une fois."""
+        from seattle_energy.imputation import GapImputer
+
+        imputer = GapImputer().fit(gappy_frame)
+        full = imputer.transform(gappy_frame)
+        chunks = [imputer.transform(gappy_frame.iloc[i:i + 64]) for i in range(0, 600, 64)]
+
+        np.testing.assert_array_equal(np.vstack(chunks), full)
+
+    def test_unseen_gaps_use_median(self, gappy_frame):
+        """Une colonne complète à l'ajustement est complétée par sa médiane."""
+        from seattle_energy.imputation import GapImputer
+
+        imputer = GapImputer().fit(gappy_frame)
+        row = gappy_frame.iloc[[10]].copy()
+        row['a'] = np.nan
+
+        assert imputer.transform(row)[0, 0] == pytest.approx(gappy_frame['a'].median())
+        with pytest.raises(KeyError):
+            imputer.transform(gappy_frame.drop(columns='b'))
+
+    def test_save_and_load(self, gappy_frame, tmp_path):
+        """Vérifie la persistance de l'imputer ajusté."""
+        from seattle_energy.imputation import GapImputer, load_imputer, save_imputer
+
+        assert load_imputer(tmp_path) is None
+        imputer = GapImputer().fit(gappy_frame)
+        save_imputer(imputer, tmp_path)
+
+        np.testing.assert_array_equal(load_imputer(tmp_path).transform(gappy_frame), imputer.transform(gappy_frame))
+
+
+class TestInferenceImputation:
+    """Tests de l'imputation des entrées de l'application."""
+
+    def test_portfolio_scores_use_imputer(self):
+        """Vérifie que seuls les scores absents sont imputés, dans le domaine de la sidebar."""
+        from app import portfolio_inputs_from_raw
+        from seattle_energy.cleaning import BUILDING_COLUMNS, OUTPUT_COLUMNS
+        from seattle_energy.imputation import GapImputer
+
+        rng = np.random.default_rng(1)
+        cleaned = pd.DataFrame(rng.uniform(0, 1, size=(300, len(OUTPUT_COLUMNS))), columns=OUTPUT_COLUMNS)
+        cleaned['PropertyGFATotal'] = rng.uniform(1e4, 1e6, size=300)
+        cleaned['ENERGYSTARScore'] = np.clip(cleaned['PropertyGFATotal'] / 1e4, 1, 100)
+        cleaned.loc[:49, 'ENERGYSTARScore'] = np.nan
+        imputer = GapImputer(predictors=BUILDING_COLUMNS).fit(cleaned)
+
+        chunk = pd.DataFrame({
+            'DataYear': [2016, 2016, 2016],
+            'YearBuilt': [1990, 1990, 1990],
+            'NumberofFloors': [3, 3, 3],
+            'PropertyGFATotal': [20000, 900000, 50000],
+            'ENERGYSTARScore': [np.nan, np.nan, 75],
+            'PrimaryPropertyType': ['Hotel', 'Hotel', 'Hotel']
+        })
+        energy_star = portfolio_inputs_from_raw(chunk, imputer=imputer)['energy_star'].to_numpy()
+
+        assert energy_star[2] == 75
+        assert 1 <= energy_star[0] < energy_star[1] <= 100
+
+    def test_cli_saved_imputer_scores_portfolio(self, monkeypatch, tmp_path):
+        """Vérifie que l'imputer sauvegardé par le nettoyage sert au scoring d'un portefeuille."""
+        import app
+        from seattle_energy import cleaning
+        from seattle_energy.imputation import load_imputer
+
+        root = Path(__file__).parent.parent
+        raw_csv = root / "data" / "2016_Building_Energy_Benchmarking.csv"
+        argv = ['cleaning', str(raw_csv), '-o', str(tmp_path / "cleaned.csv"), '--save-imputer', str(tmp_path)]
+        monkeypatch.setattr(sys, 'argv', argv)
+        with pytest.raises(SystemExit):
+            cleaning.main()
+        assert load_imputer(tmp_path) is None
+
+        monkeypatch.setattr(sys, 'argv', argv + ['--imputer', 'gaps'])
+        cleaning.main()
+        models = app.load_joblib_models(root / "models")
+        models['imputer'] = load_imputer(tmp_path)
+        assert models['imputer'] is not None
+
+        portfolio = pd.read_csv(raw_csv, nrows=200)
+        missing = portfolio['ENERGYSTARScore'].isna().to_numpy()
+        assert missing.any()
+        rows = app.score_portfolio_csv(models, raw_csv, tmp_path / "scored.csv", chunksize=100)
+        scored = pd.read_csv(tmp_path / "scored.csv")
+
+        assert rows == len(scored)
+        assert scored['ENERGYSTARScore'].notna().all()
+        assert (scored['PredictionSource'] == "ml").all()
+        assert scored['ENERGYSTARScore'].iloc[:200][missing].nunique() > 1
+
+    def test_non_gap_imputer_is_rejected(self, tmp_path):
+        """Vérifie qu'un imputer sans colonnes d'ajustement n'est ni sauvegardé ni chargé."""
+        import joblib
+        from seattle_energy.cleaning import make_imputer
+        from seattle_energy.imputation import IMPUTER_FILE, load_imputer, save_imputer
+
+        mice = make_imputer('mice').fit(np.array([[1.0, np.nan], [2.0, 3.0], [3.0, 4.0]]))
+        with pytest.raises(TypeError):
+            save_imputer(mice, tmp_path)
+        joblib.dump(mice, tmp_path / IMPUTER_FILE)
+        with pytest.warns(RuntimeWarning):
+            assert load_imputer(tmp_path) is None
@@ -0,0 +1,108 @@
+"""
+Tests pour l'ingestion incrémentale par année (seattle_energy.ingest).
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+RAW_CSV = Path(__file__).parent.parent / "data" / "2016_Building_Energy_Benchmarking.csv"
+
+pytestmark = pytest.mark.skipif(not RAW_CSV.exists(), reason="CSV brut absent")
+
+
+@pytest.fixture
+def yearly_csvs(tmp_path):
+    """Deux années construites à partir d'un extrait du fichier 2016."""
+    raw = pd.read_csv(RAW_CSV, nrows=800)
+    paths = {}
+    for year in (2015, 2016):
+        path = tmp_path / f"{year}_Building_Energy_Benchmarking.csv"
+        raw.assign(DataYear=year).to_csv(path, index=False)
+        paths[year] = path
+    return paths
+
+
+class TestIngest:
+    """Tests de la mise à jour incrémentale des partitions."""
+
+    def test_only_new_or_changed_years_are_rebuilt(self, tmp_path, yearly_csvs):
+        """Vérifie qu'une année inchangée n'est pas retraitée."""
+        from seattle_energy.ingest import ingest, open_dataset
+
+        directory = tmp_path / "partitions"
+        assert ingest([yearly_csvs[2016]], directory) == {'built': [2016], 'unchanged': []}
+        summary = ingest([yearly_csvs[2016], yearly_csvs[2015]], directory)
+        assert summary == {'built': [2015], 'unchanged': [2016]}
+
+        # Contenu modifié : seule l'année concernée est reconstruite, l'ancienne partition supprimée
+        before = open_dataset(directory).manifest['partitions']['2015']['path']
+        raw = pd.read_csv(yearly_csvs[2015])
+        raw.iloc[:700].to_csv(yearly_csvs[2015], index=False)
+        summary = ingest([yearly_csvs[2015], yearly_csvs[2016]], directory)
+        assert summary == {'built': [2015], 'unchanged': [2016]}
+        assert not (directory / before).exists()
+
+        dataset = open_dataset(directory)
+        assert dataset.years == [2015, 2016]
+        assert dataset.manifest['partitions']['2015']['rows'] < dataset.manifest['partitions']['2016']['rows']
+
+    def test_cleaning_code_change_rebuilds(self, tmp_path, yearly_csvs, monkeypatch):
+        """Vérifie que la clé dépend du code de nettoyage."""
+        from seattle_energy import ingest as ingest_module
+
+        directory = tmp_path / "partitions"
+        ingest_module.ingest([yearly_csvs[2016]], directory)
+        monkeypatch.setattr(ingest_module, 'cleaning_digest', lambda: "autre version")
+
+        assert ingest_module.ingest([yearly_csvs[2016]], directory)['built'] == [2016]
+
+    def test_same_year_twice_is_rejected(self, tmp_path, yearly_csvs):
+        """Vérifie le refus de deux fichiers pour la même année."""
+        from seattle_energy.ingest import ingest
+
+        copy = tmp_path / "copie.csv"
+        pd.read_csv(yearly_csvs[2016]).iloc[:500].to_csv(copy, index=False)
+
+        with pytest.raises(ValueError, match="2016"):
+            ingest([yearly_csvs[2016], copy], tmp_path / "partitions")
+
+
+class TestCleanedDataset:
+    """Tests de la lecture paresseuse de l'union des années."""
+
+    def test_partition_matches_cleaning_output(self, tmp_path, yearly_csvs):
+        """Vérifie que la partition reproduit exactement clean_csv."""
+        from seattle_energy.cleaning import clean_csv, OUTPUT_COLUMNS
+        from seattle_energy.ingest import ingest, open_dataset
+
+        ingest([yearly_csvs[2016]], tmp_path / "partitions")
+        clean_csv(yearly_csvs[2016], tmp_path / "cleaned.csv")
+        expected = pd.read_csv(tmp_path / "cleaned.csv", index_col=0, float_precision='round_trip')
+
+        dataset = open_dataset(tmp_path / "partitions")
+        values, _ = dataset.arrays(2016)
+        assert isinstance(values, np.memmap) and values.flags.f_contiguous
+        partition = dataset.partition(2016)
+        assert list(partition.columns) == OUTPUT_COLUMNS
+        np.testing.assert_array_equal(partition.to_numpy(), expected.to_numpy())
+        np.testing.assert_array_equal(partition.index, expected.index)
+
+    def test_read_union_and_columns(self, tmp_path, yearly_csvs):
+        """Vérifie l'union des années, la sélection de colonnes et read_cleaned."""
+        from seattle_energy.ingest import ingest, open_dataset, read_cleaned
+
+        directory = tmp_path / "partitions"
+        ingest(yearly_csvs.values(), directory)
+        dataset = open_dataset(directory)
+
+        union = dataset.read(['Age', 'ENERGYSTARScore'], with_year=True)
+        assert list(union.columns) == ['Age', 'ENERGYSTARScore', 'DataYear']
+        assert len(union) == dataset.n_rows
+        assert union.groupby('DataYear').size().to_dict() == {2015: dataset.n_rows // 2, 2016: dataset.n_rows // 2}
+        assert len(read_cleaned(directory, columns=['Age'], nrows=10)) == 10
+        assert open_dataset(tmp_path / "absent") is None
@@ -0,0 +1,277 @@
+"""
+Tests pour le service HTTP d'inférence (service.py).
+"""
+
+import asyncio
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def models():
+    """Modèles chargés depuis la racine du projet."""
+    from seattle_energy.inference import load_inference_models
+
+    return load_inference_models(Path(__file__).parent.parent / "models")
+
+
+def buildings(size, seed=0):
+    """Bâtiments variés pour les requêtes de test."""
+    from seattle_energy.inference import BUILDING_TYPES
+
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'property_gfa': int(rng.integers(1000, 500000)),
+            'floors': int(rng.integers(1, 40)),
+            'age': int(rng.integers(0, 120)),
+            'energy_star': int(rng.integers(1, 100)),
+            'building_type': str(rng.choice(BUILDING_TYPES))
+        }
+        for _ in range(size)
+    ]
+
+
+async def with_server(service, scenario):
+    """Démarre le service sur un port libre, exécute le scénario puis arrête tout."""
+    from service import start_server
+
+    server = await start_server(service, port=0)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        return await scenario(host, port)
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+
+class TestMicroBatcher:
+    """Tests du regroupement des requêtes concurrentes."""
+
+    def test_concurrent_items_are_coalesced_in_order(self):
+        """Vérifie la taille des batchs et l'ordre des résultats."""
+        from service import MicroBatcher
+
+        seen = []
+
+        def double(items):
+            seen.append(list(items))
+            return [2 * item for item in items]
+
+        async def scenario():
+            batcher = MicroBatcher(double, max_batch_size=4, max_wait=0.05)
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+            await batcher.close()
+            return results, batcher.stats()
+
+        results, stats = asyncio.run(scenario())
+
+        assert results == [2 * i for i in range(10)]
+        assert [len(batch) for batch in seen] == [4, 4, 2]
+        assert stats == {'batches': 3, 'mean_size': 10 / 3, 'max_size': 4}
+
+    def test_errors_reach_every_request_of_the_batch(self):
+        """Vérifie qu'une exception du traitement est transmise aux requêtes du batch."""
+        from service import MicroBatcher
+
+        def broken(items):
+            raise RuntimeError("modèle indisponible")
+
+        async def scenario():
+            batcher = MicroBatcher(broken, max_batch_size=8, max_wait=0.01)
+            results = await asyncio.gather(
+                *(batcher.submit(i) for i in range(3)), return_exceptions=True
+            )
+            await batcher.close()
+            return results
+
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+    def test_latency_percentiles(self):
+        """Vérifie les percentiles p50/p99 en millisecondes."""
+        from service import LatencyRecorder
+
+        recorder = LatencyRecorder()
+        assert recorder.summary()['p50_ms'] is None
+        for ms in range(1, 101):
+            recorder.record(ms / 1000)
+
+        summary = recorder.summary()
+        assert summary['count'] == 100
+        assert summary['p50_ms'] == pytest.approx(50.5)
+        assert summary['p99_ms'] == pytest.approx(99.01)
+
+
+class TestInferenceService:
+    """Tests de bout en bout via HTTP, avec le générateur de charge local."""
+
+    def test_load_generator_predictions_are_batched_and_correct(self, models):
+        """Vérifie les prédictions, le micro-batching et les métriques sous charge."""
+        from app import predict_with_fallback
+        from service import InferenceService, generate_load, http_request
+
+        requests = buildings(200)
+        service = InferenceService(models, max_batch_size=32, max_wait=0.005)
+
+        async def scenario(host, port):
+            load = await generate_load(host, port, requests, '/predict', concurrency=32)
+            reader, writer = await asyncio.open_connection(host, port)
+            responses = [await http_request(reader, writer, 'POST', '/predict', b) for b in requests[:5]]
+            metrics = await http_request(reader, writer, 'GET', '/metrics')
+            writer.close()
+            return load, responses, metrics
+
+        load, responses, (status, metrics) = asyncio.run(with_server(service, scenario))
+
+        assert load['statuses'] == [200] * len(requests)
+        assert (load['latencies'] > 0).all()
+        for building, (code, body) in zip(requests, responses):
+            energy, co2, using_ml, *_ = predict_with_fallback(models, **building)
+            assert code == 200 and body['using_ml'] == using_ml
+            assert body['energy_kbtu'] == pytest.approx(energy, rel=1e-9)
+            assert body['co2_tons'] == pytest.approx(co2, rel=1e-6)
+
+        assert status == 200
+        assert metrics['latency']['predict']['count'] == len(requests) + 5
+        assert metrics['latency']['predict']['p99_ms'] >= metrics['latency']['predict']['p50_ms']
+        assert metrics['batches']['predict']['mean_size'] > 1
+        assert set(metrics['caches']['explanation']) >= {'hits', 'misses', 'evictions'}
+
+    def test_explain_endpoint(self, models):
+        """Vérifie que base + contributions redonne la prédiction d'énergie."""
+        from app import predict_with_fallback
+        from service import InferenceService, http_request
+
+        building = buildings(1, seed=1)[0]
+        service = InferenceService(models, time_budget=None)
+
+        async def scenario(host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            response = await http_request(reader, writer, 'POST', '/explain', building)
+            writer.close()
+            return response
+
+        status, body = asyncio.run(with_server(service, scenario))
+        energy = predict_with_fallback(models, **building)[0]
+
+        assert status == 200
+        assert body['method'] == 'tree_shap'
+        assert len(body['contributions']) == len(models['energy_features'])
+        total = body['expected_value'] + sum(c['value'] for c in body['contributions'])
+        assert total == pytest.approx(energy, rel=1e-6)
+
+    def test_invalid_requests(self, models):
+        """Vérifie les codes d'erreur sans perturber la connexion keep-alive."""
+        from service import InferenceService, http_request
+
+        service = InferenceService(models)
+        valid = buildings(1)[0]
+
+        async def scenario(host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            codes = [
+                (await http_request(reader, writer, 'POST', '/predict', {'floors': 3}))[0],
+                (await http_request(reader, writer, 'POST', '/predict', dict(valid, age="vieux")))[0],
+                (await http_request(reader, writer, 'POST', '/predict', dict(valid, floors=10 ** 400)))[0],
+                (await http_request(reader, writer, 'POST', '/predict', dict(valid, property_gfa=-500)))[0],
+                (await http_request(reader, writer, 'GET', '/predict'))[0],
+                (await http_request(reader, writer, 'POST', '/inconnu', valid))[0],
+                (await http_request(reader, writer, 'GET', '/health'))[0],
+                (await http_request(reader, writer, 'POST', '/predict', valid))[0],
+            ]
+            writer.close()
+            return codes
+
+        assert asyncio.run(with_server(service, scenario)) == [400, 400, 400, 400, 405, 404, 200, 200]
+
+    def test_parse_building_domain(self):
+        """Vérifie le domaine accepté : celui de la sidebar, bornes comprises."""
+        from seattle_energy.inference import SIDEBAR_DOMAIN
+        from service import RequestError, parse_building
+
+        valid = buildings(1)[0]
+        for name, (low, high, step) in SIDEBAR_DOMAIN.items():
+            assert parse_building(dict(valid, **{name: low}))[name] == low
+            assert parse_building(dict(valid, **{name: high}))[name] == high
+            for value in (low - step, high + step, float('nan'), 10 ** 400):
+                with pytest.raises(RequestError) as error:
+                    parse_building(dict(valid, **{name: value}))
+                assert error.value.status == 400
+
+    def test_service_does_not_import_streamlit(self):
+        """Vérifie que le service reste sans interface : ni app.py ni Streamlit."""
+        import subprocess
+
+        code = "import sys, service; print('streamlit' in sys.modules, 'app' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+            capture_output=True, text=True, check=True
+        )
+        assert result.stdout.split() == ['False', 'False']
+
+    def test_model_errors_are_500_and_keep_connection(self, models, monkeypatch):
+        """Vérifie qu'une ValueError du modèle donne une 500 sans fermer la connexion keep-alive."""
+        from service import InferenceService, http_request
+
+        service = InferenceService(models)
+        valid = buildings(1)[0]
+
+        def failing(buildings):
+            raise ValueError("features incohérentes")
+
+        async def scenario(host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            monkeypatch.setattr(service.batchers['predict'], 'process_batch', failing)
+            error = await http_request(reader, writer, 'POST', '/predict', valid)
+            health = await http_request(reader, writer, 'GET', '/health')
+            writer.close()
+            return error, health
+
+        (status, body), (health_status, _) = asyncio.run(with_server(service, scenario))
+        assert status == 500 and 'ValueError' in body['error']
+        assert health_status == 200
+
+    def test_malformed_request_line_closes_connection(self, models):
+        """Vérifie qu'une ligne de requête illisible donne une 400 puis ferme la connexion."""
+        from service import InferenceService, read_http_message
+
+        service = InferenceService(models)
+
+        async def scenario(host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b"GARBAGE\r\n\r\n")
+            await writer.drain()
+            status_line, headers, _ = await read_http_message(reader)
+            closed = await reader.read() == b''
+            writer.close()
+            return status_line, headers, closed
+
+        status_line, headers, closed = asyncio.run(with_server(service, scenario))
+        assert status_line.split(' ')[1] == '400'
+        assert headers['connection'] == 'close' and closed
+
+    def test_heuristic_fallback_without_models(self):
+        """Vérifie le fallback heuristique et le refus des explications sans modèle."""
+        from app import predict_with_fallback
+        from service import InferenceService, http_request
+
+        building = buildings(1)[0]
+        service = InferenceService(None)
+
+        async def scenario(host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            predict = await http_request(reader, writer, 'POST', '/predict', building)
+            explain = await http_request(reader, writer, 'POST', '/explain', building)
+            writer.close()
+            return predict, explain
+
+        (status, body), (explain_status, _) = asyncio.run(with_server(service, scenario))
+
+        assert status == 200 and body['using_ml'] is False
+        assert body['energy_kbtu'] == pytest.approx(predict_with_fallback(None, **building)[0])
+        assert explain_status == 503
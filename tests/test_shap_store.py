@@ -0,0 +1,105 @@
+"""
+Tests pour le magasin SHAP global (seattle_energy.shap_store).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    """Magasin écrit à partir de valeurs synthétiques."""
+    from seattle_energy.shap_store import save_shap_store
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(300, 4)) * [1.0, 10.0, 100.0, 1000.0]
+    energy = features * [0.1, 1.0, 0.0, 0.5]
+    co2 = rng.normal(size=(300, 4))
+    save_shap_store(
+        tmp_path / "shap_store", ['a', 'b', 'c', 'd'], features,
+        {'energy': (energy, np.array([12.5])), 'co2': (co2, 3.0)},
+        model_version="abc", source="synthetic.csv"
+    )
+    return tmp_path / "shap_store", features, energy
+
+
+class TestShapStore:
+    """Tests d'écriture, de projection en mémoire et des vues globales."""
+
+    def test_round_trip_as_column_major_memory_maps(self, store_dir):
+        """Vérifie le stockage float32 par colonne et la lecture seule."""
+        from seattle_energy.shap_store import load_shap_store
+
+        directory, features, energy = store_dir
+        store = load_shap_store(directory, verify=True)
+
+        assert store.model_version == "abc"
+        assert store.model_names == ['energy', 'co2']
+        assert store.n_rows == 300
+        assert store.expected_value('energy') == 12.5
+        for array in (store.features, store.shap_values('energy')):
+            assert isinstance(array, np.memmap)
+            assert array.dtype == np.float32
+            assert array.flags.f_contiguous
+            assert not array.flags.writeable
+        np.testing.assert_array_equal(store.shap_values('energy'), energy.astype(np.float32))
+
+    def test_mean_abs_ranking(self, store_dir):
+        """Vérifie le classement par moyenne des |SHAP|."""
+        from seattle_energy.shap_store import load_shap_store
+
+        directory, _, energy = store_dir
+        ranking = load_shap_store(directory).mean_abs_shap('energy')
+
+        assert list(ranking.index) == ['d', 'b', 'a', 'c']
+        assert ranking['b'] == pytest.approx(np.abs(energy[:, 1]).mean(), rel=1e-6)
+
+    def test_dependence_and_beeswarm(self, store_dir):
+        """Vérifie les points de dépendance et l'échantillonnage du beeswarm."""
+        from seattle_energy.shap_store import load_shap_store
+
+        directory, features, energy = store_dir
+        store = load_shap_store(directory)
+
+        dependence = store.dependence('energy', 'b')
+        np.testing.assert_allclose(dependence['SHAP Value'], dependence['Feature Value'], rtol=1e-6)
+
+        points = store.beeswarm('energy', top=2, max_rows=50)
+        assert list(dict.fromkeys(points['Feature'])) == ['d', 'b']
+        assert len(points) == 100
+        assert points['Normalized Value'].between(0, 1).all()
+
+    def test_missing_and_corrupted_store(self, store_dir, tmp_path):
+        """Vérifie l'absence de magasin et la détection d'un tableau modifié."""
+        from seattle_energy.shap_store import load_shap_store
+
+        assert load_shap_store(tmp_path / "absent") is None
+
+        directory, _, _ = store_dir
+        values = np.load(directory / "co2.shap.npy")
+        values[0, 0] += 1.0
+        np.save(directory / "co2.shap.npy", values)
+        with pytest.raises(ValueError):
+            load_shap_store(directory, verify=True)
+
+    def test_shape_mismatch_is_rejected(self, tmp_path):
+        """Vérifie le refus de valeurs SHAP de forme différente des features."""
+        from seattle_energy.shap_store import save_shap_store
+
+        with pytest.raises(ValueError):
+            save_shap_store(tmp_path, ['a', 'b'], np.zeros((3, 2)), {'energy': (np.zeros((3, 3)), 0.0)}, "v")
+
+    def test_global_plots(self, store_dir):
+        """Vérifie les graphiques de la vue globale de l'application."""
+        from app import create_beeswarm_plot, create_dependence_plot, create_global_importance_plot
+        from seattle_energy.shap_store import load_shap_store
+
+        store = load_shap_store(store_dir[0])
+
+        assert len(create_global_importance_plot(store.mean_abs_shap('co2')).data[0].y) == 4
+        assert len(create_beeswarm_plot(store.beeswarm('co2', top=3)).data[0].x) == 900
+        assert len(create_dependence_plot(store.dependence('co2', 'a'), 'a').data[0].x) == 300
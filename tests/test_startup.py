@@ -0,0 +1,63 @@
+"""
+Tests de non-régression du démarrage à froid (import de app.py).
+
+Les imports différés sont vérifiés à chaque exécution ; le budget de temps,
+qui dépend de la machine, n'est vérifié qu'avec les benchmarks (RUN_BENCHMARKS=1).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# Budget du temps d'import à froid de app (secondes) : vérifié avec les benchmarks seulement
+RUN_BENCHMARKS = os.environ.get("RUN_BENCHMARKS", "0") == "1"
+COLD_IMPORT_BUDGET = float(os.environ.get("COLD_IMPORT_BUDGET", "2.0"))
+
+# Modules lourds qui ne doivent être importés qu'à leur première utilisation
+LAZY_MODULES = ['shap', 'plotly.express', 'joblib', 'sklearn', 'xgboost']
+
+COLD_IMPORT_SCRIPT = f"""
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def cold_import():
+    """Importe app dans un interpréteur neuf et retourne la mesure."""
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_IMPORT_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    """Tests du coût de l'import de app.py."""
+
+    def test_heavy_modules_are_deferred(self):
+        """Vérifie que shap, plotly.express, joblib et les bibliothèques de modèles ne sont pas importés."""
+        assert cold_import()['loaded'] == []
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(not RUN_BENCHMARKS, reason="Benchmarks désactivés (RUN_BENCHMARKS=1 pour les lancer)")
+    def test_cold_import_within_budget(self):
+        """Vérifie que l'import à froid de app reste sous le budget."""
+        # Minimum de trois imports successifs : écarte le bruit de la machine
+        best = min(cold_import()['seconds'] for _ in range(3))
+        assert best < COLD_IMPORT_BUDGET, (
+            f"Import à froid de app : {best:.2f} s (budget {COLD_IMPORT_BUDGET:.2f} s), "
+            "voir python scripts/profile_startup.py"
+        )
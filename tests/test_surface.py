@@ -0,0 +1,119 @@
+"""
+Tests pour l'index de surface de réponse (seattle_energy.surface).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def models():
+    """Modèles chargés depuis la racine du projet."""
+    import os
+    from app import load_models
+
+    cwd = os.getcwd()
+    os.chdir(Path(__file__).parent.parent)
+    try:
+        load_models.clear()
+        return load_models()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope="module")
+def forests(models):
+    return {'energy': models['energy_fused'], 'co2': models['co2_fused']}
+
+
+@pytest.fixture(scope="module")
+def domain_rows(models):
+    """Lignes de features du domaine indexé (balayages autour des valeurs par défaut)."""
+    from app import _batch_inputs, prepare_features_batch, surface_domain_inputs
+
+    inputs = surface_domain_inputs()
+    return prepare_features_batch(*_batch_inputs(inputs), models['energy_features'])
+
+
+class TestResponseSurface:
+    """Tests d'exactitude et de couverture de l'index."""
+
+    def test_lookup_matches_forests_on_domain(self, models, forests, domain_rows):
+        """Vérifie que toutes les lignes du domaine sont trouvées, bit à bit."""
+        values, found = models['surface'].lookup(domain_rows)
+
+        assert found.all()
+        for name, forest in forests.items():
+            assert values[name].dtype == forest.predict(domain_rows[:2]).dtype
+            np.testing.assert_array_equal(values[name], forest.predict(domain_rows))
+
+    def test_lookup_one_matches_predict_one(self, models, forests, domain_rows):
+        """Vérifie le chemin ligne unique sur un échantillon du domaine."""
+        rng = np.random.default_rng(0)
+        for row in domain_rows[rng.integers(0, len(domain_rows), size=200)]:
+            hit = models['surface'].lookup_one(row)
+            assert hit is not None
+            assert hit['energy'] == forests['energy'].predict_one(row)
+            assert hit['co2'] == forests['co2'].predict_one(row)
+
+    def test_regions_are_deduplicated(self, models, domain_rows):
+        """Vérifie que chaque région n'est stockée qu'une fois."""
+        surface = models['surface']
+        assert np.all(np.diff(surface.keys) > 0)
+        assert surface.n_regions < len(domain_rows)
+
+    def test_out_of_domain_rows_are_misses(self, models, domain_rows):
+        """Vérifie qu'une ligne hors du domaine indexé n'est jamais servie par l'index."""
+        surface = models['surface']
+        features = models['energy_features']
+
+        other_building_count = domain_rows[:1].copy()
+        other_building_count[0, features.index('NumberofBuildings')] = 50
+        missing = domain_rows[:1].copy()
+        missing[0, features.index('Age')] = np.nan
+        unseen = domain_rows[:1].copy()
+        unseen[0, [features.index('NumberofFloors'), features.index('Age')]] = [90, 140]
+
+        for row in (other_building_count, missing, unseen):
+            assert surface.lookup_one(row[0]) is None
+            assert not surface.lookup(row)[1].any()
+
+    def test_non_axis_features_must_be_constant(self, models, forests, domain_rows):
+        """Vérifie que la construction refuse un domaine qui fait varier une feature hors axes."""
+        from seattle_energy.surface import build_surface
+
+        X = domain_rows[:10].copy()
+        X[5, models['energy_features'].index('NumberofBuildings')] = 50
+
+        with pytest.raises(ValueError):
+            build_surface(forests, models['energy_features'], X, ['Age'])
+
+    def test_save_and_load_roundtrip(self, models, domain_rows, tmp_path):
+        """Vérifie qu'un index sauvegardé puis rechargé répond à l'identique."""
+        from seattle_energy.surface import save_surface, load_surface
+
+        save_surface(models['surface'], tmp_path / "response_surface.npz")
+        loaded = load_surface(tmp_path / "response_surface.npz")
+
+        assert loaded.source == models['model_version']
+        original, _ = models['surface'].lookup(domain_rows)
+        values, found = loaded.lookup(domain_rows)
+        assert found.all()
+        for name in original:
+            np.testing.assert_array_equal(values[name], original[name])
+
+    def test_predict_with_fallback_uses_surface(self, models, forests, sample_features):
+        """Vérifie que predict_with_fallback rend les mêmes prédictions via l'index."""
+        from app import predict_with_fallback
+
+        energy, co2, using_ml, X, _, _ = predict_with_fallback(models, **sample_features)
+        row = X.to_numpy(dtype=np.float64)[0]
+
+        assert using_ml
+        assert models['surface'].lookup_one(row) is not None
+        assert energy == forests['energy'].predict_one(row)
+        assert co2 == forests['co2'].predict_one(row)
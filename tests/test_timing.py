@@ -0,0 +1,160 @@
+"""
+Tests pour le chronométrage par étape (seattle_energy.timing).
+"""
+
+import json
+
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestStageTimer:
+    """Tests des histogrammes par étape et de leurs exports."""
+
+    def test_disabled_records_nothing(self):
+        """Vérifie qu'un minuteur désactivé retourne un contexte vide partagé."""
+        from seattle_energy.timing import StageTimer
+
+        timer = StageTimer(enabled=False)
+        with timer.stage('predict_energy'):
+            pass
+        assert timer.stage('a') is timer.stage('b')
+        assert timer.summary() == {}
+
+    def test_disabled_stage_does_no_work(self, monkeypatch):
+        """Vérifie qu'une étape désactivée ne lit pas l'horloge et n'alloue aucun contexte."""
+        import contextlib
+        from types import SimpleNamespace
+
+        from seattle_energy import timing
+
+        def clock():
+            raise AssertionError("horloge lue par un minuteur désactivé")
+
+        monkeypatch.setattr(timing, 'time', SimpleNamespace(perf_counter=clock))
+        timer = timing.StageTimer(enabled=False)
+        for name in ('prepare_features', 'predict_energy'):
+            with timer.stage(name) as context:
+                assert context is None
+        assert isinstance(timer.stage('a'), contextlib.nullcontext)
+        assert timer.stages == []
+
+    def test_records_and_percentiles(self):
+        """Vérifie compteurs, somme, dernière durée et percentiles de la fenêtre glissante."""
+        from seattle_energy.timing import StageTimer
+
+        timer = StageTimer(enabled=True, window=10)
+        for ms in range(1, 21):
+            timer.record('shap', ms / 1000)
+        with timer.stage('figure_gauge'):
+            pass
+
+        stats = timer.summary()['shap']
+        assert stats['count'] == 20
+        assert stats['sum_seconds'] == pytest.approx(0.21)
+        assert stats['last_ms'] == pytest.approx(20)
+        # Fenêtre de 10 : seules les durées 11 à 20 ms comptent
+        assert stats['p50_ms'] == pytest.approx(15.5)
+        assert timer.stages == ['shap', 'figure_gauge']
+
+    def test_prometheus_histogram(self):
+        """Vérifie le format d'exposition : classes cumulées, +Inf, somme et nombre."""
+        from seattle_energy.timing import METRIC_NAME, StageTimer
+
+        timer = StageTimer(enabled=True, buckets=(0.01, 0.1))
+        for seconds in (0.005, 0.05, 0.5):
+            timer.record('load_models', seconds)
+        lines = timer.to_prometheus().splitlines()
+
+        assert f"# TYPE {METRIC_NAME} histogram" in lines
+        assert f'{METRIC_NAME}_bucket{{stage="load_models",le="0.01"}} 1' in lines
+        assert f'{METRIC_NAME}_bucket{{stage="load_models",le="0.1"}} 2' in lines
+        assert f'{METRIC_NAME}_bucket{{stage="load_models",le="+Inf"}} 3' in lines
+        assert f'{METRIC_NAME}_sum{{stage="load_models"}} 0.555' in lines
+        assert f'{METRIC_NAME}_count{{stage="load_models"}} 3' in lines
+
+    def test_json_and_dump(self, tmp_path):
+        """Vérifie l'export JSON et l'écriture des deux fichiers pour la collecte."""
+        from seattle_energy.timing import JSON_FILE, PROMETHEUS_FILE, StageTimer
+
+        timer = StageTimer(enabled=True, buckets=(0.01,))
+        timer.record('predict_co2', 0.002)
+        payload = json.loads(timer.to_json())
+        assert payload['stages']['predict_co2']['buckets'] == {'0.01': 1, '+Inf': 1}
+
+        written = timer.dump(tmp_path / "metrics")
+        assert sorted(path.name for path in written) == sorted([PROMETHEUS_FILE, JSON_FILE])
+        assert sorted(path.name for path in (tmp_path / "metrics").iterdir()) == sorted([PROMETHEUS_FILE, JSON_FILE])
+        assert json.loads((tmp_path / "metrics" / JSON_FILE).read_text())['stages']['predict_co2']['count'] == 1
+
+    def test_cache_counters_exported(self, tmp_path):
+        """Vérifie l'export des compteurs de caches (Prometheus, JSON et fichiers écrits)."""
+        from seattle_energy.cache import LRUCache
+        from seattle_energy.timing import JSON_FILE, PROMETHEUS_FILE, StageTimer
+
+        cache = LRUCache(1)
+        cache.get('a')
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('b')
+        caches = {'prediction': cache}
+        timer = StageTimer(enabled=True)
+
+        lines = timer.to_prometheus(caches).splitlines()
+        assert "# TYPE seattle_energy_cache_hits_total counter" in lines
+        assert 'seattle_energy_cache_hits_total{cache="prediction"} 1' in lines
+        assert 'seattle_energy_cache_misses_total{cache="prediction"} 1' in lines
+        assert 'seattle_energy_cache_evictions_total{cache="prediction"} 1' in lines
+        assert 'seattle_energy_cache_entries{cache="prediction"} 1' in lines
+        assert 'seattle_energy_cache_hits_total' not in timer.to_prometheus()
+
+        assert json.loads(timer.to_json(caches))['caches']['prediction']['evictions'] == 1
+        timer.dump(tmp_path, caches)
+        assert json.loads((tmp_path / JSON_FILE).read_text())['caches']['prediction']['hits'] == 1
+        assert 'cache="prediction"' in (tmp_path / PROMETHEUS_FILE).read_text()
+
+
+class TestAppInstrumentation:
+    """Tests des étapes instrumentées dans app.py."""
+
+    def test_prediction_stages_recorded(self, sample_features):
+        """Vérifie que la préparation des features et les deux prédictions sont chronométrées."""
+        from app import load_joblib_models, predict_with_fallback
+        from seattle_energy.timing import STAGE_TIMER
+
+        models = load_joblib_models(Path(__file__).parent.parent / "models")
+        enabled = STAGE_TIMER.enabled
+        STAGE_TIMER.enabled = True
+        STAGE_TIMER.reset()
+        try:
+            predict_with_fallback(models, **sample_features)
+            stages = STAGE_TIMER.summary()
+        finally:
+            STAGE_TIMER.enabled = enabled
+            STAGE_TIMER.reset()
+
+        for name in ('prepare_features', 'predict_energy', 'predict_co2'):
+            assert stages[name]['count'] == 1
+
+    def test_summary_frame(self):
+        """Vérifie le tableau du panneau de diagnostic."""
+        from app import stage_summary_frame
+        from seattle_energy.timing import StageTimer
+
+        timer = StageTimer(enabled=True)
+        assert stage_summary_frame(timer).empty
+        timer.record('shap', 0.004)
+        frame = stage_summary_frame(timer)
+        assert frame.loc[0, 'Étape'] == 'shap'
+        assert frame.loc[0, 'p95 (ms)'] == pytest.approx(4.0)
+
+    def test_cache_summary_frame(self):
+        """Vérifie le tableau des caches du panneau de diagnostic."""
+        from app import application_caches, cache_summary_frame
+
+        frame = cache_summary_frame(application_caches())
+        assert list(frame['Cache']) == ['prediction', 'explanation', 'whatif']
+        assert (frame['Capacité'] > 0).all()
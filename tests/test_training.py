@@ -0,0 +1,100 @@
+"""
+Tests pour le réentraînement du zoo de modèles (seattle_energy.training).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+CLEANED_CSV = Path(__file__).parent.parent / "data" / "data_cleaned.csv"
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """400 premières lignes du dataset nettoyé."""
+    from seattle_energy.training import load_training_data
+
+    X, targets = load_training_data(CLEANED_CSV)
+    return X.iloc[:400], {name: y.iloc[:400] for name, y in targets.items()}
+
+
+class TestSuccessiveHalving:
+    """Tests de la recherche par successive halving."""
+
+    def test_halving_eliminates_candidates(self):
+        """Vérifie l'élimination par palier et le choix du meilleur candidat."""
+        from sklearn.linear_model import Ridge
+        from seattle_energy.training import make_folds, successive_halving
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(600, 5))
+        y = X @ np.array([3.0, -2.0, 1.0, 0.0, 0.5]) + rng.normal(scale=0.1, size=600)
+        candidates = [{'alpha': alpha} for alpha in (1e-3, 1e-1, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7)]
+
+        result = successive_halving(Ridge, candidates, 'raw', X, y, make_folds(600, 3), [],
+                                    min_resources=40)
+
+        assert result['params']['alpha'] <= 1e1
+        assert result['rung'] == 2 and result['resources'] == 400
+        assert result['evaluations'] == 9 + 3 + 1
+        assert not result['timed_out']
+
+    def test_time_budget_stops_search(self):
+        """Vérifie qu'un budget épuisé garde le meilleur candidat déjà évalué."""
+        from sklearn.linear_model import Ridge
+        from seattle_energy.training import make_folds, successive_halving
+
+        rng = np.random.default_rng(0)
+        X, y = rng.normal(size=(300, 3)), rng.normal(size=300)
+        candidates = [{'alpha': alpha} for alpha in (1.0, 10.0, 100.0, 1000.0)]
+
+        result = successive_halving(Ridge, candidates, 'raw', X, y, make_folds(300, 3), [], time_budget=0)
+
+        assert result['timed_out']
+        assert result['evaluations'] == 1
+        assert result['params'] == {'alpha': 1.0}
+
+
+@pytest.mark.skipif(not CLEANED_CSV.exists(), reason="dataset nettoyé absent")
+class TestTrainZoo:
+    """Tests du zoo complet et de l'écriture des artefacts."""
+
+    def test_zoo_results_and_winners(self, training_data):
+        """Vérifie le classement et le choix d'un gagnant servable par cible."""
+        from seattle_energy.training import select_winners, train_zoo
+
+        X, targets = training_data
+        results = train_zoo(X, targets, families=['ridge', 'random_forest'], n_jobs=1,
+                            time_budget=5, n_candidates=3, cv=3)
+
+        assert len(results) == 2 * 2 * 2
+        assert {r['variant'] for r in results} == {'raw', 'tt'}
+        winners = select_winners(results)
+        assert set(winners) == {'energy', 'co2'}
+        assert all(w['family'] == 'random_forest' and w['variant'] == 'raw' for w in winners.values())
+        energy = [r['test_rmse'] for r in results if r['target'] == 'energy']
+        assert energy == sorted(energy)
+
+    def test_written_artifacts_are_loaded_by_app(self, training_data, tmp_path):
+        """Vérifie que load_joblib_models charge les modèles écrits."""
+        import json
+        from app import load_joblib_models
+        from seattle_energy.training import fit_winner, select_winners, train_zoo, write_artifacts
+
+        X, targets = training_data
+        results = train_zoo(X, targets, families=['xgboost'], variants=('raw',), n_jobs=1,
+                            time_budget=2, n_candidates=2, cv=3)
+        fitted = {name: fit_winner(result, X, targets[name]) for name, result in select_winners(results).items()}
+        write_artifacts(tmp_path, X.columns, fitted, results)
+
+        models = load_joblib_models(tmp_path)
+        assert list(models['energy_features']) == list(X.columns)
+        prediction = models['energy_engine'].predict(models['energy_scaler'].transform(X.iloc[:5]))
+        np.testing.assert_allclose(
+            prediction, fitted['energy'][0].predict(fitted['energy'][1].transform(X.iloc[:5])), rtol=1e-5
+        )
+        report = json.loads((tmp_path / "training_report.json").read_text(encoding="utf-8"))
+        assert report['winners']['co2']['family'] == 'xgboost'
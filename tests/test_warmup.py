@@ -0,0 +1,121 @@
+"""
+Tests pour le préchauffage en arrière-plan (seattle_energy.warmup).
+"""
+
+import json
+import threading
+
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestWarmUp:
+    """Tests du thread de préchauffage, de son état et de son journal."""
+
+    def test_steps_run_in_background_and_are_timed(self, tmp_path):
+        """Vérifie l'ordre des étapes, l'état final et l'enregistrement des durées."""
+        from seattle_energy.warmup import WarmUp
+
+        calls = []
+        release = threading.Event()
+
+        def load(context):
+            release.wait(5)
+            context['value'] = 21
+            context['labels']['model_version'] = 'abc'
+            calls.append(('load', threading.current_thread().name))
+
+        def use(context):
+            calls.append(('use', context['value'] * 2))
+
+        warmup = WarmUp([('load', load), ('use', use)], log_path=tmp_path / "logs" / "warmup.jsonl")
+        assert warmup.state == 'pending'
+
+        warmup.start()
+        assert warmup.state == 'running'
+        assert not warmup.is_ready
+        release.set()
+
+        assert warmup.wait(5)
+        assert warmup.is_ready
+        assert calls == [('load', 'warmup'), ('use', 42)]
+        assert set(warmup.status()['timings']) == {'load', 'use'}
+
+        record = json.loads((tmp_path / "logs" / "warmup.jsonl").read_text().splitlines()[-1])
+        assert record['state'] == 'ready'
+        assert record['model_version'] == 'abc'
+        assert record['total_seconds'] >= sum(record['timings'].values())
+
+    def test_start_is_idempotent(self):
+        """Vérifie que plusieurs appels à start ne lancent qu'un préchauffage."""
+        from seattle_energy.warmup import WarmUp
+
+        runs = []
+        warmup = WarmUp([('step', lambda context: runs.append(1))])
+        warmup.start()
+        warmup.start()
+        warmup.wait(5)
+
+        assert runs == [1]
+
+    def test_failure_is_reported(self, tmp_path):
+        """Vérifie qu'une étape en échec arrête le préchauffage sans lever d'exception."""
+        from seattle_energy.warmup import WarmUp
+
+        def broken(context):
+            raise FileNotFoundError("models/energy_model.joblib")
+
+        skipped = []
+        warmup = WarmUp(
+            [('load', broken), ('after', lambda context: skipped.append(1))],
+            log_path=tmp_path / "warmup.jsonl"
+        ).start()
+
+        assert warmup.wait(5)
+        assert warmup.state == 'failed'
+        assert 'FileNotFoundError' in warmup.error
+        assert skipped == []
+        assert json.loads((tmp_path / "warmup.jsonl").read_text())['state'] == 'failed'
+
+    def test_app_warmup_steps(self, monkeypatch, tmp_path):
+        """Vérifie que les étapes de l'application chargent tout et remplissent le cache."""
+        monkeypatch.chdir(Path(__file__).parent.parent)
+
+        from app import (
+            WARMUP_STEPS, SIDEBAR_DEFAULTS, BUILDING_TYPES,
+            get_prediction_cache, load_models, prediction_cache_key
+        )
+        from seattle_energy.warmup import WarmUp
+
+        load_models.clear()
+        get_prediction_cache.clear()
+        warmup = WarmUp(WARMUP_STEPS, log_path=tmp_path / "warmup.jsonl").start()
+
+        assert warmup.wait(120)
+        assert warmup.is_ready, warmup.error
+        assert list(warmup.timings) == [name for name, _ in WARMUP_STEPS]
+        assert 'explainer' in warmup.context
+
+        models = load_models()
+        building = dict(SIDEBAR_DEFAULTS, building_type=BUILDING_TYPES[0])
+        assert prediction_cache_key(models, **building) in get_prediction_cache()
+        assert warmup.labels['model_version'] == models['model_version']
+
+    def test_no_log_written_by_default(self, monkeypatch, tmp_path):
+        """Vérifie que l'application n'écrit aucun journal de préchauffage sans WARMUP_LOG."""
+        import os
+        import app
+
+        if "WARMUP_LOG" in os.environ:
+            pytest.skip("WARMUP_LOG défini dans l'environnement")
+        assert app.WARMUP_LOG == ""
+
+        monkeypatch.chdir(tmp_path)
+        app.get_warmup.clear()
+        try:
+            assert app.get_warmup().log_path is None
+        finally:
+            app.get_warmup.clear()